@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registro perezoso de las conexiones MongoDB (sin conectar hasta la primera consulta)
+        from project.mongo import registrar_conexiones
+        registrar_conexiones()
+
+        # Métricas de comandos MongoDB (duración y fallos por colección y operación)
+        from api.metricas import registrar_oyente_mongo
+        registrar_oyente_mongo()
+
+        # Presupuesto de consultas por petición, consultas lentas y N+1
+        from api.consultas import registrar_oyente_consultas
+        registrar_oyente_consultas()
+
+        # Con MONGO_AUTO_CREATE_INDEX=False (por defecto) los índices de cada modelo no se crean en la
+        # primera consulta del proceso sino en el despliegue con `manage.py ensure_indexes`. Los modelos
+        # con índices únicos los conservan siempre: la unicidad es una garantía, no una optimización.
+        from api.models import MODELOS
+        for modelo in MODELOS:
+            unico = any(indice.get("unique") for indice in modelo._meta.get("index_specs") or [])
+            modelo._meta["auto_create_index"] = unico or getattr(settings, "MONGO_AUTO_CREATE_INDEX", False)
@@ -0,0 +1,252 @@
+"""cache_http.py
+Caché persistente (SQLite) de respuestas HTTP para los recolectores de datos
+(api/carreras_sources.py, api/universities_by_state.py).
+
+- Clave: método + URL + parámetros ordenados (+ cuerpo si lo hay). Los parámetros con
+  credenciales (PARAMETROS_EXCLUIDOS, p.ej. 'key' de Google) no forman parte de la clave ni se
+  guardan: cambiar de API key no invalida la caché y la key nunca llega al archivo.
+- TTL por entrada (CACHE_HTTP_TTL, por defecto 7 días; puede pasarse otro por llamada).
+- Tamaño acotado (CACHE_HTTP_MAX_MB): al superarlo se eliminan las entradas usadas hace más
+  tiempo (LRU) hasta quedar en el 90 %.
+- Solo se guardan respuestas 200 que el llamador considere válidas ('guardar_si'): no se
+  guardan errores de cuota ni respuestas transitorias.
+- Modos (CACHE_HTTP_MODO):
+  - "normal": usa entradas vigentes y guarda lo descargado.
+  - "offline": repetición sin red: usa cualquier entrada aunque haya expirado y, si falta,
+    lanza SinCacheOffline en lugar de pedirla.
+  - "refrescar": ignora lo guardado pero guarda lo nuevo.
+  - "desactivado": ni lee ni escribe.
+
+Estos módulos también se usan como scripts sueltos, así que la configuración se lee de variables
+de entorno (no de settings). Archivo por defecto: CACHE_HTTP_RUTA o `.cache_http.sqlite3` en la
+raíz del proyecto.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+MODOS = ("normal", "offline", "refrescar", "desactivado")
+PARAMETROS_EXCLUIDOS = frozenset({"key", "api_key", "apikey", "access_token"})
+RUTA_POR_DEFECTO = Path(__file__).resolve().parent.parent / ".cache_http.sqlite3"
+
+
+class SinCacheOffline(Exception):
+    """Modo offline y la respuesta no está en caché."""
+
+
+@dataclass
+class RespuestaGuardada:
+    estado: int
+    cabeceras: Dict[str, str]
+    cuerpo: bytes
+    creada: float
+
+    def json(self):
+        return json.loads(self.cuerpo)
+
+
+def _sin_credenciales(params: Optional[dict]) -> list:
+    return sorted((str(k), str(v)) for k, v in (params or {}).items()
+                  if k not in PARAMETROS_EXCLUIDOS and v is not None)
+
+
+def clave(metodo: str, url: str, params: Optional[dict] = None, cuerpo: Optional[bytes] = None) -> str:
+    """Huella estable de una petición; los parámetros de la query de la URL cuentan como 'params'."""
+    partes = urlsplit(url)
+    combinados = dict(parse_qsl(partes.query))
+    combinados.update(params or {})
+    base = urlunsplit((partes.scheme, partes.netloc, partes.path, "", ""))
+    h = hashlib.sha256(f"{metodo.upper()} {base}\n".encode("utf-8"))
+    h.update(json.dumps(_sin_credenciales(combinados), ensure_ascii=False).encode("utf-8"))
+    if cuerpo:
+        h.update(b"\n")
+        h.update(cuerpo)
+    return h.hexdigest()
+
+
+class CacheHTTP:
+    def __init__(self, ruta=None, ttl: Optional[float] = None, max_mb: Optional[float] = None,
+                 modo: Optional[str] = None):
+        self.ruta = Path(ruta or os.getenv("CACHE_HTTP_RUTA") or RUTA_POR_DEFECTO)
+        self.ttl = float(ttl if ttl is not None else os.getenv("CACHE_HTTP_TTL", 7 * 24 * 3600))
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv("CACHE_HTTP_MAX_MB", 512)) * 1024 * 1024)
+        self.modo = modo or os.getenv("CACHE_HTTP_MODO", "normal")
+        if self.modo not in MODOS:
+            raise ValueError(f"Modo de caché desconocido '{self.modo}'; usa uno de {', '.join(MODOS)}.")
+        self.aciertos = self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion: Optional[sqlite3.Connection] = None
+        self._total: Optional[int] = None
+
+    # ---------------------------------------------------------------- almacenamiento
+    def _bd(self) -> sqlite3.Connection:
+        if self._conexion is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS respuestas ("
+                " clave TEXT PRIMARY KEY, url TEXT NOT NULL, estado INTEGER NOT NULL, cabeceras TEXT NOT NULL,"
+                " cuerpo BLOB NOT NULL, tamano INTEGER NOT NULL, creada REAL NOT NULL, expira REAL NOT NULL,"
+                " accedida REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS respuestas_accedida ON respuestas (accedida)")
+            self._total = conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+            self._conexion = conexion
+        return self._conexion
+
+    def leer(self, clave_peticion: str) -> Optional[RespuestaGuardada]:
+        if self.modo in ("refrescar", "desactivado"):
+            return None
+        with self._lock:
+            bd = self._bd()
+            fila = bd.execute(
+                "SELECT estado, cabeceras, cuerpo, creada, expira FROM respuestas WHERE clave = ?", (clave_peticion,)
+            ).fetchone()
+            if fila is None or (self.modo != "offline" and fila[4] < time.time()):
+                self.fallos += 1
+                return None
+            bd.execute("UPDATE respuestas SET accedida = ? WHERE clave = ?", (time.time(), clave_peticion))
+            bd.commit()
+        self.aciertos += 1
+        return RespuestaGuardada(fila[0], json.loads(fila[1]), fila[2], fila[3])
+
+    def guardar(self, clave_peticion: str, url: str, estado: int, cabeceras: Dict[str, str], cuerpo: bytes,
+                ttl: Optional[float] = None) -> None:
+        if self.modo in ("offline", "desactivado"):
+            return
+        ahora = time.time()
+        # Solo cabeceras útiles al repetir la respuesta (nunca cookies ni credenciales)
+        cabeceras = {k.lower(): v for k, v in cabeceras.items() if k.lower() in ("content-type", "date", "etag", "last-modified")}
+        with self._lock:
+            bd = self._bd()
+            previa = bd.execute("SELECT tamano FROM respuestas WHERE clave = ?", (clave_peticion,)).fetchone()
+            bd.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave_peticion, url, estado, json.dumps(cabeceras), cuerpo, len(cuerpo), ahora,
+                 ahora + (self.ttl if ttl is None else ttl), ahora),
+            )
+            self._total += len(cuerpo) - (previa[0] if previa else 0)
+            if self._total > self.max_bytes:
+                self._desalojar(bd)
+            bd.commit()
+
+    def _desalojar(self, bd: sqlite3.Connection) -> None:
+        """Elimina las entradas usadas hace más tiempo hasta quedar en el 90 % del tope."""
+        objetivo = int(self.max_bytes * 0.9)
+        liberar = self._total - objetivo
+        filas = bd.execute("SELECT clave, tamano FROM respuestas ORDER BY accedida").fetchall()
+        borrar = []
+        for clave_fila, tamano in filas:
+            if liberar <= 0:
+                break
+            borrar.append((clave_fila,))
+            liberar -= tamano
+            self._total -= tamano
+        bd.executemany("DELETE FROM respuestas WHERE clave = ?", borrar)
+
+    def purgar_expiradas(self) -> int:
+        with self._lock:
+            bd = self._bd()
+            borradas = bd.execute("DELETE FROM respuestas WHERE expira < ?", (time.time(),)).rowcount
+            bd.commit()
+            self._total = bd.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        return borradas
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = self._bd().execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        return {"entradas": entradas, "bytes": self._total, "aciertos": self.aciertos, "fallos": self.fallos, "modo": self.modo}
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+
+    # ---------------------------------------------------------------- uso síncrono
+    def get_json(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None, timeout: float = 20,
+                 sesion=None, ttl: Optional[float] = None, guardar_si: Optional[Callable[[dict], bool]] = None):
+        """GET con `requests` pasando por la caché; retorna el JSON de la respuesta."""
+        clave_peticion = clave("GET", url, params)
+        guardada = self.leer(clave_peticion)
+        if guardada is not None:
+            return guardada.json()
+        if self.modo == "offline":
+            raise SinCacheOffline(f"GET {url} no está en la caché ({self.ruta}).")
+        import requests
+
+        resp = (sesion or requests).get(url, params=params, headers=headers, timeout=timeout)
+        data = resp.json()
+        if resp.status_code == 200 and (guardar_si is None or guardar_si(data)):
+            self.guardar(clave_peticion, url, resp.status_code, dict(resp.headers), resp.content, ttl)
+        return data
+
+    def iterar_lineas(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                      timeout: float = 60, sesion=None, ttl: Optional[float] = None, reintentos: int = 3) -> Iterator[str]:
+        """
+        GET con `requests` en modo streaming: entrega las líneas del cuerpo (con su salto de línea)
+        conforme llegan, para respuestas grandes como CSV de SPARQL. El cuerpo se guarda en la caché solo si se leyó
+        completo. 429/5xx y errores de conexión se reintentan antes de entregar la primera línea.
+        """
+        clave_peticion = clave("GET", url, params)
+        guardada = self.leer(clave_peticion)
+        if guardada is not None:
+            # bytes.splitlines como la lectura en vivo: str.splitlines también corta en \x0b, \x1c, \u2028...
+            for linea in guardada.cuerpo.splitlines(keepends=True):
+                yield linea.decode("utf-8")
+            return
+        if self.modo == "offline":
+            raise SinCacheOffline(f"GET {url} no está en la caché ({self.ruta}).")
+        import requests
+
+        for intento in range(reintentos + 1):
+            try:
+                resp = (sesion or requests).get(url, params=params, headers=headers, timeout=timeout, stream=True)
+            except requests.RequestException:
+                if intento == reintentos:
+                    raise
+                time.sleep(2 ** intento)
+                continue
+            if resp.status_code in (429, 500, 502, 503, 504) and intento < reintentos:
+                espera = resp.headers.get("Retry-After")
+                resp.close()
+                time.sleep(float(espera) if espera and espera.isdigit() else 2 ** intento)
+                continue
+            resp.raise_for_status()
+            break
+        partes, pendiente = [], b""
+        with resp:
+            for bloque in resp.iter_content(chunk_size=64 * 1024):
+                partes.append(bloque)
+                lineas = (pendiente + bloque).splitlines(keepends=True)
+                pendiente = lineas.pop() if lineas and not lineas[-1].endswith((b"\n", b"\r")) else b""
+                for linea in lineas:
+                    yield linea.decode("utf-8")
+        if pendiente:
+            yield pendiente.decode("utf-8")
+        self.guardar(clave_peticion, url, resp.status_code, dict(resp.headers), b"".join(partes), ttl)
+
+
+_cache: Optional[CacheHTTP] = None
+_cache_lock = threading.Lock()
+
+
+def cache_por_defecto() -> CacheHTTP:
+    """Caché compartida del proceso, configurada con las variables CACHE_HTTP_*."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheHTTP()
+    return _cache
@@ -0,0 +1,193 @@
+"""calificacion.py
+Motor de calificación en lote para `Formulario.respuestas`.
+
+Hasta ahora `Formulario.resultados` es el valor que envía el cliente. Este módulo permite
+(re)calificar en el servidor comparando `respuestas` contra la clave definida en `preguntas`.
+
+Convención de la clave (por pregunta, dentro de `preguntas`):
+- {"correcta": valor | [valores], "peso": float?}: otorga 'peso' (por defecto 1) si la
+  respuesta coincide con alguno de los valores correctos.
+- {"puntajes": {opcion: puntos, ...}}: crédito parcial por opción.
+- Las preguntas sin 'correcta' ni 'puntajes' (o que no son objetos) no se califican.
+
+`respuestas[i]` responde a `preguntas[i]`; cada elemento puede ser el valor directo o un
+objeto {"respuesta": valor}. Las comparaciones ignoran mayúsculas y espacios laterales.
+
+El resultado es un porcentaje (0-100) de los puntos obtenidos sobre los puntos máximos.
+
+Implementación:
+- Cada clave distinta se compila una sola vez (caché por huella de 'preguntas') a una tabla
+  plana de puntos por (pregunta, opción) y un índice opción -> posición en la tabla.
+- Un lote de envíos con la misma clave se codifica como matriz (envíos x preguntas) de
+  posiciones en la tabla; el puntaje es `puntos[codigos].sum(axis=1)` (NumPy).
+- Los cambios se escriben con `bulk_write` desordenado en lotes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from api.models.formulario import Formulario
+
+# Tope de claves compiladas en memoria durante una recalificación
+MAX_CLAVES_EN_CACHE = 10000
+
+
+def _normalizar(valor) -> str:
+    """Normaliza una opción/respuesta para compararla (listas: multi-selección sin orden)."""
+    if isinstance(valor, dict):
+        valor = valor.get("respuesta", valor.get("valor"))
+    if isinstance(valor, (list, tuple)):
+        return "|".join(sorted(_normalizar(v) for v in valor))
+    if valor is None:
+        return ""
+    return str(valor).strip().lower()
+
+
+@dataclass
+class ClaveCompilada:
+    """Clave de respuestas compilada a arreglos.
+
+    - indices[i]: opción normalizada -> posición en 'puntos' para la pregunta i.
+    - puntos: puntos por (pregunta, opción) con un 0 final para respuestas sin crédito.
+    - maximo: suma de los puntos máximos por pregunta.
+    """
+    indices: List[Dict[str, int]]
+    puntos: np.ndarray
+    maximo: float
+
+    @property
+    def sin_credito(self) -> int:
+        return len(self.puntos) - 1
+
+    def calificar(self, lote_respuestas: List[list]) -> np.ndarray:
+        """Califica un lote de listas de respuestas y retorna porcentajes (float64)."""
+        n_preguntas = len(self.indices)
+        codigos = np.full((len(lote_respuestas), n_preguntas), self.sin_credito, dtype=np.int32)
+        for fila, respuestas in enumerate(lote_respuestas):
+            if not isinstance(respuestas, list):
+                continue
+            for i, respuesta in enumerate(respuestas[:n_preguntas]):
+                posicion = self.indices[i].get(_normalizar(respuesta))
+                if posicion is not None:
+                    codigos[fila, i] = posicion
+        return self.puntos[codigos].sum(axis=1) * (100.0 / self.maximo)
+
+
+def compilar_clave(preguntas) -> Optional[ClaveCompilada]:
+    """Compila la clave de 'preguntas'. Retorna None si no hay preguntas calificables."""
+    if not isinstance(preguntas, list):
+        return None
+    indices: List[Dict[str, int]] = []
+    puntos: List[float] = []
+    maximo = 0.0
+    for pregunta in preguntas:
+        opciones: Dict[str, float] = {}
+        if isinstance(pregunta, dict):
+            if isinstance(pregunta.get("puntajes"), dict):
+                for opcion, valor in pregunta["puntajes"].items():
+                    try:
+                        opciones[_normalizar(opcion)] = float(valor)
+                    except (TypeError, ValueError):
+                        continue
+            elif "correcta" in pregunta:
+                try:
+                    peso = float(pregunta.get("peso", 1))
+                except (TypeError, ValueError):
+                    peso = 1.0
+                correctas = pregunta["correcta"]
+                # Una lista de correctas son alternativas válidas, salvo en multi-selección explícita
+                if isinstance(correctas, list) and not pregunta.get("multiple"):
+                    for c in correctas:
+                        opciones[_normalizar(c)] = peso
+                else:
+                    opciones[_normalizar(correctas)] = peso
+        indice: Dict[str, int] = {}
+        for opcion, valor in opciones.items():
+            indice[opcion] = len(puntos)
+            puntos.append(valor)
+        indices.append(indice)
+        if opciones:
+            maximo += max(0.0, max(opciones.values()))
+    if maximo <= 0:
+        return None
+    puntos.append(0.0)
+    return ClaveCompilada(indices=indices, puntos=np.asarray(puntos, dtype=np.float64), maximo=maximo)
+
+
+def huella_preguntas(preguntas) -> str:
+    """Huella estable de la lista de preguntas (identifica la clave)."""
+    serializado = json.dumps(preguntas, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(serializado.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _en_lotes(iterable: Iterable, tamano: int) -> Iterator[list]:
+    lote = []
+    for item in iterable:
+        lote.append(item)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def recalificar_formularios(filtro: Optional[dict] = None, lote: int = 5000,
+                            lote_escritura: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    """Recalifica los formularios que cumplen 'filtro' y escribe los resultados que cambian.
+
+    Parámetros:
+    - filtro: filtro de MongoDB sobre la colección formularios (por defecto todos).
+    - lote: documentos leídos y calificados por iteración.
+    - lote_escritura: operaciones por llamada a bulk_write.
+    - dry_run: si es True, calcula pero no escribe.
+
+    Retorna:
+    - dict con {"procesados", "actualizados", "sin_cambios", "sin_clave"}.
+    """
+    coleccion = Formulario._get_collection()
+    cursor = coleccion.find(
+        filtro or {}, {"preguntas": 1, "respuestas": 1, "resultados": 1}, batch_size=lote
+    )
+    claves: Dict[str, Optional[ClaveCompilada]] = {}
+    resumen = {"procesados": 0, "actualizados": 0, "sin_cambios": 0, "sin_clave": 0}
+    operaciones: List[UpdateOne] = []
+
+    def escribir():
+        if operaciones and not dry_run:
+            coleccion.bulk_write(operaciones, ordered=False)
+        operaciones.clear()
+
+    for docs in _en_lotes(cursor, lote):
+        grupos: Dict[str, list] = defaultdict(list)
+        for doc in docs:
+            grupos[huella_preguntas(doc.get("preguntas"))].append(doc)
+
+        for huella, grupo in grupos.items():
+            if huella not in claves:
+                if len(claves) >= MAX_CLAVES_EN_CACHE:
+                    claves.clear()
+                claves[huella] = compilar_clave(grupo[0].get("preguntas"))
+            clave = claves[huella]
+            resumen["procesados"] += len(grupo)
+            if clave is None:
+                resumen["sin_clave"] += len(grupo)
+                continue
+
+            puntajes = np.round(clave.calificar([d.get("respuestas") for d in grupo]), 4)
+            for doc, puntaje in zip(grupo, puntajes.tolist()):
+                if doc.get("resultados") == puntaje:
+                    resumen["sin_cambios"] += 1
+                    continue
+                operaciones.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"resultados": puntaje}}))
+                resumen["actualizados"] += 1
+                if len(operaciones) >= lote_escritura:
+                    escribir()
+    escribir()
+    return resumen
@@ -0,0 +1,121 @@
+"""cambios.py
+Feed de cambios del catálogo para sincronización incremental (GET /cambios?desde=<token>).
+
+Cada escritura de un modelo de catálogo lleva un `seq` global y creciente y cada borrado deja una
+lápida (api/models/rastreo.py). El cliente guarda el token que recibe y en la siguiente
+sincronización solo pide lo posterior:
+
+- token "<versión del catálogo>.<seq>"; sin token se empieza desde el principio (descarga inicial
+  paginada por el mismo mecanismo). Un update de varios documentos los sella con un mismo seq: si
+  una página termina a mitad de ese grupo el token es "<versión>.<seq>.<_id>" y la siguiente sigue
+  con los _id mayores del mismo seq.
+- Si la versión del token no es la actual hubo una recarga completa (`manage.py
+  recargar_catalogo`): se responde `reiniciar: true` con un token al inicio de la versión nueva y
+  el cliente descarta su copia local.
+- Solo se entregan cambios hasta `seq_confirmado()`: un `seq` se reserva antes de escribirse y un
+  escritor lento puede confirmarlo después de que otro ya confirmó uno mayor; entregar ese mayor
+  movería el token por encima del menor y el cliente nunca lo vería. Mientras una reserva sigue
+  abierta el feed no pasa de ella, tarde lo que tarde su escritura.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Iterable, Optional, Tuple
+
+from bson import ObjectId
+from api.catalogo import COLECCIONES, version_catalogo
+from api.models.rastreo import Eliminado, seq_confirmado
+
+# Nombre de colección MongoDB -> tipo público (el de /bulk/<tipo> y /cambios)
+_TIPO_POR_COLECCION = {modelo._get_collection_name(): tipo for tipo, modelo in COLECCIONES.items()}
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+def leer_token(token: Optional[str]) -> Tuple[Optional[int], int, Optional[str]]:
+    """"<versión>.<seq>[.<_id>]" -> (versión, seq, _id); sin token -> (None, 0, None)."""
+    if not token:
+        return None, 0, None
+    partes = token.split(".")
+    try:
+        version, seq = int(partes[0]), int(partes[1])
+    except (ValueError, IndexError):
+        raise TokenInvalido("'desde' debe ser un token devuelto por /cambios.")
+    if version < 0 or seq < 0 or len(partes) > 3 or (len(partes) == 3 and not partes[2]):
+        raise TokenInvalido("'desde' debe ser un token devuelto por /cambios.")
+    return version, seq, partes[2] if len(partes) == 3 else None
+
+
+def formar_token(version: int, seq: int, doc_id: Optional[str] = None) -> str:
+    return f"{version}.{seq}" if doc_id is None else f"{version}.{seq}.{doc_id}"
+
+
+def _filtro_seq(desde: int, doc_id: Optional[str], hasta: int) -> dict:
+    """Posteriores a (desde, doc_id) en orden (seq, _id), hasta el seq `hasta` inclusive."""
+    posteriores = {"seq": {"$gt": desde, "$lte": hasta}}
+    if doc_id is None:
+        return posteriores
+    _id = ObjectId(doc_id) if len(doc_id) == 24 and ObjectId.is_valid(doc_id) else doc_id
+    return {"$or": [{"seq": desde, "_id": {"$gt": _id}}, posteriores]}
+
+
+def _serializar(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    doc.pop("seq", None)
+    return doc
+
+
+def _upserts(tipo: str, cursor):
+    for doc in cursor:
+        yield {"coleccion": tipo, "op": "upsert", "seq": doc["seq"], "id": str(doc["_id"]), "doc": _serializar(doc)}
+
+
+def cambios_desde(token: Optional[str], limite: int, tipos: Optional[Iterable[str]] = None) -> dict:
+    """Hasta `limite` cambios posteriores a `token`, en orden de seq.
+
+    Retorna {"cambios": [{"coleccion", "op": "upsert"|"delete", "id", "doc"?}], "siguiente": token,
+    "hay_mas": bool, "reiniciar": bool}.
+    """
+    version_token, desde, desde_id = leer_token(token)
+    version = version_catalogo()
+    if version_token is not None and version_token != version:
+        return {"cambios": [], "siguiente": formar_token(version, 0), "hay_mas": True, "reiniciar": True}
+
+    tipos = list(tipos or COLECCIONES)
+    # Cota leída antes que las colecciones: lo que se confirme después queda para el siguiente token
+    hasta = seq_confirmado()
+
+    # Cada colección aporta sus primeros limite+1 cambios (índice seq, _id); se mezclan por seq.
+    # Un seq repetido es siempre de una sola colección (un update), así que el orden por _id se conserva
+    fuentes = []
+    for tipo in tipos:
+        cursor = COLECCIONES[tipo]._get_collection().find(
+            _filtro_seq(desde, desde_id, hasta)).sort([("seq", 1), ("_id", 1)]).limit(limite + 1)
+        fuentes.append(_upserts(tipo, cursor))
+    colecciones = [COLECCIONES[t]._get_collection_name() for t in tipos]
+    # Cada lápida tiene su propio seq: basta con los posteriores a `desde`
+    lapidas = Eliminado._get_collection().find(
+        {"seq": {"$gt": desde, "$lte": hasta}, "coleccion": {"$in": colecciones}}).sort("seq", 1).limit(limite + 1)
+    fuentes.append({"coleccion": _TIPO_POR_COLECCION[e["coleccion"]], "op": "delete", "seq": e["seq"], "id": e["doc_id"]}
+                   for e in lapidas)
+
+    cambios = []
+    for cambio in heapq.merge(*fuentes, key=lambda c: c["seq"]):
+        cambios.append(cambio)
+        if len(cambios) > limite:
+            break
+    hay_mas = len(cambios) > limite
+    cambios, resto = cambios[:limite], cambios[limite:]
+    if not cambios:
+        siguiente = formar_token(version, desde, desde_id)
+    elif resto and resto[0]["seq"] == cambios[-1]["seq"]:
+        # La página corta un grupo con el mismo seq: se sigue por _id dentro de él
+        siguiente = formar_token(version, cambios[-1]["seq"], cambios[-1]["id"])
+    else:
+        siguiente = formar_token(version, cambios[-1]["seq"])
+    for c in cambios:
+        del c["seq"]
+    return {"cambios": cambios, "siguiente": siguiente, "hay_mas": hay_mas, "reiniciar": False}
@@ -2,8 +2,15 @@
 Utilidades para recolectar datos de licenciaturas/carreras desde fuentes públicas.
 
 Este módulo provee funciones para:
-- Buscar posibles licenciaturas en Wikipedia (API de MediaWiki, sin API key).
-- Consultar Wikidata mediante SPARQL (opcional) para enriquecer resultados.
+- Buscar posibles licenciaturas en Wikipedia (API de MediaWiki, sin API key). `wikipedia_cosechar`
+  es la versión asíncrona: consulta varios términos a la vez (concurrencia acotada, límite de tasa
+  por host y reintentos, ver api/http_asincrono.py), sigue los tokens `continue` de MediaWiki y
+  entrega las páginas conforme llegan. `wikipedia_buscar_licenciaturas` la envuelve y retorna una lista.
+- Las respuestas de Wikipedia y Wikidata pasan por la caché en disco (api/cache_http.py): repetir
+  una recolección no vuelve a descargar nada. CACHE_HTTP_MODO=offline la repite sin red.
+- Consultar Wikidata mediante SPARQL (opcional) para enriquecer resultados. `wikidata_buscar_licenciaturas`
+  resuelve muchas palabras clave por petición (VALUES + búsqueda de texto completo del servicio
+  mwapi), pagina con LIMIT/OFFSET y lee el CSV de resultados en flujo.
 - Normalizar resultados al esquema del modelo Carrera (nombre, descripcion, main_area...)
 - Guardar resultados en JSON en la carpeta 'salidas/'.
 - (Opcional) Cargar resultados directamente a la base de datos (MongoEngine) como documentos Carrera.
@@ -25,6 +32,8 @@ Ejemplos de uso (desde consola Python/Django shell):
     ]
 
     resultados = wikipedia_buscar_licenciaturas(seeds, max_por_termino=8)
+    # Asíncrono y en flujo (p.ej. dentro de asyncio.run):
+    #   async for item in wikipedia_cosechar(seeds, max_por_termino=200, concurrencia=4): ...
     carreras = normalizar_a_carrera(resultados)
     guardar_json(carreras, filename="licenciaturas_wikipedia.json")
     # Opcional: cargar en BD (MongoEngine debe estar configurado en settings)
@@ -33,81 +42,200 @@ Ejemplos de uso (desde consola Python/Django shell):
 """
 from __future__ import annotations
 
+import asyncio
+import csv
 import json
+import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
 
 import requests
 
+from api.cache_http import SinCacheOffline, cache_por_defecto
+from api.http_asincrono import ClienteCosecha, ErrorCosecha
+
+logger = logging.getLogger(__name__)
+
 # Endpoints públicos
 WIKI_API_URL = "https://es.wikipedia.org/w/api.php"
 WIKIDATA_SPARQL_URL = "https://query.wikidata.org/sparql"
 
 
-def wikipedia_buscar_licenciaturas(seeds: List[Dict[str, str]], max_por_termino: int = 10, timeout: int = 15) -> List[Dict[str, str]]:
+# Límite de extractos por petición de MediaWiki (exlimit); gsrlimit no lo supera para que cada
+# lote de búsqueda traiga todos sus extractos en una sola respuesta
+_WIKI_LOTE = 20
+
+
+def _maxlag(resp) -> bool:
+    """MediaWiki responde 200 con error 'maxlag' cuando las réplicas van atrasadas: reintentar."""
+    try:
+        return (resp.json().get("error") or {}).get("code") == "maxlag"
+    except ValueError:
+        return False
+
+
+async def _wikipedia_paginas(cliente: ClienteCosecha, api_url: str, seed: Dict[str, str],
+                             maximo: Optional[int]) -> AsyncIterator[Dict[str, str]]:
+    """Páginas de un término, siguiendo 'continue' hasta agotar resultados o llegar a 'maximo'."""
+    termino = str(seed.get("termino", "")).strip()
+    main_area = seed.get("main_area")
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "prop": "extracts|info",
+        "generator": "search",
+        "gsrsearch": termino,
+        "gsrlimit": min(_WIKI_LOTE, maximo or _WIKI_LOTE),
+        # Extracto breve en texto plano
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": _WIKI_LOTE,
+        # URL info
+        "inprop": "url",
+        "maxlag": 5,
+    }
+    entregadas = 0
+    lote: Dict[int, dict] = {}
+    while True:
+        data = await cliente.get_json(api_url, params=params, reintentar_si=_maxlag)
+        paginas = (data.get("query") or {}).get("pages") or []
+        if isinstance(paginas, dict):  # formatversion=1
+            paginas = list(paginas.values())
+        # Un lote puede repartirse en varias respuestas (p.ej. excontinue): se combina por pageid
+        for pagina in paginas:
+            lote.setdefault(pagina.get("pageid") or pagina.get("title"), {}).update(pagina)
+        continuar = data.get("continue")
+        if "batchcomplete" in data or not continuar:
+            for pagina in sorted(lote.values(), key=lambda p: p.get("index", 0)):
+                if not pagina.get("title"):
+                    continue
+                item = {"title": pagina["title"], "extract": pagina.get("extract") or "", "url": pagina.get("fullurl") or ""}
+                if main_area:
+                    item["main_area"] = main_area
+                yield item
+                entregadas += 1
+                if maximo is not None and entregadas >= maximo:
+                    return
+            lote = {}
+        if not continuar:
+            return
+        params = {**params, **continuar}
+
+
+async def wikipedia_cosechar(seeds: List[Dict[str, str]], max_por_termino: Optional[int] = None, concurrencia: int = 4,
+                             tasa_por_segundo: float = 5.0, api_url: str = WIKI_API_URL, timeout: float = 15,
+                             cliente: Optional[ClienteCosecha] = None, usar_cache: bool = True) -> AsyncIterator[Dict[str, str]]:
+    """Busca en Wikipedia todos los términos a la vez y entrega las páginas conforme llegan.
+
+    Parámetros:
+    - seeds: lista de objetos {"termino": str, "main_area": str?}.
+    - max_por_termino: tope de páginas por término (None = todas las que devuelva la búsqueda).
+    - concurrencia: peticiones simultáneas como máximo; tasa_por_segundo: peticiones por segundo al host.
+    - api_url: endpoint de MediaWiki (un stub local en pruebas, ver api/tests/mediawiki_stub.py).
+    - cliente: ClienteCosecha compartido (si no se pasa se crea y cierra uno propio, con la caché en
+      disco salvo usar_cache=False).
+
+    Un término que falla tras los reintentos se registra en el log y se omite; el resto continúa.
+    Los items tienen la forma de `wikipedia_buscar_licenciaturas`. El orden entre términos no es fijo.
+    """
+    propio = cliente is None
+    cliente = cliente or ClienteCosecha(concurrencia=concurrencia, tasa_por_host=tasa_por_segundo, timeout=timeout,
+                                        cache=cache_por_defecto() if usar_cache else None)
+    cola: asyncio.Queue = asyncio.Queue(maxsize=concurrencia * _WIKI_LOTE)
+    fin = object()
+
+    async def recorrer(seed):
+        try:
+            async for item in _wikipedia_paginas(cliente, api_url, seed, max_por_termino):
+                await cola.put(item)
+        except ErrorCosecha as e:
+            logger.warning("Wikipedia: se omite el término %r: %s", seed.get("termino"), e)
+        except Exception:
+            logger.exception("Wikipedia: error inesperado con el término %r", seed.get("termino"))
+        # Fuera de un finally: si la tarea se cancela no debe quedar esperando espacio en la cola
+        await cola.put(fin)
+
+    validos = [s for s in seeds if str(s.get("termino", "")).strip()]
+    tareas = [asyncio.create_task(recorrer(seed)) for seed in validos]
+    try:
+        pendientes = len(tareas)
+        while pendientes:
+            item = await cola.get()
+            if item is fin:
+                pendientes -= 1
+            else:
+                yield item
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        if propio:
+            await cliente.cerrar()
+
+
+async def wikipedia_cosechar_por_termino(seeds: List[Dict[str, str]], max_por_termino: Optional[int] = None,
+                                        concurrencia: int = 4, tasa_por_segundo: float = 5.0, api_url: str = WIKI_API_URL,
+                                        timeout: float = 15, cliente: Optional[ClienteCosecha] = None,
+                                        usar_cache: bool = True):
+    """Como `wikipedia_cosechar`, pero entrega (seed, páginas | {"error": str}) al terminar cada término.
+
+    Útil cuando el término es la unidad de trabajo (p.ej. para reanudar una recolección,
+    api/recoleccion.py): un término fallido se reporta en lugar de omitirse en silencio.
+    """
+    propio = cliente is None
+    cliente = cliente or ClienteCosecha(concurrencia=concurrencia, tasa_por_host=tasa_por_segundo, timeout=timeout,
+                                        cache=cache_por_defecto() if usar_cache else None)
+
+    async def recorrer(seed):
+        try:
+            return seed, [item async for item in _wikipedia_paginas(cliente, api_url, seed, max_por_termino)]
+        except ErrorCosecha as e:
+            return seed, {"error": str(e)}
+        except Exception as e:
+            # Un error inesperado (JSON inválido, bug) solo invalida su término, no la cosecha completa
+            logger.exception("Wikipedia: error inesperado con el término %r", seed.get("termino"))
+            return seed, {"error": f"{type(e).__name__}: {e}"}
+
+    tareas = [asyncio.create_task(recorrer(s)) for s in seeds if str(s.get("termino", "")).strip()]
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            yield await siguiente
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        if propio:
+            await cliente.cerrar()
+
+
+def wikipedia_buscar_licenciaturas(seeds: List[Dict[str, str]], max_por_termino: int = 10, timeout: int = 15,
+                                   concurrencia: int = 4) -> List[Dict[str, str]]:
     """Realiza búsquedas en Wikipedia para una lista de términos seed.
 
     Parámetros:
     - seeds: lista de objetos {"termino": str, "main_area": str?}.
       Se consulta Wikipedia por 'termino' y se obtiene título y extracto.
-    - max_por_termino: máximo de páginas por término.
+    - max_por_termino: máximo de páginas por término (se siguen los tokens 'continue' hasta llegar).
     - timeout: segundos de timeout por petición HTTP.
+    - concurrencia: términos consultados a la vez.
 
     Retorna:
     - list[dict]: cada item incluye {"title", "extract", "url", "main_area"?}
     """
-    resultados: List[Dict[str, str]] = []
-    session = requests.Session()
-
-    for seed in seeds:
-        termino = str(seed.get("termino", "")).strip()
-        if not termino:
-            continue
-        main_area = seed.get("main_area")
-
-        params = {
-            "action": "query",
-            "format": "json",
-            "prop": "extracts|info",
-            "generator": "search",
-            "gsrsearch": termino,
-            "gsrlimit": max_por_termino,
-            # Extracto breve en texto plano
-            "exintro": 1,
-            "explaintext": 1,
-            # URL info
-            "inprop": "url",
-        }
-        try:
-            resp = session.get(WIKI_API_URL, params=params, timeout=timeout)
-            data = resp.json()
-        except Exception:
-            continue
+    async def _recolectar():
+        return [item async for item in wikipedia_cosechar(seeds, max_por_termino, concurrencia=concurrencia, timeout=timeout)]
 
-        pages = (data.get("query", {}) or {}).get("pages", {})
-        for _, page in pages.items():
-            title = page.get("title")
-            extract = page.get("extract")
-            fullurl = page.get("fullurl")
-            if not title:
-                continue
-            item = {
-                "title": title,
-                "extract": extract or "",
-                "url": fullurl or "",
-            }
-            if main_area:
-                item["main_area"] = main_area
-            resultados.append(item)
-
-    return resultados
+    return asyncio.run(_recolectar())
 
 
 def wikidata_buscar_licenciaturas_por_area(area_palabra_clave: str, limite: int = 50, timeout: int = 20) -> List[Dict[str, str]]:
     """Consulta Wikidata para items relacionados a licenciaturas por palabra clave.
 
     Nota: Esta consulta es genérica y busca etiquetas/escrituras que contengan
-    la palabra clave en español; puede traer falsos positivos.
+    la palabra clave en español; puede traer falsos positivos. Recorre todas las etiquetas y
+    suele exceder el tiempo límite del endpoint público: para varias palabras clave usa
+    `wikidata_buscar_licenciaturas`.
 
     Parámetros:
     - area_palabra_clave: por ejemplo "ingeniería", "derecho", "medicina".
@@ -121,7 +249,7 @@ def wikidata_buscar_licenciaturas_por_area(area_palabra_clave: str, limite: int
     SELECT ?item ?itemLabel ?itemDescription ?eswiki WHERE {{
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "es". }}
       ?item rdfs:label ?itemLabel.
-      FILTER(CONTAINS(LCASE(?itemLabel), LCASE("{area_palabra_clave}"))).
+      FILTER(CONTAINS(LCASE(?itemLabel), LCASE({escapar_literal_sparql(area_palabra_clave)}))).
       OPTIONAL {{ ?item schema:description ?itemDescription FILTER (lang(?itemDescription) = "es"). }}
       OPTIONAL {{ ?eswiki schema:about ?item ; schema:isPartOf <https://es.wikipedia.org/>. }}
     }} LIMIT {int(limite)}
@@ -131,8 +259,9 @@ def wikidata_buscar_licenciaturas_por_area(area_palabra_clave: str, limite: int
         "User-Agent": "cardic-system/1.0 (licenciaturas; contacto: ejemplo@example.com)",
     }
     try:
-        resp = requests.get(WIKIDATA_SPARQL_URL, params={"query": query}, headers=headers, timeout=timeout)
-        data = resp.json()
+        data = cache_por_defecto().get_json(WIKIDATA_SPARQL_URL, params={"query": query}, headers=headers, timeout=timeout)
+    except SinCacheOffline:
+        raise
     except Exception:
         return []
 
@@ -154,6 +283,101 @@ def wikidata_buscar_licenciaturas_por_area(area_palabra_clave: str, limite: int
     return resultados
 
 
+# Caracteres que deben escaparse dentro de un literal SPARQL entre comillas dobles (ECHAR)
+_ESCAPES_SPARQL = {"\\": "\\\\", '"': '\\"', "'": "\\'", "\n": "\\n", "\r": "\\r", "\t": "\\t",
+                   "\b": "\\b", "\f": "\\f"}
+
+# Restricción opcional de la búsqueda de texto completo: elementos que son disciplinas académicas
+WIKIDATA_DISCIPLINA_ACADEMICA = "haswbstatement:P31=Q11862829"
+
+
+def escapar_literal_sparql(texto: str) -> str:
+    """Literal SPARQL entre comillas con todos los caracteres especiales escapados."""
+    return '"' + "".join(_ESCAPES_SPARQL.get(c, c) for c in str(texto)) + '"'
+
+
+def consulta_wikidata_por_lote(busquedas: List[tuple], por_palabra: int, idioma: str, limite: int, offset: int) -> str:
+    """SPARQL que resuelve varias búsquedas a la vez: VALUES (?palabra ?busqueda) + servicio mwapi (Search)."""
+    valores = "\n".join(f"    ({escapar_literal_sparql(p)} {escapar_literal_sparql(b)})" for p, b in busquedas)
+    return f"""SELECT ?palabra ?item ?itemLabel ?itemDescription ?eswiki WHERE {{
+  VALUES (?palabra ?busqueda) {{
+{valores}
+  }}
+  SERVICE wikibase:mwapi {{
+    bd:serviceParam wikibase:endpoint "www.wikidata.org";
+                    wikibase:api "Search";
+                    mwapi:srsearch ?busqueda;
+                    mwapi:srnamespace "0";
+                    wikibase:limit {int(por_palabra)}.
+    ?titulo wikibase:apiOutput mwapi:title.
+  }}
+  BIND(IRI(CONCAT(STR(wd:), ?titulo)) AS ?item)
+  OPTIONAL {{ ?eswiki schema:about ?item; schema:isPartOf <https://es.wikipedia.org/>. }}
+  SERVICE wikibase:label {{ bd:serviceParam wikibase:language {escapar_literal_sparql(idioma + ",en")}. }}
+}}
+ORDER BY ?palabra ?item
+LIMIT {int(limite)} OFFSET {int(offset)}"""
+
+
+def wikidata_buscar_licenciaturas(palabras: Iterable[Union[str, Dict[str, str]]], por_palabra: int = 50, lote: int = 25,
+                                  pagina: int = 1000, restriccion: Optional[str] = None, idioma: str = "es",
+                                  timeout: int = 60, endpoint: str = WIKIDATA_SPARQL_URL,
+                                  omitir_errores: bool = True) -> Iterator[Dict[str, str]]:
+    """Busca en Wikidata muchas palabras clave con pocas peticiones y entrega los items en flujo.
+
+    Parámetros:
+    - palabras: cadenas o seeds {"termino": str, "main_area": str?} (como en Wikipedia).
+    - por_palabra: tope de elementos por palabra en la búsqueda de texto completo.
+    - lote: palabras por consulta (VALUES); pagina: filas por petición (LIMIT/OFFSET).
+    - restriccion: filtro de CirrusSearch añadido a cada búsqueda, p.ej. WIKIDATA_DISCIPLINA_ACADEMICA.
+    - endpoint: servicio SPARQL (un stub local en pruebas).
+
+    Cada página se pide como CSV y se procesa línea a línea, sin cargar la respuesta completa; las
+    páginas pasan por la caché en disco. Un lote que falla se registra en el log y se omite
+    (con omitir_errores=False se propaga la excepción).
+
+    Retorna (iterador):
+    - dict: {"title", "extract", "wikidata", "url", "termino", "main_area"?}
+    """
+    seeds = [p if isinstance(p, dict) else {"termino": p} for p in palabras]
+    seeds = [s for s in seeds if str(s.get("termino", "")).strip()]
+    headers = {"Accept": "text/csv", "User-Agent": "cardic-system/1.0 (licenciaturas; contacto: ejemplo@example.com)"}
+    cache = cache_por_defecto()
+    for inicio in range(0, len(seeds), lote):
+        grupo = seeds[inicio:inicio + lote]
+        areas = {str(s["termino"]).strip(): s.get("main_area") for s in grupo}
+        busquedas = [(t, f"{t} {restriccion}" if restriccion else t) for t in areas]
+        offset = 0
+        while True:
+            consulta = consulta_wikidata_por_lote(busquedas, por_palabra, idioma, pagina, offset)
+            filas = 0
+            try:
+                for fila in csv.DictReader(cache.iterar_lineas(endpoint, params={"query": consulta}, headers=headers, timeout=timeout)):
+                    filas += 1
+                    if not fila.get("item"):
+                        continue
+                    item = {
+                        "title": fila.get("itemLabel") or "",
+                        "extract": fila.get("itemDescription") or "",
+                        "wikidata": fila["item"],
+                        "url": fila.get("eswiki") or "",
+                        "termino": fila.get("palabra") or "",
+                    }
+                    if areas.get(item["termino"]):
+                        item["main_area"] = areas[item["termino"]]
+                    yield item
+            except SinCacheOffline:
+                raise
+            except (requests.RequestException, csv.Error) as e:
+                if not omitir_errores:
+                    raise
+                logger.warning("Wikidata: se omite el lote %s (offset %d): %s", list(areas), offset, e)
+                break
+            if filas < pagina:
+                break
+            offset += pagina
+
+
 def normalizar_a_carrera(items: List[Dict[str, str]]) -> List[Dict[str, Optional[str]]]:
     """Convierte resultados de Wikipedia/Wikidata al esquema de Carrera.
 
@@ -206,39 +430,43 @@ def cargar_en_bd(carreras: List[Dict[str, Optional[str]]]) -> Dict[str, int]:
         print("No se pudo importar el modelo Carrera:", e)
         return {"created": 0, "updated": 0, "failed": 0}
 
+    from api.consultas import observar_consultas
+
     created = updated = failed = 0
-    for item in carreras:
-        data = {k: v for k, v in item.items() if k in {"nombre", "descripcion", "main_area", "videos", "sub_areas"}}
-        try:
-            # Estrategia: upsert por nombre (case-insensitive)
-            existente = Carrera.objects(nombre__iexact=data.get("nombre", "")).first()
-            if existente:
-                # Actualizar campos básicos si vienen no vacíos
-                changed = False
-                for k in ("descripcion", "main_area"):
-                    val = data.get(k)
-                    if val:
-                        setattr(existente, k, val)
+    # Una consulta + un save por carrera: el registro avisa del N+1 si supera los umbrales
+    with observar_consultas("cargar_en_bd"):
+        for item in carreras:
+            data = {k: v for k, v in item.items() if k in {"nombre", "descripcion", "main_area", "videos", "sub_areas"}}
+            try:
+                # Estrategia: upsert por nombre (case-insensitive)
+                existente = Carrera.objects(nombre__iexact=data.get("nombre", "")).first()
+                if existente:
+                    # Actualizar campos básicos si vienen no vacíos
+                    changed = False
+                    for k in ("descripcion", "main_area"):
+                        val = data.get(k)
+                        if val:
+                            setattr(existente, k, val)
+                            changed = True
+                    if isinstance(data.get("videos"), list) and data.get("videos"):
+                        existente.videos = data["videos"]
+                        changed = True
+                    if isinstance(data.get("sub_areas"), list) and data.get("sub_areas"):
+                        existente.sub_areas = data["sub_areas"]
                         changed = True
-                if isinstance(data.get("videos"), list) and data.get("videos"):
-                    existente.videos = data["videos"]
-                    changed = True
-                if isinstance(data.get("sub_areas"), list) and data.get("sub_areas"):
-                    existente.sub_areas = data["sub_areas"]
-                    changed = True
-                if changed:
-                    existente.save()
-                    updated += 1
+                    if changed:
+                        existente.save()
+                        updated += 1
+                    else:
+                        # No cambios efectivos, contar como actualizado sin modificaciones
+                        updated += 1
                 else:
-                    # No cambios efectivos, contar como actualizado sin modificaciones
-                    updated += 1
-            else:
-                obj = Carrera(**data)
-                obj.save()
-                created += 1
-        except Exception as e:
-            print(f"Error guardando '{data.get('nombre', 'N/A')}':", e)
-            failed += 1
+                    obj = Carrera(**data)
+                    obj.save()
+                    created += 1
+            except Exception as e:
+                print(f"Error guardando '{data.get('nombre', 'N/A')}':", e)
+                failed += 1
     resumen = {"created": created, "updated": updated, "failed": failed}
     print("Resumen carga en BD:", resumen)
     return resumen
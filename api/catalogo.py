@@ -0,0 +1,313 @@
+"""catalogo.py
+Recarga completa del catálogo sin ventana de datos parciales, y versión del catálogo.
+
+Recargar con DELETE + /bulk/* deja a los lectores viendo colecciones a medio llenar y paga el
+mantenimiento de índices documento por documento. `recargar`:
+1. Valida cada registro contra su modelo y lo inserta por lotes (insert_many desordenado) en
+   `<colección>__staging`, que no tiene índices.
+2. Crea los índices declarados en el modelo sobre la colección ya llena.
+3. Verifica conteos: lo insertado debe coincidir con lo válido y no quedar por debajo de
+   `min_fraccion` del tamaño actual (protege contra archivos truncados).
+4. renameCollection con dropTarget de cada staging sobre la colección viva: cada colección cambia
+   de golpe, con sus índices ya construidos. El intercambio es atómico por colección, no para el
+   catálogo completo: entre un renombrado y el siguiente un lector puede ver, p. ej., carreras
+   nuevas con subáreas anteriores.
+5. Incrementa la versión del catálogo (colección `catalogo`, documento "version"); el feed
+   /cambios responde `reiniciar` a los tokens de la versión anterior (api/cambios.py).
+
+Si un renombrado falla a mitad del intercambio, las colecciones ya intercambiadas se quedan (con
+versión nueva y derivados recalculados), los staging restantes se descartan y se lanza
+IntercambioIncompleto con unas y otras.
+
+Congelamiento de escrituras: lo escrito por /bulk/* en una colección viva durante la recarga se
+perdería al renombrar el staging encima. La recarga toma el bloqueo "recarga" (colección
+`catalogo`, vence a los CATALOGO_RECARGA_MAX_SEGUNDOS por si el proceso muere) antes de llenar los
+staging, y las vistas /bulk/* del catálogo responden 503 mientras `recarga_en_curso()`. Una
+petición /bulk/* que ya estaba escribiendo al tomarse el bloqueo no se detiene: la carga de los
+staging suele durar más que ella, pero conviene recargar sin ingestas en marcha.
+
+Las cachés en memoria que dependen del catálogo (índice de recomendaciones, snapshot de
+distribución) comparan `version_catalogo()` en `asegurar_vigente` y se reconstruyen al cambiar:
+un único incremento las invalida en todos los procesos, que consultan la versión como mucho cada
+CATALOGO_VERSION_SEGUNDOS. Además se recalcula el agregado de escuelas por estado y, si existe, el
+índice de carreras similares.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from pymongo.errors import DuplicateKeyError
+
+from api.estados import estado_de_escuela
+from api.models import Carrera, Escuela, MapaCurricular, Subarea, Voluntariado
+from api.models.rastreo import Eliminado, secuencia_reservada, sellar_documentos
+
+logger = logging.getLogger(__name__)
+
+# Mismos nombres que las rutas /bulk/<tipo>
+COLECCIONES = {
+    "carreras": Carrera,
+    "subareas": Subarea,
+    "escuelas": Escuela,
+    "voluntariados": Voluntariado,
+    "mapas": MapaCurricular,
+}
+SUFIJO_STAGING = "__staging"
+MIN_FRACCION = 0.5
+
+
+class ErrorRecarga(Exception):
+    """La recarga no pasó la validación; las colecciones vivas no se tocaron."""
+
+
+class IntercambioIncompleto(ErrorRecarga):
+    """Falló un renombrado a mitad del intercambio: `intercambiadas` ya tienen los datos nuevos y
+    `descartadas` conservan los anteriores."""
+
+    def __init__(self, mensaje: str, intercambiadas: List[str], descartadas: List[str]):
+        super().__init__(mensaje)
+        self.intercambiadas, self.descartadas = intercambiadas, descartadas
+
+
+# ----------------------------------------------------------------------------- versión
+
+_version = {"valor": None, "leida": 0.0}
+_version_lock = threading.Lock()
+
+
+def _coleccion_version():
+    return Carrera._get_db()["catalogo"]
+
+
+def version_catalogo() -> int:
+    """Versión vigente del catálogo; se relee de MongoDB como mucho cada CATALOGO_VERSION_SEGUNDOS."""
+    vigencia = getattr(settings, "CATALOGO_VERSION_SEGUNDOS", 5)
+    ahora = time.monotonic()
+    if _version["valor"] is None or ahora - _version["leida"] >= vigencia:
+        with _version_lock:
+            if _version["valor"] is None or ahora - _version["leida"] >= vigencia:
+                doc = _coleccion_version().find_one({"_id": "version"}, {"version": 1})
+                _version["valor"] = (doc or {}).get("version", 0)
+                _version["leida"] = time.monotonic()
+    return _version["valor"]
+
+
+def incrementar_version(colecciones: Iterable[str]) -> int:
+    doc = _coleccion_version().find_one_and_update(
+        {"_id": "version"},
+        {"$inc": {"version": 1}, "$set": {"recargado": datetime.now(timezone.utc), "colecciones": sorted(colecciones)}},
+        upsert=True, return_document=True,
+    )
+    # Este proceso ve la nueva versión de inmediato; los demás al vencer su lectura
+    _version["valor"], _version["leida"] = doc["version"], time.monotonic()
+    return doc["version"]
+
+
+# ----------------------------------------------------------------------------- bloqueo
+
+_BLOQUEO = {"_id": "recarga"}
+
+
+def recarga_en_curso() -> bool:
+    """True mientras otra recarga tiene el bloqueo vigente (las vistas /bulk/* responden 503)."""
+    return _coleccion_version().find_one({**_BLOQUEO, "vence": {"$gt": datetime.now(timezone.utc)}},
+                                         {"_id": 1}) is not None
+
+
+@contextmanager
+def bloqueo_recarga() -> Iterator[None]:
+    """Impide dos recargas simultáneas y congela las escrituras /bulk/* mientras dura."""
+    coleccion, ahora = _coleccion_version(), datetime.now(timezone.utc)
+    # Un bloqueo vencido es de un proceso que murió sin soltarlo
+    coleccion.delete_one({**_BLOQUEO, "vence": {"$lte": ahora}})
+    ficha = time.time_ns()
+    try:
+        vigencia = timedelta(seconds=getattr(settings, "CATALOGO_RECARGA_MAX_SEGUNDOS", 3600))
+        coleccion.insert_one({**_BLOQUEO, "ficha": ficha, "desde": ahora, "vence": ahora + vigencia})
+    except DuplicateKeyError:
+        raise ErrorRecarga("Otra recarga del catálogo está en curso.")
+    try:
+        yield
+    finally:
+        coleccion.delete_one({**_BLOQUEO, "ficha": ficha})
+
+
+# ----------------------------------------------------------------------------- entrada
+
+def leer_registros(ruta) -> Iterator[dict]:
+    """Registros de un arreglo JSON o de un archivo NDJSON (un objeto por línea)."""
+    ruta = Path(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        if ruta.suffix == ".ndjson":
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            yield from json.load(f)
+
+
+def archivos_en(carpeta) -> Dict[str, Path]:
+    """{tipo: archivo} con los `<tipo>.ndjson` o `<tipo>.json` presentes en la carpeta."""
+    encontrados = {}
+    for tipo in COLECCIONES:
+        for extension in (".ndjson", ".json"):
+            ruta = Path(carpeta) / f"{tipo}{extension}"
+            if ruta.exists():
+                encontrados[tipo] = ruta
+                break
+    return encontrados
+
+
+def _documento(tipo: str, registro: dict) -> dict:
+    """Registro -> documento validado con el modelo. Los campos auxiliares ('_fuente', ...) se omiten."""
+    if not isinstance(registro, dict):
+        raise ValueError("cada elemento debe ser un objeto JSON.")
+    datos = {k: v for k, v in registro.items() if k == "_id" or not k.startswith("_")}
+    if tipo == "escuelas":
+        datos["estado"] = estado_de_escuela(datos.get("estado"), datos.get("ubicacion"))
+    obj = COLECCIONES[tipo]._from_son(datos)
+    obj.validate()
+    return obj.to_mongo().to_dict()
+
+
+def _insertar_sellados(staging, documentos: List[dict]) -> int:
+    with secuencia_reservada(len(documentos)) as inicio:
+        return len(staging.insert_many(sellar_documentos(documentos, inicio), ordered=False).inserted_ids)
+
+
+# ----------------------------------------------------------------------------- recarga
+
+def _cargar_staging(tipo: str, registros: Iterable[dict], lote: int, max_errores: int) -> dict:
+    modelo = COLECCIONES[tipo]
+    staging = modelo._get_db()[modelo._get_collection_name() + SUFIJO_STAGING]
+    staging.drop()
+
+    validos, errores, pendientes = 0, [], []
+    inicio = time.perf_counter()
+    for i, registro in enumerate(registros):
+        try:
+            pendientes.append(_documento(tipo, registro))
+        except Exception as e:
+            errores.append({"index": i, "error": str(e)})
+            if len(errores) > max_errores:
+                staging.drop()
+                raise ErrorRecarga(f"{tipo}: demasiados registros inválidos; primero: {errores[0]}")
+            continue
+        if len(pendientes) >= lote:
+            validos += _insertar_sellados(staging, pendientes)
+            pendientes = []
+    if pendientes:
+        validos += _insertar_sellados(staging, pendientes)
+    carga = time.perf_counter() - inicio
+
+    # Índices al final: una construcción por índice en lugar de mantenerlo en cada inserción
+    inicio = time.perf_counter()
+    for spec in modelo._meta.get("index_specs") or []:
+        opciones = dict(spec)
+        staging.create_index(opciones.pop("fields"), **opciones)
+    return {"staging": staging, "validos": validos, "errores": errores,
+            "carga_s": round(carga, 2), "indices_s": round(time.perf_counter() - inicio, 2)}
+
+
+def recargar(fuentes: Dict[str, Iterable[dict]], lote: int = 1000, min_fraccion: float = MIN_FRACCION,
+             max_errores: int = 0, dry_run: bool = False, progreso: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Recarga las colecciones de `fuentes` ({tipo: registros}) vía staging y renombrado atómico.
+
+    Lanza ErrorRecarga (sin tocar las colecciones vivas) si hay más de `max_errores` registros
+    inválidos en un tipo, si algún conteo no cuadra o si otra recarga está en curso, e
+    IntercambioIncompleto si falla a mitad del intercambio. Con dry_run se valida todo y se
+    descartan las colecciones de staging (sin bloqueo). Cada colección se intercambia de forma
+    atómica, pero no todas a la vez. Retorna {tipo: {"anteriores", "cargados", "errores", ...}, "version", "derivados"};
+    "derivados" es "ok" o el error al recalcular los derivados tras un intercambio ya hecho.
+    """
+    desconocidos = set(fuentes) - set(COLECCIONES)
+    if desconocidos:
+        raise ErrorRecarga(f"Colecciones desconocidas: {', '.join(sorted(desconocidos))}.")
+    if dry_run:
+        return _recargar(fuentes, lote, min_fraccion, max_errores, dry_run, progreso)
+    with bloqueo_recarga():
+        return _recargar(fuentes, lote, min_fraccion, max_errores, dry_run, progreso)
+
+
+def _recargar(fuentes, lote, min_fraccion, max_errores, dry_run, progreso) -> dict:
+    cargas, resumen = {}, {}
+    try:
+        for tipo, registros in fuentes.items():
+            carga = cargas[tipo] = _cargar_staging(tipo, registros, lote, max_errores)
+            anteriores = COLECCIONES[tipo]._get_collection().estimated_document_count()
+            en_staging = carga["staging"].count_documents({})
+            resumen[tipo] = {"anteriores": anteriores, "cargados": en_staging, "errores": len(carga["errores"]),
+                             "carga_s": carga["carga_s"], "indices_s": carga["indices_s"]}
+            if progreso:
+                progreso(tipo, resumen[tipo])
+            if en_staging != carga["validos"]:
+                raise ErrorRecarga(f"{tipo}: staging tiene {en_staging} documentos y se insertaron {carga['validos']}.")
+            if en_staging < min_fraccion * anteriores:
+                raise ErrorRecarga(f"{tipo}: {en_staging} documentos nuevos frente a {anteriores} actuales "
+                                   f"(mínimo {min_fraccion:.0%}); ¿archivo incompleto?")
+    except BaseException:
+        _descartar(cargas)
+        raise
+    if dry_run:
+        _descartar(cargas)
+        return {**resumen, "version": None, "derivados": None}
+
+    # Intercambio: cada renameCollection reemplaza la colección viva (e índices) de forma atómica
+    intercambiadas = []
+    try:
+        for tipo, carga in cargas.items():
+            carga["staging"].rename(COLECCIONES[tipo]._get_collection_name(), dropTarget=True)
+            intercambiadas.append(tipo)
+    except Exception as e:
+        descartadas = [t for t in cargas if t not in intercambiadas]
+        _descartar({t: cargas[t] for t in descartadas})
+        if intercambiadas:
+            _cerrar_intercambio(intercambiadas, resumen)
+        logger.exception("Intercambio incompleto: intercambiadas %s, descartadas %s", intercambiadas, descartadas)
+        raise IntercambioIncompleto(
+            f"falló el intercambio de {descartadas[0]} ({type(e).__name__}: {e}); intercambiadas: "
+            f"{', '.join(intercambiadas) or 'ninguna'}; sin cambios: {', '.join(descartadas)}.",
+            intercambiadas, descartadas) from e
+    return _cerrar_intercambio(intercambiadas, resumen)
+
+
+def _cerrar_intercambio(tipos: List[str], resumen: dict) -> dict:
+    # Las lápidas de las colecciones reemplazadas ya no aplican: los clientes de la versión nueva
+    # sincronizan desde cero (/cambios responde reiniciar)
+    Eliminado._get_collection().delete_many(
+        {"coleccion": {"$in": [COLECCIONES[t]._get_collection_name() for t in tipos]}})
+    resumen["version"] = incrementar_version(tipos)
+    # El catálogo ya cambió: un fallo aquí no debe reportarse como recarga fallida
+    try:
+        _tras_recarga(set(tipos))
+        resumen["derivados"] = "ok"
+    except Exception as e:
+        logger.exception("Catálogo recargado (versión %s), pero falló el recálculo de derivados", resumen["version"])
+        resumen["derivados"] = f"error: {type(e).__name__}: {e}"
+    return resumen
+
+
+def _descartar(cargas: dict) -> None:
+    for carga in cargas.values():
+        carga["staging"].drop()
+
+
+def _tras_recarga(tipos: set) -> None:
+    """Recalcula los derivados persistidos del catálogo recargado."""
+    if "escuelas" in tipos:
+        from api.escuelas_por_estado import refrescar
+
+        refrescar()
+    if tipos & {"carreras", "mapas"}:
+        from api.similares import IndiceSimilares, ruta_indice
+
+        if ruta_indice().exists():
+            IndiceSimilares.construir().guardar(ruta_indice())
@@ -0,0 +1,204 @@
+"""consultas.py
+Registro de los comandos MongoDB emitidos en un contexto (una petición, un script o un test).
+
+- `OyenteConsultas` (pymongo CommandListener, registrado en ApiConfig.ready()) anota cada
+  comando en el registro activo del contexto (ContextVar): colección, operación, forma del
+  filtro y duración. Los listeners de pymongo se invocan en la hebra que emite el comando, así
+  que cada petición ve solo sus comandos.
+- La "forma" de un filtro sustituye los valores por "?" y conserva campos y operadores
+  ({"subarea": {"$in": "?"}}): permite agrupar consultas iguales con distintos parámetros.
+- Reglas (settings): comandos lentos (CONSULTAS_LENTA_MS) se registran en el log al terminar;
+  al cerrar el contexto se avisa si se superó el presupuesto de comandos
+  (CONSULTAS_MAX_POR_PETICION) o de tiempo (CONSULTAS_MAX_MS_POR_PETICION), y si una misma forma
+  se repite CONSULTAS_N_MAS_1_UMBRAL veces o más (patrón N+1).
+
+Uso:
+- Peticiones: api.middleware.PresupuestoConsultasMiddleware.
+- Scripts y cargas: `with observar_consultas("cargar_en_bd"): ...`
+- Tests: `with max_consultas(3): client.get("/carreras")` lanza AssertionError si se excede.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from django.conf import settings
+from pymongo import monitoring
+
+from api.metricas import coleccion_de_comando
+
+logger = logging.getLogger(__name__)
+
+# Comandos de sesión/cursor que no son consultas de la aplicación
+_IGNORADOS = frozenset({"endSessions", "killCursors", "hello", "isMaster", "ismaster", "ping"})
+
+
+@dataclass
+class Consulta:
+    coleccion: str
+    operacion: str
+    forma: str
+    duracion_ms: float
+    fallida: bool = False
+
+
+@dataclass
+class RegistroConsultas:
+    """Comandos de un contexto. Los registros anidados también anotan en su padre."""
+    padre: Optional["RegistroConsultas"] = None
+    consultas: List[Consulta] = field(default_factory=list)
+
+    def agregar(self, consulta: Consulta) -> None:
+        registro = self
+        while registro is not None:
+            registro.consultas.append(consulta)
+            registro = registro.padre
+
+    @property
+    def total(self) -> int:
+        return len(self.consultas)
+
+    @property
+    def tiempo_ms(self) -> float:
+        return sum(c.duracion_ms for c in self.consultas)
+
+    def repetidas(self, umbral: int) -> List[tuple]:
+        """[(coleccion, operacion, forma, veces)] con formas repetidas al menos 'umbral' veces."""
+        conteo = Counter(
+            (c.coleccion, c.operacion, c.forma) for c in self.consultas if c.operacion != "getMore"
+        )
+        return [(*clave, n) for clave, n in conteo.most_common() if n >= umbral]
+
+    def resumen(self) -> str:
+        conteo = Counter(f"{c.coleccion}.{c.operacion} {c.forma}" for c in self.consultas)
+        return "; ".join(f"{n}x {forma}" for forma, n in conteo.most_common(5))
+
+
+_registro: ContextVar[Optional[RegistroConsultas]] = ContextVar("registro_consultas", default=None)
+
+
+def registro_actual() -> Optional[RegistroConsultas]:
+    """Registro activo del contexto (None fuera de observar_consultas/max_consultas)."""
+    return _registro.get()
+
+
+def forma_filtro(filtro) -> str:
+    """Filtro con los valores sustituidos por '?' (conserva campos y operadores)."""
+    def _forma(valor):
+        if isinstance(valor, dict):
+            return {k: _forma(v) for k, v in valor.items()}
+        if isinstance(valor, (list, tuple)) and valor and all(isinstance(v, dict) for v in valor):
+            return [_forma(v) for v in valor]  # $and/$or
+        return "?"
+    if not filtro:
+        return "{}"
+    return json.dumps(_forma(filtro), sort_keys=True, default=str)
+
+
+def _filtro_de_comando(nombre: str, comando) -> Optional[dict]:
+    if nombre == "find":
+        return comando.get("filter")
+    if nombre in ("count", "distinct", "findAndModify"):
+        return comando.get("query")
+    if nombre == "aggregate":
+        for etapa in comando.get("pipeline") or []:
+            if "$match" in etapa:
+                return etapa["$match"]
+        return None
+    if nombre == "update":
+        return (comando.get("updates") or [{}])[0].get("q")
+    if nombre == "delete":
+        return (comando.get("deletes") or [{}])[0].get("q")
+    return None
+
+
+class OyenteConsultas(monitoring.CommandListener):
+    def __init__(self):
+        self._en_vuelo = {}
+
+    def started(self, event):
+        registro = _registro.get()
+        if registro is None or event.command_name in _IGNORADOS:
+            return
+        forma = "-" if event.command_name == "getMore" else forma_filtro(_filtro_de_comando(event.command_name, event.command))
+        self._en_vuelo[(event.connection_id, event.request_id)] = (
+            registro, coleccion_de_comando(event.command_name, event.command), forma,
+        )
+
+    def _terminar(self, event, fallida: bool):
+        pendiente = self._en_vuelo.pop((event.connection_id, event.request_id), None)
+        if pendiente is None:
+            return
+        registro, coleccion, forma = pendiente
+        consulta = Consulta(coleccion, event.command_name, forma, event.duration_micros / 1000, fallida)
+        registro.agregar(consulta)
+        if consulta.duracion_ms >= getattr(settings, "CONSULTAS_LENTA_MS", 100):
+            logger.warning(
+                "Comando MongoDB lento: %s.%s %.1f ms forma=%s",
+                coleccion, event.command_name, consulta.duracion_ms, forma,
+            )
+
+    def succeeded(self, event):
+        self._terminar(event, fallida=False)
+
+    def failed(self, event):
+        self._terminar(event, fallida=True)
+
+
+_oyente_registrado = False
+
+
+def registrar_oyente_consultas() -> None:
+    global _oyente_registrado
+    if not _oyente_registrado:
+        monitoring.register(OyenteConsultas())
+        _oyente_registrado = True
+
+
+def evaluar(registro: RegistroConsultas, contexto: str) -> List[str]:
+    """Aplica presupuesto y detección de N+1; registra y retorna los avisos."""
+    avisos = []
+    maximo = getattr(settings, "CONSULTAS_MAX_POR_PETICION", 30)
+    maximo_ms = getattr(settings, "CONSULTAS_MAX_MS_POR_PETICION", 300)
+    if registro.total > maximo or registro.tiempo_ms > maximo_ms:
+        avisos.append(
+            f"{contexto}: {registro.total} comandos MongoDB en {registro.tiempo_ms:.1f} ms "
+            f"(presupuesto {maximo} / {maximo_ms} ms): {registro.resumen()}"
+        )
+    for coleccion, operacion, forma, veces in registro.repetidas(getattr(settings, "CONSULTAS_N_MAS_1_UMBRAL", 5)):
+        avisos.append(f"{contexto}: posible N+1, {veces}x {coleccion}.{operacion} forma={forma}")
+    for aviso in avisos:
+        logger.warning(aviso)
+    return avisos
+
+
+@contextmanager
+def observar_consultas(contexto: str):
+    """Registra los comandos del bloque y evalúa presupuesto y N+1 al salir."""
+    registro = RegistroConsultas(padre=_registro.get())
+    token = _registro.set(registro)
+    try:
+        yield registro
+    finally:
+        _registro.reset(token)
+        evaluar(registro, contexto)
+
+
+@contextmanager
+def max_consultas(maximo: int, tiempo_ms: Optional[float] = None):
+    """Helper de tests: falla si el bloque emite más de 'maximo' comandos (o tarda más de 'tiempo_ms')."""
+    registro = RegistroConsultas(padre=_registro.get())
+    token = _registro.set(registro)
+    try:
+        yield registro
+    finally:
+        _registro.reset(token)
+    if registro.total > maximo:
+        raise AssertionError(f"Se esperaban como máximo {maximo} comandos MongoDB y hubo {registro.total}: {registro.resumen()}")
+    if tiempo_ms is not None and registro.tiempo_ms > tiempo_ms:
+        raise AssertionError(f"Los comandos MongoDB tardaron {registro.tiempo_ms:.1f} ms (máximo {tiempo_ms} ms).")
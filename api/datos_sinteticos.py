@@ -0,0 +1,357 @@
+"""datos_sinteticos.py
+Generador determinista de datos sintéticos (manage.py generar_datos y benchmark_endpoints).
+
+Contenido:
+- Carreras con nombres de licenciaturas reales por `MAIN_AREAS` (con número de plan cuando la
+  escala supera el catálogo base), subáreas con listas de `Leccion`, materias del mapa curricular.
+- Escuelas con uno a tres planteles repartidos en los 32 estados según su población, con
+  coordenadas alrededor de ciudades reales de cada estado.
+- Voluntariados y usuarios ubicados en ciudades reales; formularios con una clave de respuestas
+  por subárea (compatible con api/calificacion.py) y resultados coherentes con las respuestas.
+
+Determinismo: los documentos de cada colección se generan por bloques de TAMANO_BLOQUE índices y
+cada bloque usa su propio `random.Random(semilla, colección, bloque)`. El resultado no depende del
+orden de generación ni del número de procesos, y los nombres se derivan del índice
+(`nombre_carrera(i)`), de modo que las colecciones se referencian entre sí sin listas en memoria.
+
+`sembrar` inserta por bloques con `insert_many(ordered=False)`, opcionalmente en varios procesos.
+"""
+from __future__ import annotations
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from api.estados import ESTADOS
+from api.models.constants import MAIN_AREAS
+
+TAMANO_BLOQUE = 10_000
+
+# Licenciaturas base por área (el índice de carrera recorre la lista de forma intercalada por área)
+_CARRERAS_POR_AREA = {
+    "ciencias": (
+        "Ingeniería Civil", "Ingeniería en Sistemas Computacionales", "Ingeniería Mecánica", "Ingeniería Química",
+        "Ingeniería Industrial", "Ingeniería Eléctrica", "Matemáticas", "Física", "Actuaría", "Biología",
+        "Ciencia de Datos", "Ingeniería en Mecatrónica", "Arquitectura", "Química", "Ingeniería Ambiental",
+    ),
+    "salud": (
+        "Medicina", "Enfermería", "Odontología", "Nutrición", "Psicología Clínica", "Fisioterapia",
+        "Químico Farmacéutico Biólogo", "Optometría", "Medicina Veterinaria y Zootecnia", "Terapia Ocupacional",
+        "Salud Pública", "Ciencias Forenses", "Gerontología", "Biomedicina", "Radiología e Imagen",
+    ),
+    "sociales": (
+        "Derecho", "Economía", "Administración de Empresas", "Contaduría Pública", "Sociología",
+        "Ciencias Políticas", "Relaciones Internacionales", "Comunicación", "Trabajo Social", "Mercadotecnia",
+        "Finanzas", "Negocios Internacionales", "Antropología", "Geografía", "Turismo",
+    ),
+    "humanidades": (
+        "Filosofía", "Historia", "Letras Hispánicas", "Pedagogía", "Lenguas Modernas", "Artes Visuales",
+        "Música", "Diseño Gráfico", "Literatura Dramática y Teatro", "Bibliotecología", "Danza",
+        "Cinematografía", "Arqueología", "Estudios Latinoamericanos", "Traducción",
+    ),
+}
+_TEMAS_SUBAREA = (
+    "Fundamentos", "Métodos Cuantitativos", "Teoría", "Práctica Profesional", "Investigación", "Laboratorio",
+    "Ética y Sociedad", "Comunicación Académica", "Tecnologías Aplicadas", "Gestión de Proyectos",
+)
+_PALABRAS = (
+    "análisis diseño teoría práctica laboratorio investigación métodos fundamentos sistemas modelos estadística "
+    "programación ética comunicación salud sociedad cultura lenguaje datos proyectos evaluación desarrollo "
+    "comunidad ciencia técnica historia introducción avanzado aplicado integral regional sustentable"
+).split()
+_NOMBRES = (
+    "María", "José", "Juan", "Guadalupe", "Luis", "Ana", "Carlos", "Fernanda", "Jorge", "Sofía", "Miguel",
+    "Valeria", "Diego", "Ximena", "Alejandro", "Daniela", "Ricardo", "Camila", "Emiliano", "Regina",
+)
+_APELLIDOS = (
+    "Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez", "Cruz",
+    "Flores", "Gómez", "Morales", "Vázquez", "Reyes", "Jiménez", "Torres", "Díaz", "Gutiérrez", "Ruiz",
+)
+_DISCAPACIDADES = ("ninguna",) * 17 + ("visual", "auditiva", "motriz")
+
+_PESOS_ESTADOS = [p for _, _, p in ESTADOS]
+
+
+@dataclass(frozen=True)
+class Escala:
+    carreras: int
+    subareas_por_carrera: int
+    materias_por_carrera: int
+    escuelas: int
+    voluntariados: int
+    formularios: int
+    usuarios: int
+
+    @classmethod
+    def por_factor(cls, factor: float) -> "Escala":
+        """Escala lineal: factor 1 = 100 carreras, 1k escuelas, 10k formularios, 2k usuarios."""
+        n = lambda base: max(1, int(round(base * factor)))
+        return cls(carreras=n(100), subareas_por_carrera=5, materias_por_carrera=12, escuelas=n(1_000),
+                   voluntariados=n(500), formularios=n(10_000), usuarios=n(2_000))
+
+
+ESCALAS: Dict[str, Escala] = {
+    "pequena": Escala(carreras=200, subareas_por_carrera=4, materias_por_carrera=10, escuelas=2_000,
+                      voluntariados=1_000, formularios=20_000, usuarios=2_000),
+    "mediana": Escala(carreras=2_000, subareas_por_carrera=5, materias_por_carrera=20, escuelas=50_000,
+                      voluntariados=20_000, formularios=200_000, usuarios=50_000),
+    "grande": Escala(carreras=10_000, subareas_por_carrera=5, materias_por_carrera=30, escuelas=500_000,
+                     voluntariados=100_000, formularios=1_000_000, usuarios=500_000),
+}
+
+# Nombre de modelo (api.models.MODELOS) de cada colección generada, en orden de inserción
+COLECCIONES = ("Carrera", "Subarea", "MapaCurricular", "Escuela", "Voluntariado", "Formulario", "User")
+
+
+class GeneradorDatos:
+    def __init__(self, escala: Escala, semilla: int = 1):
+        self.escala = escala
+        self.semilla = semilla
+        self._areas = list(MAIN_AREAS)
+        self._claves: Dict[int, tuple] = {}
+
+    # ------------------------------------------------------------------ nombres
+    def _base_carrera(self, i: int):
+        area = self._areas[i % len(self._areas)]
+        catalogo = _CARRERAS_POR_AREA[area]
+        return area, catalogo[(i // len(self._areas)) % len(catalogo)], i // (len(self._areas) * len(catalogo))
+
+    def nombre_carrera(self, i: int) -> str:
+        _, base, plan = self._base_carrera(i)
+        return f"Licenciatura en {base}" + (f" (Plan {plan + 1})" if plan else "")
+
+    def area_carrera(self, i: int) -> str:
+        return self._base_carrera(i)[0]
+
+    def nombre_subarea(self, carrera: int, j: int) -> str:
+        tema = _TEMAS_SUBAREA[j % len(_TEMAS_SUBAREA)]
+        ronda = j // len(_TEMAS_SUBAREA)
+        return f"{tema}{f' {ronda + 1}' if ronda else ''} de {self.nombre_carrera(carrera)}"
+
+    # ---------------------------------------------------------------- utilidades
+    def total(self, coleccion: str) -> int:
+        e = self.escala
+        return {
+            "Carrera": e.carreras, "Subarea": e.carreras * e.subareas_por_carrera,
+            "MapaCurricular": e.carreras * e.materias_por_carrera, "Escuela": e.escuelas,
+            "Voluntariado": e.voluntariados, "Formulario": e.formularios, "User": e.usuarios,
+        }[coleccion]
+
+    def bloques(self, coleccion: str) -> int:
+        return math.ceil(self.total(coleccion) / TAMANO_BLOQUE)
+
+    @staticmethod
+    def _texto(rng: random.Random, palabras: int) -> str:
+        return " ".join(rng.choices(_PALABRAS, k=palabras)).capitalize() + "."
+
+    @staticmethod
+    def _ciudad(rng: random.Random):
+        estado, ciudades, _ = rng.choices(ESTADOS, weights=_PESOS_ESTADOS)[0]
+        return (estado, *rng.choice(ciudades))
+
+    def _clave_subarea(self, s: int):
+        """(clave, preguntas) del formulario de la subárea s; la lista 'preguntas' se comparte entre documentos."""
+        clave = self._claves.get(s)
+        if clave is None:
+            if len(self._claves) >= 50_000:
+                self._claves.clear()
+            rng = random.Random(f"{self.semilla}:clave:{s}")
+            respuestas = [rng.choice("abcd") for _ in range(10)]
+            preguntas = [{"texto": f"Pregunta {k + 1}", "correcta": c, "peso": 1} for k, c in enumerate(respuestas)]
+            clave = self._claves[s] = (respuestas, preguntas)
+        return clave
+
+    # ------------------------------------------------------------ documentos
+    def _carrera(self, rng, i):
+        return {
+            "nombre": self.nombre_carrera(i),
+            "descripcion": self._texto(rng, 30),
+            "main_area": self.area_carrera(i),
+            "videos": [f"https://videos.example/carreras/{i}/{k}" for k in range(rng.randint(0, 3))],
+            "sub_areas": [self.nombre_subarea(i, j) for j in range(self.escala.subareas_por_carrera)],
+        }
+
+    def _subarea(self, rng, i):
+        carrera, j = divmod(i, self.escala.subareas_por_carrera)
+        lecciones = [
+            {
+                "titulo": f"Lección {k + 1}: {self._texto(rng, 3)[:-1]}",
+                "videos": [f"https://videos.example/lecciones/{i}/{k}"],
+                "descripcion": self._texto(rng, 15),
+            }
+            for k in range(rng.randint(3, 8))
+        ]
+        return {
+            "nombre": self.nombre_subarea(carrera, j),
+            "introduccion": self._texto(rng, 12),
+            "descripcion": self._texto(rng, 40),
+            "videos_escuela": [f"https://videos.example/subareas/{i}"],
+            "lecciones": lecciones,
+            "carrera": self.nombre_carrera(carrera),
+            "progreso": 0,
+            "total_lecciones": len(lecciones),
+        }
+
+    def _materia(self, rng, i):
+        carrera, j = divmod(i, self.escala.materias_por_carrera)
+        return {
+            "nombre": f"{rng.choice(_PALABRAS).capitalize()} {rng.choice(_PALABRAS)} {['I', 'II', 'III'][j % 3]}",
+            "descripcion": self._texto(rng, 25),
+            "carrera": self.nombre_carrera(carrera),
+        }
+
+    def _escuela(self, rng, i):
+        estado, ciudad, lat, lng = self._ciudad(rng)
+        tipo = "publica" if rng.random() < 0.4 else "privada"
+        prefijo = "Universidad Autónoma" if tipo == "publica" else rng.choice(("Universidad", "Instituto", "Centro Universitario"))
+        ofrecidas = rng.sample(range(self.escala.carreras), k=min(rng.randint(3, 25), self.escala.carreras))
+        return {
+            "nombre": f"{prefijo} de {ciudad} {i + 1}",
+            # Planteles a unos kilómetros del centro de la ciudad (~0.1° ≈ 11 km)
+            "ubicacion": [
+                {"lat": round(lat + rng.gauss(0, 0.08), 6), "lng": round(lng + rng.gauss(0, 0.08), 6)}
+                for _ in range(rng.choices((1, 2, 3), weights=(70, 20, 10))[0])
+            ],
+            "type": tipo,
+            "estado": estado,
+            "carreras": [self.nombre_carrera(c) for c in ofrecidas],
+            "costo": 0.0 if tipo == "publica" and rng.random() < 0.7 else float(rng.randrange(20_000, 250_000, 500)),
+        }
+
+    def _voluntariado(self, rng, i):
+        estado, ciudad, _, _ = self._ciudad(rng)
+        carrera = rng.randrange(self.escala.carreras)
+        return {
+            "carrera": self.nombre_carrera(carrera),
+            "titulo": f"Apoyo en {rng.choice(_PALABRAS)} {rng.choice(_PALABRAS)}",
+            "descripcion": self._texto(rng, 25),
+            "ubicacion": f"{ciudad}, {estado}",
+            "salario": 0.0 if rng.random() < 0.6 else float(rng.randrange(1_000, 15_000, 100)),
+            "permalink": f"https://voluntariados.example/{i + 1}",
+        }
+
+    def _formulario(self, rng, i):
+        carrera = rng.randrange(self.escala.carreras)
+        j = rng.randrange(self.escala.subareas_por_carrera)
+        clave, preguntas = self._clave_subarea(carrera * self.escala.subareas_por_carrera + j)
+        habilidad = rng.betavariate(4, 3)
+        respuestas = [c if rng.random() < habilidad else rng.choice("abcd") for c in clave]
+        return {
+            "nombre": f"Diagnóstico {self.nombre_subarea(carrera, j)}",
+            "descripcion": "Evaluación diagnóstica de la subárea.",
+            "preguntas": preguntas,
+            "respuestas": respuestas,
+            "resultados": round(100.0 * sum(r == c for r, c in zip(respuestas, clave)) / len(clave), 2),
+            "subarea": self.nombre_subarea(carrera, j),
+        }
+
+    def _usuario(self, rng, i):
+        estado, ciudad, _, _ = self._ciudad(rng)
+        carrera = rng.randrange(self.escala.carreras)
+        nombre, apellido = rng.choice(_NOMBRES), rng.choice(_APELLIDOS)
+        email = f"{nombre.lower()}.{apellido.lower()}.{i + 1}@example.com".encode("ascii", "ignore").decode()
+        return {
+            "first_name": nombre,
+            "last_name": f"{apellido} {rng.choice(_APELLIDOS)}",
+            "email": email,
+            "email_normalizado": email,
+            "ubicacion": f"{ciudad}, {estado}",
+            "discapacidad": rng.choice(_DISCAPACIDADES),
+            "carrera": self.nombre_carrera(carrera),
+            "main_area": self.area_carrera(carrera),
+            "intereses": rng.sample(_PALABRAS, k=rng.randint(2, 6)),
+            "zona": rng.random() < 0.5,
+        }
+
+    _FABRICAS = {
+        "Carrera": _carrera, "Subarea": _subarea, "MapaCurricular": _materia, "Escuela": _escuela,
+        "Voluntariado": _voluntariado, "Formulario": _formulario, "User": _usuario,
+    }
+
+    def generar_bloque(self, coleccion: str, bloque: int) -> List[dict]:
+        """Documentos de los índices [bloque * TAMANO_BLOQUE, ...) de la colección."""
+        rng = random.Random(f"{self.semilla}:{coleccion}:{bloque}")
+        fabrica = self._FABRICAS[coleccion]
+        inicio = bloque * TAMANO_BLOQUE
+        return [fabrica(self, rng, i) for i in range(inicio, min(inicio + TAMANO_BLOQUE, self.total(coleccion)))]
+
+    def documentos(self, coleccion: str) -> Iterator[dict]:
+        for bloque in range(self.bloques(coleccion)):
+            yield from self.generar_bloque(coleccion, bloque)
+
+    # Atajos por colección
+    def carreras(self): return self.documentos("Carrera")
+    def subareas(self): return self.documentos("Subarea")
+    def mapas(self): return self.documentos("MapaCurricular")
+    def escuelas(self): return self.documentos("Escuela")
+    def voluntariados(self): return self.documentos("Voluntariado")
+    def formularios(self): return self.documentos("Formulario")
+    def usuarios(self): return self.documentos("User")
+
+
+def _modelo(nombre_modelo: str):
+    from api.models import MODELOS
+
+    return {m.__name__: m for m in MODELOS}[nombre_modelo]
+
+
+def _coleccion_pymongo(nombre_modelo: str):
+    return _modelo(nombre_modelo)._get_collection()
+
+
+def _insertar_bloque(escala: Escala, semilla: int, coleccion: str, bloque: int) -> int:
+    """Trabajador: genera e inserta un bloque (en procesos hijos usa su propio MongoClient)."""
+    from api.models.rastreo import DocumentoCatalogo, secuencia_reservada, sellar_documentos
+
+    documentos = GeneradorDatos(escala, semilla).generar_bloque(coleccion, bloque)
+    if not documentos:
+        return 0
+    if not issubclass(_modelo(coleccion), DocumentoCatalogo):
+        return _insertar(coleccion, documentos)
+    with secuencia_reservada(len(documentos)) as inicio:
+        return _insertar(coleccion, sellar_documentos(documentos, inicio))
+
+
+def _insertar(coleccion: str, documentos: List[dict]) -> int:
+    resultado = _coleccion_pymongo(coleccion).insert_many(documentos, ordered=False, bypass_document_validation=True)
+    return len(resultado.inserted_ids)
+
+
+def sembrar(generador: GeneradorDatos, limpiar: bool = False, procesos: int = 1,
+            colecciones: Optional[Iterable[str]] = None, progreso=None) -> Dict[str, int]:
+    """
+    Inserta las colecciones por bloques desordenados y retorna documentos insertados por colección.
+    Con procesos > 1 los bloques se reparten entre procesos hijos (fork): cada uno genera e inserta
+    sus bloques con su propia conexión. 'limpiar' elimina antes la colección (y sus índices, que
+    conviene crear después con ensure_indexes: indexar tras la carga es más rápido). Si se siembra
+    Escuela se recalcula el agregado de /escuelas/por-estado.
+    """
+    insertados = {}
+    ejecutor = ProcessPoolExecutor(procesos, mp_context=get_context("fork")) if procesos > 1 else None
+    try:
+        for nombre in colecciones or COLECCIONES:
+            coleccion = _coleccion_pymongo(nombre)
+            if limpiar:
+                coleccion.drop()
+            argumentos = [(generador.escala, generador.semilla, nombre, b) for b in range(generador.bloques(nombre))]
+            if ejecutor:
+                conteos = ejecutor.map(_insertar_bloque, *zip(*argumentos)) if argumentos else []
+            else:
+                conteos = (_insertar_bloque(*a) for a in argumentos)
+            total = 0
+            for n in conteos:
+                total += n
+                if progreso:
+                    progreso(coleccion.name, total, generador.total(nombre))
+            insertados[coleccion.name] = total
+    finally:
+        if ejecutor:
+            ejecutor.shutdown()
+    if "Escuela" in (colecciones or COLECCIONES):
+        from api.escuelas_por_estado import refrescar
+
+        refrescar()
+    return insertados
@@ -0,0 +1,369 @@
+"""dedup.py
+Deduplicación aproximada de carreras y escuelas recolectadas (api/recoleccion.py, Places).
+
+Coincidencias que se detectan además de la igualdad exacta: acentos, mayúsculas y puntuación
+("Ingeniería Civil" / "INGENIERIA CIVIL."), orden de palabras, prefijos genéricos en carreras
+("Licenciatura en Derecho" / "Derecho") y siglas ("UNAM" / "Universidad Nacional Autónoma de México").
+
+Para no comparar todos los pares (O(n²)) se usa blocking:
+- Cada registro se indexa por sus BLOQUES_POR_REGISTRO tokens menos frecuentes del conjunto y por
+  sus siglas; solo se comparan registros que comparten alguna clave.
+- Escuelas: la clave incluye además la celda geohash (PRECISION_GEOHASH, ~5 × 5 km) y se buscan
+  candidatos en la celda y sus 8 vecinas; dos escuelas solo coinciden si están a menos de
+  'radio_m' metros.
+- Los tokens presentes en más de 'max_bloque' registros (casi universales) no se usan como clave
+  y cada clave aporta como mucho 'max_bloque' candidatos: el costo es O(n · max_bloque) en el peor caso.
+Los pares candidatos con similitud >= 'umbral' se agrupan con union-find y cada grupo se fusiona
+en un registro. Los documentos ya existentes en MongoDB pueden participar (`existentes_en_mongo`):
+un grupo que contiene uno se reporta como actualización de ese documento en lugar de un alta.
+"""
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Palabras vacías que no cuentan para tokens ni siglas
+PALABRAS_VACIAS = frozenset({"de", "del", "la", "las", "el", "los", "y", "e", "en", "a", "para", "the", "of", "and"})
+# Prefijos sin valor para distinguir carreras
+GENERICOS_CARRERA = frozenset({"licenciatura", "lic", "carrera", "grado"})
+
+PRECISION_GEOHASH = 5
+BLOQUES_POR_REGISTRO = 2
+UMBRAL = 0.85
+RADIO_M = 2000.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_NO_PALABRA = re.compile(r"[^\w\s]")
+_SIGLA = re.compile(r"[A-ZÁÉÍÓÚÑ]{2,8}")
+
+
+# ----------------------------------------------------------------------------- normalización
+
+def normalizar_nombre(texto: str) -> str:
+    """Minúsculas, sin acentos ni puntuación, espacios simples."""
+    # NFKD separa las marcas diacríticas ("í" -> "i" + acento) y el paso por ASCII las descarta
+    plano = unicodedata.normalize("NFKD", (texto or "").casefold()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NO_PALABRA.sub(" ", plano).split())
+
+
+def tokens(nombre: str, tipo: str = "escuelas") -> List[str]:
+    genericos = GENERICOS_CARRERA if tipo == "carreras" else ()
+    return [t for t in normalizar_nombre(nombre).split() if t not in PALABRAS_VACIAS and t not in genericos]
+
+
+def siglas(nombre: str, palabras: Optional[List[str]] = None) -> str:
+    """Siglas de un nombre largo ("Universidad Nacional Autónoma de México" -> "unam"), o el propio
+    nombre si ya parece una sigla (una palabra de 2 a 8 letras en mayúsculas). 'palabras' evita
+    volver a calcular `tokens(nombre)`."""
+    crudo = (nombre or "").strip()
+    if _SIGLA.fullmatch(crudo):
+        return normalizar_nombre(crudo)
+    palabras = tokens(crudo) if palabras is None else palabras
+    return "".join(p[0] for p in palabras) if len(palabras) >= 3 else ""
+
+
+# ----------------------------------------------------------------------------- geografía
+
+def geohash(lat: float, lng: float, precision: int = PRECISION_GEOHASH) -> str:
+    rangos = [[-90.0, 90.0], [-180.0, 180.0]]
+    bits, bit, par, salida = 0, 0, True, []
+    while len(salida) < precision:
+        rango, valor = (rangos[1], lng) if par else (rangos[0], lat)
+        medio = (rango[0] + rango[1]) / 2
+        if valor >= medio:
+            bits = bits * 2 + 1
+            rango[0] = medio
+        else:
+            bits *= 2
+            rango[1] = medio
+        par = not par
+        bit += 1
+        if bit == 5:
+            salida.append(_BASE32[bits])
+            bits = bit = 0
+    return "".join(salida)
+
+
+def celda(lat: float, lng: float, precision: int = PRECISION_GEOHASH) -> tuple:
+    """Celda geohash del punto como par de enteros (columna, fila): misma partición que `geohash`,
+    pero las vecinas se obtienen sumando ±1."""
+    bits = 5 * precision
+    filas, columnas = 2 ** (bits // 2), 2 ** ((bits + 1) // 2)
+    return (min(columnas - 1, int((lng + 180.0) / 360.0 * columnas)), min(filas - 1, max(0, int((lat + 90.0) / 180.0 * filas))))
+
+
+def celdas_vecinas(lat: float, lng: float, precision: int = PRECISION_GEOHASH) -> set:
+    """La celda del punto y sus 8 vecinas (la longitud da la vuelta en ±180°)."""
+    columnas = 2 ** ((5 * precision + 1) // 2)
+    x, y = celda(lat, lng, precision)
+    return {((x + dx) % columnas, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+
+
+def distancia_m(a: dict, b: dict) -> float:
+    """Distancia haversine en metros entre dos puntos {"lat", "lng"}."""
+    p1, p2 = math.radians(a["lat"]), math.radians(b["lat"])
+    dp, dl = p2 - p1, math.radians(b["lng"] - a["lng"])
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371000.0 * math.asin(min(1.0, math.sqrt(h)))
+
+
+# ----------------------------------------------------------------------------- similitud
+
+class _Rasgos:
+    """Lo que se compara de un nombre, calculado una sola vez por registro."""
+    __slots__ = ("tokens", "conjunto", "ordenado", "sigla")
+
+    def __init__(self, nombre: str, tipo: str):
+        self.tokens = tokens(nombre, tipo)
+        self.conjunto = frozenset(self.tokens)
+        self.ordenado = " ".join(sorted(self.tokens))
+        self.sigla = siglas(nombre, self.tokens if tipo == "escuelas" else None)
+
+
+def _similitud(a: _Rasgos, b: _Rasgos, minimo: float = 0.0) -> float:
+    if a.conjunto == b.conjunto:
+        return 1.0
+    if (len(a.tokens) == 1 and a.tokens[0] == b.sigla) or (len(b.tokens) == 1 and b.tokens[0] == a.sigla):
+        return 1.0
+    if not a.conjunto or not b.conjunto:
+        return 0.0
+    # Parecido de caracteres (erratas) promediado con Jaccard de tokens (una palabra distinta pesa)
+    jaccard = len(a.conjunto & b.conjunto) / len(a.conjunto | b.conjunto)
+    if (1 + jaccard) / 2 < minimo:
+        return 0.0  # ni con caracteres idénticos alcanzaría el mínimo: se evita SequenceMatcher
+    return (SequenceMatcher(None, a.ordenado, b.ordenado, autojunk=False).ratio() + jaccard) / 2
+
+
+def similitud(a: str, b: str, tipo: str = "escuelas") -> float:
+    """1.0 si coinciden los tokens normalizados o uno es la sigla del otro; si no, el promedio del
+    parecido de caracteres de los tokens ordenados y del Jaccard de tokens."""
+    return _similitud(_Rasgos(a, tipo), _Rasgos(b, tipo))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.padre = list(range(n))
+
+    def raiz(self, i: int) -> int:
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, i: int, j: int) -> None:
+        ri, rj = self.raiz(i), self.raiz(j)
+        if ri != rj:
+            # La raíz queda en el índice menor: los existentes (al inicio) representan a su grupo
+            self.padre[max(ri, rj)] = min(ri, rj)
+
+
+# ----------------------------------------------------------------------------- agrupación
+
+# Celda de bloqueo donde se indexan además los registros con coordenadas (ver `agrupar`)
+_CUALQUIER_CELDA = "*"
+
+
+def _puntos(registro: dict) -> list:
+    return [p for p in registro.get("ubicacion") or [] if p and p.get("lat") is not None and p.get("lng") is not None]
+
+
+def _cerca(pa: list, pb: list, radio_m: float) -> bool:
+    if not pa or not pb:
+        return True  # sin coordenadas decide solo el nombre
+    return any(distancia_m(x, y) <= radio_m for x in pa for y in pb)
+
+
+def agrupar(registros: Sequence[dict], tipo: str, umbral: float = UMBRAL, radio_m: float = RADIO_M,
+            max_bloque: int = 500, estadisticas: Optional[dict] = None) -> List[List[int]]:
+    """
+    Índices de 'registros' agrupados por duplicado (cada registro necesita "nombre"; las escuelas
+    además "ubicacion": [{"lat", "lng"}]). Los grupos conservan el orden de aparición.
+    Cada registro se compara a lo sumo con 'max_bloque' candidatos por clave.
+    """
+    rasgos = [_Rasgos(r.get("nombre") or "", tipo) for r in registros]
+    frecuencia = Counter(t for x in rasgos for t in x.conjunto)
+    espacial = tipo == "escuelas"
+
+    indice: Dict[tuple, List[int]] = defaultdict(list)
+    uf = _UnionFind(len(registros))
+    comparaciones = 0
+    for i, r in enumerate(registros):
+        x = rasgos[i]
+        # Tokens más raros (los casi universales no sirven como bloque) + siglas
+        claves = [t for t in sorted(x.conjunto, key=lambda t: (frecuencia[t], t)) if frecuencia[t] <= max_bloque]
+        claves = indexar = claves[:BLOQUES_POR_REGISTRO]
+        # Siglas en dos espacios: un nombre largo busca las palabras sueltas iguales a su sigla y
+        # viceversa, sin comparar entre sí todos los nombres largos con la misma sigla
+        if len(x.tokens) == 1:
+            claves, indexar = claves + ["s:" + x.tokens[0]], indexar + ["a:" + x.tokens[0]]
+        elif x.sigla:
+            claves, indexar = claves + ["a:" + x.sigla], indexar + ["s:" + x.sigla]
+        puntos = _puntos(r) if espacial else []
+        # Sin coordenadas el registro vive en la celda None, que se consulta desde cualquier celda; con
+        # coordenadas vive en sus celdas y en _CUALQUIER_CELDA, que solo consultan los que no tienen
+        # (así el resultado no depende del orden de llegada y el bloqueo espacial se mantiene)
+        if puntos:
+            propias = {celda(p["lat"], p["lng"]) for p in puntos} | {_CUALQUIER_CELDA}
+            consultar = set().union(*(celdas_vecinas(p["lat"], p["lng"]) for p in puntos)) | {None}
+        else:
+            propias, consultar = {None}, {None, _CUALQUIER_CELDA}
+
+        candidatos = set()
+        for clave in claves:
+            for c in consultar:
+                bloque = indice.get((clave, c))
+                if bloque:
+                    candidatos.update(bloque[-max_bloque:])
+        raiz = uf.raiz(i)
+        for j in sorted(candidatos):
+            if uf.raiz(j) == raiz:
+                continue
+            comparaciones += 1
+            if _similitud(x, rasgos[j], umbral) >= umbral and (not espacial or _cerca(puntos, _puntos(registros[j]), radio_m)):
+                uf.unir(i, j)
+                raiz = uf.raiz(i)
+        for clave in indexar:
+            for c in propias:
+                indice[(clave, c)].append(i)
+
+    grupos: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(registros)):
+        grupos[uf.raiz(i)].append(i)
+    if estadisticas is not None:
+        estadisticas.update({"registros": len(registros), "comparaciones": comparaciones, "grupos": len(grupos)})
+    return list(grupos.values())
+
+
+def fusionar(grupo: Sequence[dict], tipo: str) -> dict:
+    """Un registro por grupo: el primero como base, con el nombre más largo (no la sigla), la
+    descripción más completa y, en escuelas, todos los puntos de `ubicacion` sin repetir."""
+    base = dict(grupo[0])
+    base["nombre"] = max((r.get("nombre") or "" for r in grupo), key=len)
+    if tipo == "carreras":
+        base["descripcion"] = max((r.get("descripcion") or "" for r in grupo), key=len)
+        base["main_area"] = next((r["main_area"] for r in grupo if r.get("main_area")), base.get("main_area", ""))
+    else:
+        puntos, vistos = [], set()
+        for r in grupo:
+            for p in _puntos(r):
+                clave = (round(p["lat"], 5), round(p["lng"], 5))
+                if clave not in vistos:
+                    vistos.add(clave)
+                    puntos.append({"lat": p["lat"], "lng": p["lng"]})
+        base["ubicacion"] = puntos
+        base["type"] = next((r["type"] for r in grupo if r.get("type")), base.get("type"))
+    return base
+
+
+@dataclass
+class ResultadoDedup:
+    nuevos: List[dict] = field(default_factory=list)
+    # _id del documento existente -> registro fusionado (existente + duplicados entrantes)
+    actualizaciones: Dict[object, dict] = field(default_factory=dict)
+    descartados: int = 0
+    estadisticas: dict = field(default_factory=dict)
+
+
+def deduplicar(registros: Iterable[dict], tipo: str, existentes: Sequence[dict] = (), umbral: float = UMBRAL,
+               radio_m: float = RADIO_M, max_bloque: int = 500) -> ResultadoDedup:
+    """
+    Deduplica 'registros' entre sí y contra 'existentes' (documentos con "_id", ver
+    `existentes_en_mongo`). Un grupo sin existentes produce un registro nuevo fusionado; uno con
+    existentes produce una actualización del primero (los demás existentes del grupo no se tocan).
+    """
+    existentes = list(existentes)
+    todos = existentes + list(registros)
+    resultado = ResultadoDedup()
+    grupos = agrupar(todos, tipo, umbral, radio_m, max_bloque, resultado.estadisticas)
+    for grupo in grupos:
+        entrantes = [i for i in grupo if i >= len(existentes)]
+        if not entrantes:
+            continue
+        resultado.descartados += len(entrantes) - (0 if grupo[0] < len(existentes) else 1)
+        miembros = [todos[i] for i in grupo]
+        if grupo[0] < len(existentes):
+            fusionado = fusionar(miembros, tipo)
+            # El nombre del existente se conserva: otras colecciones lo referencian por nombre
+            fusionado["nombre"] = todos[grupo[0]]["nombre"]
+            resultado.actualizaciones[todos[grupo[0]]["_id"]] = fusionado
+        else:
+            resultado.nuevos.append(fusionar(miembros, tipo))
+    return resultado
+
+
+def existentes_en_mongo(tipo: str) -> List[dict]:
+    """Documentos actuales de la colección del tipo, solo con los campos que usa la deduplicación."""
+    from api.models import Carrera, Escuela
+
+    modelo, campos = {"carreras": (Carrera, ("nombre", "descripcion", "main_area")),
+                      "escuelas": (Escuela, ("nombre", "ubicacion", "type", "estado"))}[tipo]
+    return list(modelo._get_collection().find({}, {c: 1 for c in campos}))
+
+
+def aplicar_en_mongo(resultado: ResultadoDedup, tipo: str, lote: int = 500) -> Dict[str, int]:
+    """Inserta los registros nuevos y actualiza los existentes que absorbieron duplicados (carreras:
+    descripción y área; escuelas: se agregan los puntos de `ubicacion`), por lotes de 'lote'
+    operaciones. Solo se escriben campos del modelo (no los que empiezan con '_'). En escuelas se
+    asigna `estado` (api/estados.py) y se refresca el agregado por estado de los afectados. Todas
+    las escrituras llevan marcas de cambio (api/models/rastreo.py) para el feed /cambios."""
+    from datetime import datetime, timezone
+
+    from pymongo import InsertOne, UpdateOne
+
+    from api.escuelas_por_estado import refrescar
+    from api.estados import estado_de_escuela
+    from api.models import Carrera, Escuela
+    from api.models.rastreo import con_sellos, secuencia_reservada, sellar_documentos
+
+    modelo = {"carreras": Carrera, "escuelas": Escuela}[tipo]
+    campos = set(modelo._fields) - {"id"}
+    vacios = {"carreras": {"videos": [], "sub_areas": []}, "escuelas": {"carreras": []}}[tipo]
+    actualizables = ("descripcion", "main_area")
+
+    estados = set()
+    if tipo == "escuelas":
+        for r in [*resultado.nuevos, *resultado.actualizaciones.values()]:
+            r["estado"] = estado_de_escuela(r.get("estado"), r.get("ubicacion"))
+            estados.add(r["estado"])
+
+    # (documento, None) para inserciones y (filtro, cambio) para actualizaciones
+    pendientes = [({**vacios, **{k: v for k, v in r.items() if k in campos and v not in ("", None)}}, None)
+                  for r in resultado.nuevos]
+    for _id, r in resultado.actualizaciones.items():
+        if tipo == "escuelas":
+            # $addToSet en lugar de reemplazar la lista: no pisa puntos agregados por otra carga
+            # El filtro descarta documentos que ya tienen todos los puntos: sin cambio no hay marca nueva
+            if r.get("ubicacion"):
+                pendientes.append(({"_id": _id, "ubicacion": {"$not": {"$all": r["ubicacion"]}}},
+                                   {"$addToSet": {"ubicacion": {"$each": r["ubicacion"]}}}))
+            # El estado solo se completa si el documento no tenía
+            if r["estado"]:
+                pendientes.append(({"_id": _id, "estado": None}, {"$set": {"estado": r["estado"]}}))
+            continue
+        cambios = {k: r[k] for k in actualizables if r.get(k)}
+        if cambios:
+            pendientes.append(({"_id": _id, "$or": [{k: {"$ne": v}} for k, v in cambios.items()]}, {"$set": cambios}))
+    coleccion = modelo._get_collection()
+    cuenta = {"insertados": 0, "actualizados": 0}
+    for inicio in range(0, len(pendientes), lote):
+        bloque = pendientes[inicio:inicio + lote]
+        # Una reserva por lote: mientras se escribe retiene el feed /cambios (api/models/rastreo.py),
+        # así que una carga grande no lo detiene completa, solo lo que dura cada bulk_write
+        ahora = datetime.now(timezone.utc)
+        with secuencia_reservada(len(bloque)) as seq:
+            nuevos = sellar_documentos([d for d, cambio in bloque if cambio is None], seq, ahora)
+            actualizaciones = [(filtro, cambio) for filtro, cambio in bloque if cambio is not None]
+            operaciones = [InsertOne(d) for d in nuevos] + [
+                UpdateOne(filtro, con_sellos(cambio, seq + len(nuevos) + i, ahora))
+                for i, (filtro, cambio) in enumerate(actualizaciones)]
+            res = coleccion.bulk_write(operaciones, ordered=False)
+        cuenta["insertados"] += res.inserted_count
+        cuenta["actualizados"] += res.modified_count
+    if estados:
+        refrescar(estados)
+    return cuenta
@@ -0,0 +1,235 @@
+"""distribucion.py
+Snapshot columnar de `Formulario.resultados` para analítica de distribución.
+
+En lugar de recorrer la colección de formularios en cada petición, este módulo mantiene
+en memoria (por proceso) dos arreglos NumPy alineados:
+- valores (float64): resultado de cada formulario con resultado numérico.
+- codigos (int32): código entero de la subárea del formulario.
+
+Los valores se ordenan por código de subárea, de modo que los resultados de una subárea
+son un slice contiguo. Agrupar por carrera o por main_area consiste en concatenar los
+slices de sus subáreas y calcular percentiles/histogramas vectorizados.
+
+Actualización:
+- Refresco incremental cada DISTRIBUCION_REFRESCO_SEGUNDOS: solo se leen formularios con
+  `_id` mayor al último visto (los ObjectId crecen con la inserción).
+- Reconstrucción completa cada DISTRIBUCION_RECONSTRUCCION_SEGUNDOS: recoge cambios sobre
+  documentos existentes (p.ej. recalificaciones) y cambios del catálogo de carreras.
+- Una recarga del catálogo (cambio de `version_catalogo`, api/catalogo.py) también fuerza la
+  reconstrucción completa.
+- El estado se reemplaza de forma atómica; las lecturas nunca esperan a una recarga.
+- Los resúmenes por combinación de parámetros se cachean por versión del snapshot, solo los
+  RESUMENES_MAXIMO más recientes (LRU): las claves vienen de parámetros de la petición.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from api.catalogo import version_catalogo
+from api.models.carrera import Carrera
+from api.models.formulario import Formulario
+from project.mongo import coleccion_lectura
+
+PERCENTILES_POR_DEFECTO = (10, 25, 50, 75, 90)
+PERCENTILES_MAXIMO = 20
+BINS_POR_DEFECTO = 10
+RESUMENES_MAXIMO = 32
+
+
+@dataclass
+class _Estado:
+    """Estado inmutable de un snapshot; se sustituye completo en cada refresco."""
+    valores: np.ndarray
+    codigos: np.ndarray
+    subareas: Dict[str, int]
+    carreras: List[Tuple[str, Optional[str], List[str]]]
+    ultimo_id: object = None
+    version: int = 0
+    actualizado: Optional[datetime] = None
+    ordenados: np.ndarray = field(init=False)
+    limites: np.ndarray = field(init=False)
+    resumenes: "OrderedDict[tuple, dict]" = field(default_factory=OrderedDict)
+
+    def __post_init__(self):
+        orden = np.argsort(self.codigos, kind="stable")
+        self.ordenados = self.valores[orden]
+        self.limites = np.searchsorted(
+            self.codigos[orden], np.arange(len(self.subareas) + 1), side="left"
+        )
+
+
+def _estado_vacio() -> _Estado:
+    return _Estado(np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int32), {}, [])
+
+
+class SnapshotResultados:
+    """Snapshot en memoria de resultados por subárea con refresco incremental."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_resumenes = threading.Lock()
+        self._estado = _estado_vacio()
+        self._ultimo_refresco = 0.0
+        self._ultima_reconstruccion = 0.0
+        self._version_catalogo: Optional[int] = None
+
+    # ------------------------------------------------------------------ carga
+    @staticmethod
+    def _leer_formularios(subareas: Dict[str, int], desde_id=None):
+        filtro = {"resultados": {"$type": "number"}}
+        if desde_id is not None:
+            filtro["_id"] = {"$gt": desde_id}
+        cursor = coleccion_lectura(Formulario).find(
+            filtro, {"resultados": 1, "subarea": 1}, batch_size=10000
+        )
+        valores: List[float] = []
+        codigos: List[int] = []
+        ultimo_id = desde_id
+        for doc in cursor:
+            nombre = (doc.get("subarea") or "").strip()
+            codigo = subareas.setdefault(nombre, len(subareas))
+            valores.append(doc["resultados"])
+            codigos.append(codigo)
+            if ultimo_id is None or doc["_id"] > ultimo_id:
+                ultimo_id = doc["_id"]
+        return np.asarray(valores, dtype=np.float64), np.asarray(codigos, dtype=np.int32), ultimo_id
+
+    @staticmethod
+    def _leer_catalogo() -> List[Tuple[str, Optional[str], List[str]]]:
+        return [
+            (c.nombre, c.main_area, [s.strip() for s in (c.sub_areas or []) if isinstance(s, str)])
+            for c in Carrera.objects.only("nombre", "main_area", "sub_areas")
+        ]
+
+    def reconstruir(self) -> None:
+        """Relee todos los formularios y el catálogo de carreras."""
+        with self._lock:
+            self._version_catalogo = version_catalogo()
+            subareas: Dict[str, int] = {}
+            valores, codigos, ultimo_id = self._leer_formularios(subareas)
+            self._estado = _Estado(
+                valores, codigos, subareas, self._leer_catalogo(),
+                ultimo_id=ultimo_id,
+                version=self._estado.version + 1,
+                actualizado=datetime.now(timezone.utc),
+            )
+            self._ultima_reconstruccion = self._ultimo_refresco = time.monotonic()
+
+    def refrescar(self) -> None:
+        """Agrega al snapshot solo los formularios insertados desde el último refresco."""
+        with self._lock:
+            previo = self._estado
+            subareas = dict(previo.subareas)
+            valores, codigos, ultimo_id = self._leer_formularios(subareas, desde_id=previo.ultimo_id)
+            self._ultimo_refresco = time.monotonic()
+            if not len(valores):
+                return
+            self._estado = _Estado(
+                np.concatenate([previo.valores, valores]),
+                np.concatenate([previo.codigos, codigos]),
+                subareas, previo.carreras,
+                ultimo_id=ultimo_id,
+                version=previo.version + 1,
+                actualizado=datetime.now(timezone.utc),
+            )
+
+    def asegurar_vigente(self) -> None:
+        """Refresca o reconstruye según los intervalos configurados."""
+        if self._estado.version and self._lock.locked():
+            # Otra hebra ya está recargando; se sirve el snapshot vigente sin esperar
+            return
+        ahora = time.monotonic()
+        reconstruccion = getattr(settings, "DISTRIBUCION_RECONSTRUCCION_SEGUNDOS", 300)
+        refresco = getattr(settings, "DISTRIBUCION_REFRESCO_SEGUNDOS", 5)
+        if (not self._ultima_reconstruccion or ahora - self._ultima_reconstruccion >= reconstruccion
+                or version_catalogo() != self._version_catalogo):
+            self.reconstruir()
+        elif ahora - self._ultimo_refresco >= refresco:
+            self.refrescar()
+
+    def invalidar(self) -> None:
+        """Fuerza una reconstrucción completa en la siguiente consulta."""
+        self._ultima_reconstruccion = 0.0
+
+    # ---------------------------------------------------------------- cálculo
+    @staticmethod
+    def _valores_de(estado: _Estado, subareas) -> np.ndarray:
+        codigos = sorted({estado.subareas[s] for s in subareas if s in estado.subareas})
+        if not codigos:
+            return np.empty(0, dtype=np.float64)
+        return np.concatenate([estado.ordenados[estado.limites[c]:estado.limites[c + 1]] for c in codigos])
+
+    @staticmethod
+    def _estadisticas(valores: np.ndarray, percentiles: Sequence[float], bordes: np.ndarray) -> dict:
+        if not len(valores):
+            return {
+                "n": 0,
+                "media": None,
+                "min": None,
+                "max": None,
+                "percentiles": {f"p{p:g}": None for p in percentiles},
+                "histograma": [0] * (len(bordes) - 1),
+            }
+        cuantiles = np.percentile(valores, percentiles)
+        conteos, _ = np.histogram(valores, bins=bordes)
+        return {
+            "n": int(len(valores)),
+            "media": float(valores.mean()),
+            "min": float(valores.min()),
+            "max": float(valores.max()),
+            "percentiles": {f"p{p:g}": float(q) for p, q in zip(percentiles, cuantiles)},
+            "histograma": conteos.tolist(),
+        }
+
+    def resumen(self, agrupar: Sequence[str], percentiles: Sequence[float], bins: int) -> dict:
+        """Calcula (o recupera del caché de la versión actual) el resumen de distribución."""
+        estado = self._estado
+        clave = (tuple(agrupar), tuple(percentiles), bins)
+        with self._lock_resumenes:
+            cacheado = estado.resumenes.get(clave)
+            if cacheado is not None:
+                estado.resumenes.move_to_end(clave)
+                return cacheado
+
+        if len(estado.ordenados):
+            bordes = np.histogram_bin_edges(estado.ordenados, bins=bins)
+        else:
+            bordes = np.linspace(0.0, 1.0, bins + 1)
+
+        data = {
+            "total": int(len(estado.ordenados)),
+            "actualizado": estado.actualizado.isoformat() if estado.actualizado else None,
+            "bins": bordes.tolist(),
+        }
+        if "carrera" in agrupar:
+            data["por_carrera"] = [
+                {"carrera": nombre, **self._estadisticas(self._valores_de(estado, subareas), percentiles, bordes)}
+                for nombre, _, subareas in estado.carreras
+            ]
+        if "main_area" in agrupar:
+            por_area: Dict[str, set] = {}
+            for _, area, subareas in estado.carreras:
+                if area:
+                    por_area.setdefault(area, set()).update(subareas)
+            data["por_main_area"] = [
+                {"main_area": area, **self._estadisticas(self._valores_de(estado, subareas), percentiles, bordes)}
+                for area, subareas in sorted(por_area.items())
+            ]
+
+        with self._lock_resumenes:
+            estado.resumenes[clave] = data
+            while len(estado.resumenes) > RESUMENES_MAXIMO:
+                estado.resumenes.popitem(last=False)
+        return data
+
+
+# Instancia por proceso compartida por las vistas
+snapshot_resultados = SnapshotResultados()
@@ -0,0 +1,89 @@
+"""escuelas_por_estado.py
+Agregado precalculado de escuelas por estado y tipo (colección escuelas_por_estado).
+
+Cada documento EscuelasPorEstado guarda, para un estado, el total de escuelas y por tipo
+(publica/privada) el total y las ESCUELAS_POR_ESTADO_TOP con más carreras ofrecidas. La vista
+GET /escuelas/por-estado solo lee esta colección (32 documentos como máximo), en lugar de que el
+cliente descargue todas las escuelas para contarlas.
+
+Refresco:
+- `refrescar(estados)` recalcula únicamente los estados indicados; lo invocan las rutas de
+  escritura de escuelas (/bulk/escuelas, dedup.aplicar_en_mongo, recolectar --mongo).
+- `refrescar()` sin argumentos recalcula todo y elimina estados que se quedaron sin escuelas
+  (tras generar_datos o `python manage.py asignar_estados`).
+- Dos refrescos concurrentes del mismo estado no se pisan al revés: cada escritura solo aplica si
+  el documento guardado es anterior (`actualizado`) al inicio de sus agregaciones.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from api.models.escuela import Escuela, EscuelasPorEstado
+
+TIPOS = ("publica", "privada")
+
+
+def _top(coleccion, estado: str, tipo: str, n: int) -> List[dict]:
+    return list(coleccion.aggregate([
+        {"$match": {"estado": estado, "type": tipo}},
+        {"$project": {"_id": 0, "nombre": 1, "costo": 1, "carreras": {"$size": {"$ifNull": ["$carreras", []]}}}},
+        {"$sort": {"carreras": -1, "nombre": 1}},
+        {"$limit": n},
+    ]))
+
+
+def _totales(coleccion, estados: Optional[List[str]]) -> Dict[str, Dict[str, int]]:
+    filtro = {"estado": {"$in": estados}} if estados is not None else {"estado": {"$nin": [None, ""]}}
+    totales: Dict[str, Dict[str, int]] = {}
+    for fila in coleccion.aggregate([
+        {"$match": filtro},
+        {"$group": {"_id": {"estado": "$estado", "type": "$type"}, "total": {"$sum": 1}}},
+    ]):
+        totales.setdefault(fila["_id"]["estado"], {})[fila["_id"].get("type")] = fila["total"]
+    return totales
+
+
+def refrescar(estados: Optional[Iterable[Optional[str]]] = None) -> int:
+    """Recalcula el agregado de `estados` (todos si es None). Devuelve los estados escritos."""
+    coleccion = Escuela._get_collection()
+    destino = EscuelasPorEstado._get_collection()
+    n = getattr(settings, "ESCUELAS_POR_ESTADO_TOP", 10)
+
+    objetivo = None if estados is None else sorted({e for e in estados if e})
+    if objetivo == []:
+        return 0
+    # Antes de agregar: un refresco que empezó después (datos más nuevos) no se sobrescribe
+    ahora = datetime.now(timezone.utc)
+    totales = _totales(coleccion, objetivo)
+
+    operaciones = []
+    for estado in objetivo if objetivo is not None else sorted(totales):
+        por_tipo_total = totales.get(estado, {})
+        if not por_tipo_total:
+            operaciones.append(DeleteOne({"_id": estado, "actualizado": {"$lt": ahora}}))
+            continue
+        por_tipo = {
+            tipo: {"total": por_tipo_total.get(tipo, 0),
+                   "top": _top(coleccion, estado, tipo, n) if por_tipo_total.get(tipo) else []}
+            for tipo in TIPOS
+        }
+        operaciones.append(ReplaceOne(
+            {"_id": estado, "actualizado": {"$lt": ahora}},
+            {"total": sum(por_tipo_total.values()), "por_tipo": por_tipo, "actualizado": ahora},
+            upsert=True,
+        ))
+    if objetivo is None:
+        destino.delete_many({"_id": {"$nin": sorted(totales)}, "actualizado": {"$lt": ahora}})
+    if operaciones:
+        try:
+            destino.bulk_write(operaciones, ordered=False)
+        except BulkWriteError as e:
+            # Clave duplicada: el upsert no coincidió porque otro refresco más nuevo ya escribió ese estado
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+    return sum(1 for op in operaciones if isinstance(op, ReplaceOne))
@@ -0,0 +1,103 @@
+"""estados.py
+Los 32 estados de México: nombres canónicos, ciudades de referencia con coordenadas y población.
+
+- `normalizar_estado`: nombre libre ("yucatan", "CDMX", "Edo. Méx.") -> nombre canónico o None.
+- `estado_por_coordenadas`: estado de un punto por la ciudad de referencia más cercana (sin
+  polígonos de límites estatales en el repositorio). Es exacto lejos de las fronteras y puede
+  equivocarse cerca de ellas: cuando la fuente ya conoce el estado (Places se consulta por estado,
+  /bulk/escuelas acepta "estado") se usa ese valor y esto queda como respaldo.
+"""
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from typing import Optional
+
+# (estado, ciudades [(nombre, lat, lng)], población en millones)
+ESTADOS = (
+    ("Aguascalientes", (("Aguascalientes", 21.8853, -102.2916),), 1.4),
+    ("Baja California", (("Tijuana", 32.5149, -117.0382), ("Mexicali", 32.6245, -115.4523)), 3.8),
+    ("Baja California Sur", (("La Paz", 24.1426, -110.3128),), 0.8),
+    ("Campeche", (("Campeche", 19.8301, -90.5349),), 0.9),
+    ("Chiapas", (("Tuxtla Gutiérrez", 16.7516, -93.1029), ("Tapachula", 14.9031, -92.2575)), 5.5),
+    ("Chihuahua", (("Chihuahua", 28.6353, -106.0889), ("Ciudad Juárez", 31.6904, -106.4245)), 3.7),
+    ("Ciudad de México", (("Ciudad de México", 19.4326, -99.1332),), 9.2),
+    ("Coahuila", (("Saltillo", 25.4232, -100.9924), ("Torreón", 25.5428, -103.4068)), 3.1),
+    ("Colima", (("Colima", 19.2452, -103.7241),), 0.7),
+    ("Durango", (("Durango", 24.0277, -104.6532),), 1.8),
+    ("Estado de México", (("Toluca", 19.2826, -99.6557), ("Ecatepec", 19.6018, -99.0507)), 16.9),
+    ("Guanajuato", (("León", 21.1250, -101.6860), ("Guanajuato", 21.0190, -101.2574)), 6.2),
+    ("Guerrero", (("Chilpancingo", 17.5515, -99.5006), ("Acapulco", 16.8531, -99.8237)), 3.5),
+    ("Hidalgo", (("Pachuca", 20.1011, -98.7591),), 3.1),
+    ("Jalisco", (("Guadalajara", 20.6597, -103.3496), ("Puerto Vallarta", 20.6534, -105.2253)), 8.3),
+    ("Michoacán", (("Morelia", 19.7060, -101.1950), ("Uruapan", 19.4115, -102.0580)), 4.7),
+    ("Morelos", (("Cuernavaca", 18.9242, -99.2216),), 2.0),
+    ("Nayarit", (("Tepic", 21.5042, -104.8946),), 1.2),
+    ("Nuevo León", (("Monterrey", 25.6866, -100.3161),), 5.8),
+    ("Oaxaca", (("Oaxaca de Juárez", 17.0732, -96.7266),), 4.1),
+    ("Puebla", (("Puebla", 19.0414, -98.2063), ("Tehuacán", 18.4617, -97.3928)), 6.6),
+    ("Querétaro", (("Querétaro", 20.5888, -100.3899),), 2.4),
+    ("Quintana Roo", (("Cancún", 21.1619, -86.8515), ("Chetumal", 18.5001, -88.2961)), 1.9),
+    ("San Luis Potosí", (("San Luis Potosí", 22.1565, -100.9855),), 2.8),
+    ("Sinaloa", (("Culiacán", 24.8091, -107.3940), ("Mazatlán", 23.2494, -106.4111)), 3.0),
+    ("Sonora", (("Hermosillo", 29.0729, -110.9559), ("Ciudad Obregón", 27.4828, -109.9304)), 2.9),
+    ("Tabasco", (("Villahermosa", 17.9892, -92.9475),), 2.4),
+    ("Tamaulipas", (("Ciudad Victoria", 23.7369, -99.1411), ("Reynosa", 26.0508, -98.2979)), 3.5),
+    ("Tlaxcala", (("Tlaxcala", 19.3182, -98.2375),), 1.3),
+    ("Veracruz", (("Xalapa", 19.5438, -96.9102), ("Veracruz", 19.1738, -96.1342)), 8.1),
+    ("Yucatán", (("Mérida", 20.9674, -89.5926),), 2.3),
+    ("Zacatecas", (("Zacatecas", 22.7709, -102.5832),), 1.6),
+)
+
+NOMBRES = tuple(nombre for nombre, _, _ in ESTADOS)
+
+# Puntos a más de esta distancia de toda ciudad de referencia se consideran fuera de México
+DISTANCIA_MAXIMA_KM = 500.0
+
+_ALIAS = {
+    "cdmx": "Ciudad de México", "df": "Ciudad de México", "distrito federal": "Ciudad de México",
+    "mexico": "Estado de México", "edomex": "Estado de México", "edo mex": "Estado de México",
+    "coahuila de zaragoza": "Coahuila", "michoacan de ocampo": "Michoacán", "veracruz de ignacio de la llave": "Veracruz",
+}
+
+
+def _clave(texto: str) -> str:
+    plano = unicodedata.normalize("NFKD", (texto or "").casefold()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^\w\s]", " ", plano).split())
+
+
+_POR_CLAVE = {**{_clave(n): n for n in NOMBRES}, **_ALIAS}
+_REFERENCIAS = [(estado, math.radians(lat), math.radians(lng)) for estado, ciudades, _ in ESTADOS for _, lat, lng in ciudades]
+
+
+def normalizar_estado(texto: Optional[str]) -> Optional[str]:
+    if not texto:
+        return None
+    clave = _clave(texto)
+    return _POR_CLAVE.get(clave) or _POR_CLAVE.get(re.sub(r"^(estado de|edo de|edo) ", "", clave))
+
+
+def estado_por_coordenadas(lat: float, lng: float) -> Optional[str]:
+    """Estado de la ciudad de referencia más cercana (None si está a más de DISTANCIA_MAXIMA_KM)."""
+    p1, l1 = math.radians(lat), math.radians(lng)
+    mejor, distancia = None, float("inf")
+    for estado, p2, l2 in _REFERENCIAS:
+        h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin((l2 - l1) / 2) ** 2
+        d = 2 * 6371.0 * math.asin(min(1.0, math.sqrt(h)))
+        if d < distancia:
+            mejor, distancia = estado, d
+    return mejor if distancia <= DISTANCIA_MAXIMA_KM else None
+
+
+def estado_de_escuela(estado: Optional[str], ubicacion) -> Optional[str]:
+    """Estado declarado (normalizado) o, si no hay, el del primer punto de `ubicacion`."""
+    normalizado = normalizar_estado(estado)
+    if normalizado:
+        return normalizado
+    for punto in ubicacion or []:
+        lat = punto.get("lat") if isinstance(punto, dict) else getattr(punto, "lat", None)
+        lng = punto.get("lng") if isinstance(punto, dict) else getattr(punto, "lng", None)
+        if lat is not None and lng is not None:
+            return estado_por_coordenadas(lat, lng)
+    return None
@@ -0,0 +1,176 @@
+"""http_asincrono.py
+Cliente HTTP asíncrono y cortés para los recolectores de datos (api/carreras_sources.py).
+
+- `ClienteCosecha` comparte un `httpx.AsyncClient` (pool con keep-alive) entre todas las tareas y
+  acota las peticiones simultáneas con un semáforo ('concurrencia').
+- `LimitadorPorHost` espacia las peticiones a cada host ('tasa' por segundo, configurable por
+  host): las tareas reservan turnos consecutivos, así que el ritmo se respeta aunque muchas
+  tareas pidan a la vez. Un 429/503 pausa al host completo, no solo a la tarea que lo recibió.
+- Reintentos con backoff exponencial y jitter ante errores de transporte, 429 y 5xx, respetando
+  `Retry-After`. Los demás 4xx no se reintentan (ErrorCosecha).
+- Caché opcional de respuestas (api/cache_http.py): los aciertos no consumen turno del limitador
+  ni cupo de concurrencia; en modo offline una respuesta ausente es un ErrorCosecha.
+
+Uso:
+
+    async with ClienteCosecha(concurrencia=8, tasa_por_host=5) as cliente:
+        datos = await cliente.get_json("https://es.wikipedia.org/w/api.php", params={...})
+"""
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from api.cache_http import CacheHTTP, clave
+
+ESTADOS_REINTENTABLES = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "cardic-system/1.0 (licenciaturas; contacto: ejemplo@example.com)"
+
+
+class ErrorCosecha(Exception):
+    """Respuesta no reintentable o reintentos agotados."""
+
+    def __init__(self, mensaje: str, estado: Optional[int] = None):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos (acepta segundos o fecha HTTP)."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LimitadorPorHost:
+    """Espaciado mínimo entre peticiones a un mismo host (1/tasa segundos)."""
+
+    def __init__(self, tasa: float, tasas: Optional[Dict[str, float]] = None):
+        self.tasa = tasa
+        self.tasas = dict(tasas or {})
+        self._siguiente: Dict[str, float] = {}
+
+    def _intervalo(self, host: str) -> float:
+        tasa = self.tasas.get(host, self.tasa)
+        return 1.0 / tasa if tasa and tasa > 0 else 0.0
+
+    async def esperar(self, host: str) -> None:
+        # Sin await entre la lectura y la reserva: el turno es atómico dentro del event loop
+        ahora = time.monotonic()
+        turno = max(ahora, self._siguiente.get(host, 0.0))
+        self._siguiente[host] = turno + self._intervalo(host)
+        if turno > ahora:
+            await asyncio.sleep(turno - ahora)
+
+    def pausar(self, host: str, segundos: float) -> None:
+        self._siguiente[host] = max(self._siguiente.get(host, 0.0), time.monotonic() + segundos)
+
+
+class ClienteCosecha:
+    def __init__(self, concurrencia: int = 8, tasa_por_host: float = 5.0, tasas: Optional[Dict[str, float]] = None,
+                 reintentos: int = 4, backoff: float = 0.5, backoff_max: float = 30.0, timeout: float = 20.0,
+                 headers: Optional[Dict[str, str]] = None, cliente: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[CacheHTTP] = None):
+        self.cache = cache
+        self.limitador = LimitadorPorHost(tasa_por_host, tasas)
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.estadisticas: Counter = Counter()
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._propio = cliente is None
+        self._cliente = cliente or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            limits=httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia),
+            headers={"User-Agent": USER_AGENT, "Accept": "application/json", **(headers or {})},
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self) -> "ClienteCosecha":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.cerrar()
+
+    async def cerrar(self) -> None:
+        if self._propio:
+            await self._cliente.aclose()
+
+    def _espera(self, intento: int) -> float:
+        return min(self.backoff_max, self.backoff * 2 ** intento) * random.uniform(0.5, 1.0)
+
+    async def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                  reintentar_si: Optional[Callable[[httpx.Response], bool]] = None,
+                  guardar_si: Optional[Callable[[httpx.Response], bool]] = None,
+                  ttl: Optional[float] = None) -> httpx.Response:
+        """
+        GET con límite de concurrencia y de tasa por host, y reintentos. 'reintentar_si' permite
+        reintentar respuestas 200 que el servicio marca como transitorias (p.ej. maxlag de MediaWiki);
+        'guardar_si' decide qué respuestas 200 se guardan en la caché (por defecto todas).
+        """
+        clave_peticion = None
+        if self.cache is not None:
+            clave_peticion = clave("GET", url, params)
+            guardada = self.cache.leer(clave_peticion)
+            if guardada is not None:
+                self.estadisticas["cache"] += 1
+                return httpx.Response(guardada.estado, headers=guardada.cabeceras, content=guardada.cuerpo,
+                                      request=httpx.Request("GET", url, params=params))
+            if self.cache.modo == "offline":
+                raise ErrorCosecha(f"GET {url} no está en la caché y el modo es offline.")
+        host = urlsplit(url).netloc
+        for intento in range(self.reintentos + 1):
+            async with self._semaforo:
+                await self.limitador.esperar(host)
+                self.estadisticas["peticiones"] += 1
+                try:
+                    resp = await self._cliente.get(url, params=params, headers=headers)
+                except httpx.TransportError as e:
+                    detalle, espera, estado = f"{type(e).__name__}: {e}", self._espera(intento), None
+                else:
+                    estado = resp.status_code
+                    transitoria = estado in ESTADOS_REINTENTABLES or (
+                        estado == 200 and reintentar_si is not None and reintentar_si(resp)
+                    )
+                    if not transitoria:
+                        if estado >= 400:
+                            raise ErrorCosecha(f"GET {url} respondió {estado}.", estado)
+                        if clave_peticion and estado == 200 and (guardar_si is None or guardar_si(resp)):
+                            self.cache.guardar(clave_peticion, url, estado, dict(resp.headers), resp.content, ttl)
+                        return resp
+                    retry_after = segundos_retry_after(resp.headers.get("Retry-After"))
+                    espera = retry_after if retry_after is not None else self._espera(intento)
+                    if estado in (429, 503) or retry_after is not None:
+                        self.limitador.pausar(host, espera)
+                    detalle = f"estado {estado}"
+            if intento == self.reintentos:
+                self.estadisticas["fallidas"] += 1
+                raise ErrorCosecha(f"GET {url} falló tras {self.reintentos + 1} intentos ({detalle}).", estado)
+            self.estadisticas["reintentos"] += 1
+            await asyncio.sleep(espera)
+        raise AssertionError("inalcanzable")
+
+    async def get_json(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                       reintentar_si: Optional[Callable[[httpx.Response], bool]] = None,
+                       guardar_si: Optional[Callable[[httpx.Response], bool]] = None,
+                       ttl: Optional[float] = None) -> Any:
+        resp = await self.get(url, params=params, headers=headers, reintentar_si=reintentar_si,
+                              guardar_si=guardar_si, ttl=ttl)
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise ErrorCosecha(f"GET {url} no devolvió JSON válido.", resp.status_code) from e
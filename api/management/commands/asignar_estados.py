@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from api.escuelas_por_estado import refrescar
+from api.estados import estado_de_escuela
+from api.models.escuela import Escuela
+from api.models.rastreo import con_sellos, secuencia_reservada
+
+
+class Command(BaseCommand):
+    """
+    python manage.py asignar_estados [--lote N]
+    Llena 'estado' en escuelas existentes que no lo tienen, a partir de su primer punto de
+    ubicacion (api/estados.py), y recalcula completo el agregado de /escuelas/por-estado.
+    """
+    help = "Rellena Escuela.estado desde la ubicación y recalcula escuelas_por_estado."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Operaciones por bulk_write.")
+
+    def handle(self, *args, **options):
+        coleccion = Escuela._get_collection()
+        operaciones, actualizados, sin_estado = [], 0, 0
+        for doc in coleccion.find({"estado": None}, {"ubicacion": 1}):
+            estado = estado_de_escuela(None, doc.get("ubicacion"))
+            if not estado:
+                sin_estado += 1
+                continue
+            operaciones.append(({"_id": doc["_id"]}, {"$set": {"estado": estado}}))
+            if len(operaciones) >= options["lote"]:
+                actualizados += self._escribir(coleccion, operaciones)
+                operaciones = []
+        if operaciones:
+            actualizados += self._escribir(coleccion, operaciones)
+        self.stdout.write(f"Escuelas actualizadas: {actualizados}")
+        if sin_estado:
+            self.stdout.write(self.style.WARNING(f"{sin_estado} escuelas sin ubicación dentro de México quedan sin estado."))
+
+        estados = refrescar()
+        self.stdout.write(self.style.SUCCESS(f"Agregado por estado recalculado ({estados} estados)."))
+
+    @staticmethod
+    def _escribir(coleccion, operaciones) -> int:
+        # Con marcas de cambio para que el feed /cambios entregue el estado nuevo
+        ahora = datetime.now(timezone.utc)
+        with secuencia_reservada(len(operaciones)) as seq:
+            return coleccion.bulk_write([UpdateOne(filtro, con_sellos(cambio, seq + i, ahora))
+                                         for i, (filtro, cambio) in enumerate(operaciones)], ordered=False).modified_count
@@ -0,0 +1,129 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un intérprete nuevo por medición: arranque en frío como un worker de gunicorn
+_HIJO = r"""
+import json, os, sys, time
+inicio = time.perf_counter()
+import django
+from django.core.wsgi import get_wsgi_application
+aplicacion = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+arranque_ms = (time.perf_counter() - inicio) * 1000
+
+from io import BytesIO
+
+def entorno(ruta):
+    return {
+        "REQUEST_METHOD": "GET", "PATH_INFO": ruta, "QUERY_STRING": "", "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80", "HTTP_HOST": "localhost", "wsgi.url_scheme": "http", "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr, "wsgi.version": (1, 0), "wsgi.multithread": False,
+        "wsgi.multiprocess": True, "wsgi.run_once": False,
+    }
+
+def peticion(ruta):
+    cuerpo = aplicacion(entorno(ruta), lambda estado, cabeceras, exc_info=None: None)
+    b"".join(cuerpo)
+    cuerpo.close()
+
+t = time.perf_counter()
+peticion("/healthz")
+primera_ms = (time.perf_counter() - t) * 1000
+
+rss_kb = None
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+n = int(sys.argv[1])
+for _ in range(min(n, 200)):
+    peticion("/healthz")
+t = time.perf_counter()
+for _ in range(n):
+    peticion("/healthz")
+peticion_us = (time.perf_counter() - t) / n * 1e6
+
+# La misma vista sin la cadena de middleware: la diferencia es el costo del middleware
+from django.test import RequestFactory
+from api.views.salud import HealthzAPIView
+vista = HealthzAPIView.as_view()
+fabrica = RequestFactory(HTTP_HOST="localhost")
+t = time.perf_counter()
+for _ in range(n):
+    vista(fabrica.get("/healthz")).render()
+vista_us = (time.perf_counter() - t) / n * 1e6
+
+print(json.dumps({
+    "arranque_ms": arranque_ms, "primera_peticion_ms": primera_ms, "rss_mb": rss_kb / 1024,
+    "modulos": len(sys.modules), "peticion_us": peticion_us, "middleware_us": max(0.0, peticion_us - vista_us),
+}))
+"""
+
+_METRICAS = ("arranque_ms", "primera_peticion_ms", "rss_mb", "modulos", "peticion_us", "middleware_us")
+
+
+class Command(BaseCommand):
+    """
+    python manage.py bench_arranque [--perfiles project.settings,project.settings_api] [--repeticiones 5]
+        [--peticiones 2000] [--salida archivo.json]
+
+    Compara perfiles de settings arrancando cada uno en un intérprete nuevo (como un worker):
+    - arranque_ms: import de Django y del proyecto, django.setup(), aplicación WSGI y URLconf.
+    - primera_peticion_ms y rss_mb: primera petición a /healthz y memoria residente después de ella.
+    - modulos: módulos importados.
+    - peticion_us: costo medio de /healthz por el handler WSGI completo; middleware_us: esa cifra
+      menos la misma vista llamada directamente (el costo de la cadena de middleware).
+    Reporta la mediana de las repeticiones de cada perfil y la diferencia contra el primero.
+    """
+    help = "Mide tiempo de arranque, memoria y costo de middleware de perfiles de settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--perfiles", default="project.settings,project.settings_api")
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--peticiones", type=int, default=2000)
+        parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto solo la tabla).")
+
+    def _medir(self, perfil, peticiones):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=perfil, ALLOWED_HOSTS="*", PYTHONDONTWRITEBYTECODE="1")
+        entorno.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        proceso = subprocess.run(
+            [sys.executable, "-c", _HIJO, str(peticiones)], cwd=Path(settings.BASE_DIR),
+            env=entorno, capture_output=True, text=True, timeout=300,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f"Falló la medición de {perfil}:\n{proceso.stderr[-2000:]}")
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        perfiles = [p.strip() for p in options["perfiles"].split(",") if p.strip()]
+        resultados = {}
+        for perfil in perfiles:
+            self.stderr.write(f"Midiendo {perfil} ({options['repeticiones']} arranques) ...")
+            corridas = [self._medir(perfil, options["peticiones"]) for _ in range(options["repeticiones"])]
+            resultados[perfil] = {m: round(statistics.median(c[m] for c in corridas), 2) for m in _METRICAS}
+
+        base = resultados[perfiles[0]]
+        self.stdout.write(f"{'perfil':<28}" + "".join(f"{m:>22}" for m in _METRICAS))
+        for perfil, valores in resultados.items():
+            celdas = []
+            for m in _METRICAS:
+                celda = f"{valores[m]:g}"
+                if perfil != perfiles[0] and base[m]:
+                    celda += f" ({(valores[m] - base[m]) / base[m]:+.0%})"
+                celdas.append(f"{celda:>22}")
+            self.stdout.write(f"{perfil:<28}" + "".join(celdas))
+
+        if options["salida"]:
+            Path(options["salida"]).write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
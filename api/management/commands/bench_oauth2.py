@@ -0,0 +1,84 @@
+import json
+import time
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.oauth2_estado import MODOS
+from api.tests.oauth2_stub import ProveedorOAuth2Stub
+
+
+class Command(BaseCommand):
+    """
+    python manage.py bench_oauth2 [--iteraciones N] [--modos cookie,cache,session]
+    Mide el throughput del par /auth/oauth2/start + /auth/oauth2/callback en proceso para cada
+    modo de almacenamiento del estado, y cuenta las consultas SQL que genera cada login. El modo
+    "session" requiere las tablas de sesiones (manage.py migrate).
+
+    El canje del código y la verificación del id_token se hacen contra el proveedor stub local
+    (api/tests/oauth2_stub.py); el alta del usuario requiere MongoDB (sin conexión responde 500, lo que
+    se refleja en 'codigos'). También reporta cuántas veces se pidió el JWKS (caché).
+    """
+    help = "Compara el throughput del flujo OAuth2 según OAUTH2_ESTADO_MODO."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteraciones", type=int, default=500)
+        parser.add_argument("--modos", default=",".join(MODOS))
+
+    def _medir(self, modo, iteraciones, stub):
+        config = {
+            "OAUTH_CLIENT_ID": stub.client_id,
+            "OAUTH_AUTH_ENDPOINT": f"{stub.issuer}/authorize",
+            "OAUTH_REDIRECT_URI": "https://app.invalid/callback",
+            "OAUTH_TOKEN_ENDPOINT": stub.token_endpoint,
+            "OAUTH_JWKS_URI": stub.jwks_uri,
+            "OAUTH_ISSUER": stub.issuer,
+            # Un solo proceso: el modo cache puede medirse con LocMem
+            "OAUTH2_ESTADO_CACHE_LOCAL": True,
+        }
+        with override_settings(OAUTH2_ESTADO_MODO=modo, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], **config):
+            cliente = Client()
+            invalidos = 0
+            codigos = Counter()
+            jwks_antes = stub.peticiones_jwks
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                for _ in range(iteraciones):
+                    auth_url = cliente.get("/auth/oauth2/start", {"provider": "google"}).json()["auth_url"]
+                    state = parse_qs(urlparse(auth_url).query)["state"][0]
+                    respuesta = cliente.get("/auth/oauth2/callback", {"code": "bench@example.com", "state": state})
+                    codigos[str(respuesta.status_code)] += 1
+                    if respuesta.json().get("detail") == "State inválido.":
+                        invalidos += 1
+                duracion = time.perf_counter() - inicio
+        return {
+            "logins": iteraciones,
+            "duracion_s": round(duracion, 3),
+            "logins_por_s": round(iteraciones / duracion, 1),
+            "ms_por_login": round(duracion * 1000 / iteraciones, 3),
+            "consultas_sql_por_login": round(len(consultas.captured_queries) / iteraciones, 2),
+            "state_invalido": invalidos,
+            "codigos": dict(codigos),
+            "descargas_jwks": stub.peticiones_jwks - jwks_antes,
+        }
+
+    def handle(self, *args, **options):
+        reporte = {}
+        with ProveedorOAuth2Stub() as stub:
+            self._medir_modos(options, reporte, stub)
+        self.stdout.write(json.dumps(reporte, indent=2, ensure_ascii=False))
+
+    def _medir_modos(self, options, reporte, stub):
+        for modo in [m.strip() for m in options["modos"].split(",") if m.strip()]:
+            if modo not in MODOS:
+                self.stderr.write(f"Modo desconocido: {modo}")
+                continue
+            if modo == "session" and "django_session" not in connection.introspection.table_names():
+                reporte[modo] = {"omitido": "faltan las tablas de sesiones; ejecuta manage.py migrate"}
+                continue
+            reporte[modo] = self._medir(modo, options["iteraciones"], stub)
@@ -0,0 +1,89 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return round(ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))], 2)
+
+
+class Command(BaseCommand):
+    """
+    python manage.py bench_registro [--url URL] [--registros N] [--concurrencia C] [--duplicados F]
+    Prueba de carga de una ráfaga de altas contra un servidor en ejecución (runserver o gunicorn).
+
+    Una fracción de las peticiones repite un email ya enviado (con otra capitalización) para
+    ejercitar el índice único bajo concurrencia. Al final verifica que cada email distinto haya
+    producido exactamente un 201 y reporta latencias (ms), throughput y códigos de estado en JSON.
+    """
+    help = "Prueba de carga de /usuarios/registro con altas concurrentes y emails duplicados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/usuarios/registro")
+        parser.add_argument("--registros", type=int, default=2000)
+        parser.add_argument("--concurrencia", type=int, default=32)
+        parser.add_argument("--duplicados", type=float, default=0.2, help="Fracción de emails repetidos (0..1).")
+        parser.add_argument("--semilla", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["semilla"])
+        corrida = uuid.uuid4().hex[:8]
+        emails = []
+        for i in range(options["registros"]):
+            if emails and rng.random() < options["duplicados"]:
+                emails.append(rng.choice(emails).upper())
+            else:
+                emails.append(f"bench-{corrida}-{i}@example.com")
+        unicos = {e.lower() for e in emails}
+
+        limites = httpx.Limits(max_connections=options["concurrencia"], max_keepalive_connections=options["concurrencia"])
+        with httpx.Client(limits=limites, timeout=30) as cliente:
+            def registrar(email):
+                payload = {
+                    "first_name": "Bench", "last_name": "Registro", "email": email, "ubicacion": "Puebla",
+                    "discapacidad": "ninguna", "carrera": "Ingeniería", "main_area": "ciencias",
+                }
+                inicio = time.perf_counter()
+                try:
+                    codigo = cliente.post(options["url"], json=payload).status_code
+                except httpx.HTTPError:
+                    codigo = "error"
+                return email.lower(), codigo, (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrencia"]) as pool:
+                resultados = list(pool.map(registrar, emails))
+            duracion = time.perf_counter() - inicio
+
+        latencias = [ms for _, _, ms in resultados]
+        codigos = Counter(str(codigo) for _, codigo, _ in resultados)
+        creados_por_email = Counter(email for email, codigo, _ in resultados if codigo == 201)
+        reporte = {
+            "registros": len(emails),
+            "emails_unicos": len(unicos),
+            "concurrencia": options["concurrencia"],
+            "duracion_s": round(duracion, 3),
+            "throughput_rps": round(len(emails) / duracion, 1) if duracion else None,
+            "latencia_ms": {
+                "p50": _percentil(latencias, 50),
+                "p95": _percentil(latencias, 95),
+                "p99": _percentil(latencias, 99),
+                "media": round(statistics.fmean(latencias), 2) if latencias else None,
+            },
+            "codigos": dict(codigos),
+            "emails_sin_alta": len(unicos - set(creados_por_email)),
+            "emails_con_alta_duplicada": sum(1 for n in creados_por_email.values() if n > 1),
+        }
+        self.stdout.write(json.dumps(reporte, indent=2, ensure_ascii=False))
+        if reporte["emails_con_alta_duplicada"] or reporte["emails_sin_alta"]:
+            self.stderr.write(self.style.ERROR("Inconsistencia: cada email distinto debe tener exactamente un 201."))
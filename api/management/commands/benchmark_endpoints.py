@@ -0,0 +1,270 @@
+import json
+import logging
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import django
+import mongoengine
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from mongoengine.connection import DEFAULT_CONNECTION_NAME
+
+from api.datos_sinteticos import ESCALAS, GeneradorDatos, sembrar
+from api.models import MODELOS
+from api.models.constants import MAIN_AREAS
+from api.models.mapa_curricular import MapaCurricular
+from api.models.user import User
+from api.tests.oauth2_stub import ProveedorOAuth2Stub
+from api.similares import IndiceSimilares
+from api.urls import urlpatterns
+from project.mongo import ALIAS_LECTURA
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return round(ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))], 3)
+
+
+class Command(BaseCommand):
+    """
+    python manage.py benchmark_endpoints [--escala pequena|mediana|grande] [--carreras N] [--formularios N]
+        [--escuelas N] [--semilla S] [--iteraciones N] [--hilos H] [--mongomock | --mongo-uri URI]
+        [--sin-sembrar] [--rutas r1,r2] [--salida archivo.json]
+
+    Siembra datos sintéticos deterministas (api/datos_sinteticos.py) y mide cada ruta de api/urls.py
+    en proceso con el cliente de pruebas de Django: lecturas, cargas masivas, registro, OAuth2 (contra
+    el proveedor stub local) y salud. Reporta por ruta p50/p95/p99 y media en ms, throughput,
+    comandos MongoDB por petición (cabecera X-Mongo-Comandos; con mongomock los cuenta
+    api/tests/mongomock_compat.py) y códigos de estado, en JSON para comparar corridas.
+
+    Base de datos: un mongod local (--mongo-uri, la base debe contener "bench" en el nombre porque se
+    vacía al sembrar) o mongomock en memoria (--mongomock, requiere requirements-dev.txt).
+    """
+    help = "Benchmark de todos los endpoints con datos sintéticos a escala."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escala", choices=sorted(ESCALAS), default="pequena")
+        parser.add_argument("--carreras", type=int)
+        parser.add_argument("--formularios", type=int)
+        parser.add_argument("--escuelas", type=int)
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument("--iteraciones", type=int, default=50, help="Peticiones medidas por ruta.")
+        parser.add_argument("--calentamiento", type=int, default=3, help="Peticiones previas no medidas por ruta.")
+        parser.add_argument("--hilos", type=int, default=1, help="Clientes concurrentes por ruta.")
+        parser.add_argument("--lote-bulk", type=int, default=100, help="Documentos por petición a /bulk/*.")
+        parser.add_argument("--mongomock", action="store_true")
+        parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:27017/bench_endpoints")
+        parser.add_argument("--sin-sembrar", action="store_true", help="Usa los datos ya presentes.")
+        parser.add_argument("--rutas", help="Solo estas rutas (patrones de api/urls.py separados por coma).")
+        parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto stdout).")
+
+    # ------------------------------------------------------------------ conexión
+    def _conectar(self, options):
+        for alias in (DEFAULT_CONNECTION_NAME, ALIAS_LECTURA):
+            mongoengine.disconnect(alias)
+        # Sin alias "lectura": coleccion_lectura() usa "default", es decir, la base del benchmark
+        if options["mongomock"]:
+            try:
+                import mongomock
+            except ImportError:
+                raise CommandError("--mongomock requiere el paquete mongomock (pip install -r requirements-dev.txt).")
+            from api.tests.mongomock_compat import parchear_mongomock
+
+            parchear_mongomock()
+            mongoengine.connect("bench_endpoints", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+            return "mongomock"
+        base = urlparse(options["mongo_uri"]).path.strip("/") or "test"
+        if not options["sin_sembrar"] and "bench" not in base:
+            raise CommandError(f"La base '{base}' se vaciaría al sembrar; usa una cuyo nombre contenga 'bench'.")
+        mongoengine.connect(host=options["mongo_uri"], serverSelectionTimeoutMS=5000)
+        return "mongod"
+
+    # --------------------------------------------------------------------- casos
+    def _casos(self, generador, lote_bulk):
+        """Ruta (patrón) -> función(cliente, i) que hace una petición."""
+        n = generador.escala.carreras
+        carrera = lambda i: generador.nombre_carrera(i % n)
+        subarea = lambda i: generador.nombre_subarea(i % n, i % generador.escala.subareas_por_carrera)
+        usuario = User.objects.only("id").first()
+        materia = MapaCurricular.objects.only("nombre").first()
+        corrida = uuid.uuid4().hex[:8]
+
+        # Documentos nuevos para /bulk/*: otra semilla, consumidos por lotes conforme se piden (el flujo
+        # vuelve a empezar si se agota, para que cada petición lleve siempre 'lote_bulk' documentos)
+        extra = GeneradorDatos(generador.escala, semilla=generador.semilla + 1)
+
+        def sin_fin(fabrica):
+            while True:
+                yield from fabrica()
+
+        flujos = {
+            "bulk/carreras": sin_fin(extra.carreras), "bulk/subareas": sin_fin(extra.subareas),
+            "bulk/escuelas": sin_fin(extra.escuelas), "bulk/voluntariados": sin_fin(extra.voluntariados),
+            "bulk/formularios": sin_fin(extra.formularios), "bulk/mapas": sin_fin(extra.mapas),
+        }
+        lock = threading.Lock()
+
+        def bulk(ruta):
+            def enviar(c, i):
+                with lock:
+                    lote = list(islice(flujos[ruta], lote_bulk))
+                return c.post(f"/{ruta}", lote, content_type="application/json")
+            return enviar
+
+        def oauth(c, i):
+            auth_url = c.get("/auth/oauth2/start", {"provider": "google"}).json()["auth_url"]
+            state = parse_qs(urlparse(auth_url).query)["state"][0]
+            return c.get("/auth/oauth2/callback", {"code": f"bench-{corrida}-{i}@example.com", "state": state})
+
+        casos = {
+            "healthz": lambda c, i: c.get("/healthz"),
+            "readyz": lambda c, i: c.get("/readyz"),
+            "metrics": lambda c, i: c.get("/metrics"),
+            # Sin la cabecera X-Perfilar: mide el rechazo (401)
+            "perfiles": lambda c, i: c.get("/perfiles"),
+            "perfiles/<str:perfil_id>": lambda c, i: c.get("/perfiles/20260101000000-00000000"),
+            "auth/oauth2/start": lambda c, i: c.get("/auth/oauth2/start", {"provider": "google"}),
+            "auth/oauth2/callback": oauth,  # incluye el /start previo que genera el state
+            "usuarios/registro": lambda c, i: c.post("/usuarios/registro", {
+                "first_name": "Bench", "last_name": "Registro", "email": f"registro-{corrida}-{i}@example.com",
+                "ubicacion": "Puebla", "discapacidad": "ninguna", "carrera": carrera(i), "main_area": MAIN_AREAS[i % 4],
+            }, content_type="application/json"),
+            "usuarios/<str:user_id>/recomendaciones": lambda c, i: c.get(
+                f"/usuarios/{usuario.id if usuario else 'sin-usuarios'}/recomendaciones", {"k": 10}),
+            "voluntariados": lambda c, i: c.get("/voluntariados", {"carrera": carrera(i)}),
+            "carreras": lambda c, i: c.get("/carreras", {"area": MAIN_AREAS[i % len(MAIN_AREAS)]}),
+            "carreras/mapa-curricular": lambda c, i: c.get("/carreras/mapa-curricular", {"carrera": carrera(i)}),
+            "carreras/mapa-curricular/descripcion": lambda c, i: c.get(
+                "/carreras/mapa-curricular/descripcion", {"materia": materia.nombre if materia else "sin-materias"}),
+            "carreras/<str:nombre>/similares": lambda c, i: c.get(f"/carreras/{carrera(i)}/similares"),
+            "escuelas": lambda c, i: c.get("/escuelas", {"carrera": carrera(i)}),
+            "escuelas/por-estado": lambda c, i: c.get("/escuelas/por-estado", {"type": ("publica", "privada")[i % 2]}),
+            "subareas": lambda c, i: c.get("/subareas", {"carrera": carrera(i)}),
+            "subarea": lambda c, i: c.get("/subarea", {"nombre": subarea(i)}),
+            "formulario": lambda c, i: c.get("/formulario", {"subarea": subarea(i)}),
+            "dashboard/formularios/promedio-por-carrera": lambda c, i: c.get("/dashboard/formularios/promedio-por-carrera"),
+            "dashboard/formularios/distribucion": lambda c, i: c.get("/dashboard/formularios/distribucion"),
+            "cambios": lambda c, i: c.get("/cambios", {"limite": 100}),
+            "formularios/recalificar": lambda c, i: c.post(
+                "/formularios/recalificar", {"subarea": subarea(i), "dry_run": True}, content_type="application/json"),
+        }
+        casos.update({ruta: bulk(ruta) for ruta in flujos})
+        return casos
+
+    # ------------------------------------------------------------------- medición
+    def _medir(self, caso, iteraciones, calentamiento, hilos):
+        latencias, estados, comandos = [], Counter(), []
+        lock = threading.Lock()
+
+        def trabajador(indices):
+            cliente = Client()
+            for i in indices:
+                inicio = time.perf_counter()
+                respuesta = caso(cliente, i)
+                duracion = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    latencias.append(duracion)
+                    estados[str(respuesta.status_code)] += 1
+                    if respuesta.has_header("X-Mongo-Comandos"):
+                        comandos.append(int(respuesta["X-Mongo-Comandos"]))
+
+        cliente = Client()
+        for i in range(calentamiento):
+            caso(cliente, iteraciones + i)
+        reparto = [range(h, iteraciones, hilos) for h in range(hilos)]
+        inicio = time.perf_counter()
+        trabajadores = [threading.Thread(target=trabajador, args=(r,)) for r in reparto]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        total = time.perf_counter() - inicio
+
+        ordenados = sorted(latencias)
+        return {
+            "peticiones": len(latencias),
+            "p50_ms": _percentil(ordenados, 50),
+            "p95_ms": _percentil(ordenados, 95),
+            "p99_ms": _percentil(ordenados, 99),
+            "media_ms": round(statistics.fmean(ordenados), 3) if ordenados else None,
+            "peticiones_por_s": round(len(latencias) / total, 1) if total else None,
+            "comandos_mongo_por_peticion": round(statistics.fmean(comandos), 2) if comandos else None,
+            "estados": dict(estados),
+        }
+
+    def handle(self, *args, **options):
+        escala = ESCALAS[options["escala"]]
+        escala = replace(escala, **{k: options[k] for k in ("carreras", "formularios", "escuelas") if options[k] is not None})
+        generador = GeneradorDatos(escala, semilla=options["semilla"])
+        backend = self._conectar(options)
+
+        # Los avisos de presupuesto/N+1 y los 4xx/5xx esperados se resumen en el reporte
+        for nombre in ("api.consultas", "django.request"):
+            logging.getLogger(nombre).setLevel(logging.ERROR)
+
+        reporte = {
+            "meta": {
+                "fecha": datetime.now(timezone.utc).isoformat(),
+                "backend": backend,
+                "escala": asdict(escala),
+                "semilla": options["semilla"],
+                "iteraciones": options["iteraciones"],
+                "hilos": options["hilos"],
+                "django": django.get_version(),
+            },
+        }
+        if not options["sin_sembrar"]:
+            inicio = time.perf_counter()
+            reporte["meta"]["sembrados"] = sembrar(generador, limpiar=True)
+            for modelo in MODELOS:
+                modelo.ensure_indexes()
+            reporte["meta"]["siembra_s"] = round(time.perf_counter() - inicio, 2)
+            self.stderr.write(f"Datos sembrados en {reporte['meta']['siembra_s']} s: {reporte['meta']['sembrados']}")
+
+        solo = {r.strip() for r in (options["rutas"] or "").split(",") if r.strip()}
+        with tempfile.TemporaryDirectory() as directorio, ProveedorOAuth2Stub() as stub:
+            indice = Path(directorio) / "similares.npz"
+            IndiceSimilares.construir().guardar(indice)
+            configuracion = {
+                "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+                "SIMILARES_INDICE_RUTA": indice,
+                "MONGO_URI": options["mongo_uri"],
+                "OAUTH_CLIENT_ID": stub.client_id,
+                "OAUTH_AUTH_ENDPOINT": f"{stub.issuer}/authorize",
+                "OAUTH_REDIRECT_URI": "https://app.invalid/callback",
+                "OAUTH_TOKEN_ENDPOINT": stub.token_endpoint,
+                "OAUTH_JWKS_URI": stub.jwks_uri,
+                "OAUTH_ISSUER": stub.issuer,
+            }
+            with override_settings(**configuracion):
+                casos = self._casos(generador, options["lote_bulk"])
+                resultados = {}
+                for patron in urlpatterns:
+                    ruta = str(patron.pattern)
+                    if solo and ruta not in solo:
+                        continue
+                    caso = casos.get(ruta)
+                    if caso is None:
+                        self.stderr.write(self.style.WARNING(f"Sin caso de benchmark para '{ruta}'."))
+                        continue
+                    self.stderr.write(f"Midiendo {ruta} ...")
+                    resultados[ruta] = self._medir(caso, options["iteraciones"], options["calentamiento"], options["hilos"])
+        reporte["endpoints"] = resultados
+
+        salida = json.dumps(reporte, indent=2, ensure_ascii=False)
+        if options["salida"]:
+            Path(options["salida"]).write_text(salida, encoding="utf-8")
+            self.stderr.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
+        else:
+            self.stdout.write(salida)
@@ -0,0 +1,48 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.dedup import RADIO_M, UMBRAL
+from api.universities_by_state import cargar_en_bd
+
+
+class Command(BaseCommand):
+    """
+    python manage.py cargar_escuelas --entrada salidas/universidades_mx.json [--lote N] [--dry-run]
+        [--umbral 0.85] [--radio-m 2000]
+
+    Carga la salida de Places (JSON de `universidades_por_estados`, {estado: [{name, type, position}]},
+    o el escuelas.ndjson de `manage.py recolectar`) como documentos Escuela, sin rehacer el payload
+    de /bulk/escuelas a mano. Las universidades que coinciden con una escuela existente (nombre y
+    cercanía) se fusionan en ella agregando sus puntos a `ubicacion`; las demás se insertan.
+    """
+    help = "Carga universidades de Google Places como Escuela, fusionando con las existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entrada", required=True, help="JSON por estado o NDJSON de escuelas.")
+        parser.add_argument("--lote", type=int, default=500, help="Operaciones por bulk_write.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo reporta lo que se haría.")
+        parser.add_argument("--umbral", type=float, default=UMBRAL, help="Similitud mínima de nombres (0-1).")
+        parser.add_argument("--radio-m", type=float, default=RADIO_M, help="Distancia máxima a una escuela existente.")
+
+    def handle(self, *args, **options):
+        ruta = options["entrada"]
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                if ruta.endswith(".ndjson"):
+                    data = [json.loads(linea) for linea in f if linea.strip()]
+                else:
+                    data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {ruta}: {e}")
+
+        inicio = time.perf_counter()
+        resumen = cargar_en_bd(data, lote=options["lote"], umbral=options["umbral"], radio_m=options["radio_m"],
+                               dry_run=options["dry_run"])
+        self.stdout.write(
+            f"{resumen['leidas']} universidades -> {resumen['nuevas']} escuelas nuevas, {resumen['fusionadas']} fusionadas "
+            f"con otra del archivo o con una existente; {resumen['insertadas']} insertadas y {resumen['actualizadas']} "
+            f"actualizadas en {time.perf_counter() - inicio:.2f}s."
+        )
+        self.stdout.write(self.style.SUCCESS("Dry run: no se escribió nada." if options["dry_run"] else "Carga terminada."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.similares import IndiceSimilares, ruta_indice
+
+
+class Command(BaseCommand):
+    """
+    python manage.py construir_indice_similares [--ruta ARCHIVO.npz]
+    Construye fuera de línea el índice MinHash/LSH de carreras parecidas (ver api/similares.py)
+    y lo persiste; los procesos web lo recargan al detectar el archivo nuevo.
+    """
+    help = "Construye y persiste el índice MinHash/LSH de carreras similares."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ruta", help="Archivo de salida (por defecto SIMILARES_INDICE_RUTA).")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        indice = IndiceSimilares.construir()
+        ruta = options.get("ruta") or ruta_indice()
+        indice.guardar(ruta)
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice con {len(indice.nombres)} carreras guardado en {ruta} ({time.perf_counter() - inicio:.2f}s)"
+        ))
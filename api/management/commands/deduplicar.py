@@ -0,0 +1,59 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.dedup import RADIO_M, UMBRAL, aplicar_en_mongo, deduplicar, existentes_en_mongo
+
+
+class Command(BaseCommand):
+    """
+    python manage.py deduplicar --tipo carreras|escuelas --entrada ARCHIVO.ndjson [--salida ARCHIVO.ndjson]
+        [--contra-mongo] [--cargar [--lote N]] [--umbral 0.85] [--radio-m 2000]
+
+    Deduplicación aproximada (api/dedup.py) de una salida de `manage.py recolectar`: agrupa variantes
+    del mismo nombre (acentos, siglas, erratas; en escuelas además cercanas entre sí), fusiona cada
+    grupo y escribe el resultado en --salida (por defecto <entrada>.dedup.ndjson). Con --contra-mongo
+    los registros que ya existen en la base no se reportan como nuevos; con --cargar se insertan los
+    nuevos y se actualizan los existentes que absorbieron duplicados.
+    """
+    help = "Deduplicación aproximada de carreras/escuelas recolectadas (NDJSON), opcionalmente contra MongoDB."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tipo", choices=("carreras", "escuelas"), required=True)
+        parser.add_argument("--entrada", required=True, help="NDJSON de entrada (p.ej. salidas/recoleccion/escuelas.ndjson).")
+        parser.add_argument("--salida", help="NDJSON deduplicado (por defecto <entrada>.dedup.ndjson).")
+        parser.add_argument("--contra-mongo", action="store_true", help="Incluye los documentos existentes en MongoDB.")
+        parser.add_argument("--cargar", action="store_true", help="Escribe el resultado en MongoDB (implica --contra-mongo).")
+        parser.add_argument("--lote", type=int, default=500, help="Operaciones por bulk_write al cargar.")
+        parser.add_argument("--umbral", type=float, default=UMBRAL, help="Similitud mínima de nombres (0-1).")
+        parser.add_argument("--radio-m", type=float, default=RADIO_M, help="Distancia máxima entre escuelas duplicadas.")
+
+    def handle(self, *args, **options):
+        entrada = Path(options["entrada"])
+        try:
+            with open(entrada, encoding="utf-8") as f:
+                registros = [json.loads(linea) for linea in f if linea.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {entrada}: {e}")
+        tipo = options["tipo"]
+        existentes = existentes_en_mongo(tipo) if options["contra_mongo"] or options["cargar"] else []
+
+        inicio = time.perf_counter()
+        resultado = deduplicar(registros, tipo, existentes, umbral=options["umbral"], radio_m=options["radio_m"])
+        duracion = time.perf_counter() - inicio
+
+        salida = Path(options["salida"] or entrada.with_suffix(".dedup.ndjson"))
+        with open(salida, "w", encoding="utf-8") as f:
+            for r in resultado.nuevos:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        self.stdout.write(
+            f"{len(registros)} registros ({len(existentes)} existentes en MongoDB) -> {len(resultado.nuevos)} nuevos, "
+            f"{len(resultado.actualizaciones)} existentes con duplicados, {resultado.descartados} duplicados fusionados; "
+            f"{resultado.estadisticas.get('comparaciones', 0)} comparaciones en {duracion:.2f}s. Salida: {salida}"
+        )
+        if options["cargar"]:
+            cuenta = aplicar_en_mongo(resultado, tipo, options["lote"])
+            self.stdout.write(f"MongoDB: {cuenta['insertados']} insertados, {cuenta['actualizados']} actualizados.")
+        self.stdout.write(self.style.SUCCESS("Deduplicación terminada."))
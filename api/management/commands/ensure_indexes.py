@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import MODELOS
+
+
+class Command(BaseCommand):
+    """
+    python manage.py ensure_indexes [--verificar]
+    Crea los índices declarados en el 'meta' de cada modelo. Pensado para la fase de release del
+    despliegue (ver Procfile), de modo que ningún worker pague la creación de índices en la
+    primera petición. Con --verificar solo compara y termina con error si falta alguno.
+    """
+    help = "Crea (o verifica) los índices MongoDB declarados en los modelos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verificar", action="store_true", help="Solo reporta índices faltantes.")
+
+    def handle(self, *args, **options):
+        faltantes = 0
+        for modelo in MODELOS:
+            nombre = modelo._get_collection_name()
+            if options["verificar"]:
+                diferencias = modelo.compare_indexes()
+                # El índice de _id solo "falta" si la colección aún no existe (se crea con el primer documento)
+                faltan = [i for i in diferencias["missing"] if i != [("_id", 1)]]
+                faltantes += len(faltan)
+                for indice in faltan:
+                    self.stdout.write(self.style.WARNING(f"{nombre}: falta {indice}"))
+                for indice in diferencias["extra"]:
+                    self.stdout.write(f"{nombre}: índice no declarado {indice}")
+                continue
+            inicio = time.perf_counter()
+            modelo.ensure_indexes()
+            self.stdout.write(f"{nombre}: índices listos ({time.perf_counter() - inicio:.2f}s)")
+        if faltantes:
+            raise CommandError(f"Faltan {faltantes} índices; ejecuta manage.py ensure_indexes.")
+        self.stdout.write(self.style.SUCCESS("Índices verificados." if options["verificar"] else "Índices creados."))
@@ -0,0 +1,112 @@
+import os
+import time
+
+import mongoengine
+from django.core.management.base import BaseCommand, CommandError
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, get_db
+
+from api import catalogo
+from api.datos_sinteticos import COLECCIONES, ESCALAS, Escala, GeneradorDatos, sembrar
+from api.models import MODELOS
+from project.mongo import ALIAS_LECTURA
+
+# Fragmentos de nombre de base que se aceptan como desechables para --limpiar sin --forzar
+_BASES_DESECHABLES = ("bench", "sintetic", "test", "dev", "local")
+
+
+class Command(BaseCommand):
+    """
+    python manage.py generar_datos --escala N --seed S [--procesos P] [--colecciones Carrera,Escuela]
+        [--limpiar [--forzar]] [--sin-indices] [--mongomock]
+
+    Genera datos sintéticos deterministas (api/datos_sinteticos.py) y los inserta en la base de
+    MONGO_URI por bloques desordenados. --escala acepta un factor (1 = 100 carreras, 1k escuelas,
+    10k formularios, 2k usuarios; 1000 ≈ 14 millones de documentos) o un preset de
+    benchmark_endpoints (pequena, mediana, grande). La misma escala y semilla producen los mismos
+    documentos con cualquier número de procesos.
+
+    Para cargas grandes: --limpiar elimina las colecciones (y sus índices) antes de insertar y los
+    índices se crean al final, lo que es mucho más rápido que mantenerlos durante la carga; cada
+    proceso genera e inserta sus propios bloques (por defecto, uno por CPU).
+    """
+    help = "Genera e inserta datos sintéticos deterministas a escala."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escala", default="1", help="Factor numérico o preset (pequena, mediana, grande).")
+        parser.add_argument("--seed", "--semilla", dest="semilla", type=int, default=1)
+        parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--colecciones", help=f"Subconjunto de {','.join(COLECCIONES)}.")
+        parser.add_argument("--limpiar", action="store_true", help="Elimina las colecciones antes de insertar.")
+        parser.add_argument("--forzar", action="store_true", help="Permite --limpiar en cualquier base.")
+        parser.add_argument("--sin-indices", action="store_true", help="No crea los índices al terminar.")
+        parser.add_argument("--mongomock", action="store_true", help="Base en memoria (un proceso; para pruebas).")
+
+    def _escala(self, valor: str) -> Escala:
+        if valor in ESCALAS:
+            return ESCALAS[valor]
+        try:
+            factor = float(valor)
+        except ValueError:
+            raise CommandError(f"--escala debe ser un número o uno de: {', '.join(sorted(ESCALAS))}.")
+        if factor <= 0:
+            raise CommandError("--escala debe ser mayor que 0.")
+        return Escala.por_factor(factor)
+
+    def handle(self, *args, **options):
+        generador = GeneradorDatos(self._escala(options["escala"]), semilla=options["semilla"])
+        colecciones = COLECCIONES
+        if options["colecciones"]:
+            colecciones = tuple(c.strip() for c in options["colecciones"].split(",") if c.strip())
+            desconocidas = set(colecciones) - set(COLECCIONES)
+            if desconocidas:
+                raise CommandError(f"Colecciones desconocidas: {', '.join(sorted(desconocidas))}.")
+
+        procesos = max(1, options["procesos"])
+        if options["mongomock"]:
+            try:
+                import mongomock
+            except ImportError:
+                raise CommandError("--mongomock requiere el paquete mongomock (pip install -r requirements-dev.txt).")
+            for alias in (DEFAULT_CONNECTION_NAME, ALIAS_LECTURA):
+                mongoengine.disconnect(alias)
+            from api.tests.mongomock_compat import parchear_mongomock
+
+            parchear_mongomock()
+            mongoengine.connect("datos_sinteticos", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+            procesos = 1  # la base en memoria no se comparte entre procesos
+        try:
+            base = get_db().name
+        except mongoengine.connection.ConnectionFailure:
+            raise CommandError("MONGO_URI no está configurada.")
+        if options["limpiar"] and not options["forzar"] and not any(p in base.lower() for p in _BASES_DESECHABLES):
+            raise CommandError(f"--limpiar eliminaría colecciones de '{base}'; usa --forzar si es intencional.")
+
+        total_esperado = sum(generador.total(c) for c in colecciones)
+        self.stdout.write(f"Generando {total_esperado} documentos en '{base}' con {procesos} proceso(s), semilla {generador.semilla}.")
+
+        inicio = time.perf_counter()
+        ultimo = [0.0]
+
+        def progreso(coleccion, hechos, total):
+            ahora = time.perf_counter()
+            if hechos == total or ahora - ultimo[0] >= 2:
+                ultimo[0] = ahora
+                self.stderr.write(f"  {coleccion}: {hechos}/{total} ({hechos / max(ahora - inicio, 1e-9):,.0f} docs/s acumulado)")
+
+        insertados = sembrar(generador, limpiar=options["limpiar"], procesos=procesos, colecciones=colecciones, progreso=progreso)
+        duracion = time.perf_counter() - inicio
+        total = sum(insertados.values())
+        self.stdout.write(f"Insertados {total} documentos en {duracion:.1f}s ({total / max(duracion, 1e-9):,.0f} docs/s): {insertados}")
+
+        if not options["sin_indices"]:
+            inicio = time.perf_counter()
+            for modelo in MODELOS:
+                if modelo.__name__ in colecciones:
+                    modelo.ensure_indexes()
+            self.stdout.write(f"Índices creados en {time.perf_counter() - inicio:.1f}s.")
+        # Con --limpiar el catálogo se reemplazó por completo: como tras recargar_catalogo, la nueva
+        # versión invalida las cachés de los procesos y hace que los clientes de /api/cambios reinicien
+        tipos = [tipo for tipo, modelo in catalogo.COLECCIONES.items() if modelo.__name__ in colecciones]
+        if options["limpiar"] and tipos:
+            self.stdout.write(f"Versión del catálogo: {catalogo.incrementar_version(tipos)}.")
+        self.stdout.write(self.style.SUCCESS("Datos sintéticos generados."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from api.models.user import User, normalizar_email
+
+
+class Command(BaseCommand):
+    """
+    python manage.py normalizar_emails [--lote N]
+    Llena 'email_normalizado' en usuarios existentes y crea el índice único. Si hay emails que
+    solo difieren en mayúsculas/espacios, los reporta y no crea el índice hasta resolverlos.
+    """
+    help = "Rellena User.email_normalizado y crea su índice único."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Operaciones por bulk_write.")
+
+    def handle(self, *args, **options):
+        coleccion = User._get_collection()
+        operaciones, actualizados = [], 0
+        for doc in coleccion.find({"email_normalizado": {"$exists": False}, "email": {"$type": "string"}}, {"email": 1}):
+            operaciones.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"email_normalizado": normalizar_email(doc["email"])}}))
+            if len(operaciones) >= options["lote"]:
+                actualizados += coleccion.bulk_write(operaciones, ordered=False).modified_count
+                operaciones = []
+        if operaciones:
+            actualizados += coleccion.bulk_write(operaciones, ordered=False).modified_count
+        self.stdout.write(f"Usuarios actualizados: {actualizados}")
+
+        duplicados = list(coleccion.aggregate([
+            {"$match": {"email_normalizado": {"$type": "string"}}},
+            {"$group": {"_id": "$email_normalizado", "n": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+            {"$match": {"n": {"$gt": 1}}},
+        ]))
+        if duplicados:
+            for d in duplicados:
+                self.stdout.write(self.style.WARNING(f"Duplicado {d['_id']}: {', '.join(str(i) for i in d['ids'])}"))
+            self.stdout.write(self.style.ERROR("Resuelve los duplicados antes de crear el índice único."))
+            return
+
+        User.ensure_indexes()
+        self.stdout.write(self.style.SUCCESS("Índice único de email_normalizado listo."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.calificacion import recalificar_formularios
+
+
+class Command(BaseCommand):
+    """
+    python manage.py recalificar_formularios [--subarea NOMBRE] [--lote N] [--lote-escritura N] [--dry-run]
+    Recalifica en el servidor los formularios comparando 'respuestas' contra la clave de 'preguntas'
+    (ver api/calificacion.py) y escribe los resultados que cambian con bulk_write en lotes.
+    """
+    help = "Recalifica Formulario.resultados a partir de respuestas y la clave de preguntas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subarea", help="Recalificar solo los formularios de esta subárea.")
+        parser.add_argument("--lote", type=int, default=5000, help="Documentos calificados por lote.")
+        parser.add_argument("--lote-escritura", type=int, default=1000, help="Operaciones por bulk_write.")
+        parser.add_argument("--dry-run", action="store_true", help="Calcular sin escribir resultados.")
+
+    def handle(self, *args, **options):
+        filtro = {"subarea": options["subarea"].strip()} if options.get("subarea") else None
+        resumen = recalificar_formularios(
+            filtro,
+            lote=options["lote"],
+            lote_escritura=options["lote_escritura"],
+            dry_run=options["dry_run"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recalificación terminada: {resumen}"))
@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalogo import (COLECCIONES, MIN_FRACCION, ErrorRecarga, IntercambioIncompleto, archivos_en, leer_registros,
+                          recargar)
+
+
+class Command(BaseCommand):
+    """
+    python manage.py recargar_catalogo --entrada DIR [--colecciones carreras,escuelas] [--lote N]
+        [--min-fraccion 0.5] [--max-errores N] [--dry-run]
+
+    Reemplaza el catálogo sin que los lectores vean datos parciales (api/catalogo.py): carga
+    DIR/<tipo>.ndjson o DIR/<tipo>.json (mismo esquema que /bulk/<tipo>) en colecciones
+    `__staging`, crea los índices, valida conteos y renombra cada staging sobre la colección viva
+    (atómico por colección, no para el catálogo completo). Si algo falla antes del intercambio las
+    colecciones vivas quedan intactas. Al terminar incrementa la versión del catálogo, con lo que
+    las cachés en memoria de todos los procesos se invalidan, y recalcula los derivados (escuelas
+    por estado, índice de similares); si esto último falla se avisa, pero la recarga ya ocurrió.
+    """
+    help = "Recarga el catálogo vía colecciones de staging y renombrado atómico."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entrada", required=True, help="Carpeta con <tipo>.ndjson o <tipo>.json.")
+        parser.add_argument("--colecciones", help=f"Subconjunto de {','.join(COLECCIONES)} (por defecto las presentes).")
+        parser.add_argument("--lote", type=int, default=1000, help="Documentos por insert_many.")
+        parser.add_argument("--min-fraccion", type=float, default=MIN_FRACCION,
+                            help="Mínimo de documentos nuevos respecto de los actuales (0-1).")
+        parser.add_argument("--max-errores", type=int, default=0, help="Registros inválidos tolerados por colección.")
+        parser.add_argument("--dry-run", action="store_true", help="Carga y valida en staging sin reemplazar.")
+
+    def handle(self, *args, **options):
+        archivos = archivos_en(options["entrada"])
+        if options["colecciones"]:
+            tipos = [t.strip() for t in options["colecciones"].split(",") if t.strip()]
+            faltantes = [t for t in tipos if t not in archivos]
+            if faltantes:
+                raise CommandError(f"Sin archivo en {options['entrada']} para: {', '.join(faltantes)}.")
+            archivos = {t: archivos[t] for t in tipos}
+        if not archivos:
+            raise CommandError(f"No hay archivos de catálogo en {options['entrada']}.")
+
+        def progreso(tipo, resumen):
+            self.stdout.write(f"  {tipo}: {resumen['cargados']} en staging ({resumen['anteriores']} actuales), "
+                              f"carga {resumen['carga_s']}s, índices {resumen['indices_s']}s")
+
+        inicio = time.perf_counter()
+        try:
+            resumen = recargar({t: leer_registros(r) for t, r in archivos.items()}, lote=options["lote"],
+                               min_fraccion=options["min_fraccion"], max_errores=options["max_errores"],
+                               dry_run=options["dry_run"], progreso=progreso)
+        except IntercambioIncompleto as e:
+            raise CommandError(f"Recarga incompleta: {e} Vuelve a recargar {', '.join(e.descartadas)}.")
+        except ErrorRecarga as e:
+            raise CommandError(f"Recarga cancelada, el catálogo vivo no cambió: {e}")
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer la entrada, el catálogo vivo no cambió: {e}")
+        self.stdout.write(json.dumps(resumen, ensure_ascii=False, indent=2))
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS("Dry run: staging validado y descartado."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Catálogo recargado en {time.perf_counter() - inicio:.1f}s (versión {resumen['version']})."
+            ))
+            if resumen["derivados"] != "ok":
+                self.stderr.write(self.style.WARNING(
+                    f"Las colecciones ya se intercambiaron, pero falló el recálculo de derivados ({resumen['derivados']}); "
+                    "ejecuta `manage.py asignar_estados` y `manage.py construir_indice_similares`."
+                ))
@@ -0,0 +1,76 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.recoleccion import FUENTES, recolectar
+
+
+class Command(BaseCommand):
+    """
+    python manage.py recolectar [--fuentes wikipedia,wikidata,places] [--salida DIR] [--reiniciar]
+        [--mongo [--lote N]] [--seeds archivo.json] [--estados Puebla,Jalisco] [--max-por-termino N]
+        [--concurrencia C] [--qps Q] [--wikipedia-url URL] [--wikidata-url URL] [--places-url URL]
+
+    Recolecta carreras (Wikipedia, Wikidata) y universidades por estado (Places) con el pipeline
+    de api/recoleccion.py: escribe NDJSON conforme termina cada unidad y guarda un checkpoint, así
+    que si se interrumpe basta con volver a ejecutarlo para continuar desde la última unidad
+    completada. --reiniciar descarta la salida y el checkpoint previos.
+    """
+    help = "Recolección reanudable de Wikipedia, Wikidata y Google Places (NDJSON y, opcionalmente, MongoDB)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fuentes", default="wikipedia,wikidata,places", help=f"Subconjunto de {','.join(FUENTES)}.")
+        parser.add_argument("--salida", default="salidas/recoleccion", help="Carpeta de NDJSON y checkpoint.")
+        parser.add_argument("--reiniciar", action="store_true", help="Ignora y elimina el progreso previo.")
+        parser.add_argument("--mongo", action="store_true", help="Además carga los registros en MongoDB (upserts).")
+        parser.add_argument("--lote", type=int, default=500, help="Operaciones por bulk_write en MongoDB.")
+        parser.add_argument("--seeds", help='JSON con [{"termino": ..., "main_area": ...}] para Wikipedia/Wikidata.')
+        parser.add_argument("--estados", help="Estados para Places separados por coma (por defecto los 32).")
+        parser.add_argument("--max-por-termino", type=int, default=50, help="Páginas de Wikipedia por término.")
+        parser.add_argument("--concurrencia", type=int, default=4, help="Términos de Wikipedia en paralelo.")
+        parser.add_argument("--qps", type=float, default=10.0, help="Tope de peticiones por segundo a Places.")
+        parser.add_argument("--wikipedia-url", help="Endpoint de MediaWiki (p.ej. api/tests/mediawiki_stub.py).")
+        parser.add_argument("--wikidata-url", help="Endpoint SPARQL de Wikidata.")
+        parser.add_argument("--places-url", help="Endpoint de Places Text Search (p.ej. api/tests/places_stub.py).")
+
+    def handle(self, *args, **options):
+        fuentes = [f.strip() for f in options["fuentes"].split(",") if f.strip()]
+        desconocidas = set(fuentes) - set(FUENTES)
+        if desconocidas:
+            raise CommandError(f"Fuentes desconocidas: {', '.join(sorted(desconocidas))}.")
+        seeds = None
+        if options["seeds"]:
+            try:
+                with open(options["seeds"], encoding="utf-8") as f:
+                    seeds = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer --seeds: {e}")
+        estados = [e.strip() for e in options["estados"].split(",") if e.strip()] if options["estados"] else None
+
+        opciones = {
+            "wikipedia": {"max_por_termino": options["max_por_termino"], "concurrencia": options["concurrencia"]},
+            "wikidata": {},
+            "places": {"qps": options["qps"]},
+        }
+        for fuente, parametro, opcion in (("wikipedia", "api_url", "wikipedia_url"), ("wikidata", "endpoint", "wikidata_url"),
+                                          ("places", "places_url", "places_url")):
+            if options[opcion]:
+                opciones[fuente][parametro] = options[opcion]
+
+        def progreso(fuente, clave, nuevos, error):
+            if error:
+                self.stderr.write(f"  {fuente}: {clave} falló ({error}); se reintentará en la próxima ejecución.")
+            else:
+                self.stdout.write(f"  {fuente}: {clave} -> {nuevos} registros nuevos")
+
+        inicio = time.perf_counter()
+        resumen = recolectar(fuentes, options["salida"], seeds=seeds, estados=estados, mongo=options["mongo"],
+                             lote=options["lote"], reiniciar=options["reiniciar"], opciones=opciones, progreso=progreso)
+        self.stdout.write(json.dumps(resumen, ensure_ascii=False, indent=2))
+        fallidas = sum(r.get("fallidas", 0) for r in resumen.values())
+        mensaje = f"Recolección terminada en {time.perf_counter() - inicio:.1f}s en {options['salida']}."
+        if fallidas:
+            self.stdout.write(self.style.WARNING(f"{mensaje} {fallidas} unidades fallaron; vuelve a ejecutar para reintentarlas."))
+        else:
+            self.stdout.write(self.style.SUCCESS(mensaje))
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from api.catalogo import COLECCIONES
+from api.models.rastreo import secuencia_reservada
+
+
+class Command(BaseCommand):
+    """
+    python manage.py sellar_catalogo [--lote N]
+    Asigna created_at, updated_at y seq a los documentos del catálogo escritos antes de que
+    existieran las marcas de cambio, para que el feed /cambios los entregue. created_at se toma
+    del ObjectId (momento de inserción). Es idempotente: solo toca documentos sin seq.
+    """
+    help = "Rellena las marcas de cambio (created_at, updated_at, seq) del catálogo existente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Operaciones por bulk_write.")
+
+    def handle(self, *args, **options):
+        for tipo, modelo in COLECCIONES.items():
+            coleccion = modelo._get_collection()
+            actualizados, pendientes = 0, []
+            for doc in coleccion.find({"seq": None}, {"_id": 1}):
+                pendientes.append(doc["_id"])
+                if len(pendientes) >= options["lote"]:
+                    actualizados += self._sellar(coleccion, pendientes)
+                    pendientes = []
+            if pendientes:
+                actualizados += self._sellar(coleccion, pendientes)
+            self.stdout.write(f"{tipo}: {actualizados} documentos sellados")
+        self.stdout.write(self.style.SUCCESS("Marcas de cambio listas."))
+
+    @staticmethod
+    def _sellar(coleccion, ids) -> int:
+        ahora = datetime.now(timezone.utc)
+        with secuencia_reservada(len(ids)) as seq:
+            operaciones = [
+                UpdateOne({"_id": _id, "seq": None}, {
+                    "$set": {"updated_at": ahora, "seq": seq + i},
+                    "$min": {"created_at": getattr(_id, "generation_time", ahora)},
+                })
+                for i, _id in enumerate(ids)
+            ]
+            return coleccion.bulk_write(operaciones, ordered=False).modified_count
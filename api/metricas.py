@@ -0,0 +1,111 @@
+"""metricas.py
+Métricas Prometheus de la API (expuestas en /metrics, ver api/views/metricas.py).
+
+- Peticiones HTTP por ruta (patrón de URL, no la URL concreta, para acotar la cardinalidad):
+  latencia, total por código de estado, peticiones en curso y tamaño de respuesta
+  (api/middleware.py).
+- Comandos MongoDB por colección y operación: duración y fallos, mediante un
+  `pymongo.monitoring.CommandListener` registrado globalmente en ApiConfig.ready().
+- Carga masiva (/bulk/*): documentos creados/fallidos y duración de cada lote.
+
+Con gunicorn (varios procesos) se usa el modo multiproceso de prometheus_client: la variable
+PROMETHEUS_MULTIPROC_DIR debe apuntar a un directorio vacío antes de arrancar (lo hace
+gunicorn.conf.py) y /metrics agrega los archivos de todos los workers.
+"""
+from __future__ import annotations
+
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+_BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_BUCKETS_MONGO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PETICION_DURACION = Histogram(
+    "api_peticion_duracion_segundos", "Latencia de las peticiones HTTP por ruta.",
+    ["metodo", "ruta"], buckets=_BUCKETS_SEGUNDOS,
+)
+PETICIONES = Counter(
+    "api_peticiones_total", "Peticiones HTTP atendidas por ruta y código de estado.",
+    ["metodo", "ruta", "estado"],
+)
+PETICIONES_EN_CURSO = Gauge(
+    "api_peticiones_en_curso", "Peticiones HTTP en curso por ruta.",
+    ["metodo", "ruta"], multiprocess_mode="livesum",
+)
+RESPUESTA_TAMANO = Histogram(
+    "api_respuesta_tamano_bytes", "Tamaño del cuerpo de las respuestas por ruta.",
+    ["metodo", "ruta"], buckets=_BUCKETS_BYTES,
+)
+
+MONGO_COMANDO_DURACION = Histogram(
+    "mongo_comando_duracion_segundos", "Duración de los comandos MongoDB por colección y operación.",
+    ["coleccion", "operacion"], buckets=_BUCKETS_MONGO,
+)
+MONGO_COMANDOS_FALLIDOS = Counter(
+    "mongo_comandos_fallidos_total", "Comandos MongoDB que terminaron con error.",
+    ["coleccion", "operacion"],
+)
+
+INGESTA_DOCUMENTOS = Counter(
+    "api_ingesta_documentos_total", "Documentos recibidos por la carga masiva, por colección y resultado.",
+    ["coleccion", "resultado"],
+)
+INGESTA_DURACION = Histogram(
+    "api_ingesta_duracion_segundos", "Duración de cada lote de carga masiva.",
+    ["coleccion"], buckets=_BUCKETS_SEGUNDOS,
+)
+
+
+def registrar_ingesta(coleccion: str, creados: int, fallidos: int, inicio: float) -> None:
+    """Registra un lote de /bulk/*; 'inicio' es el time.perf_counter() al empezar el lote."""
+    INGESTA_DURACION.labels(coleccion).observe(time.perf_counter() - inicio)
+    if creados:
+        INGESTA_DOCUMENTOS.labels(coleccion, "creado").inc(creados)
+    if fallidos:
+        INGESTA_DOCUMENTOS.labels(coleccion, "fallido").inc(fallidos)
+
+
+# Comandos cuyo primer campo no es el nombre de la colección o que no la tienen
+_SIN_COLECCION = "-"
+
+
+def coleccion_de_comando(nombre: str, comando) -> str:
+    """Colección de un comando: el valor de su primer campo (find: "carreras") o 'collection' en getMore."""
+    if nombre == "getMore":
+        return str(comando.get("collection", _SIN_COLECCION))
+    valor = comando.get(nombre)
+    return valor if isinstance(valor, str) else _SIN_COLECCION
+
+
+class OyenteComandosMongo(monitoring.CommandListener):
+    """Observa duración y fallos de cada comando. Los eventos de fin no traen el comando, así que
+    la colección se recuerda por (conexión, request_id) desde el evento de inicio."""
+
+    def __init__(self):
+        self._en_vuelo = {}
+
+    def started(self, event):
+        self._en_vuelo[(event.connection_id, event.request_id)] = coleccion_de_comando(event.command_name, event.command)
+
+    def succeeded(self, event):
+        coleccion = self._en_vuelo.pop((event.connection_id, event.request_id), _SIN_COLECCION)
+        MONGO_COMANDO_DURACION.labels(coleccion, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        coleccion = self._en_vuelo.pop((event.connection_id, event.request_id), _SIN_COLECCION)
+        MONGO_COMANDO_DURACION.labels(coleccion, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMANDOS_FALLIDOS.labels(coleccion, event.command_name).inc()
+
+
+_oyente_registrado = False
+
+
+def registrar_oyente_mongo() -> None:
+    """Registra el CommandListener para los clientes creados desde ahora (todos, al ser perezosos)."""
+    global _oyente_registrado
+    if not _oyente_registrado:
+        monitoring.register(OyenteComandosMongo())
+        _oyente_registrado = True
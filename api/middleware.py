@@ -0,0 +1,102 @@
+"""middleware.py
+Middleware de la API.
+
+- MetricasMiddleware: latencia, peticiones en curso, códigos de estado y tamaño de respuesta
+  por ruta (ver api/metricas.py). La ruta es el patrón de URL resuelto
+  (p.ej. "carreras/<str:nombre>/similares"); lo no resuelto se agrupa como "sin_ruta".
+- PresupuestoConsultasMiddleware: registra los comandos MongoDB de cada petición y avisa en el
+  log de presupuestos excedidos, comandos lentos y patrones N+1 (ver api/consultas.py).
+- PerfiladoMiddleware: perfila bajo demanda (cabecera X-Perfilar o muestreo) y devuelve el
+  desglose db/hidratación/serialización/render en Server-Timing (ver api/perfilado.py).
+"""
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api import perfilado
+from api.consultas import observar_consultas, registro_actual
+from api.metricas import PETICION_DURACION, PETICIONES, PETICIONES_EN_CURSO, RESPUESTA_TAMANO
+
+SIN_RUTA = "sin_ruta"
+
+
+def ruta_de(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.route if match and match.route else SIN_RUTA
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        ruta = ruta_de(request)
+        if getattr(request, "_metricas_en_curso", None):
+            PETICIONES_EN_CURSO.labels(*request._metricas_en_curso).dec()
+        PETICION_DURACION.labels(request.method, ruta).observe(time.perf_counter() - inicio)
+        PETICIONES.labels(request.method, ruta, str(response.status_code)).inc()
+        if not response.streaming:
+            RESPUESTA_TAMANO.labels(request.method, ruta).observe(len(response.content))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Aquí la URL ya está resuelta: se conoce la ruta para el gauge de peticiones en curso
+        request._metricas_en_curso = (request.method, ruta_de(request))
+        PETICIONES_EN_CURSO.labels(*request._metricas_en_curso).inc()
+        return None
+
+
+class PresupuestoConsultasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with observar_consultas(f"{request.method} {request.path}") as registro:
+            response = self.get_response(request)
+        response["X-Mongo-Comandos"] = str(registro.total)
+        return response
+
+
+class PerfiladoMiddleware:
+    """Va después de PresupuestoConsultasMiddleware para leer el tiempo MongoDB de la petición."""
+
+    def __init__(self, get_response):
+        if not perfilado.habilitado():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.muestreo = getattr(settings, "PERFILADO_MUESTREO", 0.0)
+
+    def __call__(self, request):
+        if not (perfilado.token_valido(request.headers.get(perfilado.CABECERA)) or random.random() < self.muestreo):
+            return self.get_response(request)
+
+        request._perfil = perfil = perfilado.Perfil()
+        perfil.iniciar_perfilador()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfil.detener_perfilador()
+        registro = registro_actual()
+        response["Server-Timing"] = perfilado.server_timing(perfil.desglose(registro.tiempo_ms if registro else 0.0))
+        perfil_id = perfil.guardar()
+        if perfil_id:
+            response["X-Perfil-Id"] = perfil_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        perfil = getattr(request, "_perfil", None)
+        if perfil is not None:
+            perfil.inicio_vista = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # Se llama justo al volver la vista y antes de Response.render()
+        perfil = getattr(request, "_perfil", None)
+        if perfil is not None:
+            perfil.fin_vista = perfil.inicio_render = time.perf_counter()
+            response.add_post_render_callback(lambda r: setattr(perfil, "fin_render", time.perf_counter()))
+        return response
@@ -0,0 +1,15 @@
+"""Modelos MongoEngine de la API.
+
+MODELOS lista los Document con colección propia; lo usan `manage.py ensure_indexes` y
+ApiConfig.ready() (creación automática de índices según MONGO_AUTO_CREATE_INDEX).
+"""
+from api.models.carrera import Carrera
+from api.models.escuela import Escuela, EscuelasPorEstado
+from api.models.formulario import Formulario
+from api.models.mapa_curricular import MapaCurricular
+from api.models.rastreo import Eliminado
+from api.models.subarea import Subarea
+from api.models.user import User
+from api.models.voluntariado import Voluntariado
+
+MODELOS = (Carrera, Eliminado, Escuela, EscuelasPorEstado, Formulario, MapaCurricular, Subarea, User, Voluntariado)
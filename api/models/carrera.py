@@ -1,7 +1,8 @@
-from mongoengine import Document, StringField, ListField
+from mongoengine import StringField, ListField
 from .constants import MAIN_AREAS
+from .rastreo import DocumentoCatalogo
 
-class Carrera(Document):
+class Carrera(DocumentoCatalogo):
     """Modelo de Carrera.
 
     Representa una carrera universitaria/oficio dentro del sistema.
@@ -12,11 +13,13 @@ class Carrera(Document):
     - main_area (str, opcional, choices=MAIN_AREAS): Área principal a la que pertenece.
     - videos (list[str], requerido): Recursos audiovisuales recomendados.
     - sub_areas (list[str], requerido): Nombres de subáreas asociadas.
+    - created_at, updated_at (datetime) y seq (int): marcas de cambio (api/models/rastreo.py).
 
     Índices:
     - nombre: para búsquedas por nombre.
     - main_area: para filtros por área.
     - sub_areas: para búsquedas por pertenencia.
+    - updated_at, seq: feed de cambios (/cambios).
     """
     nombre = StringField()
     descripcion = StringField()
@@ -31,7 +34,9 @@ class Carrera(Document):
         "indexes": [
             "nombre",  # Búsqueda por nombre
             "main_area",  # Filtrado por área
-            "sub_areas"
+            "sub_areas",
+            "updated_at",
+            ("seq", "id"),  # Cursor del feed de cambios
         ],
     }
 
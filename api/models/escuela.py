@@ -1,5 +1,9 @@
 
-from mongoengine import Document, StringField, FloatField, ListField, EmbeddedDocument, EmbeddedDocumentField
+from mongoengine import (Document, StringField, FloatField, IntField, ListField, DictField, DateTimeField,
+                         EmbeddedDocument, EmbeddedDocumentField)
+
+from api.estados import NOMBRES as ESTADOS
+from api.models.rastreo import DocumentoCatalogo
 
 
 class Coordenadas(EmbeddedDocument):
@@ -12,7 +16,7 @@ class Coordenadas(EmbeddedDocument):
     lat = FloatField()
     lng = FloatField()
 
-class Escuela(Document):
+class Escuela(DocumentoCatalogo):
     """Modelo de Escuela/Universidad.
 
     Campos:
@@ -21,14 +25,18 @@ class Escuela(Document):
     - type (str, requerido, choices=[publica, privada]): Naturaleza de la institución.
     - carreras (list[str], requerido): Carreras ofrecidas (por nombre).
     - costo (float, requerido): Costo o colegiatura referencial.
+    - estado (str, opcional, choices=api.estados.NOMBRES): Estado de México; se asigna al ingerir
+      (el declarado o, si falta, el del primer punto de ubicacion, ver api/estados.py).
+    - created_at, updated_at (datetime) y seq (int): marcas de cambio (api/models/rastreo.py).
 
-    Índices: nombre, ubicacion y arreglo carreras.
+    Índices: nombre, ubicacion, arreglo carreras, (estado, type), updated_at y seq.
     """
     nombre = StringField()
     ubicacion = ListField(EmbeddedDocumentField(Coordenadas))
     type = StringField(choices=["publica", "privada"])
     carreras = ListField()
     costo = FloatField()
+    estado = StringField(choices=ESTADOS)
 
     meta = {
         "collection": "escuelas",
@@ -37,6 +45,26 @@ class Escuela(Document):
         "indexes": [
             "nombre",  # Búsqueda por nombre
             "ubicacion",  # Filtrado por ubicación
-            {"fields": ["carreras"]}  # Búsqueda por elemento en la lista
+            {"fields": ["carreras"]},  # Búsqueda por elemento en la lista
+            ("estado", "type"),  # Conteos y top por estado (api/escuelas_por_estado.py)
+            "updated_at",
+            ("seq", "id"),  # Cursor del feed de cambios (/cambios)
         ],
-    }
\ No newline at end of file
+    }
+
+
+class EscuelasPorEstado(Document):
+    """Agregado precalculado de escuelas por estado (api/escuelas_por_estado.py).
+
+    Campos:
+    - estado (str, llave primaria)
+    - total (int): escuelas del estado.
+    - por_tipo (dict): {"publica"|"privada": {"total": int, "top": [{"nombre", "carreras", "costo"}]}}
+    - actualizado (datetime): último recálculo.
+    """
+    estado = StringField(primary_key=True)
+    total = IntField()
+    por_tipo = DictField()
+    actualizado = DateTimeField()
+
+    meta = {"collection": "escuelas_por_estado"}
\ No newline at end of file
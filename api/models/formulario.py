@@ -12,6 +12,9 @@ class Formulario(Document):
     - respuestas (list, requerido): Lista de respuestas o estructura capturada.
     - resultados (float, requerido, default=None): Puntaje o resultado calculado.
     - subarea (str, requerido): Nombre de la subárea a la que pertenece.
+
+    Calificación en servidor: si las preguntas incluyen 'correcta'/'peso' o 'puntajes', los
+    resultados pueden recalcularse con api/calificacion.py (porcentaje 0-100).
     """
     nombre = StringField()
     descripcion = StringField()
@@ -1,6 +1,8 @@
-from mongoengine import StringField, Document
+from mongoengine import StringField
 
-class MapaCurricular(Document):
+from api.models.rastreo import DocumentoCatalogo
+
+class MapaCurricular(DocumentoCatalogo):
     """Modelo de Mapa Curricular.
 
     Representa una materia o nodo dentro del mapa curricular de una carrera.
@@ -9,6 +11,7 @@ class MapaCurricular(Document):
     - nombre (str, requerido): Nombre de la materia.
     - descripcion (str, requerido): Descripción de la materia.
     - carrera (str, requerido): Nombre de la carrera a la que pertenece.
+    - created_at, updated_at (datetime) y seq (int): marcas de cambio (api/models/rastreo.py).
     """
     nombre = StringField()
     descripcion = StringField()
@@ -21,5 +24,7 @@ class MapaCurricular(Document):
         "indexes": [
             "nombre",  # Búsqueda por nombre
             "carrera",  # Filtrado por carrera
+            "updated_at",
+            ("seq", "id"),  # Cursor del feed de cambios (/cambios)
         ],
     }
\ No newline at end of file
@@ -0,0 +1,223 @@
+# rastreo.py
+"""Marcas de cambio de los modelos de catálogo (feed /cambios, ver api/cambios.py).
+
+- DocumentoCatalogo: base abstracta con created_at, updated_at y seq. `save()` los llena.
+- QuerySetCatalogo (queryset_class de esos modelos): `insert`, `update`/`update_one`/
+  `upsert_one`, `modify` y `delete` de QuerySet (y `Document.update`/`modify`/`delete`, que pasan
+  por él) también sellan o dejan lápida (Eliminado), así que ninguna escritura vía MongoEngine
+  se salta el feed.
+- Las rutas masivas sobre pymongo (bulk_write, insert_many) no pasan por MongoEngine y usan
+  `sellar_documentos` / `con_sellos` dentro de `secuencia_reservada`, un lote a la vez.
+- seq: número de secuencia global y creciente (contador "secuencia" de la colección `catalogo`),
+  reservado por bloques. Es el cursor del feed de cambios; los documentos de un mismo update de
+  QuerySet comparten seq (el feed desempata por _id).
+- Eliminado: lápida {coleccion, doc_id, seq, deleted_at} por documento borrado.
+
+Reservas en curso: un seq se reserva antes de escribirse, así que un escritor lento puede
+confirmar un seq menor después de que otro ya confirmó (y el feed entregó) uno mayor. Cada
+reserva se anota en `pendientes` del contador mientras dura su escritura y `seq_confirmado()`
+da el mayor seq por debajo de la reserva abierta más antigua: hasta ahí todo está escrito, sin
+importar cuánto tarde un bulk_write. Una reserva abierta más de CAMBIOS_RESERVA_MAX_SEGUNDOS se
+da por abandonada (proceso caído) y se descarta.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from mongoengine import DateTimeField, Document, IntField, QuerySet, StringField, signals
+from mongoengine.connection import get_db
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+_CONTADOR = {"_id": "secuencia"}
+
+
+def _coleccion_contador():
+    return get_db()["catalogo"]
+
+
+@contextmanager
+def secuencia_reservada(n: int = 1) -> Iterator[int]:
+    """Reserva n números de secuencia consecutivos y da el primero; la reserva sigue abierta
+    (y retiene el feed) hasta que termina el bloque, que debe hacer la escritura que los usa."""
+    coleccion, campo = _coleccion_contador(), f"pendientes.{uuid.uuid4().hex}"
+    # 1) Se anota la reserva antes de incrementar: nunca hay un seq reservado sin anotar
+    doc = coleccion.find_one_and_update(
+        _CONTADOR, {"$set": {campo: {"creada": time.time()}}}, upsert=True, return_document=ReturnDocument.AFTER)
+    try:
+        # 2) El incremento fija, en la misma operación, una cota inferior de los seq reservados
+        doc = coleccion.find_one_and_update(
+            {**_CONTADOR, campo: {"$exists": True}},
+            {"$inc": {"valor": n}, "$set": {f"{campo}.cota": doc.get("valor", 0) + 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            raise RuntimeError("La reserva de seq se descartó por vencida antes de usarse.")
+        yield doc["valor"] - n + 1
+    finally:
+        coleccion.update_one(_CONTADOR, {"$unset": {campo: ""}})
+
+
+def seq_confirmado() -> int:
+    """Mayor seq tal que todos los seq menores o iguales ya se escribieron (o se abandonaron)."""
+    coleccion = _coleccion_contador()
+    doc = coleccion.find_one(_CONTADOR) or {}
+    vencimiento = time.time() - getattr(settings, "CAMBIOS_RESERVA_MAX_SEGUNDOS", 600)
+    confirmado, vencidas = doc.get("valor", 0), []
+    for ficha, reserva in (doc.get("pendientes") or {}).items():
+        if reserva.get("creada", 0) < vencimiento:
+            vencidas.append(ficha)
+        elif "cota" in reserva:
+            confirmado = min(confirmado, reserva["cota"] - 1)
+        # Sin cota aún no incrementó: sus seq serán mayores que "valor"
+    if vencidas:
+        logger.warning("Se descartan %d reservas de seq abiertas por más de CAMBIOS_RESERVA_MAX_SEGUNDOS.", len(vencidas))
+        coleccion.update_one(_CONTADOR, {"$unset": {f"pendientes.{f}": "" for f in vencidas}})
+    return confirmado
+
+
+def sellar_documentos(documentos: List[dict], inicio: int, ahora: Optional[datetime] = None) -> List[dict]:
+    """Agrega created_at, updated_at y seq (desde `inicio`, ver secuencia_reservada) a documentos
+    por insertar."""
+    ahora = ahora or datetime.now(timezone.utc)
+    for i, doc in enumerate(documentos):
+        doc.setdefault("created_at", ahora)
+        doc["updated_at"] = ahora
+        doc["seq"] = inicio + i
+    return documentos
+
+
+def con_sellos(actualizacion: dict, seq: int, ahora: datetime, solo_alta: bool = False) -> dict:
+    """Copia de un documento de actualización ($set, $addToSet, ...) con updated_at y seq, y
+    created_at si el update termina en inserción (upsert). Con solo_alta todas las marcas van en
+    $setOnInsert: el upsert no cambia (ni re-sella) un documento que ya existe."""
+    resultado = dict(actualizacion)
+    sellos = {"updated_at": ahora, "seq": seq}
+    if not solo_alta:
+        resultado["$set"] = {**actualizacion.get("$set", {}), **sellos}
+        sellos = {}
+    resultado["$setOnInsert"] = {**actualizacion.get("$setOnInsert", {}), **sellos, "created_at": ahora}
+    return resultado
+
+
+class Eliminado(Document):
+    """Lápida de un documento de catálogo borrado."""
+    coleccion = StringField(required=True)
+    doc_id = StringField(required=True)
+    seq = IntField(required=True)
+    deleted_at = DateTimeField()
+
+    meta = {
+        "collection": "eliminados",
+        "indexes": [
+            "seq",
+            "deleted_at",  # Sondeo de borrados recientes (api/recomendaciones.py)
+        ],
+    }
+
+
+def registrar_eliminados(coleccion: str, ids: Iterable) -> int:
+    ids = [str(i) for i in ids]
+    if not ids:
+        return 0
+    ahora = datetime.now(timezone.utc)
+    with secuencia_reservada(len(ids)) as inicio:
+        Eliminado._get_collection().insert_many([
+            {"coleccion": coleccion, "doc_id": i, "seq": inicio + k, "deleted_at": ahora} for k, i in enumerate(ids)
+        ], ordered=False)
+    return len(ids)
+
+
+@contextmanager
+def _sellado(update: dict) -> Iterator[dict]:
+    """Argumentos de update de MongoEngine con las marcas en la misma operación (un solo seq)."""
+    ahora = datetime.now(timezone.utc)
+    with secuencia_reservada() as seq:
+        if "__raw__" not in update:
+            yield {**update, "set__updated_at": ahora, "set__seq": seq, "set_on_insert__created_at": ahora}
+        elif isinstance(update["__raw__"], list):
+            # Pipeline de agregación: una etapa más al final
+            yield {**update, "__raw__": [*update["__raw__"], {"$set": {
+                "updated_at": ahora, "seq": seq, "created_at": {"$ifNull": ["$created_at", ahora]}}}]}
+        else:
+            yield {**update, "__raw__": con_sellos(update["__raw__"], seq, ahora)}
+
+
+class QuerySetCatalogo(QuerySet):
+    """QuerySet de los modelos de catálogo: sus escrituras también alimentan el feed /cambios.
+
+    Un update (de uno o de varios documentos, también con __raw__) se sella en la misma operación:
+    todo lo que modifica comparte un seq y /cambios pagina esos empates por _id. Como $set de
+    updated_at siempre modifica, un update sin cambios reales también re-sella lo que coincide.
+    """
+
+    def insert(self, doc_or_docs, *args, **kwargs):
+        documentos = doc_or_docs if isinstance(doc_or_docs, (list, tuple)) else [doc_or_docs]
+        ahora = datetime.now(timezone.utc)
+        with secuencia_reservada(len(documentos)) as inicio:
+            for i, doc in enumerate(documentos):
+                doc.created_at = doc.created_at or ahora
+                doc.updated_at, doc.seq = ahora, inicio + i
+            return super().insert(doc_or_docs, *args, **kwargs)
+
+    def update(self, upsert=False, multi=True, write_concern=None, read_concern=None, full_result=False,
+               array_filters=None, **update):
+        opciones = {"upsert": upsert, "write_concern": write_concern, "read_concern": read_concern,
+                    "array_filters": array_filters}
+        with _sellado(update) as sellado:
+            return super().update(multi=multi, full_result=full_result, **opciones, **sellado)
+
+    def modify(self, upsert=False, full_response=False, remove=False, new=False, array_filters=None, **update):
+        with nullcontext(update) if remove else _sellado(update) as sellado:
+            resultado = super().modify(upsert=upsert, full_response=full_response, remove=remove, new=new,
+                                       array_filters=array_filters, **sellado)
+        doc = resultado["value"] if full_response and resultado else resultado
+        if doc is not None and remove:
+            registrar_eliminados(self._document._get_collection_name(), [doc.pk])
+        return resultado
+
+    def delete(self, write_concern=None, _from_doc_delete=False, cascade_refs=None):
+        documento = self._document
+        con_senal = signals.signals_available and (
+            signals.pre_delete.has_receivers_for(documento) or signals.post_delete.has_receivers_for(documento))
+        if not _from_doc_delete and (self._skip or self._limit or con_senal):
+            # MongoEngine borra uno por uno con Document.delete, que vuelve aquí con _from_doc_delete
+            return super().delete(write_concern=write_concern, cascade_refs=cascade_refs)
+        # Se borra exactamente lo que se leyó: cada _id borrado tiene su lápida
+        ids = list(self.clone().scalar("pk"))
+        if not ids:
+            return 0
+        borrados = super(QuerySetCatalogo, self._por_ids(ids)).delete(
+            write_concern=write_concern, _from_doc_delete=_from_doc_delete, cascade_refs=cascade_refs)
+        registrar_eliminados(documento._get_collection_name(), ids)
+        return borrados
+
+    def _por_ids(self, ids: List) -> "QuerySetCatalogo":
+        return type(self)(self._document, self._collection_obj).filter(pk__in=ids)
+
+
+class DocumentoCatalogo(Document):
+    """Base de los modelos de catálogo: marcas de creación/actualización y lápidas al borrar
+    (QuerySetCatalogo).
+
+    Cada modelo declara en su meta los índices "updated_at" y ("seq", "id").
+    """
+    created_at = DateTimeField()
+    updated_at = DateTimeField()
+    seq = IntField()
+
+    meta = {"abstract": True, "queryset_class": QuerySetCatalogo}
+
+    def save(self, *args, **kwargs):
+        ahora = datetime.now(timezone.utc)
+        if not self.created_at:
+            self.created_at = ahora
+        self.updated_at = ahora
+        with secuencia_reservada() as seq:
+            self.seq = seq
+            return super().save(*args, **kwargs)
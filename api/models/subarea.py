@@ -1,4 +1,6 @@
-from mongoengine import Document, StringField, ListField, EmbeddedDocumentField, EmbeddedDocument, FloatField, IntField
+from mongoengine import StringField, ListField, EmbeddedDocumentField, EmbeddedDocument, FloatField, IntField
+
+from api.models.rastreo import DocumentoCatalogo
 
 
 class Leccion(EmbeddedDocument):
@@ -6,7 +8,7 @@ class Leccion(EmbeddedDocument):
     videos = ListField(StringField())
     descripcion = StringField()
 
-class Subarea(Document):
+class Subarea(DocumentoCatalogo):
     """Modelo de Subárea.
 
     Subdivisión de una carrera con contenidos y recursos asociados.
@@ -17,6 +19,7 @@ class Subarea(Document):
     - descripcion (str, requerido): Descripción detallada.
     - videos_escuela (list, requerido): Recursos audiovisuales de apoyo.
     - carrera (str, requerido): Nombre de la carrera a la que pertenece.
+    - created_at, updated_at (datetime) y seq (int): marcas de cambio (api/models/rastreo.py).
     """
     nombre = StringField()
     introduccion = StringField()
@@ -34,5 +37,7 @@ class Subarea(Document):
         "indexes": [
             "nombre",  # Búsqueda por nombre
             "carrera",  # Filtrado por carrera
+            "updated_at",
+            ("seq", "id"),  # Cursor del feed de cambios (/cambios)
         ],
     }
\ No newline at end of file
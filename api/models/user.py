@@ -3,6 +3,11 @@ from mongoengine import Document, StringField, BooleanField, ListField
 from api.models.constants import MAIN_AREAS
 
 
+def normalizar_email(email):
+    """Forma canónica del email usada para unicidad (sin espacios laterales, en minúsculas)."""
+    return email.strip().lower() if isinstance(email, str) else None
+
+
 class User(Document):
     """Modelo de Usuario del sistema.
 
@@ -10,6 +15,7 @@ class User(Document):
     - first_name (str, req.): Nombre.
     - last_name (str, req.): Apellidos.
     - email (str, req.): Correo electrónico único de contacto.
+    - email_normalizado (str): email en forma canónica; se llena en clean() y tiene índice único.
     - ubicacion (str, req.): Ubicación (libre, p.ej. estado/ciudad).
     - discapacidad (str, req.): Información de discapacidad (si aplica).
     - carrera (str, req.): Carrera de interés/estudio.
@@ -19,6 +25,7 @@ class User(Document):
     first_name = StringField()
     last_name = StringField()
     email = StringField()
+    email_normalizado = StringField()
     ubicacion = StringField()
     discapacidad = StringField()
     carrera = StringField()
@@ -31,5 +38,11 @@ class User(Document):
         "indexes": [
             "carrera",  # Búsqueda por carrera
             "main_area",  # Filtrado por área
+            # Unicidad del email normalizado: el alta es un solo insert y los duplicados fallan en la BD.
+            # sparse para tolerar documentos antiguos sin el campo (ver manage.py normalizar_emails).
+            {"fields": ["email_normalizado"], "unique": True, "sparse": True},
         ],
-    }
\ No newline at end of file
+    }
+
+    def clean(self):
+        self.email_normalizado = normalizar_email(self.email)
\ No newline at end of file
@@ -1,7 +1,9 @@
 
-from mongoengine import StringField, FloatField, Document
+from mongoengine import StringField, FloatField
 
-class Voluntariado(Document):
+from api.models.rastreo import DocumentoCatalogo
+
+class Voluntariado(DocumentoCatalogo):
     """Modelo de Voluntariado.
 
     Publicaciones de voluntariados asociados a carreras.
@@ -13,6 +15,9 @@ class Voluntariado(Document):
     - ubicacion (str, req.): Ubicación de la actividad.
     - salario (float, req.): Estimación de apoyo/estímulo (si aplica).
     - permalink (str, req.): Enlace permanente a la publicación.
+    - created_at, updated_at (datetime) y seq (int): marcas de cambio (api/models/rastreo.py).
+
+    Índices: carrera (/voluntariados?carrera=...), updated_at y seq (feed /cambios).
     """
     carrera = StringField()
     titulo = StringField()
@@ -20,3 +25,12 @@ class Voluntariado(Document):
     ubicacion = StringField()
     salario = FloatField()
     permalink = StringField()
+
+    meta = {
+        "collection": "voluntariado",
+        "indexes": [
+            "carrera",  # Filtrado por carrera
+            "updated_at",
+            ("seq", "id"),  # Cursor del feed de cambios
+        ],
+    }
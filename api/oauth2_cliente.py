@@ -0,0 +1,186 @@
+"""oauth2_cliente.py
+Intercambio de código OAuth2 y verificación local del id_token.
+
+- Un único `httpx.Client` por proceso (keep-alive y pool de conexiones) para hablar con el
+  proveedor: evita abrir una conexión TLS nueva en cada login. Se recrea tras un fork.
+- Las claves públicas (JWKS) se guardan en caché con TTL (OAUTH_JWKS_TTL). Si llega un token
+  con un `kid` desconocido (rotación de claves) se vuelve a descargar el JWKS, con una sola
+  descarga en vuelo aunque lleguen muchas peticiones a la vez (single-flight) y un intervalo
+  mínimo entre descargas forzadas para no amplificar tokens con `kid` inventados.
+- La firma y los claims (exp, iat, aud, iss) se verifican localmente con PyJWT.
+
+Para pruebas locales ver api/tests/oauth2_stub.py (proveedor stub con token endpoint y JWKS).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+import jwt
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Solo algoritmos asimétricos: 'none' y HS* no son aceptables para un id_token de terceros
+ALGORITMOS_PERMITIDOS = ("RS256", "RS384", "RS512", "PS256", "PS384", "PS512", "ES256", "ES384")
+
+
+class ErrorOAuth2(Exception):
+    """Fallo al canjear el código o al verificar el id_token."""
+
+
+_cliente: Optional[httpx.Client] = None
+_cliente_pid: Optional[int] = None
+_cliente_lock = threading.Lock()
+
+
+def cliente_http() -> httpx.Client:
+    """Cliente HTTP compartido por proceso (pool con keep-alive)."""
+    global _cliente, _cliente_pid
+    if _cliente is None or _cliente_pid != os.getpid():
+        with _cliente_lock:
+            if _cliente is None or _cliente_pid != os.getpid():
+                timeout = float(getattr(settings, "OAUTH_HTTP_TIMEOUT", 10))
+                _cliente = httpx.Client(
+                    timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+                    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=90),
+                    headers={"Accept": "application/json"},
+                )
+                _cliente_pid = os.getpid()
+    return _cliente
+
+
+def intercambiar_codigo(token_endpoint: str, code: str, code_verifier: str, redirect_uri: str,
+                        client_id: str, client_secret: Optional[str] = None) -> dict:
+    """Canjea el código de autorización (PKCE) por tokens en el token endpoint."""
+    data = {
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": redirect_uri,
+        "client_id": client_id,
+        "code_verifier": code_verifier,
+    }
+    if client_secret:
+        data["client_secret"] = client_secret
+    try:
+        resp = cliente_http().post(token_endpoint, data=data)
+    except httpx.HTTPError as e:
+        raise ErrorOAuth2(f"No se pudo contactar al proveedor: {e}") from e
+    try:
+        tokens = resp.json()
+    except ValueError:
+        tokens = {}
+    if resp.status_code != 200:
+        raise ErrorOAuth2(f"El proveedor rechazó el código ({resp.status_code}): {tokens.get('error', 'sin detalle')}")
+    if not tokens.get("id_token"):
+        raise ErrorOAuth2("La respuesta del proveedor no incluye id_token.")
+    return tokens
+
+
+class CacheJWKS:
+    """Caché de claves públicas de un JWKS con TTL, refresco por kid desconocido y single-flight."""
+
+    def __init__(self, jwks_uri: str, ttl: float = 3600, intervalo_minimo: float = 30):
+        self.jwks_uri = jwks_uri
+        self.ttl = ttl
+        self.intervalo_minimo = intervalo_minimo
+        self._claves: Dict[Optional[str], jwt.PyJWK] = {}
+        self._expira = 0.0
+        self._ultimo_forzado = 0.0
+        self._lock = threading.Lock()
+        self._en_vuelo: Optional[threading.Event] = None
+
+    def _descargar(self) -> None:
+        resp = cliente_http().get(self.jwks_uri)
+        resp.raise_for_status()
+        claves = {}
+        for jwk in jwt.PyJWKSet.from_dict(resp.json()).keys:
+            claves[jwk.key_id] = jwk
+        self._claves = claves
+        self._expira = time.monotonic() + self.ttl
+
+    def _refrescar(self, forzado: bool) -> None:
+        with self._lock:
+            evento = self._en_vuelo
+            lider = evento is None
+            if lider:
+                if forzado:
+                    if time.monotonic() - self._ultimo_forzado < self.intervalo_minimo:
+                        return
+                    self._ultimo_forzado = time.monotonic()
+                evento = self._en_vuelo = threading.Event()
+        if not lider:
+            # Otra hebra ya está descargando: esperar su resultado
+            evento.wait(timeout=float(getattr(settings, "OAUTH_HTTP_TIMEOUT", 10)))
+            return
+        try:
+            self._descargar()
+        except (httpx.HTTPError, jwt.PyJWKSetError, ValueError) as e:
+            # Se conservan las claves anteriores (aunque estén vencidas) y se reintenta más tarde
+            logger.warning("No se pudo descargar el JWKS de %s: %s", self.jwks_uri, e)
+            self._expira = time.monotonic() + self.intervalo_minimo
+        finally:
+            with self._lock:
+                self._en_vuelo = None
+            evento.set()
+
+    def clave(self, kid: Optional[str]) -> jwt.PyJWK:
+        if time.monotonic() >= self._expira:
+            self._refrescar(forzado=False)
+        if kid not in self._claves and not (kid is None and len(self._claves) == 1):
+            self._refrescar(forzado=True)
+        if kid is None and len(self._claves) == 1:
+            return next(iter(self._claves.values()))
+        try:
+            return self._claves[kid]
+        except KeyError:
+            raise ErrorOAuth2("El id_token está firmado con una clave desconocida.") from None
+
+
+_caches_jwks: Dict[str, CacheJWKS] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_jwks(jwks_uri: str) -> CacheJWKS:
+    with _caches_lock:
+        cache = _caches_jwks.get(jwks_uri)
+        if cache is None:
+            cache = _caches_jwks[jwks_uri] = CacheJWKS(
+                jwks_uri, ttl=float(getattr(settings, "OAUTH_JWKS_TTL", 3600))
+            )
+        return cache
+
+
+def verificar_id_token(id_token: str, jwks_uri: str, audience: str, issuer: str) -> dict:
+    """Verifica firma y claims del id_token con claves del JWKS en caché y retorna los claims.
+
+    `iss` es obligatorio y debe coincidir con `issuer`: un JWKS puede firmar tokens de varios
+    emisores (p. ej. varios tenants de un mismo proveedor).
+    """
+    if not issuer:
+        raise ErrorOAuth2("Falta el issuer esperado del id_token.")
+    try:
+        encabezado = jwt.get_unverified_header(id_token)
+    except jwt.PyJWTError as e:
+        raise ErrorOAuth2(f"id_token mal formado: {e}") from e
+    algoritmo = encabezado.get("alg")
+    if algoritmo not in ALGORITMOS_PERMITIDOS:
+        raise ErrorOAuth2(f"Algoritmo de firma no permitido: {algoritmo}")
+
+    clave = cache_jwks(jwks_uri).clave(encabezado.get("kid"))
+    try:
+        return jwt.decode(
+            id_token,
+            key=clave.key,
+            algorithms=[algoritmo],
+            audience=audience,
+            issuer=issuer,
+            leeway=60,
+            options={"require": ["exp", "iat", "aud", "iss"]},
+        )
+    except jwt.PyJWTError as e:
+        raise ErrorOAuth2(f"id_token inválido: {e}") from e
@@ -0,0 +1,103 @@
+"""oauth2_estado.py
+Almacenamiento del estado del flujo OAuth2 (state, code_verifier PKCE y proveedor) entre
+`/auth/oauth2/start` y `/auth/oauth2/callback`.
+
+Modos (setting OAUTH2_ESTADO_MODO):
+- "cookie" (por defecto): el estado viaja firmado (django.core.signing, con expiración) en una
+  cookie HttpOnly. Sin escrituras en base de datos ni estado en el servidor, funciona con
+  cualquier número de workers y máquinas que compartan SECRET_KEY.
+- "cache": el estado se guarda en el backend de caché de Django con TTL. Uso único garantizado
+  por `cache.delete`. Requiere una caché compartida (Redis con REDIS_URL): con LocMem cada
+  worker tiene la suya y el callback suele llegar a uno que no guardó el estado, así que
+  /auth/oauth2/start se rechaza salvo OAUTH2_ESTADO_CACHE_LOCAL=True (un solo proceso).
+- "session": comportamiento anterior, en `request.session` (con el motor de sesiones por
+  defecto implica escrituras en la base SQL en cada inicio de sesión).
+
+La cookie va firmada pero no cifrada: su contenido solo lo ve el propio navegador del usuario,
+nunca viaja en la URL de redirección, por lo que el code_verifier no se expone a terceros.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+MODOS = ("cookie", "cache", "session")
+COOKIE_ESTADO = "oauth2_estado"
+_SAL = "api.oauth2.estado"
+_CLAVES_SESION = {"state": "oauth2_state", "code_verifier": "oauth2_code_verifier", "provider": "oauth2_provider"}
+
+
+def modo_estado() -> str:
+    modo = getattr(settings, "OAUTH2_ESTADO_MODO", "cookie")
+    return modo if modo in MODOS else "cookie"
+
+
+def error_configuracion() -> Optional[str]:
+    """Mensaje si el modo configurado no puede funcionar con varios workers; None si está bien."""
+    if (modo_estado() == "cache" and isinstance(caches["default"], LocMemCache)
+            and not getattr(settings, "OAUTH2_ESTADO_CACHE_LOCAL", False)):
+        return ("OAUTH2_ESTADO_MODO=cache requiere una caché compartida (REDIS_URL); "
+                "LocMemCache es por proceso.")
+    return None
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "OAUTH2_ESTADO_TTL", 600))
+
+
+def _clave_cache(state: str) -> str:
+    return f"oauth2:estado:{state}"
+
+
+def guardar_estado(request, response, state: str, code_verifier: str, provider: str) -> None:
+    """Persiste el estado del flujo según el modo configurado (puede escribir en 'response')."""
+    datos = {"state": state, "code_verifier": code_verifier, "provider": provider}
+    modo = modo_estado()
+    if modo == "session":
+        for campo, clave in _CLAVES_SESION.items():
+            request.session[clave] = datos[campo]
+    elif modo == "cache":
+        cache.set(_clave_cache(state), datos, timeout=_ttl())
+    else:
+        response.set_cookie(
+            COOKIE_ESTADO,
+            signing.dumps(datos, salt=_SAL, compress=True),
+            max_age=_ttl(),
+            httponly=True,
+            samesite="Lax",
+            secure=request.is_secure(),
+        )
+
+
+def consumir_estado(request, state: str) -> Optional[dict]:
+    """Recupera y retira el estado asociado a 'state'. None si no existe, expiró o no coincide."""
+    modo = modo_estado()
+    if modo == "session":
+        datos = {campo: request.session.pop(clave, None) for campo, clave in _CLAVES_SESION.items()}
+    elif modo == "cache":
+        clave = _clave_cache(state)
+        datos = cache.get(clave)
+        # delete() retorna False si otra petición ya lo consumió: evita replays concurrentes
+        if not datos or not cache.delete(clave):
+            return None
+    else:
+        firmado = request.COOKIES.get(COOKIE_ESTADO)
+        if not firmado:
+            return None
+        try:
+            datos = signing.loads(firmado, salt=_SAL, max_age=_ttl())
+        except signing.BadSignature:
+            return None
+    if not datos.get("state") or datos["state"] != state:
+        return None
+    return datos
+
+
+def descartar_estado(response) -> None:
+    """Elimina la cookie de estado (modo cookie) en la respuesta del callback."""
+    if modo_estado() == "cookie":
+        response.delete_cookie(COOKIE_ESTADO, samesite="Lax")
@@ -0,0 +1,145 @@
+"""perfilado.py
+Perfilado bajo demanda de peticiones (api.middleware.PerfiladoMiddleware).
+
+Se perfila una petición si trae la cabecera `X-Perfilar: <PERFILADO_TOKEN>` o si cae en la
+muestra aleatoria PERFILADO_MUESTREO (0..1). Sin PERFILADO_TOKEN el middleware se descarta al
+arrancar (MiddlewareNotUsed) y no añade costo alguno; el muestreo también lo requiere, porque sin
+token los perfiles guardados no se podrían descargar (GET /perfiles exige la cabecera).
+
+Desglose (cabecera `Server-Timing`, en ms):
+- db: tiempo de los comandos MongoDB de la petición (registro de api/consultas.py).
+- hidratacion: construcción de Documents a partir de los BSON (`BaseDocument._from_son`),
+  medido con cProfile.
+- serializacion: resto del tiempo de la vista (armado de diccionarios, lógica).
+- render: `Response.render()` de DRF (JSON).
+- total: la petición completa desde el middleware.
+
+El perfil cProfile completo se guarda en PERFILADO_DIR como `<id>.prof` (se conservan los
+PERFILADO_MAX_ARCHIVOS más recientes; cada proceso poda el directorio cada PERFILADO_MAX_ARCHIVOS/10
+perfiles guardados, así que puede excederse por poco entre podas), su id va en la cabecera `X-Perfil-Id` y se descarga en
+GET /perfiles/<id> (`python -m pstats` o snakeviz para leerlo). cProfile solo admite un perfil
+activo a la vez: si otra petición ya se está perfilando se devuelve el desglose sin hidratación.
+"""
+from __future__ import annotations
+
+import cProfile
+import hmac
+import logging
+import pstats
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CABECERA = "X-Perfilar"
+_FORMATO_ID = re.compile(r"^[0-9]{14}-[0-9a-f]{8}$")
+_perfilador_lock = threading.Lock()
+_poda = {"guardados": 0}
+_poda_lock = threading.Lock()
+
+
+def habilitado() -> bool:
+    if getattr(settings, "PERFILADO_TOKEN", None):
+        return True
+    if getattr(settings, "PERFILADO_MUESTREO", 0.0) > 0:
+        logger.warning("PERFILADO_MUESTREO se ignora sin PERFILADO_TOKEN: los perfiles no se podrían descargar.")
+    return False
+
+
+def token_valido(valor: Optional[str]) -> bool:
+    token = getattr(settings, "PERFILADO_TOKEN", None)
+    return bool(token and valor and hmac.compare_digest(valor, token))
+
+
+def directorio() -> Path:
+    return Path(getattr(settings, "PERFILADO_DIR", "/tmp/perfiles"))
+
+
+class Perfil:
+    """Perfil de una petición: cProfile (si está libre) y marcas de tiempo de sus fases."""
+
+    def __init__(self):
+        self.id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.inicio = time.perf_counter()
+        self.inicio_vista: Optional[float] = None
+        self.fin_vista: Optional[float] = None
+        self.inicio_render: Optional[float] = None
+        self.fin_render: Optional[float] = None
+        self.perfilador: Optional[cProfile.Profile] = None
+
+    def iniciar_perfilador(self) -> None:
+        if _perfilador_lock.acquire(blocking=False):
+            self.perfilador = cProfile.Profile()
+            self.perfilador.enable()
+
+    def detener_perfilador(self) -> None:
+        if self.perfilador is not None:
+            self.perfilador.disable()
+            _perfilador_lock.release()
+
+    def hidratacion_ms(self) -> Optional[float]:
+        if self.perfilador is None:
+            return None
+        stats = pstats.Stats(self.perfilador).stats
+        # cProfile ya descuenta la recursión (documentos embebidos) en el tiempo acumulado
+        return sum(ct for (archivo, _, funcion), (_, _, _, ct, _) in stats.items()
+                   if funcion == "_from_son" and "mongoengine" in archivo) * 1000
+
+    def desglose(self, db_ms: float) -> Dict[str, float]:
+        fin = time.perf_counter()
+        fases = {"db": db_ms}
+        hidratacion = self.hidratacion_ms()
+        if hidratacion is not None:
+            fases["hidratacion"] = hidratacion
+        if self.inicio_vista is not None:
+            vista = ((self.fin_vista or fin) - self.inicio_vista) * 1000
+            fases["serializacion"] = max(0.0, vista - db_ms - (hidratacion or 0.0))
+        if self.inicio_render is not None and self.fin_render is not None:
+            fases["render"] = (self.fin_render - self.inicio_render) * 1000
+        fases["total"] = (fin - self.inicio) * 1000
+        return fases
+
+    def guardar(self) -> Optional[str]:
+        """Escribe el .prof y poda los más antiguos; retorna el id o None si no hubo cProfile."""
+        if self.perfilador is None:
+            return None
+        destino = directorio()
+        destino.mkdir(parents=True, exist_ok=True)
+        self.perfilador.dump_stats(destino / f"{self.id}.prof")
+        maximo = getattr(settings, "PERFILADO_MAX_ARCHIVOS", 200)
+        # Listar y ordenar el directorio en cada petición perfilada es caro con muestreo: se poda por tandas
+        with _poda_lock:
+            _poda["guardados"] += 1
+            podar = _poda["guardados"] >= max(1, maximo // 10)
+            if podar:
+                _poda["guardados"] = 0
+        if podar:
+            for antiguo in listar()[maximo:]:
+                (destino / f"{antiguo}.prof").unlink(missing_ok=True)
+        return self.id
+
+
+def server_timing(fases: Dict[str, float]) -> str:
+    return ", ".join(f"{nombre};dur={ms:.2f}" for nombre, ms in fases.items())
+
+
+def listar() -> List[str]:
+    """Ids de los perfiles guardados, del más reciente al más antiguo."""
+    try:
+        nombres = [p.stem for p in directorio().glob("*.prof")]
+    except OSError:
+        return []
+    return sorted((n for n in nombres if _FORMATO_ID.match(n)), reverse=True)
+
+
+def ruta_perfil(perfil_id: str) -> Optional[Path]:
+    if not _FORMATO_ID.match(perfil_id):
+        return None
+    ruta = directorio() / f"{perfil_id}.prof"
+    return ruta if ruta.is_file() else None
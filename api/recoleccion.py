@@ -0,0 +1,378 @@
+"""recoleccion.py
+Recolección reanudable de Wikipedia, Wikidata y Google Places (`manage.py recolectar`).
+
+Pipeline en flujo por unidad de trabajo: descarga → normalización → deduplicación → sumideros.
+- Unidades: un término en Wikipedia, un lote de términos en Wikidata y un estado en Places.
+  Cada unidad se procesa completa y, al terminar, se escribe en los sumideros y se registra en
+  el checkpoint; una unidad fallida no se registra y se reintenta en la siguiente ejecución.
+- Sumideros: NDJSON incremental (`carreras.ndjson` y `escuelas.ndjson` en la carpeta de salida,
+  un registro por línea) y, opcionalmente, MongoDB por lotes de upserts (bulk_write). Los
+  upserts son idempotentes: repetir una unidad no duplica documentos.
+- Checkpoint (`checkpoint.json`, escritura atómica): unidades completadas por fuente y tamaño
+  de cada NDJSON confirmado. Al reanudar, cada archivo se recorta a ese tamaño (se descarta lo
+  escrito por una unidad a medias) y se relee para reconstruir el conjunto de deduplicación.
+
+Uso:
+
+    resumen = recolectar(["wikipedia", "places"], "salidas/recoleccion", mongo=True)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from api.carreras_sources import normalizar_a_carrera, wikidata_buscar_licenciaturas, wikipedia_cosechar_por_termino
+from api.dedup import normalizar_nombre
+from api.estados import estado_de_escuela
+from api.models.constants import MAIN_AREAS
+from api.universities_by_state import ESTADOS_MEXICO, universidades_cosechar
+
+logger = logging.getLogger(__name__)
+
+# Fuente -> tipo de registro (nombre del NDJSON y de la colección destino)
+FUENTES = {"wikipedia": "carreras", "wikidata": "carreras", "places": "escuelas"}
+
+SEEDS_POR_DEFECTO = (
+    {"termino": "Licenciatura en Ingeniería", "main_area": "ciencias"},
+    {"termino": "Licenciatura en Derecho", "main_area": "humanidades"},
+    {"termino": "Licenciatura en Medicina", "main_area": "ciencias"},
+    {"termino": "Licenciatura en Contaduría", "main_area": "sociales"},
+    {"termino": "Licenciatura en Psicología", "main_area": "salud"},
+    {"termino": "Licenciatura en Enfermería", "main_area": "salud"},
+    {"termino": "Licenciatura en Historia", "main_area": "humanidades"},
+    {"termino": "Licenciatura en Economía", "main_area": "sociales"},
+)
+
+ARCHIVO_CHECKPOINT = "checkpoint.json"
+
+
+# ----------------------------------------------------------------------------- checkpoint
+
+class Checkpoint:
+    """Unidades completadas por fuente y bytes confirmados por archivo NDJSON."""
+
+    def __init__(self, ruta: Path):
+        self.ruta = Path(ruta)
+        self.completadas: Dict[str, set] = {}
+        self.archivos: Dict[str, int] = {}
+        if self.ruta.exists():
+            datos = json.loads(self.ruta.read_text(encoding="utf-8"))
+            self.completadas = {f: set(claves) for f, claves in datos.get("completadas", {}).items()}
+            self.archivos = {a: int(n) for a, n in datos.get("archivos", {}).items()}
+
+    def completada(self, fuente: str, clave: str) -> bool:
+        return clave in self.completadas.get(fuente, ())
+
+    def registrar(self, fuente: str, clave: str, archivos: Dict[str, int]) -> None:
+        self.completadas.setdefault(fuente, set()).add(clave)
+        self.archivos.update(archivos)
+        self.guardar()
+
+    def guardar(self) -> None:
+        datos = {
+            "completadas": {f: sorted(claves) for f, claves in self.completadas.items()},
+            "archivos": self.archivos,
+            "actualizado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        temporal = self.ruta.with_suffix(".tmp")
+        temporal.write_text(json.dumps(datos, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(temporal, self.ruta)
+
+
+# ----------------------------------------------------------------------------- sumideros
+
+class SumideroNDJSON:
+    """Un archivo NDJSON por tipo; `vaciar` hace fsync y retorna el tamaño confirmado de cada uno."""
+
+    def __init__(self, carpeta: Path, confirmados: Dict[str, int]):
+        self.carpeta = Path(carpeta)
+        self._confirmados = dict(confirmados)
+        self._archivos = {}
+
+    def _archivo(self, tipo: str):
+        if tipo not in self._archivos:
+            nombre = f"{tipo}.ndjson"
+            ruta = self.carpeta / nombre
+            f = open(ruta, "ab")
+            # Lo escrito después del último checkpoint pertenece a una unidad incompleta
+            f.truncate(min(self._confirmados.get(nombre, 0), f.seek(0, os.SEEK_END)))
+            self._archivos[tipo] = f
+        return self._archivos[tipo]
+
+    def escribir(self, tipo: str, registros: List[dict]) -> None:
+        f = self._archivo(tipo)
+        f.write(b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in registros))
+
+    def vaciar(self) -> Dict[str, int]:
+        tamanos = {}
+        for tipo, f in self._archivos.items():
+            f.flush()
+            os.fsync(f.fileno())
+            tamanos[f"{tipo}.ndjson"] = f.tell()
+        return tamanos
+
+    def cerrar(self) -> None:
+        for f in self._archivos.values():
+            f.close()
+        self._archivos = {}
+
+
+# Cada registro produce (filtro, actualización, upsert): un upsert que solo usa $setOnInsert (alta
+# completa, sin efecto si ya existe) y, si hay algo que cambiar, un update cuyo filtro excluye los
+# documentos que ya tienen esos valores. Así repetir una recolección no re-sella (ni re-emite en
+# /cambios) lo que no cambió.
+
+def _operacion_carrera(r: dict) -> List[Tuple[dict, dict, bool]]:
+    cambios = {k: r[k] for k in ("descripcion", "main_area") if r.get(k)}
+    filtro = {"nombre": r["nombre"]}
+    operaciones = [(filtro, {"$setOnInsert": {"videos": [], "sub_areas": [], **cambios}}, True)]
+    if cambios:
+        operaciones.append(({**filtro, "$or": [{k: {"$ne": v}} for k, v in cambios.items()]}, {"$set": cambios}, False))
+    return operaciones
+
+
+def _operacion_escuela(r: dict) -> List[Tuple[dict, dict, bool]]:
+    filtro = {"nombre": r["nombre"]}
+    operaciones = [(filtro, {"$setOnInsert": {"type": r["type"], "carreras": [], "estado": r.get("estado"),
+                                              "ubicacion": r["ubicacion"]}}, True)]
+    if r["ubicacion"]:
+        operaciones.append(({**filtro, "ubicacion": {"$not": {"$all": r["ubicacion"]}}},
+                            {"$addToSet": {"ubicacion": {"$each": r["ubicacion"]}}}, False))
+    return operaciones
+
+
+class SumideroMongo:
+    """Upserts por lotes de 'lote' operaciones (bulk_write desordenado) en la colección de cada tipo,
+    con marcas de cambio (api/models/rastreo.py) reservadas por lote y solo en lo que cambia. Al vaciar se refresca el agregado por estado (api/escuelas_por_estado.py) de las escuelas escritas."""
+
+    _OPERACIONES = {"carreras": _operacion_carrera, "escuelas": _operacion_escuela}
+
+    def __init__(self, lote: int = 500):
+        from api.models import Carrera, Escuela
+
+        self.lote = max(1, lote)
+        self._colecciones = {"carreras": Carrera._get_collection(), "escuelas": Escuela._get_collection()}
+        self._pendientes: Dict[str, list] = {}
+        self._estados: set = set()
+        self.insertados = self.actualizados = 0
+
+    def escribir(self, tipo: str, registros: List[dict]) -> None:
+        if tipo == "escuelas":
+            self._estados.update(r.get("estado") for r in registros)
+        pendientes = self._pendientes.setdefault(tipo, [])
+        for r in registros:
+            pendientes.extend(self._OPERACIONES[tipo](r))
+        if len(pendientes) >= self.lote:
+            self._enviar(tipo)
+
+    def _enviar(self, tipo: str) -> None:
+        from pymongo import UpdateOne
+
+        from api.models.rastreo import con_sellos, secuencia_reservada
+
+        pendientes = self._pendientes.get(tipo)
+        while pendientes:
+            lote, ahora = pendientes[:self.lote], datetime.now(timezone.utc)
+            with secuencia_reservada(len(lote)) as seq:
+                operaciones = [UpdateOne(filtro, con_sellos(actualizacion, seq + i, ahora, solo_alta=upsert), upsert=upsert)
+                               for i, (filtro, actualizacion, upsert) in enumerate(lote)]
+                resultado = self._colecciones[tipo].bulk_write(operaciones, ordered=False)
+            self.insertados += resultado.upserted_count
+            self.actualizados += resultado.modified_count
+            del pendientes[:self.lote]
+
+    def vaciar(self) -> Dict[str, int]:
+        from api.escuelas_por_estado import refrescar
+
+        for tipo in list(self._pendientes):
+            self._enviar(tipo)
+        if self._estados:
+            refrescar(self._estados)
+            self._estados = set()
+        return {}
+
+    def cerrar(self) -> None:
+        # Lo pendiente pertenece a una unidad que no se completó: se repetirá al reanudar
+        self._pendientes = {}
+        self._estados = set()
+
+
+# ----------------------------------------------------------------------------- normalización y deduplicación
+
+def _carreras(items: List[dict], fuente: str) -> Iterator[dict]:
+    for c in normalizar_a_carrera(items):
+        if c["main_area"] not in MAIN_AREAS:
+            c["main_area"] = ""
+        c["_fuente"] = fuente
+        yield c
+
+
+def _escuelas(estado: str, universidades: List[dict]) -> Iterator[dict]:
+    for u in universidades:
+        ubicacion = [{"lat": u["position"]["lat"], "lng": u["position"]["lng"]}]
+        yield {
+            "nombre": u["name"],
+            "type": u["type"],
+            "ubicacion": ubicacion,
+            "estado": estado_de_escuela(estado, ubicacion),
+            "_fuente": "places",
+        }
+
+
+def clave_registro(tipo: str, registro: dict) -> str:
+    """Clave de deduplicación exacta en flujo: nombre normalizado (sin acentos, mayúsculas ni
+    puntuación) y, en escuelas, posición redondeada a ~100 m. Las variantes aproximadas (siglas,
+    erratas) se resuelven después con `manage.py deduplicar` (api/dedup.py)."""
+    nombre = normalizar_nombre(registro["nombre"])
+    if tipo == "escuelas":
+        punto = registro["ubicacion"][0]
+        return f"{nombre}|{punto['lat']:.3f}|{punto['lng']:.3f}"
+    return nombre
+
+
+def deduplicar(tipo: str, registros: Iterable[dict], vistos: set) -> Iterator[dict]:
+    for r in registros:
+        k = clave_registro(tipo, r)
+        if k not in vistos:
+            vistos.add(k)
+            yield r
+
+
+def _vistos_desde_ndjson(ruta: Path, tipo: str, limite: int) -> set:
+    vistos = set()
+    if ruta.exists():
+        with open(ruta, "rb") as f:
+            leidos = 0
+            for linea in f:
+                leidos += len(linea)
+                if leidos > limite:
+                    break
+                vistos.add(clave_registro(tipo, json.loads(linea)))
+    return vistos
+
+
+# ----------------------------------------------------------------------------- unidades por fuente
+
+def _clave_lote(grupo: List[dict]) -> str:
+    return "|".join(s["termino"] for s in grupo)
+
+
+def unidades(fuente: str, seeds: List[dict], estados: Iterable[str], lote_wikidata: int = 25) -> List[str]:
+    """Claves de las unidades de trabajo de una fuente (en el orden en que se recorren)."""
+    if fuente == "places":
+        return list(estados)
+    if fuente == "wikidata":
+        return [_clave_lote(seeds[i:i + lote_wikidata]) for i in range(0, len(seeds), lote_wikidata)]
+    return [s["termino"] for s in seeds]
+
+
+async def _descargar(fuente: str, pendientes: List[str], seeds: List[dict], opciones: dict
+                     ) -> AsyncIterator[Tuple[str, object]]:
+    """(clave, datos crudos | {"error": str}) por unidad, conforme terminan."""
+    if fuente == "wikipedia":
+        por_termino = {s["termino"]: s for s in seeds}
+        async for seed, datos in wikipedia_cosechar_por_termino([por_termino[t] for t in pendientes],
+                                                                **opciones.get("wikipedia", {})):
+            yield seed["termino"], datos
+    elif fuente == "wikidata":
+        por_termino = {s["termino"]: s for s in seeds}
+        for clave in pendientes:
+            grupo = [por_termino[t] for t in clave.split("|")]
+            try:
+                datos = await asyncio.to_thread(lambda: list(wikidata_buscar_licenciaturas(
+                    grupo, lote=len(grupo), omitir_errores=False, **opciones.get("wikidata", {}))))
+            except Exception as e:
+                datos = {"error": f"{type(e).__name__}: {e}"}
+            yield clave, datos
+    else:
+        async for estado, datos in universidades_cosechar(pendientes, **opciones.get("places", {})):
+            yield estado, datos
+
+
+def _normalizar(fuente: str, clave: str, datos: list) -> Iterator[dict]:
+    if fuente == "places":
+        return _escuelas(clave, datos)
+    return _carreras(datos, fuente)
+
+
+# ----------------------------------------------------------------------------- pipeline
+
+async def recolectar_async(fuentes: Iterable[str], carpeta, seeds: Optional[List[dict]] = None,
+                           estados: Optional[Iterable[str]] = None, mongo: bool = False, lote: int = 500,
+                           lote_wikidata: int = 25, reiniciar: bool = False, opciones: Optional[dict] = None,
+                           progreso: Optional[Callable[[str, str, int, Optional[str]], None]] = None) -> dict:
+    """
+    Ejecuta (o reanuda) la recolección de las fuentes indicadas.
+
+    - carpeta: destino de los NDJSON y del checkpoint; reiniciar=True los elimina antes de empezar.
+    - seeds: términos {"termino", "main_area"?} de Wikipedia/Wikidata (SEEDS_POR_DEFECTO si no se pasan).
+    - estados: estados para Places (ESTADOS_MEXICO si no se pasan).
+    - mongo: además de los NDJSON, upserts por lotes de 'lote' operaciones en MongoDB.
+    - lote_wikidata: términos por consulta SPARQL (cada lote es una unidad).
+    - opciones: parámetros por fuente, p.ej. {"wikipedia": {"max_por_termino": 50, "api_url": ...},
+      "wikidata": {"endpoint": ...}, "places": {"qps": 10, "places_url": ...}}.
+    - progreso(fuente, clave, registros_nuevos, error) se llama al terminar cada unidad.
+
+    Retorna un resumen por fuente: unidades completadas, omitidas (ya estaban), fallidas y registros.
+    """
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    opciones = opciones or {}
+    seeds = [s for s in (seeds or SEEDS_POR_DEFECTO) if str(s.get("termino", "")).strip()]
+    seeds = [{**s, "termino": s["termino"].strip()} for s in seeds]
+    estados = list(estados or ESTADOS_MEXICO)
+    if reiniciar:
+        for nombre in [ARCHIVO_CHECKPOINT] + [f"{t}.ndjson" for t in set(FUENTES.values())]:
+            (carpeta / nombre).unlink(missing_ok=True)
+
+    checkpoint = Checkpoint(carpeta / ARCHIVO_CHECKPOINT)
+    sumideros = [SumideroNDJSON(carpeta, checkpoint.archivos)]
+    if mongo:
+        sumideros.append(SumideroMongo(lote))
+    vistos = {t: _vistos_desde_ndjson(carpeta / f"{t}.ndjson", t, checkpoint.archivos.get(f"{t}.ndjson", 0))
+              for t in set(FUENTES.values())}
+
+    resumen = {}
+    try:
+        for fuente in fuentes:
+            tipo = FUENTES[fuente]
+            claves = unidades(fuente, seeds, estados, lote_wikidata)
+            pendientes = [c for c in claves if not checkpoint.completada(fuente, c)]
+            cuenta = resumen[fuente] = {"unidades": len(claves), "omitidas": len(claves) - len(pendientes),
+                                        "completadas": 0, "fallidas": 0, "registros": 0}
+            if not pendientes:
+                continue
+            async for clave, datos in _descargar(fuente, pendientes, seeds, opciones):
+                if isinstance(datos, dict) and "error" in datos:
+                    cuenta["fallidas"] += 1
+                    logger.warning("%s: la unidad %r falló y se reintentará: %s", fuente, clave, datos["error"])
+                    if progreso:
+                        progreso(fuente, clave, 0, datos["error"])
+                    continue
+                registros = list(deduplicar(tipo, _normalizar(fuente, clave, datos), vistos[tipo]))
+                tamanos = {}
+                for sumidero in sumideros:
+                    if registros:
+                        sumidero.escribir(tipo, registros)
+                    tamanos.update(sumidero.vaciar())
+                checkpoint.registrar(fuente, clave, tamanos)
+                cuenta["completadas"] += 1
+                cuenta["registros"] += len(registros)
+                if progreso:
+                    progreso(fuente, clave, len(registros), None)
+    finally:
+        for sumidero in sumideros:
+            sumidero.cerrar()
+    if mongo:
+        resumen["mongo"] = {"insertados": sumideros[1].insertados, "actualizados": sumideros[1].actualizados}
+    return resumen
+
+
+def recolectar(fuentes: Iterable[str], carpeta, **kwargs) -> dict:
+    """Versión síncrona de `recolectar_async`."""
+    return asyncio.run(recolectar_async(fuentes, carpeta, **kwargs))
@@ -0,0 +1,308 @@
+"""recomendaciones.py
+Índice TF-IDF en memoria para recomendar carreras según los intereses del usuario.
+
+Cada carrera se representa con el texto de su `descripcion`, los nombres de `sub_areas` y el
+texto de sus documentos Subarea (nombre, introducción, descripción y títulos de lecciones).
+Se guarda una sola matriz NumPy densa de frecuencias (carreras x términos, float32) más el IDF
+y la norma L2 de cada fila ponderada: la similitud coseno es (tf @ (idf * consulta)) / normas, un
+solo producto matriz-vector, sin una segunda copia ponderada de la matriz.
+
+Mantenimiento:
+- Reconstrucción completa cada RECOMENDACIONES_RECONSTRUCCION_SEGUNDOS (vocabulario nuevo).
+- Actualización incremental: las carreras afectadas se marcan como pendientes; en la siguiente
+  consulta solo se releen esas carreras, se actualizan sus filas de frecuencias y las
+  frecuencias documentales, y se recalculan IDF y normas (operación vectorizada, sin volver a
+  leer el resto del catálogo). Las altas se escriben en filas de reserva (la capacidad crece al
+  doble), no se realoja la matriz en cada alta; una fila editada se sobrescribe en su lugar. Una subárea afecta a la carrera de su campo
+  `carrera` y a las carreras que la listan en `sub_areas`.
+- Las vistas de escritura marcan lo que cambian en su propio proceso (`marcar_carreras`,
+  `marcar_subareas`). Los cambios hechos por otros procesos se descubren sondeando, como mucho
+  cada CATALOGO_VERSION_SEGUNDOS, las carreras y subáreas con `seq` posterior al último sondeo y
+  hasta `seq_confirmado()` (marcas de api/models/rastreo.py); una lápida nueva de carrera o
+  subárea provoca una reconstrucción completa.
+- Si cambia la versión del catálogo (recarga con `manage.py recargar_catalogo`, api/catalogo.py)
+  se reconstruye completo en la siguiente consulta.
+- El vocabulario se limita a RECOMENDACIONES_MAX_TERMINOS términos (los de mayor frecuencia
+  documental) para acotar la memoria.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from django.conf import settings
+from pymongo import ReadPreference
+
+from api.catalogo import version_catalogo
+from api.models.carrera import Carrera
+from api.models.rastreo import Eliminado, seq_confirmado
+from api.models.subarea import Subarea
+from project.mongo import coleccion_lectura
+
+STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el ella ellas
+ellos en entre era es esa esas ese eso esos esta estas este esto estos fue fueron ha han hasta hay la las le
+les lo los mas me mi mis muy ni no nos o otra otras otro otros para pero por porque que se ser si sin sobre
+son su sus tambien te tiene tienen todo todos tu un una unas uno unos y ya
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Minúsculas, sin acentos, sin stopwords y con tokens de al menos 3 caracteres."""
+    if not texto:
+        return []
+    plano = unicodedata.normalize("NFKD", texto.lower())
+    plano = "".join(ch for ch in plano if not unicodedata.combining(ch))
+    return [t for t in _TOKEN_RE.findall(plano) if len(t) >= 3 and t not in STOPWORDS]
+
+
+def _texto_subarea(doc: dict) -> str:
+    partes = [doc.get("nombre"), doc.get("introduccion"), doc.get("descripcion")]
+    partes += [lec.get("titulo") for lec in (doc.get("lecciones") or []) if isinstance(lec, dict)]
+    return " ".join(p for p in partes if isinstance(p, str))
+
+
+class IndiceCarreras:
+    """Matriz TF-IDF de carreras con actualización incremental por carrera."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nombres: List[str] = []
+        self._areas: List[Optional[str]] = []
+        self._filas: Dict[str, int] = {}
+        self._vocabulario: Dict[str, int] = {}
+        # Filas 0..len(_nombres)-1 en uso; el resto es reserva para altas
+        self._tf = np.zeros((0, 0), dtype=np.float32)
+        self._df = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._vista = (self._tf, self._idf, np.ones(0, dtype=np.float32), {}, [], np.zeros(0, dtype=object))
+        self._pendientes: Set[str] = set()
+        self._subareas_pendientes: Set[str] = set()
+        self._ultima_reconstruccion = 0.0
+        self._version_catalogo: Optional[int] = None
+        self._sondeo_desde = 0
+        self._ultimo_sondeo = 0.0
+
+    # ----------------------------------------------------------------- lectura
+    @staticmethod
+    def _coleccion(modelo, primario: bool):
+        # Reconstrucciones completas desde el alias "lectura" (secondaryPreferred); los pendientes
+        # del primario, porque se leen justo después de la escritura que los marcó y un
+        # secundario atrasado aún no los tendría (y no se volverían a marcar)
+        if primario:
+            return modelo._get_collection().with_options(read_preference=ReadPreference.PRIMARY)
+        return coleccion_lectura(modelo)
+
+    @classmethod
+    def _leer_carreras(cls, nombres: Optional[Iterable[str]] = None, primario: bool = False) -> List[dict]:
+        filtro = {"nombre": {"$in": list(nombres)}} if nombres is not None else {}
+        return list(cls._coleccion(Carrera, primario).find(
+            filtro, {"nombre": 1, "descripcion": 1, "main_area": 1, "sub_areas": 1}
+        ))
+
+    @classmethod
+    def _leer_textos_subareas(cls, carreras: List[dict], primario: bool = False) -> Dict[str, List[str]]:
+        """Textos de Subarea indexados por nombre de carrera (en minúsculas) y por nombre de subárea."""
+        nombres_carrera = [c["nombre"] for c in carreras if c.get("nombre")]
+        nombres_subarea = [s for c in carreras for s in (c.get("sub_areas") or []) if isinstance(s, str)]
+        filtro = {"$or": [{"carrera": {"$in": nombres_carrera}}, {"nombre": {"$in": nombres_subarea}}]}
+        textos: Dict[str, List[str]] = {}
+        proyeccion = {"nombre": 1, "introduccion": 1, "descripcion": 1, "carrera": 1, "lecciones.titulo": 1}
+        for doc in cls._coleccion(Subarea, primario).find(filtro, proyeccion):
+            texto = _texto_subarea(doc)
+            if doc.get("carrera"):
+                textos.setdefault(f"c:{doc['carrera'].strip().lower()}", []).append(texto)
+            if doc.get("nombre"):
+                textos.setdefault(f"s:{doc['nombre'].strip().lower()}", []).append(texto)
+        return textos
+
+    @staticmethod
+    def _tokens_carrera(carrera: dict, textos: Dict[str, List[str]]) -> List[str]:
+        sub_areas = [s for s in (carrera.get("sub_areas") or []) if isinstance(s, str)]
+        partes = [carrera.get("descripcion") or ""] + sub_areas
+        vistos = set(textos.get(f"c:{(carrera.get('nombre') or '').strip().lower()}", []))
+        partes += list(vistos)
+        for s in sub_areas:
+            for t in textos.get(f"s:{s.strip().lower()}", []):
+                if t not in vistos:
+                    vistos.add(t)
+                    partes.append(t)
+        return tokenizar(" ".join(partes))
+
+    @staticmethod
+    def _fila_tf(tokens: List[str], vocabulario: Dict[str, int]) -> np.ndarray:
+        fila = np.zeros(len(vocabulario), dtype=np.float32)
+        for termino, n in Counter(tokens).items():
+            col = vocabulario.get(termino)
+            if col is not None:
+                fila[col] = 1.0 + np.log(n)
+        return fila
+
+    def _reponderar(self) -> None:
+        n = max(len(self._nombres), 1)
+        self._idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        tf = self._tf[:len(self._nombres)]
+        # ||tf_i * idf|| sin materializar la matriz ponderada
+        normas = np.sqrt(np.einsum("ij,ij,j->i", tf, tf, self._idf * self._idf)).astype(np.float32)
+        normas[normas == 0] = 1.0
+        # Vista que usan las consultas; se sustituye de forma atómica. `tf` es una vista de la matriz
+        # (sin copia): una consulta simultánea a la edición de una fila puede puntuar esa carrera
+        # con la fila a medio escribir, solo en esa consulta
+        self._vista = (
+            tf, self._idf, normas, self._vocabulario,
+            list(self._nombres), np.asarray(self._areas, dtype=object),
+        )
+
+    # ------------------------------------------------------------ construcción
+    def reconstruir(self) -> None:
+        """Relee todo el catálogo y recalcula vocabulario y matriz."""
+        with self._lock:
+            self._version_catalogo = version_catalogo()
+            self._sondeo_desde = seq_confirmado()
+            self._ultimo_sondeo = time.monotonic()
+            carreras = [c for c in self._leer_carreras() if c.get("nombre")]
+            textos = self._leer_textos_subareas(carreras)
+            tokens = [self._tokens_carrera(c, textos) for c in carreras]
+
+            df = Counter(t for ts in tokens for t in set(ts))
+            max_terminos = getattr(settings, "RECOMENDACIONES_MAX_TERMINOS", 4096)
+            terminos = sorted(df, key=lambda t: (-df[t], t))[:max_terminos]
+            self._vocabulario = {t: i for i, t in enumerate(terminos)}
+
+            self._nombres = [c["nombre"] for c in carreras]
+            self._areas = [c.get("main_area") for c in carreras]
+            self._filas = {n: i for i, n in enumerate(self._nombres)}
+            self._tf = np.zeros((len(tokens), len(terminos)), dtype=np.float32)
+            for i, ts in enumerate(tokens):
+                self._tf[i] = self._fila_tf(ts, self._vocabulario)
+            self._df = (self._tf > 0).sum(axis=0).astype(np.float32)
+            self._reponderar()
+            self._pendientes.clear()
+            self._subareas_pendientes.clear()
+            self._ultima_reconstruccion = time.monotonic()
+
+    def _aplicar_pendientes(self) -> None:
+        with self._lock:
+            nombres, self._pendientes = self._pendientes, set()
+            subareas, self._subareas_pendientes = self._subareas_pendientes, set()
+            if subareas:
+                nombres |= {c["nombre"] for c in self._coleccion(Carrera, True).find(
+                    {"sub_areas": {"$in": list(subareas)}}, {"nombre": 1}) if c.get("nombre")}
+            if not nombres:
+                return
+            carreras = {c["nombre"]: c for c in self._leer_carreras(nombres, primario=True) if c.get("nombre")}
+            textos = self._leer_textos_subareas(list(carreras.values()), primario=True)
+
+            # Carreras eliminadas: se quitan sus filas
+            eliminadas = [self._filas[n] for n in nombres if n in self._filas and n not in carreras]
+            if eliminadas:
+                self._df -= (self._tf[eliminadas] > 0).sum(axis=0)
+                conservar = np.setdiff1d(np.arange(len(self._nombres)), eliminadas)
+                # Matriz nueva: la vista vigente sigue usando la anterior hasta _reponderar
+                self._tf = self._tf[conservar]
+                self._nombres = [self._nombres[i] for i in conservar]
+                self._areas = [self._areas[i] for i in conservar]
+                self._filas = {n: i for i, n in enumerate(self._nombres)}
+
+            altas = [n for n in carreras if n not in self._filas]
+            self._reservar_filas(len(self._nombres) + len(altas))
+            for nombre, carrera in carreras.items():
+                fila = self._fila_tf(self._tokens_carrera(carrera, textos), self._vocabulario)
+                i = self._filas.get(nombre)
+                if i is None:
+                    # Fila de reserva: fuera de la vista vigente hasta _reponderar
+                    i = self._filas[nombre] = len(self._nombres)
+                    self._nombres.append(nombre)
+                    self._areas.append(carrera.get("main_area"))
+                    self._df += fila > 0
+                else:
+                    self._df += (fila > 0).astype(np.float32) - (self._tf[i] > 0)
+                    self._areas[i] = carrera.get("main_area")
+                self._tf[i] = fila
+            self._reponderar()
+
+    def _reservar_filas(self, filas: int) -> None:
+        """Asegura capacidad para `filas`; al crecer duplica, así las altas no copian la matriz cada vez."""
+        capacidad = self._tf.shape[0]
+        if filas <= capacidad:
+            return
+        nueva = np.zeros((max(filas, 2 * capacidad), len(self._vocabulario)), dtype=np.float32)
+        nueva[:len(self._nombres)] = self._tf[:len(self._nombres)]
+        self._tf = nueva
+
+    def marcar_carreras(self, nombres: Iterable[str]) -> None:
+        """Marca carreras cuyo texto cambió (alta, edición, baja o cambio en sus subáreas)."""
+        self._pendientes.update(n.strip() for n in nombres if isinstance(n, str) and n.strip())
+
+    def marcar_subareas(self, nombres: Iterable[str], carreras: Iterable[str] = ()) -> None:
+        """Marca subáreas cuyo texto cambió: afectan a `carreras` (su campo `carrera`) y a las
+        carreras que las listan en `sub_areas` (se resuelven al aplicar los pendientes)."""
+        self._subareas_pendientes.update(n for n in nombres if isinstance(n, str) and n)
+        self.marcar_carreras(carreras)
+
+    def _sondear_cambios(self) -> bool:
+        """Marca lo que cambió en MongoDB desde el último sondeo, incluidas escrituras de otros
+        procesos. Retorna True si hubo borrados y hace falta reconstruir completo."""
+        if time.monotonic() - self._ultimo_sondeo < getattr(settings, "CATALOGO_VERSION_SEGUNDOS", 5):
+            return False
+        desde, self._sondeo_desde = self._sondeo_desde, seq_confirmado()
+        self._ultimo_sondeo = time.monotonic()
+        # Del primario: lo recién escrito puede no haber llegado aún a un secundario
+        recientes = {"seq": {"$gt": desde, "$lte": self._sondeo_desde}}
+        self.marcar_carreras(c.get("nombre") for c in Carrera._get_collection().find(recientes, {"nombre": 1}))
+        subareas = list(Subarea._get_collection().find(recientes, {"nombre": 1, "carrera": 1}))
+        self.marcar_subareas([s.get("nombre") for s in subareas], [s.get("carrera") for s in subareas])
+        colecciones = [Carrera._get_collection_name(), Subarea._get_collection_name()]
+        return Eliminado._get_collection().find_one(
+            {"coleccion": {"$in": colecciones}, **recientes}, {"_id": 1}) is not None
+
+    def asegurar_vigente(self) -> None:
+        ttl = getattr(settings, "RECOMENDACIONES_RECONSTRUCCION_SEGUNDOS", 900)
+        # Una recarga del catálogo (api/catalogo.py) cambia la versión e invalida el índice completo
+        if (not self._ultima_reconstruccion or time.monotonic() - self._ultima_reconstruccion >= ttl
+                or version_catalogo() != self._version_catalogo or self._sondear_cambios()):
+            self.reconstruir()
+        elif self._pendientes or self._subareas_pendientes:
+            self._aplicar_pendientes()
+
+    # -------------------------------------------------------------- consulta
+    def recomendar(self, intereses: Iterable[str], main_area: Optional[str] = None, k: int = 10) -> List[dict]:
+        """Retorna hasta k carreras ordenadas por similitud coseno con los intereses."""
+        self.asegurar_vigente()
+        tf, idf, normas, vocabulario, nombres, areas = self._vista
+        if not nombres:
+            return []
+        tokens = tokenizar(" ".join(i for i in intereses if isinstance(i, str)))
+        consulta = self._fila_tf(tokens, vocabulario) * idf
+        norma = np.linalg.norm(consulta)
+        if norma == 0:
+            return []
+        similitud = (tf @ (consulta / norma * idf)) / normas
+
+        # Solo carreras con similitud de texto; el bono por área ordena, no agrega candidatos
+        relevantes = np.flatnonzero(similitud > 0)
+        if not len(relevantes):
+            return []
+        puntajes = similitud[relevantes]
+        bono = getattr(settings, "RECOMENDACIONES_BONO_AREA", 0.05)
+        if main_area and bono:
+            puntajes = puntajes + bono * (areas[relevantes] == main_area)
+
+        k = min(k, len(relevantes))
+        candidatos = np.argpartition(-puntajes, k - 1)[:k]
+        orden = candidatos[np.argsort(-puntajes[candidatos], kind="stable")]
+        return [
+            {"carrera": nombres[relevantes[j]], "main_area": areas[relevantes[j]], "puntaje": round(float(puntajes[j]), 6)}
+            for j in orden
+        ]
+
+
+# Instancia por proceso compartida por las vistas
+indice_carreras = IndiceCarreras()
@@ -0,0 +1,186 @@
+"""similares.py
+Índice MinHash/LSH para encontrar "carreras parecidas".
+
+Cada carrera se representa como un conjunto de elementos:
+- "s:<subárea>" por cada nombre en `Carrera.sub_areas`.
+- "m:<materia>" por cada materia de `MapaCurricular` asociada a la carrera.
+(Nombres normalizados: minúsculas, sin acentos ni espacios repetidos.)
+
+La similitud de Jaccard entre conjuntos se estima con firmas MinHash de NUM_PERMUTACIONES
+valores; el LSH divide cada firma en BANDAS bandas y solo compara carreras que coinciden en al
+menos una banda, evitando el costo cuadrático de comparar todos los pares. El endpoint solo
+devuelve pares con Jaccard estimado >= SIMILITUD_MINIMA, y las bandas se eligen para ese corte:
+con 32 bandas de 4 filas un par es candidato con probabilidad 1 - (1 - J^4)^32, es decir ~0.87
+con J = 0.5, ~0.99 con J = 0.6 y ~0.05 con J = 0.2 (umbral aproximado (1/32)^(1/4) ~ 0.42).
+
+El índice se construye fuera de línea (`python manage.py construir_indice_similares`), se
+persiste en SIMILARES_INDICE_RUTA (.npz) y los procesos web lo cargan de forma perezosa,
+recargándolo cuando el archivo cambia.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from api.models.carrera import Carrera
+from api.models.mapa_curricular import MapaCurricular
+from project.mongo import coleccion_lectura
+
+NUM_PERMUTACIONES = 128
+BANDAS = 32  # 4 filas por banda: umbral aproximado de candidatos (1/32)^(1/4) ~ 0.42
+SIMILITUD_MINIMA = 0.5
+SEMILLA = 20250901
+
+_PRIMO_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalizar_nombre(texto: str) -> str:
+    plano = unicodedata.normalize("NFKD", (texto or "").lower())
+    plano = "".join(ch for ch in plano if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", plano).strip()
+
+
+def _permutaciones(num_permutaciones: int, semilla: int):
+    rng = np.random.default_rng(semilla)
+    a = rng.integers(1, int(_PRIMO_MERSENNE), size=num_permutaciones, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIMO_MERSENNE), size=num_permutaciones, dtype=np.uint64)
+    return a, b
+
+
+def firma_minhash(elementos: Iterable[str], a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Firma MinHash (uint32) de un conjunto de cadenas; conjunto vacío -> todos en el máximo."""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(e.encode("utf-8"), digest_size=4).digest(), "little") for e in set(elementos)),
+        dtype=np.uint64,
+    )
+    if not len(hashes):
+        return np.full(len(a), _MAX_HASH, dtype=np.uint32)
+    # Permutaciones universales (a*h + b) mod p, truncadas a 32 bits (el desbordamiento en uint64 es intencional)
+    with np.errstate(over="ignore"):
+        permutados = (np.outer(a, hashes) + b[:, None]) % _PRIMO_MERSENNE & _MAX_HASH
+    return permutados.min(axis=1).astype(np.uint32)
+
+
+class IndiceSimilares:
+    """Firmas MinHash por carrera y tablas LSH por banda."""
+
+    def __init__(self, nombres: List[str], firmas: np.ndarray, bandas: int = BANDAS):
+        self.nombres = nombres
+        self.firmas = firmas
+        self.bandas = bandas
+        self._posiciones = {normalizar_nombre(n): i for i, n in enumerate(nombres)}
+        self._cubetas: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bandas)]
+        filas = firmas.shape[1] // bandas if len(firmas) else 0
+        vacia = np.full(firmas.shape[1] if len(firmas) else 0, _MAX_HASH, dtype=np.uint32)
+        for i, firma in enumerate(firmas):
+            if np.array_equal(firma, vacia):
+                continue
+            for banda in range(bandas):
+                self._cubetas[banda][firma[banda * filas:(banda + 1) * filas].tobytes()].append(i)
+        self._filas = filas
+
+    # -------------------------------------------------------------- construcción
+    @classmethod
+    def construir(cls, num_permutaciones: int = NUM_PERMUTACIONES, bandas: int = BANDAS,
+                  semilla: int = SEMILLA) -> "IndiceSimilares":
+        """Lee carreras y mapas curriculares y calcula las firmas de todas las carreras."""
+        conjuntos: Dict[str, set] = {}
+        nombres: List[str] = []
+        for doc in coleccion_lectura(Carrera).find({}, {"nombre": 1, "sub_areas": 1}):
+            nombre = doc.get("nombre")
+            if not nombre or normalizar_nombre(nombre) in conjuntos:
+                continue
+            nombres.append(nombre)
+            conjuntos[normalizar_nombre(nombre)] = {
+                f"s:{normalizar_nombre(s)}" for s in (doc.get("sub_areas") or []) if isinstance(s, str)
+            }
+        for doc in coleccion_lectura(MapaCurricular).find({}, {"nombre": 1, "carrera": 1}):
+            conjunto = conjuntos.get(normalizar_nombre(doc.get("carrera") or ""))
+            if conjunto is not None and doc.get("nombre"):
+                conjunto.add(f"m:{normalizar_nombre(doc['nombre'])}")
+
+        a, b = _permutaciones(num_permutaciones, semilla)
+        firmas = (
+            np.vstack([firma_minhash(conjuntos[normalizar_nombre(n)], a, b) for n in nombres])
+            if nombres else np.zeros((0, num_permutaciones), dtype=np.uint32)
+        )
+        return cls(nombres, firmas, bandas)
+
+    def guardar(self, ruta) -> None:
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(ruta.name + ".tmp.npz")
+        np.savez_compressed(
+            temporal, firmas=self.firmas, nombres=np.array(self.nombres, dtype=str),
+            bandas=np.array(self.bandas),
+        )
+        # Reemplazo atómico para que los lectores nunca vean un archivo a medias
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta) -> "IndiceSimilares":
+        with np.load(ruta) as data:
+            return cls([str(n) for n in data["nombres"]], data["firmas"], int(data["bandas"]))
+
+    # ------------------------------------------------------------------ consulta
+    def similares(self, nombre: str, k: int = 10) -> Optional[List[dict]]:
+        """Top-k carreras con Jaccard estimado >= SIMILITUD_MINIMA. None si la carrera no está indexada."""
+        i = self._posiciones.get(normalizar_nombre(nombre))
+        if i is None:
+            return None
+        firma = self.firmas[i]
+        candidatos = set()
+        for banda in range(self.bandas):
+            clave = firma[banda * self._filas:(banda + 1) * self._filas].tobytes()
+            candidatos.update(self._cubetas[banda].get(clave, ()))
+        candidatos.discard(i)
+        if not candidatos:
+            return []
+        indices = np.fromiter(candidatos, dtype=np.int64)
+        jaccard = (self.firmas[indices] == firma).mean(axis=1)
+        suficientes = jaccard >= SIMILITUD_MINIMA
+        indices, jaccard = indices[suficientes], jaccard[suficientes]
+        orden = np.argsort(-jaccard, kind="stable")[:k]
+        return [
+            {"carrera": self.nombres[indices[j]], "similitud": round(float(jaccard[j]), 4)}
+            for j in orden
+        ]
+
+
+def ruta_indice() -> Path:
+    return Path(getattr(settings, "SIMILARES_INDICE_RUTA", Path(settings.BASE_DIR) / "indices" / "similares_carreras.npz"))
+
+
+class _IndiceCargado:
+    """Carga perezosa por proceso del índice persistido; se recarga si cambia el archivo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice: Optional[IndiceSimilares] = None
+        self._mtime: Optional[float] = None
+
+    def obtener(self) -> Optional[IndiceSimilares]:
+        ruta = ruta_indice()
+        try:
+            mtime = ruta.stat().st_mtime
+        except FileNotFoundError:
+            return self._indice
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self._indice = IndiceSimilares.cargar(ruta)
+                    self._mtime = mtime
+        return self._indice
+
+
+indice_similares = _IndiceCargado()
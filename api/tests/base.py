@@ -0,0 +1,54 @@
+"""base.py
+Base de las pruebas que usan MongoDB.
+
+Por defecto cada prueba corre sobre mongomock en memoria, con los ajustes de
+api/tests/mongomock_compat.py (conteo de comandos para `max_consultas` y bulk_write con
+UpdateOne). Con MONGO_URI_PRUEBAS (p.ej. mongodb://127.0.0.1:27017/test_api) se usa ese mongod;
+la base se vacía antes de cada prueba, por eso su nombre debe contener "test".
+"""
+import mongoengine
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, get_db
+from rest_framework.test import APIClient
+
+from api import catalogo
+from project.mongo import ALIAS_LECTURA
+
+MONGO_URI_PRUEBAS = getattr(settings, "MONGO_URI_PRUEBAS", None)
+
+
+class PruebaMongo(TestCase):
+    """Conecta el alias "default" a la base de pruebas y la vacía antes de cada prueba."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for alias in (DEFAULT_CONNECTION_NAME, ALIAS_LECTURA):
+            mongoengine.disconnect(alias)
+        # Sin alias "lectura": coleccion_lectura() usa "default"
+        if MONGO_URI_PRUEBAS:
+            mongoengine.connect(host=MONGO_URI_PRUEBAS, serverSelectionTimeoutMS=5000)
+            if "test" not in get_db().name:
+                raise RuntimeError(f"La base '{get_db().name}' se vaciaría; usa una cuyo nombre contenga 'test'.")
+        else:
+            import mongomock
+
+            from api.tests.mongomock_compat import parchear_mongomock
+
+            parchear_mongomock()
+            mongoengine.connect("test_api", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+
+    @classmethod
+    def tearDownClass(cls):
+        mongoengine.disconnect(DEFAULT_CONNECTION_NAME)
+        super().tearDownClass()
+
+    def setUp(self):
+        db = get_db()
+        for nombre in db.list_collection_names():
+            db.drop_collection(nombre)
+        catalogo._version["valor"] = None
+        cache.clear()
+        self.cliente = APIClient()
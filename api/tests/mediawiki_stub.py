@@ -0,0 +1,140 @@
+"""mediawiki_stub.py
+Servidor MediaWiki stub para probar localmente `wikipedia_cosechar` (api/carreras_sources.py).
+
+Levanta un servidor HTTP en 127.0.0.1 que responde GET /w/api.php con `generator=search`:
+- Cada término devuelve 'paginas_por_termino' páginas deterministas ("<término> 1", ...),
+  paginadas con `gsrlimit` y tokens `continue` (`gsroffset`) como la API real.
+- Fallos inyectados: las primeras 'fallos' peticiones responden 429 (con Retry-After) o 503,
+  y 'maxlag' peticiones responden 200 con el error "maxlag", para ejercitar reintentos.
+- 'retardo' segundos de latencia por respuesta.
+- Contadores 'peticiones' y 'max_simultaneas' (máximo de peticiones atendidas a la vez) para
+  comprobar el límite de concurrencia, y 'instantes' (monotonic de cada petición) para la tasa.
+
+Uso programático:
+
+    with ServidorMediaWikiStub(paginas_por_termino=45, fallos=2) as stub:
+        items = [i async for i in wikipedia_cosechar(seeds, api_url=stub.api_url)]
+
+Uso manual: python -m api.tests.mediawiki_stub (imprime la URL a usar como api_url).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class ServidorMediaWikiStub:
+    def __init__(self, paginas_por_termino: int = 45, fallos: int = 0, maxlag: int = 0, retardo: float = 0.0,
+                 puerto: int = 0):
+        self.paginas_por_termino = paginas_por_termino
+        self.fallos = fallos
+        self.maxlag = maxlag
+        self.retardo = retardo
+        self.peticiones = 0
+        self.max_simultaneas = 0
+        self.instantes = []
+        self._simultaneas = 0
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/w/api.php"
+
+    def _buscar(self, params: dict) -> dict:
+        termino = params.get("gsrsearch", "")
+        inicio = int(params.get("gsroffset", 0))
+        limite = min(int(params.get("gsrlimit", 10)), 50)
+        fin = min(inicio + limite, self.paginas_por_termino)
+        paginas = [
+            {
+                "pageid": abs(hash((termino, i))) % 10**9,
+                "ns": 0,
+                "title": f"{termino} {i + 1}",
+                "index": i + 1,
+                "extract": f"Extracto de {termino} {i + 1}.",
+                "fullurl": f"https://es.wikipedia.org/wiki/{termino.replace(' ', '_')}_{i + 1}",
+            }
+            for i in range(inicio, fin)
+        ]
+        respuesta = {"batchcomplete": True, "query": {"pages": paginas}}
+        if fin < self.paginas_por_termino:
+            respuesta["continue"] = {"gsroffset": fin, "continue": "gsroffset||"}
+        return respuesta
+
+    def _manejador(self):
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, codigo, cuerpo, cabeceras=None):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                for nombre, valor in (cabeceras or {}).items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                if partes.path != "/w/api.php":
+                    return self._responder(404, {"error": "not_found"})
+                with stub._lock:
+                    stub.peticiones += 1
+                    numero = stub.peticiones
+                    stub.instantes.append(time.monotonic())
+                    stub._simultaneas += 1
+                    stub.max_simultaneas = max(stub.max_simultaneas, stub._simultaneas)
+                try:
+                    if stub.retardo:
+                        time.sleep(stub.retardo)
+                    if numero <= stub.fallos:
+                        if numero % 2:
+                            return self._responder(429, {"error": "too_many_requests"}, {"Retry-After": "0"})
+                        return self._responder(503, {"error": "unavailable"})
+                    if numero <= stub.fallos + stub.maxlag:
+                        return self._responder(200, {"error": {"code": "maxlag", "info": "Waiting for replicas"}},
+                                               {"Retry-After": "0"})
+                    params = {k: v[0] for k, v in parse_qs(partes.query).items()}
+                    return self._responder(200, stub._buscar(params))
+                finally:
+                    with stub._lock:
+                        stub._simultaneas -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self) -> "ServidorMediaWikiStub":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    stub = ServidorMediaWikiStub(puerto=8766).iniciar()
+    print(f"MediaWiki stub escuchando. api_url={stub.api_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.detener()
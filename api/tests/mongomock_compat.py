@@ -0,0 +1,92 @@
+"""mongomock_compat.py
+Ajustes de mongomock para correr la API en memoria (tests y `--mongomock` de los benchmarks).
+
+- pymongo 4.x pasa `sort=` a BulkOperationBuilder.add_update/add_replace al armar un bulk_write
+  con UpdateOne/ReplaceOne; mongomock 4.3 no lo acepta. Se descarta (no cambia el resultado de
+  los filtros por _id que usa la API).
+- mongomock no emite eventos de monitoreo de pymongo, así que `OyenteConsultas` no vería nada y
+  los presupuestos de `max_consultas` contarían 0. Cada método público de Collection anota un
+  comando en el registro activo (api/consultas.py) con el mismo nombre que pymongo enviaría al
+  servidor; las llamadas internas de mongomock (find_one -> find) no se cuentan dos veces.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+
+from api.consultas import Consulta, forma_filtro, registro_actual
+
+# Método de Collection -> (comando que emitiría pymongo, posición del filtro en los argumentos)
+_COMANDOS = {
+    "find": ("find", 0),
+    "find_one": ("find", 0),
+    "aggregate": ("aggregate", None),
+    "count_documents": ("aggregate", 0),
+    "estimated_document_count": ("count", None),
+    "distinct": ("distinct", 1),
+    "insert_one": ("insert", None),
+    "insert_many": ("insert", None),
+    "update_one": ("update", 0),
+    "update_many": ("update", 0),
+    "replace_one": ("update", 0),
+    "delete_one": ("delete", 0),
+    "delete_many": ("delete", 0),
+    "find_one_and_update": ("findAndModify", 0),
+    "find_one_and_replace": ("findAndModify", 0),
+    "find_one_and_delete": ("findAndModify", 0),
+    "bulk_write": ("bulkWrite", None),
+}
+
+_anidado = threading.local()
+_parcheado = False
+
+
+def _filtro(metodo: str, posicion, args, kwargs):
+    if metodo == "aggregate":
+        pipeline = args[0] if args else kwargs.get("pipeline") or []
+        return next((etapa["$match"] for etapa in pipeline if "$match" in etapa), None)
+    if posicion is None:
+        return None
+    if len(args) > posicion:
+        return args[posicion]
+    return kwargs.get("filter")
+
+
+def _contado(metodo: str, original):
+    comando, posicion = _COMANDOS[metodo]
+
+    @functools.wraps(original)
+    def envoltura(self, *args, **kwargs):
+        registro = registro_actual()
+        if registro is None or getattr(_anidado, "activo", False):
+            return original(self, *args, **kwargs)
+        _anidado.activo = True
+        inicio = time.perf_counter()
+        fallida = True
+        try:
+            resultado = original(self, *args, **kwargs)
+            fallida = False
+            return resultado
+        finally:
+            _anidado.activo = False
+            registro.agregar(Consulta(self.name, comando, forma_filtro(_filtro(metodo, posicion, args, kwargs)),
+                                      (time.perf_counter() - inicio) * 1000, fallida))
+
+    return envoltura
+
+
+def parchear_mongomock() -> None:
+    """Aplica los ajustes una sola vez por proceso."""
+    global _parcheado
+    if _parcheado:
+        return
+    from mongomock.collection import BulkOperationBuilder, Collection
+
+    for nombre in ("add_update", "add_replace"):
+        original = getattr(BulkOperationBuilder, nombre)
+        setattr(BulkOperationBuilder, nombre,
+                functools.wraps(original)(lambda self, *a, sort=None, _original=original, **k: _original(self, *a, **k)))
+    for metodo in _COMANDOS:
+        setattr(Collection, metodo, _contado(metodo, getattr(Collection, metodo)))
+    _parcheado = True
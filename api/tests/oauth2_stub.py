@@ -0,0 +1,157 @@
+"""oauth2_stub.py
+Proveedor OAuth2/OIDC stub para probar localmente el callback (api/views/login.py).
+
+Levanta un servidor HTTP en 127.0.0.1 con:
+- POST /token: acepta cualquier código con code_verifier y devuelve un id_token RS256 firmado.
+  El email del usuario es el propio código si contiene '@' (p.ej. code=ana@example.com).
+- GET /jwks: claves públicas en formato JWKS.
+- rotar_clave(): cambia la clave de firma (para probar el refresco por kid desconocido).
+- Contadores 'peticiones_token' y 'peticiones_jwks' para comprobar el uso de la caché.
+
+Uso programático:
+
+    with ProveedorOAuth2Stub(client_id="mi-cliente") as stub:
+        settings.OAUTH_TOKEN_ENDPOINT = stub.token_endpoint
+        settings.OAUTH_JWKS_URI = stub.jwks_uri
+        settings.OAUTH_ISSUER = stub.issuer
+
+Uso manual: python -m api.tests.oauth2_stub (imprime las variables de entorno a configurar).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+class ProveedorOAuth2Stub:
+    def __init__(self, client_id: str = "stub-client", puerto: int = 0):
+        self.client_id = client_id
+        self.peticiones_token = 0
+        self.peticiones_jwks = 0
+        self._claves = []
+        self.rotar_clave()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def issuer(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    @property
+    def token_endpoint(self) -> str:
+        return f"{self.issuer}/token"
+
+    @property
+    def jwks_uri(self) -> str:
+        return f"{self.issuer}/jwks"
+
+    def rotar_clave(self) -> str:
+        """Genera una clave de firma nueva; el JWKS publica solo la vigente."""
+        kid = uuid.uuid4().hex[:12]
+        self._claves = [(kid, rsa.generate_private_key(public_exponent=65537, key_size=2048))]
+        return kid
+
+    def emitir_id_token(self, email: str, **claims) -> str:
+        kid, privada = self._claves[-1]
+        ahora = int(time.time())
+        payload = {
+            "iss": self.issuer,
+            "aud": self.client_id,
+            "sub": f"stub-{email}",
+            "email": email,
+            "email_verified": True,
+            "given_name": "Usuario",
+            "family_name": "Stub",
+            "iat": ahora,
+            "exp": ahora + 3600,
+            **claims,
+        }
+        return jwt.encode(payload, privada, algorithm="RS256", headers={"kid": kid})
+
+    def _jwks(self) -> dict:
+        claves = []
+        for kid, privada in self._claves:
+            jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(privada.public_key()))
+            jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+            claves.append(jwk)
+        return {"keys": claves}
+
+    def _manejador(self):
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como un proveedor real
+
+            def _responder(self, codigo, cuerpo):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                if self.path.startswith("/jwks"):
+                    stub.peticiones_jwks += 1
+                    return self._responder(200, stub._jwks())
+                return self._responder(404, {"error": "not_found"})
+
+            def do_POST(self):
+                if not self.path.startswith("/token"):
+                    return self._responder(404, {"error": "not_found"})
+                stub.peticiones_token += 1
+                largo = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(largo).decode("utf-8")).items()}
+                if form.get("grant_type") != "authorization_code" or not form.get("code") or not form.get("code_verifier"):
+                    return self._responder(400, {"error": "invalid_request"})
+                if form.get("client_id") != stub.client_id:
+                    return self._responder(401, {"error": "invalid_client"})
+                email = form["code"] if "@" in form["code"] else "usuario@example.com"
+                return self._responder(200, {
+                    "access_token": uuid.uuid4().hex,
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                    "id_token": stub.emitir_id_token(email),
+                })
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self) -> "ProveedorOAuth2Stub":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    stub = ProveedorOAuth2Stub(puerto=8765).iniciar()
+    print("Proveedor stub escuchando. Configura:")
+    print(f"  OAUTH_CLIENT_ID={stub.client_id}")
+    print(f"  OAUTH_TOKEN_ENDPOINT={stub.token_endpoint}")
+    print(f"  OAUTH_JWKS_URI={stub.jwks_uri}")
+    print(f"  OAUTH_ISSUER={stub.issuer}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.detener()
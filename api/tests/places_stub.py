@@ -0,0 +1,141 @@
+"""places_stub.py
+Servidor Google Places (Text Search) stub para probar localmente el recolector por estados
+(api/universities_by_state.py).
+
+Levanta un servidor HTTP en 127.0.0.1 que responde GET /maps/api/place/textsearch/json:
+- Cada consulta devuelve 'resultados_por_consulta' lugares deterministas, en páginas de 20 con
+  `next_page_token` (máximo 3 páginas, como la API real).
+- Un token solo es válido 'activacion' segundos después de emitirse; antes se responde
+  INVALID_REQUEST, igual que Places.
+- Sin el parámetro 'key' se responde REQUEST_DENIED.
+- Contadores: 'peticiones', 'prematuras' (tokens usados antes de activarse) e 'instantes'
+  (monotonic de cada petición) para comprobar el límite de QPS.
+
+Uso programático:
+
+    with ServidorPlacesStub(activacion=0.2) as stub:
+        datos = universidades_por_estados(ESTADOS_MEXICO, places_url=stub.places_url, api_key="x", espera_token=0.2)
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_POR_PAGINA = 20
+
+
+class ServidorPlacesStub:
+    def __init__(self, resultados_por_consulta: int = 45, activacion: float = 2.0, retardo: float = 0.0,
+                 puerto: int = 0):
+        self.resultados_por_consulta = resultados_por_consulta
+        self.activacion = activacion
+        self.retardo = retardo
+        self.peticiones = 0
+        self.prematuras = 0
+        self.instantes = []
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def places_url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/maps/api/place/textsearch/json"
+
+    def _pagina(self, consulta: str, inicio: int) -> dict:
+        fin = min(inicio + _POR_PAGINA, self.resultados_por_consulta, 3 * _POR_PAGINA)
+        # Nombres repetidos cada 15 resultados para ejercitar la deduplicación
+        resultados = [
+            {
+                "name": f"Universidad {consulta.split(' en ')[-1].split(',')[0]} {i % 15 + 1}",
+                "formatted_address": f"Calle {i}, {consulta}",
+                "geometry": {"location": {"lat": 19.0 + i / 1000, "lng": -99.0 - i / 1000}},
+                "place_id": f"stub-{abs(hash((consulta, i))) % 10**9}",
+            }
+            for i in range(inicio, fin)
+        ]
+        respuesta = {"status": "OK" if resultados else "ZERO_RESULTS", "results": resultados}
+        if fin < min(self.resultados_por_consulta, 3 * _POR_PAGINA):
+            token = uuid.uuid4().hex
+            with self._lock:
+                self._tokens[token] = (consulta, fin, time.monotonic() + self.activacion)
+            respuesta["next_page_token"] = token
+        return respuesta
+
+    def _responder_consulta(self, params: dict) -> dict:
+        if not params.get("key"):
+            return {"status": "REQUEST_DENIED", "error_message": "The provided API key is invalid.", "results": []}
+        token = params.get("pagetoken")
+        if token:
+            with self._lock:
+                datos = self._tokens.get(token)
+            if datos is None:
+                return {"status": "INVALID_REQUEST", "results": []}
+            consulta, inicio, activo_desde = datos
+            if time.monotonic() < activo_desde:
+                with self._lock:
+                    self.prematuras += 1
+                return {"status": "INVALID_REQUEST", "results": []}
+            return self._pagina(consulta, inicio)
+        return self._pagina(params.get("query", ""), 0)
+
+    def _manejador(self):
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, codigo, cuerpo):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                if partes.path != "/maps/api/place/textsearch/json":
+                    return self._responder(404, {"status": "NOT_FOUND"})
+                with stub._lock:
+                    stub.peticiones += 1
+                    stub.instantes.append(time.monotonic())
+                if stub.retardo:
+                    time.sleep(stub.retardo)
+                params = {k: v[0] for k, v in parse_qs(partes.query).items()}
+                return self._responder(200, stub._responder_consulta(params))
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self) -> "ServidorPlacesStub":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    stub = ServidorPlacesStub(puerto=8767).iniciar()
+    print(f"Places stub escuchando. places_url={stub.places_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.detener()
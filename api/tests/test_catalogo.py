@@ -0,0 +1,60 @@
+"""Recarga completa del catálogo (api/catalogo.py)."""
+import logging
+from unittest import mock
+
+from mongoengine.connection import get_db
+
+from api import catalogo
+from api.models import Carrera, Subarea
+from api.tests.base import PruebaMongo
+
+
+class RecargarTests(PruebaMongo):
+    def test_fallo_en_derivados_no_revierte_la_recarga(self):
+        Carrera(nombre="Vieja", main_area="salud").save()
+        registros = [{"nombre": "Nueva", "main_area": "salud"}]
+        with mock.patch.object(catalogo, "_tras_recarga", side_effect=RuntimeError("sin agregados")), \
+                self.assertLogs(catalogo.logger, logging.ERROR):
+            resumen = catalogo.recargar({"carreras": registros}, min_fraccion=0)
+        self.assertEqual(resumen["version"], 1)
+        self.assertTrue(resumen["derivados"].startswith("error: RuntimeError"))
+        self.assertEqual([c.nombre for c in Carrera.objects], ["Nueva"])
+
+    def test_dry_run_no_toca_colecciones(self):
+        Carrera(nombre="Vieja", main_area="salud").save()
+        resumen = catalogo.recargar({"carreras": [{"nombre": "Nueva"}]}, min_fraccion=0, dry_run=True)
+        self.assertEqual((resumen["version"], resumen["derivados"]), (None, None))
+        self.assertEqual([c.nombre for c in Carrera.objects], ["Vieja"])
+
+    def test_intercambio_incompleto(self):
+        Carrera(nombre="Vieja", main_area="salud").save()
+        Subarea(nombre="Vieja", carrera="Vieja").save()
+        coleccion = type(Carrera._get_collection())
+        original = coleccion.rename
+
+        def renombrar(staging, nombre, **kwargs):
+            if nombre == Subarea._get_collection_name():
+                raise RuntimeError("sin espacio")
+            return original(staging, nombre, **kwargs)
+
+        fuentes = {"carreras": [{"nombre": "Nueva", "main_area": "salud"}],
+                   "subareas": [{"nombre": "Nueva", "carrera": "Nueva"}]}
+        with mock.patch.object(coleccion, "rename", renombrar), self.assertLogs(catalogo.logger, logging.ERROR), \
+                self.assertRaises(catalogo.IntercambioIncompleto) as error:
+            catalogo.recargar(fuentes, min_fraccion=0)
+        self.assertEqual((error.exception.intercambiadas, error.exception.descartadas), (["carreras"], ["subareas"]))
+        self.assertEqual(catalogo.version_catalogo(), 1)
+        self.assertEqual([c.nombre for c in Carrera.objects], ["Nueva"])
+        self.assertEqual([s.nombre for s in Subarea.objects], ["Vieja"])
+        self.assertFalse([n for n in get_db().list_collection_names() if n.endswith(catalogo.SUFIJO_STAGING)])
+        self.assertFalse(catalogo.recarga_en_curso())
+
+    def test_bloqueo_congela_bulk(self):
+        with catalogo.bloqueo_recarga():
+            respuesta = self.cliente.post("/bulk/carreras", [{"nombre": "Nueva", "main_area": "salud"}],
+                                          format="json")
+            self.assertEqual(respuesta.status_code, 503)
+            with self.assertRaises(catalogo.ErrorRecarga):
+                catalogo.recargar({"carreras": []}, min_fraccion=0)
+        self.assertEqual(Carrera.objects.count(), 0)
+        self.assertFalse(catalogo.recarga_en_curso())
@@ -0,0 +1,74 @@
+"""Cosecha concurrente de fuentes externas (Places, Wikipedia)."""
+import asyncio
+import logging
+from unittest import mock
+
+from django.test import TestCase
+
+from api import carreras_sources, universities_by_state
+from api.http_asincrono import ClienteCosecha
+from api.tests.mediawiki_stub import ServidorMediaWikiStub
+
+
+class CosechaPlacesTests(TestCase):
+    def test_error_inesperado_queda_en_su_estado(self):
+        async def top_5(cliente, estado, **opciones):
+            if estado == "Jalisco":
+                raise KeyError("geometry")
+            return [{"nombre": estado}]
+
+        with mock.patch.object(universities_by_state, "top_5_por_tipo_async", top_5), \
+                self.assertLogs(universities_by_state.logger, logging.ERROR):
+            data = universities_by_state.universidades_por_estados(["Jalisco", "Colima"], usar_cache=False)
+        self.assertEqual(data["Jalisco"], {"error": "KeyError: 'geometry'"})
+        self.assertEqual(data["Colima"], [{"nombre": "Colima"}])
+
+
+class CosechaWikipediaTests(TestCase):
+    @staticmethod
+    def _cosechar(stub, seeds, **opciones):
+        async def cosechar():
+            cliente = ClienteCosecha(backoff=0.0, tasa_por_host=1000.0)
+            try:
+                return [item async for item in carreras_sources.wikipedia_cosechar(
+                    seeds, api_url=stub.api_url, cliente=cliente, **opciones)]
+            finally:
+                await cliente.cerrar()
+
+        return asyncio.run(cosechar())
+
+    def test_sigue_continue_hasta_agotar(self):
+        with ServidorMediaWikiStub(paginas_por_termino=45) as stub:
+            items = self._cosechar(stub, [{"termino": "Medicina", "main_area": "salud"}, {"termino": "Derecho"}])
+        self.assertEqual(len({i["title"] for i in items}), 90)
+        self.assertTrue(all(i["main_area"] == "salud" for i in items if i["title"].startswith("Medicina")))
+        # Lotes de 20: tres peticiones por término
+        self.assertEqual(stub.peticiones, 6)
+
+    def test_max_por_termino(self):
+        with ServidorMediaWikiStub(paginas_por_termino=45) as stub:
+            items = self._cosechar(stub, [{"termino": "Medicina"}], max_por_termino=25)
+        self.assertEqual([i["title"] for i in items], [f"Medicina {n}" for n in range(1, 26)])
+
+    def test_reintenta_429_503_y_maxlag(self):
+        with ServidorMediaWikiStub(paginas_por_termino=5, fallos=2, maxlag=1) as stub:
+            items = self._cosechar(stub, [{"termino": "Medicina"}])
+        self.assertEqual(len(items), 5)
+        self.assertEqual(stub.peticiones, 4)
+
+    def test_error_inesperado_queda_en_su_termino(self):
+        async def paginas(cliente, api_url, seed, maximo):
+            if seed["termino"] == "Medicina":
+                raise ValueError("JSON inválido")
+            yield {"nombre": seed["termino"]}
+
+        async def cosechar():
+            seeds = [{"termino": "Medicina"}, {"termino": "Derecho"}]
+            return {seed["termino"]: paginas async for seed, paginas in
+                    carreras_sources.wikipedia_cosechar_por_termino(seeds, usar_cache=False)}
+
+        with mock.patch.object(carreras_sources, "_wikipedia_paginas", paginas), \
+                self.assertLogs(carreras_sources.logger, logging.ERROR):
+            data = asyncio.run(cosechar())
+        self.assertEqual(data["Medicina"], {"error": "ValueError: JSON inválido"})
+        self.assertEqual(data["Derecho"], [{"nombre": "Derecho"}])
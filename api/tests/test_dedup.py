@@ -0,0 +1,17 @@
+"""Deduplicación de carreras y escuelas (api/dedup.py)."""
+from django.test import TestCase
+
+from api import dedup
+
+
+class AgruparTests(TestCase):
+    def test_resultado_independiente_del_orden(self):
+        con = {"nombre": "Universidad Autonoma de Chiapas", "ubicacion": [{"lat": 16.75, "lng": -93.1}]}
+        sin = {"nombre": "Universidad Autónoma de Chiapas", "ubicacion": []}
+        self.assertEqual(dedup.agrupar([con, sin], "escuelas"), [[0, 1]])
+        self.assertEqual(dedup.agrupar([sin, con], "escuelas"), [[0, 1]])
+
+    def test_bloqueo_espacial(self):
+        a = {"nombre": "Universidad Autonoma de Chiapas", "ubicacion": [{"lat": 16.75, "lng": -93.1}]}
+        b = {"nombre": "Universidad Autonoma de Chiapas", "ubicacion": [{"lat": 19.4, "lng": -99.1}]}
+        self.assertEqual(dedup.agrupar([a, b], "escuelas"), [[0], [1]])
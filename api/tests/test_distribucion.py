@@ -0,0 +1,23 @@
+"""Snapshot de distribución de resultados (api/distribucion.py) y su vista."""
+from unittest import mock
+
+from api import distribucion
+from api.distribucion import SnapshotResultados
+from api.tests.base import PruebaMongo
+
+
+class DistribucionTests(PruebaMongo):
+    def test_demasiados_percentiles(self):
+        percentiles = ",".join(str(p) for p in range(distribucion.PERCENTILES_MAXIMO + 1))
+        respuesta = self.cliente.get("/dashboard/formularios/distribucion", {"percentiles": percentiles})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_cache_de_resumenes_acotado(self):
+        snapshot = SnapshotResultados()
+        with mock.patch.object(distribucion, "RESUMENES_MAXIMO", 2):
+            primero = snapshot.resumen(["carrera"], [50], 1)
+            snapshot.resumen(["carrera"], [50], 2)
+            # Usar el primero lo vuelve el más reciente: se descarta el de 2 bins
+            self.assertIs(snapshot.resumen(["carrera"], [50], 1), primero)
+            snapshot.resumen(["carrera"], [50], 3)
+        self.assertEqual([clave[2] for clave in snapshot._estado.resumenes], [1, 3])
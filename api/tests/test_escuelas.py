@@ -0,0 +1,41 @@
+"""Carga de escuelas desde Places y agregado por estado."""
+from datetime import timedelta, timezone
+from unittest import mock
+
+from api.escuelas_por_estado import refrescar
+from api.models import Escuela
+from api.models.escuela import EscuelasPorEstado
+from api.tests.base import PruebaMongo
+from api.universities_by_state import cargar_en_bd
+
+
+class CargarEscuelasTests(PruebaMongo):
+    def test_umbral_cero_explicito(self):
+        registros = [{"nombre": nombre, "type": "publica", "ubicacion": [{"lat": 19.0, "lng": -98.2}], "estado": "Puebla"}
+                     for nombre in ("Universidad Tecnologica de Puebla", "Universidad Politecnica de Puebla")]
+        self.assertEqual(cargar_en_bd(registros, dry_run=True)["nuevas"], 2)
+        self.assertEqual(cargar_en_bd(registros, umbral=0, dry_run=True)["nuevas"], 1)
+
+
+class EscuelasPorEstadoTests(PruebaMongo):
+    def test_refrescar(self):
+        for i, tipo in enumerate(("publica", "publica", "privada")):
+            Escuela(nombre=f"Escuela {i}", type=tipo, estado="Puebla").save()
+        self.assertEqual(refrescar(), 1)
+        self.assertEqual(EscuelasPorEstado.objects.get(estado="Puebla").total, 3)
+        Escuela.objects.delete()
+        refrescar(["Puebla"])
+        self.assertEqual(EscuelasPorEstado.objects.count(), 0)
+
+    def test_refresco_anterior_no_pisa_uno_nuevo(self):
+        Escuela(nombre="Escuela 0", type="publica", estado="Puebla").save()
+        refrescar(["Puebla"])
+        nuevo = EscuelasPorEstado.objects.get(estado="Puebla")
+        Escuela(nombre="Escuela 1", type="publica", estado="Puebla").save()
+        # Un refresco que tomó su hora antes que el ya guardado no lo reemplaza
+        with mock.patch("api.escuelas_por_estado.datetime") as reloj:
+            reloj.now.return_value = nuevo.actualizado.replace(tzinfo=timezone.utc) - timedelta(seconds=1)
+            refrescar(["Puebla"])
+        self.assertEqual(EscuelasPorEstado.objects.get(estado="Puebla").total, 1)
+        refrescar(["Puebla"])
+        self.assertEqual(EscuelasPorEstado.objects.get(estado="Puebla").total, 2)
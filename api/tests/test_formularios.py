@@ -0,0 +1,35 @@
+"""POST /formularios/recalificar (api/views/formularios.py)."""
+from django.test import override_settings
+
+from api.models.formulario import Formulario
+from api.tests.base import PruebaMongo
+
+
+class RecalificarTests(PruebaMongo):
+    def setUp(self):
+        super().setUp()
+        for respuestas in (["2"], ["3"]):
+            Formulario(subarea="s", preguntas=[{"texto": "1+1", "correcta": "2"}], respuestas=respuestas,
+                       resultados=1.0).save()
+
+    def _post(self, cuerpo):
+        return self.cliente.post("/formularios/recalificar", cuerpo, format="json")
+
+    def test_subarea_obligatoria(self):
+        self.assertEqual(self._post({}).status_code, 400)
+
+    def test_dry_run_booleano(self):
+        for valor in ("quizá", 2, None, "yes"):
+            self.assertEqual(self._post({"subarea": "s", "dry_run": valor}).status_code, 400, valor)
+        for valor in ("true", "1", True):
+            self.assertEqual(self._post({"subarea": "s", "dry_run": valor}).status_code, 200, valor)
+        self.assertEqual(sorted(f.resultados for f in Formulario.objects), [1.0, 1.0])
+
+    def test_dry_run_falso_escribe(self):
+        for valor in ("false", "0", False):
+            self.assertEqual(self._post({"subarea": "s", "dry_run": valor}).status_code, 200, valor)
+        self.assertEqual(sorted(f.resultados for f in Formulario.objects), [0.0, 100.0])
+
+    @override_settings(RECALIFICAR_MAXIMO_API=1)
+    def test_tope_de_formularios(self):
+        self.assertEqual(self._post({"subarea": "s"}).status_code, 400)
@@ -0,0 +1,81 @@
+"""Flujo OAuth2: estado del login (api/oauth2_estado.py) y verificación del id_token."""
+import functools
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.oauth2_cliente import ErrorOAuth2, verificar_id_token
+from api.oauth2_estado import error_configuracion
+from api.tests.oauth2_stub import ProveedorOAuth2Stub
+
+
+class EstadoOAuth2Tests(TestCase):
+    def test_modo_cache_con_locmem(self):
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                               OAUTH2_ESTADO_MODO="cache"):
+            self.assertIsNotNone(error_configuracion())
+            with override_settings(OAUTH2_ESTADO_CACHE_LOCAL=True):
+                self.assertIsNone(error_configuracion())
+        with override_settings(OAUTH2_ESTADO_MODO="cookie"):
+            self.assertIsNone(error_configuracion())
+
+
+class IdTokenTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = ProveedorOAuth2Stub().iniciar()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.detener()
+        super().tearDownClass()
+
+    def test_issuer_obligatorio(self):
+        token = self.stub.emitir_id_token("ana@example.com")
+        self.assertEqual(verificar_id_token(token, self.stub.jwks_uri, self.stub.client_id, self.stub.issuer)["iss"],
+                         self.stub.issuer)
+        with self.assertRaises(ErrorOAuth2):
+            verificar_id_token(token, self.stub.jwks_uri, self.stub.client_id, None)
+        with self.assertRaises(ErrorOAuth2):
+            verificar_id_token(token, self.stub.jwks_uri, self.stub.client_id, "https://otro.invalid")
+
+    def test_rechaza_token_sin_iss(self):
+        import jwt
+
+        kid, privada = self.stub._claves[-1]
+        payload = jwt.decode(self.stub.emitir_id_token("ana@example.com"), options={"verify_signature": False})
+        del payload["iss"]
+        token = jwt.encode(payload, privada, algorithm="RS256", headers={"kid": kid})
+        with self.assertRaises(ErrorOAuth2):
+            verificar_id_token(token, self.stub.jwks_uri, self.stub.client_id, self.stub.issuer)
+
+    def _callback(self, **config):
+        config = {
+            "OAUTH_CLIENT_ID": self.stub.client_id,
+            "OAUTH_AUTH_ENDPOINT": f"{self.stub.issuer}/authorize",
+            "OAUTH_REDIRECT_URI": "https://app.invalid/callback",
+            "OAUTH_TOKEN_ENDPOINT": self.stub.token_endpoint,
+            "OAUTH_JWKS_URI": self.stub.jwks_uri,
+            "OAUTH_ISSUER": self.stub.issuer,
+            "OAUTH2_ESTADO_MODO": "cookie",
+            **config,
+        }
+        with override_settings(**config):
+            cliente = APIClient()
+            auth_url = cliente.get("/auth/oauth2/start", {"provider": "google"}).json()["auth_url"]
+            state = parse_qs(urlparse(auth_url).query)["state"][0]
+            return cliente.get("/auth/oauth2/callback", {"code": "ana@example.com", "state": state})
+
+    def test_callback_sin_issuer_configurado(self):
+        self.assertEqual(self._callback(OAUTH_ISSUER=None).status_code, 500)
+
+    def test_callback_rechaza_email_no_verificado(self):
+        for claims in ({"email_verified": False}, {"email_verified": "true"}):
+            emitir = functools.partial(ProveedorOAuth2Stub.emitir_id_token, self.stub, **claims)
+            with mock.patch.object(self.stub, "emitir_id_token", emitir):
+                respuesta = self._callback()
+            self.assertEqual(respuesta.status_code, 400, claims)
+            self.assertEqual(respuesta.json()["detail"], "El proveedor no ha verificado el email.")
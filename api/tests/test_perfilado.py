@@ -0,0 +1,33 @@
+"""Perfilado bajo demanda (api/perfilado.py)."""
+import logging
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from api import perfilado
+
+
+class PerfiladoTests(SimpleTestCase):
+    def test_muestreo_sin_token_no_habilita(self):
+        with override_settings(PERFILADO_TOKEN=None, PERFILADO_MUESTREO=0.5), \
+                self.assertLogs(perfilado.logger, logging.WARNING):
+            self.assertFalse(perfilado.habilitado())
+        with override_settings(PERFILADO_TOKEN="secreto", PERFILADO_MUESTREO=0.5):
+            self.assertTrue(perfilado.habilitado())
+
+    def test_poda_por_tandas(self):
+        with tempfile.TemporaryDirectory() as carpeta, \
+                override_settings(PERFILADO_DIR=carpeta, PERFILADO_MAX_ARCHIVOS=20):
+            perfilado._poda["guardados"] = 0
+            for i in range(21):
+                Path(carpeta, f"20250101000000-{i:08x}.prof").touch()
+            perfil = perfilado.Perfil()
+            perfil.iniciar_perfilador()
+            perfil.detener_perfilador()
+            perfil.guardar()
+            # Poda cada 20 // 10 = 2 guardados: el primero aún no lista el directorio
+            self.assertEqual(len(perfilado.listar()), 22)
+            perfil.guardar()
+            self.assertEqual(len(perfilado.listar()), 20)
+            self.assertIn(perfil.id, perfilado.listar())
@@ -0,0 +1,73 @@
+"""Presupuestos de comandos MongoDB de las rutas calientes (`max_consultas`, api/consultas.py)."""
+from unittest import mock
+
+
+from api import catalogo
+from api.consultas import max_consultas
+from api.distribucion import SnapshotResultados
+from api.escuelas_por_estado import refrescar
+from api.models import Carrera, Escuela, MapaCurricular, Subarea, Voluntariado
+from api.models.escuela import Coordenadas
+from api.models.formulario import Formulario
+from api.models.user import User
+from api.recomendaciones import IndiceCarreras
+from api.tests.base import PruebaMongo
+
+
+class PresupuestoConsultasTests(PruebaMongo):
+    """Se siembran N=12 documentos por relación: un patrón N+1 superaría cualquiera de estos
+    presupuestos."""
+
+    N = 12
+
+    def setUp(self):
+        super().setUp()
+        for i in range(self.N):
+            Carrera(nombre=f"Carrera {i}", main_area="salud", descripcion=f"descripcion {i} anatomia",
+                    sub_areas=[f"Subarea {i}"]).save()
+            Subarea(nombre=f"Subarea {i}", carrera="Carrera 0", descripcion="anatomia").save()
+            Escuela(nombre=f"Escuela {i}", type="publica", estado="Puebla", carreras=["Carrera 0"],
+                    ubicacion=[Coordenadas(lat=19.0, lng=-98.2)]).save()
+            Voluntariado(titulo=f"Voluntariado {i}", carrera="Carrera 0").save()
+            MapaCurricular(nombre=f"Materia {i}", carrera="Carrera 0").save()
+            Formulario(subarea=f"Subarea {i}", preguntas=[], respuestas=[], resultados=float(i)).save()
+        refrescar()
+        self.usuario = User(first_name="Ana", intereses=["anatomia"], main_area="salud").save()
+
+    def _get(self, maximo, ruta, params=None):
+        with max_consultas(maximo):
+            respuesta = self.cliente.get(ruta, params or {})
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta
+
+    def test_el_presupuesto_se_aplica(self):
+        with self.assertRaises(AssertionError):
+            with max_consultas(self.N - 1):
+                for carrera in Carrera.objects:
+                    list(Subarea.objects(nombre__in=carrera.sub_areas))
+
+    def test_listados_de_catalogo_una_consulta(self):
+        self.assertEqual(len(self._get(1, "/carreras").json()), self.N)
+        self.assertEqual(len(self._get(1, "/carreras", {"area": "salud"}).json()), self.N)
+        self.assertEqual(len(self._get(1, "/escuelas", {"carrera": "Carrera 0"}).json()), self.N)
+        self.assertEqual(len(self._get(1, "/voluntariados", {"carrera": "Carrera 0"}).json()), self.N)
+        self.assertEqual(len(self._get(1, "/carreras/mapa-curricular", {"carrera": "Carrera 0"}).json()), self.N)
+        self.assertEqual(len(self._get(1, "/subareas", {"carrera": "Carrera 0"}).json()), self.N)
+        self._get(1, "/subarea", {"nombre": "Subarea 3"})
+        self._get(1, "/formulario", {"subarea": "Subarea 3"})
+        self._get(1, "/escuelas/por-estado")
+
+    def test_recomendaciones(self):
+        with mock.patch("api.views.recomendaciones.indice_carreras", IndiceCarreras()):
+            # La primera petición construye el índice (versión, seq confirmado, carreras y subáreas)
+            self._get(5, f"/usuarios/{self.usuario.id}/recomendaciones")
+            self._get(1, f"/usuarios/{self.usuario.id}/recomendaciones")
+
+    def test_distribucion(self):
+        with mock.patch("api.views.stats.snapshot_resultados", SnapshotResultados()):
+            self.assertEqual(self._get(4, "/dashboard/formularios/distribucion").json()["total"], self.N)
+
+    def test_cambios(self):
+        # Versión del catálogo, seq confirmado, una consulta por colección y una de lápidas
+        respuesta = self._get(len(catalogo.COLECCIONES) + 3, "/cambios", {"limite": 1000})
+        self.assertEqual(len(respuesta.json()["cambios"]), len(catalogo.COLECCIONES) * self.N)
@@ -0,0 +1,124 @@
+"""Marcas de cambio del catálogo (api/models/rastreo.py) y feed /cambios (api/cambios.py)."""
+from unittest import mock
+
+from django.test import override_settings
+
+from api import dedup
+from api.cambios import cambios_desde
+from api.consultas import max_consultas
+from api.models import Carrera
+from api.models import rastreo
+from api.models.rastreo import Eliminado
+from api.recoleccion import SumideroMongo
+from api.tests.base import PruebaMongo
+
+
+class RastreoTests(PruebaMongo):
+    def _seqs(self):
+        return {c.nombre: c.seq for c in Carrera.objects}
+
+    def test_update_one_sella_en_linea(self):
+        for nombre in "AB":
+            Carrera(nombre=nombre, main_area="salud").save()
+        antes = self._seqs()
+        Carrera.objects(nombre="A").update_one(set__descripcion="x")
+        despues = self._seqs()
+        self.assertGreater(despues["A"], max(antes.values()))
+        self.assertEqual(despues["B"], antes["B"])
+
+    def test_update_multiple_sella_en_la_misma_operacion(self):
+        for nombre in "ABC":
+            Carrera(nombre=nombre, main_area="salud").save()
+        antes = self._seqs()
+        with max_consultas(4):  # Reserva (abrir y cerrar: 3) y un solo update
+            Carrera.objects(nombre__in=["A", "B"]).update(set__descripcion="x")
+        despues = self._seqs()
+        self.assertEqual(despues["A"], despues["B"])
+        self.assertGreater(despues["A"], max(antes.values()))
+        self.assertEqual(despues["C"], antes["C"])
+        Carrera.objects(nombre="C").update(__raw__={"$set": {"descripcion": "y"}})
+        self.assertGreater(self._seqs()["C"], despues["A"])
+
+    def test_feed_pagina_un_seq_compartido(self):
+        for nombre in "ABCD":
+            Carrera(nombre=nombre, main_area="salud").save()
+        Carrera.objects(nombre__in=["A", "B", "C"]).update(set__descripcion="x")
+        vistos, token = [], None
+        while True:
+            pagina = cambios_desde(token, 1)
+            vistos += [c["doc"]["nombre"] for c in pagina["cambios"]]
+            token = pagina["siguiente"]
+            if not pagina["hay_mas"]:
+                break
+        self.assertEqual(vistos[0], "D")
+        self.assertEqual(sorted(vistos[1:]), ["A", "B", "C"])
+
+    def test_delete_de_queryset_deja_lapidas(self):
+        for nombre in "ABC":
+            Carrera(nombre=nombre, main_area="salud").save()
+        ids = {str(c.id) for c in Carrera.objects(nombre__in=["A", "B"])}
+        self.assertEqual(Carrera.objects(nombre__in=["A", "B"]).delete(), 2)
+        self.assertEqual({e.doc_id for e in Eliminado.objects}, ids)
+        Carrera.objects(nombre="C").modify(remove=True)
+        self.assertEqual(Eliminado.objects.count(), 3)
+        self.assertEqual(len({e.seq for e in Eliminado.objects}), 3)
+
+    def test_feed_de_cambios(self):
+        for nombre in "AB":
+            Carrera(nombre=nombre, main_area="salud").save()
+        primera = cambios_desde(None, 1)
+        self.assertTrue(primera["hay_mas"])
+        Carrera.objects(nombre="A").first().delete()
+        resto = cambios_desde(primera["siguiente"], 100)
+        self.assertEqual([(c["op"], c["id"]) for c in resto["cambios"]],
+                         [("upsert", str(Carrera.objects.get(nombre="B").id)), ("delete", primera["cambios"][0]["id"])])
+        self.assertTrue(cambios_desde("999.0", 100)["reiniciar"])
+
+    def test_reserva_abierta_retiene_el_feed(self):
+        Carrera(nombre="A", main_area="salud").save()
+        with rastreo.secuencia_reservada() as lenta:
+            # Otro escritor reserva después pero confirma antes que la reserva abierta
+            Carrera(nombre="B", main_area="salud").save()
+            self.assertEqual(rastreo.seq_confirmado(), lenta - 1)
+            parcial = cambios_desde(None, 100)
+            self.assertEqual([c["doc"]["nombre"] for c in parcial["cambios"]], ["A"])
+            Carrera._get_collection().insert_one(rastreo.sellar_documentos([{"nombre": "C"}], lenta)[0])
+        resto = cambios_desde(parcial["siguiente"], 100)
+        self.assertEqual([c["doc"]["nombre"] for c in resto["cambios"]], ["C", "B"])
+
+    def test_reserva_vencida_se_descarta(self):
+        with rastreo.secuencia_reservada(3) as inicio:
+            self.assertEqual(rastreo.seq_confirmado(), inicio - 1)
+            # Un proceso caído nunca cierra su reserva: pasado el plazo deja de retener el feed
+            with override_settings(CAMBIOS_RESERVA_MAX_SEGUNDOS=-1), self.assertLogs(rastreo.logger, "WARNING"):
+                self.assertEqual(rastreo.seq_confirmado(), inicio + 2)
+
+
+class CargasMasivasTests(PruebaMongo):
+    def test_secuencia_reservada_por_lote(self):
+        escritos = []
+        original = rastreo.secuencia_reservada
+
+        def reservar(n=1):
+            escritos.append(Carrera._get_collection().count_documents({}))
+            return original(n)
+
+        resultado = dedup.ResultadoDedup(nuevos=[{"nombre": f"Carrera {i}", "main_area": "salud"} for i in range(5)])
+        with mock.patch.object(rastreo, "secuencia_reservada", reservar):
+            cuenta = dedup.aplicar_en_mongo(resultado, "carreras", lote=2)
+        self.assertEqual(cuenta["insertados"], 5)
+        # Cada reserva ocurre después de escribir el lote anterior y se cierra al escribirlo
+        self.assertEqual(escritos, [0, 2, 4])
+        self.assertEqual(rastreo.seq_confirmado(), max(Carrera.objects.scalar("seq")))
+
+    def test_sumidero_sin_cambios_no_sella(self):
+        def escribir():
+            sumidero = SumideroMongo(lote=10)
+            sumidero.escribir("carreras", [{"nombre": "Medicina", "descripcion": "d", "main_area": "salud"}])
+            sumidero.vaciar()
+            return sumidero, Carrera.objects.get(nombre="Medicina").seq
+
+        _, seq = escribir()
+        sumidero, repetido = escribir()
+        self.assertEqual(repetido, seq)
+        self.assertEqual((sumidero.insertados, sumidero.actualizados), (0, 0))
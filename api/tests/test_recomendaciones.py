@@ -0,0 +1,56 @@
+"""Índice de recomendaciones (api/recomendaciones.py)."""
+from unittest import mock
+
+from django.test import override_settings
+from pymongo import ReadPreference
+
+from api.models import Carrera
+from api.recomendaciones import IndiceCarreras
+from api.tests.base import PruebaMongo
+
+
+class RecomendacionesTests(PruebaMongo):
+    def setUp(self):
+        super().setUp()
+        Carrera(nombre="Medicina", main_area="salud", descripcion="cuerpo humano robotica", sub_areas=["Anatomía"]).save()
+        Carrera(nombre="Informática", main_area="ciencias", descripcion="algoritmos", sub_areas=["Software"]).save()
+
+    def test_lectura_de_pendientes_en_primario(self):
+        self.assertEqual(IndiceCarreras._coleccion(Carrera, True).read_preference, ReadPreference.PRIMARY)
+
+    @override_settings(CATALOGO_VERSION_SEGUNDOS=0)
+    def test_subarea_marca_carreras_que_la_listan(self):
+        indice = IndiceCarreras()
+        self.assertEqual([r["carrera"] for r in indice.recomendar(["robotica"])], ["Medicina"])
+        with mock.patch("api.views.subareas.indice_carreras", indice):
+            # La subárea declara otra carrera, pero Informática la lista en sub_areas
+            respuesta = self.cliente.post("/bulk/subareas", [{
+                "nombre": "Software", "carrera": "Otra", "introduccion": "", "descripcion": "robotica",
+                "lecciones": [], "videos_escuela": []}], format="json")
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertIn("Informática", [r["carrera"] for r in indice.recomendar(["robotica"])])
+
+    @override_settings(CATALOGO_VERSION_SEGUNDOS=0)
+    def test_otro_proceso_ve_los_cambios(self):
+        otro = IndiceCarreras()
+        otro.recomendar(["robotica"])
+        Carrera.objects(nombre="Medicina").first().delete()
+        self.assertEqual(otro.recomendar(["cuerpo", "robotica"]), [])
+
+    def test_bono_de_area_no_agrega_carreras_sin_similitud(self):
+        resultado = IndiceCarreras().recomendar(["robotica"], main_area="ciencias")
+        self.assertEqual([r["carrera"] for r in resultado], ["Medicina"])
+
+    def test_altas_incrementales_igual_que_reconstruir(self):
+        Carrera(nombre="Mecatrónica", main_area="ciencias", descripcion="robotica brazos").save()
+        indice = IndiceCarreras()
+        indice.recomendar(["robotica"])
+        # Varias altas seguidas: la matriz crece por capacidad y las filas nuevas van a la reserva
+        for i in range(3):
+            Carrera(nombre=f"Robótica {i}", main_area="ciencias", descripcion="robotica brazos " * (i + 1)).save()
+            indice.marcar_carreras([f"Robótica {i}"])
+            incremental = indice.recomendar(["robotica", "brazos"])
+        completo = IndiceCarreras().recomendar(["robotica", "brazos"])
+        self.assertEqual([r["carrera"] for r in incremental], [r["carrera"] for r in completo])
+        for a, b in zip(incremental, completo):
+            self.assertAlmostEqual(a["puntaje"], b["puntaje"], places=5)
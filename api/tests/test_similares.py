@@ -0,0 +1,26 @@
+"""Índice MinHash/LSH de carreras similares (api/similares.py)."""
+import numpy as np
+from django.test import SimpleTestCase
+
+from api import similares
+from api.similares import IndiceSimilares, firma_minhash
+
+
+class IndiceSimilaresTests(SimpleTestCase):
+    def setUp(self):
+        a, b = similares._permutaciones(similares.NUM_PERMUTACIONES, 1)
+        base = [f"materia {i}" for i in range(20)]
+        conjuntos = {
+            "A": base,
+            "B": base[:16] + [f"otra {i}" for i in range(4)],  # Jaccard 16/24 ~ 0.67
+            "C": base[:4] + [f"ajena {i}" for i in range(16)],  # Jaccard 4/36 ~ 0.11
+        }
+        self.indice = IndiceSimilares(list(conjuntos), np.vstack([firma_minhash(v, a, b) for v in conjuntos.values()]))
+
+    def test_solo_pares_sobre_el_corte(self):
+        resultado = self.indice.similares("A", 10)
+        self.assertEqual([r["carrera"] for r in resultado], ["B"])
+        self.assertGreaterEqual(resultado[0]["similitud"], similares.SIMILITUD_MINIMA)
+
+    def test_carrera_no_indexada(self):
+        self.assertIsNone(self.indice.similares("Z", 10))
@@ -6,27 +6,43 @@ públicas y privadas por estado de México y genera archivos JSON con los result
 
 Requisitos:
 - Variable de entorno GOOGLE_MAPS_API_KEY con una API Key válida de Google Maps/Places.
-- requests instalado.
+- requests y httpx instalados.
 
 Funciones principales:
 - buscar_universidades: ejecuta la consulta a Places y retorna resultados normalizados.
 - top_5_por_tipo: obtiene hasta 5 públicas y 5 privadas por estado (deduplicadas).
-- universidades_por_estados: procesa múltiples estados y agrega manejo de errores.
+- universidades_por_estados: procesa múltiples estados en paralelo y agrega manejo de errores.
+- universidades_cosechar (async): recorre los estados a la vez con un cliente compartido
+  (api/http_asincrono.py) y un tope global de QPS, y entrega cada estado al terminar.
 - guardar_universidades_json: persiste resultados a disco en carpeta 'salidas/'.
+- cargar_en_bd: carga los resultados como documentos Escuela, fusionando con las escuelas
+  existentes por nombre y cercanía (`manage.py cargar_escuelas`).
 
 Advertencias y límites:
 - La API de Places tiene cuotas y costos; usa parámetros con moderación.
-- La paginación de Places usa next_page_token y puede requerir esperas breves; aquí
-  se limita a 3 páginas por simplicidad.
+- La paginación de Places usa next_page_token, que se activa unos segundos después de emitirse;
+  se limita a 3 páginas. En la versión asíncrona la espera no bloquea a las demás búsquedas.
+- Las respuestas pasan por la caché en disco (api/cache_http.py, sin la API key en la clave ni
+  en el archivo): repetir una consulta no gasta cuota. CACHE_HTTP_MODO=offline la repite sin red.
+  Los términos de Google limitan el tiempo que pueden guardarse coordenadas (30 días): no
+  subas CACHE_HTTP_TTL por encima de eso.
 """
+import asyncio
+import logging
 import os
-import requests
-from urllib.parse import urlencode
+import time
 # Python
 import json
 from datetime import datetime
 from pathlib import Path
 
+from api.cache_http import cache_por_defecto, clave
+from api.dedup import agrupar
+from api.estados import estado_de_escuela
+from api.http_asincrono import ClienteCosecha, ErrorCosecha
+
+logger = logging.getLogger(__name__)
+
 API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")  # export GOOGLE_MAPS_API_KEY="tu_api_key"
 
 PLACES_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
@@ -48,6 +64,51 @@ def guardar_universidades_json(data, filename="universidades_mx.json", carpeta="
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"Archivo guardado en: {ruta.resolve()}")
 
+# Places activa el next_page_token unos segundos después de emitirlo; antes responde INVALID_REQUEST
+ESPERA_TOKEN_SEGUNDOS = 2.0
+_ESTADOS_VALIDOS = ("OK", "ZERO_RESULTS")
+
+ESTADOS_MEXICO = (
+    "Aguascalientes", "Baja California", "Baja California Sur", "Campeche", "Coahuila", "Colima", "Chiapas",
+    "Chihuahua", "Ciudad de México", "Durango", "Guanajuato", "Guerrero", "Hidalgo", "Jalisco",
+    "Estado de México", "Michoacán", "Morelos", "Nayarit", "Nuevo León", "Oaxaca", "Puebla", "Querétaro",
+    "Quintana Roo", "San Luis Potosí", "Sinaloa", "Sonora", "Tabasco", "Tamaulipas", "Tlaxcala", "Veracruz",
+    "Yucatán", "Zacatecas",
+)
+
+
+def _normalizar_resultado(r):
+    """Resultado de Text Search -> {name, lat, lng, formatted_address} (None si no tiene coordenadas)."""
+    loc = r.get("geometry", {}).get("location", {})
+    if "lat" in loc and "lng" in loc and r.get("name"):
+        return {
+            "name": r["name"],
+            "lat": loc["lat"],
+            "lng": loc["lng"],
+            "formatted_address": r.get("formatted_address")
+        }
+    return None
+
+
+def deduplicar(lista):
+    """Deduplica variantes del mismo nombre (acentos, mayúsculas, siglas; ver api/dedup.py) que
+    estén a menos de dedup.RADIO_M, conservando el primer resultado de cada grupo."""
+    grupos = agrupar([{"nombre": u["name"], "ubicacion": [{"lat": u["lat"], "lng": u["lng"]}]} for u in lista], "escuelas")
+    return [lista[grupo[0]] for grupo in grupos]
+
+
+def formatear(lista, tipo):
+    """Estructura final de cada universidad: {"name", "type", "position": {"lat", "lng"}}."""
+    return [{"name": u["name"], "type": tipo, "position": {"lat": u["lat"], "lng": u["lng"]}} for u in lista]
+
+
+def _consultas_estado(estado):
+    return {
+        "publica": f"universidad pública en {estado}, México",
+        "privada": f"universidad privada en {estado}, México",
+    }
+
+
 def buscar_universidades(consulta, region="mx", max_results=10):
     """Busca universidades en Google Places por consulta libre.
 
@@ -58,12 +119,15 @@ def buscar_universidades(consulta, region="mx", max_results=10):
 
     Detalles de implementación:
     - Usa el endpoint Text Search de Places y pagina hasta 3 iteraciones o hasta
-      alcanzar max_results.
+      alcanzar max_results, esperando ESPERA_TOKEN_SEGUNDOS antes de pedir cada página
+      siguiente (salvo que ya esté en la caché).
     - Normaliza resultados extrayendo name, lat, lng y formatted_address cuando existen.
+    - Para muchas consultas usa la versión asíncrona (`universidades_por_estados`).
 
     Retorna:
     - list[dict]: lista de universidades con llaves name, lat, lng, formatted_address.
     """
+    cache = cache_por_defecto()
     params = {
         "query": consulta,
         "type": "university",
@@ -77,20 +141,18 @@ def buscar_universidades(consulta, region="mx", max_results=10):
     while len(resultados) < max_results and page < 3:
         if next_page_token:
             params = {"pagetoken": next_page_token, "key": API_KEY}
-        resp = requests.get(PLACES_URL, params=params, timeout=20)
-        data = resp.json()
-        if data.get("status") not in ("OK", "ZERO_RESULTS"):
+            if cache.leer(clave("GET", PLACES_URL, params)) is None:
+                time.sleep(ESPERA_TOKEN_SEGUNDOS)
+        # Solo se guardan respuestas válidas: nunca OVER_QUERY_LIMIT, REQUEST_DENIED ni INVALID_REQUEST
+        data = cache.get_json(PLACES_URL, params=params, timeout=20,
+                              guardar_si=lambda d: d.get("status") in _ESTADOS_VALIDOS)
+        if data.get("status") not in _ESTADOS_VALIDOS:
             break
 
         for r in data.get("results", []):
-            loc = r.get("geometry", {}).get("location", {})
-            if "lat" in loc and "lng" in loc and r.get("name"):
-                resultados.append({
-                    "name": r["name"],
-                    "lat": loc["lat"],
-                    "lng": loc["lng"],
-                    "formatted_address": r.get("formatted_address")
-                })
+            item = _normalizar_resultado(r)
+            if item:
+                resultados.append(item)
             if len(resultados) >= max_results:
                 break
 
@@ -116,94 +178,182 @@ def top_5_por_tipo(estado):
     - list[dict]: lista combinada (públicas + privadas), cada item:
       {"name": str, "type": "publica|privada", "position": {"lat": float, "lng": float}}
     """
-    publicas_raw = buscar_universidades(f"universidad pública en {estado}, México", max_results=20)
-    privadas_raw = buscar_universidades(f"universidad privada en {estado}, México", max_results=20)
-
-    # Deduplicar por nombre (case-insensitive)
-    def dedup(lista):
-        seen = set()
-        out = []
-        for item in lista:
-            key = item["name"].strip().lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            out.append(item)
-        return out
-
-    publicas = dedup(publicas_raw)[:5]
-    privadas = dedup(privadas_raw)[:5]
-
-    # Estructura final
-    publicas_fmt = [
-        {"name": u["name"], "type": "publica", "position": {"lat": u["lat"], "lng": u["lng"]}}
-        for u in publicas
-    ]
-    privadas_fmt = [
-        {"name": u["name"], "type": "privada", "position": {"lat": u["lat"], "lng": u["lng"]}}
-        for u in privadas
-    ]
-    return publicas_fmt + privadas_fmt
-
-def universidades_por_estados(estados):
+    salida = []
+    for tipo, consulta in _consultas_estado(estado).items():
+        salida += formatear(deduplicar(buscar_universidades(consulta, max_results=20))[:5], tipo)
+    return salida
+
+
+def escuelas_desde_places(data):
+    """Salida de `universidades_por_estados` ({estado: [universidad] | {"error"}}) o de
+    `top_5_por_tipo` (lista) -> registros con la forma de Escuela. "estado" es el estado consultado
+    (normalizado) o, si no se conoce, el derivado de las coordenadas (api/estados.py). Se omiten
+    estados con error y universidades sin coordenadas."""
+    por_estado = data.items() if isinstance(data, dict) else [(None, data)]
+    for estado, universidades in por_estado:
+        if not isinstance(universidades, list):
+            continue
+        for u in universidades:
+            posicion = u.get("position") or {}
+            if u.get("name") and posicion.get("lat") is not None and posicion.get("lng") is not None:
+                ubicacion = [{"lat": posicion["lat"], "lng": posicion["lng"]}]
+                yield {
+                    "nombre": u["name"],
+                    "type": u.get("type"),
+                    "ubicacion": ubicacion,
+                    "estado": estado_de_escuela(estado, ubicacion),
+                }
+
+
+def cargar_en_bd(data, lote=500, umbral=None, radio_m=None, dry_run=False):
+    """Carga universidades de Places como documentos Escuela en una sola pasada.
+
+    Cada universidad se compara (api/dedup.py: nombre normalizado/siglas y distancia menor a
+    'radio_m') con las demás del lote y con las escuelas ya guardadas: si coincide con una
+    existente se le agregan los puntos nuevos a `ubicacion`; si no, se inserta. Las escrituras van
+    en bulk_write de 'lote' operaciones. 'data' es la salida de `universidades_por_estados`,
+    `top_5_por_tipo` o registros ya con la forma de Escuela.
+
+    Retorna {"leidas", "nuevas", "fusionadas", "insertadas", "actualizadas"}.
+    """
+    from api import dedup
+    from api.consultas import observar_consultas
+
+    if isinstance(data, list) and data and "nombre" in data[0]:
+        registros = data
+    else:
+        registros = list(escuelas_desde_places(data))
+    opciones = {"umbral": umbral if umbral is not None else dedup.UMBRAL,
+                "radio_m": radio_m if radio_m is not None else dedup.RADIO_M}
+    with observar_consultas("cargar_escuelas"):
+        resultado = dedup.deduplicar(registros, "escuelas", dedup.existentes_en_mongo("escuelas"), **opciones)
+        escrito = {"insertadas": 0, "actualizadas": 0}
+        if not dry_run:
+            cuenta = dedup.aplicar_en_mongo(resultado, "escuelas", lote)
+            escrito = {"insertadas": cuenta["insertados"], "actualizadas": cuenta["actualizados"]}
+    return {"leidas": len(registros), "nuevas": len(resultado.nuevos), "fusionadas": resultado.descartados, **escrito}
+
+
+# ----------------------------------------------------------------------------- versión asíncrona
+
+class ErrorPlaces(Exception):
+    """Places respondió un status distinto de OK/ZERO_RESULTS (p.ej. REQUEST_DENIED)."""
+
+
+def _sin_cuota(resp) -> bool:
+    try:
+        return resp.json().get("status") == "OVER_QUERY_LIMIT"
+    except ValueError:
+        return False
+
+
+async def buscar_universidades_async(cliente, consulta, region="mx", max_results=20, max_paginas=3,
+                                     places_url=PLACES_URL, api_key=None, espera_token=ESPERA_TOKEN_SEGUNDOS):
+    """Como `buscar_universidades`, sobre un ClienteCosecha compartido.
+
+    La espera de activación de cada next_page_token es un `asyncio.sleep` de esta búsqueda: el
+    resto de las búsquedas sigue usando la cuota mientras tanto. Si la página ya está en la caché
+    no se espera; si Places aún no activó el token (INVALID_REQUEST) se reintenta tras otra espera.
+    OVER_QUERY_LIMIT se reintenta con backoff en el cliente.
+    """
+    api_key = api_key if api_key is not None else API_KEY
+    params = {"query": consulta, "type": "university", "region": region, "key": api_key}
+    resultados = []
+    for pagina in range(max_paginas):
+        for intento in range(3):
+            if pagina and (cliente.cache is None or cliente.cache.leer(clave("GET", places_url, params)) is None):
+                await asyncio.sleep(espera_token * (intento + 1))
+            data = await cliente.get_json(places_url, params=params, reintentar_si=_sin_cuota,
+                                          guardar_si=lambda r: r.json().get("status") in _ESTADOS_VALIDOS)
+            if not (pagina and data.get("status") == "INVALID_REQUEST"):
+                break
+        status = data.get("status")
+        if status not in _ESTADOS_VALIDOS:
+            if pagina and status == "INVALID_REQUEST":
+                break  # token que nunca se activó: se conserva lo obtenido
+            raise ErrorPlaces(f"Places respondió {status} para '{consulta}': {data.get('error_message', '')}".strip())
+        for r in data.get("results", []):
+            item = _normalizar_resultado(r)
+            if item:
+                resultados.append(item)
+        token = data.get("next_page_token")
+        if len(resultados) >= max_results or not token:
+            break
+        params = {"pagetoken": token, "key": api_key}
+    return resultados[:max_results]
+
+
+async def top_5_por_tipo_async(cliente, estado, por_tipo=5, **opciones):
+    """Búsquedas pública y privada del estado en paralelo; misma salida que `top_5_por_tipo`."""
+    consultas = _consultas_estado(estado)
+    listas = await asyncio.gather(*(buscar_universidades_async(cliente, c, **opciones) for c in consultas.values()))
+    salida = []
+    for tipo, lista in zip(consultas, listas):
+        salida += formatear(deduplicar(lista)[:por_tipo], tipo)
+    return salida
+
+
+async def universidades_cosechar(estados, qps=10.0, concurrencia=16, usar_cache=True, cliente=None, **opciones):
+    """Recorre todos los estados a la vez y entrega (estado, universidades | {"error": str}) conforme terminan.
+
+    - qps: tope global de peticiones por segundo a Places (un solo host, así que el límite por
+      host de ClienteCosecha es el global); concurrencia: peticiones en vuelo como máximo.
+    - opciones: parámetros de `buscar_universidades_async` (places_url, api_key, espera_token, ...),
+      p.ej. places_url de un stub local (api/tests/places_stub.py).
+    El tiempo total se acerca al del estado más lento, no a la suma de todos.
+    """
+    propio = cliente is None
+    cliente = cliente or ClienteCosecha(concurrencia=concurrencia, tasa_por_host=qps,
+                                        cache=cache_por_defecto() if usar_cache else None)
+
+    async def un_estado(estado):
+        try:
+            return estado, await top_5_por_tipo_async(cliente, estado, **opciones)
+        except (ErrorCosecha, ErrorPlaces) as e:
+            logger.warning("Places: falló el estado %s: %s", estado, e)
+            return estado, {"error": str(e)}
+        except Exception as e:
+            # Un payload malformado (KeyError, ...) o un error de httpx no debe cancelar los demás estados
+            logger.exception("Places: error inesperado con el estado %s", estado)
+            return estado, {"error": f"{type(e).__name__}: {e}"}
+
+    tareas = [asyncio.create_task(un_estado(e)) for e in estados]
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            yield await siguiente
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        if propio:
+            await cliente.cerrar()
+
+
+def universidades_por_estados(estados, **opciones):
     """Construye un diccionario de universidades por lista de estados.
 
     Parámetros:
     - estados (list[str]): nombres de estados de México.
+    - opciones: qps, concurrencia, usar_cache y los de `buscar_universidades_async`.
 
     Comportamiento:
-    - Por cada estado, intenta obtener top_5_por_tipo.
+    - Consulta todos los estados en paralelo (ver `universidades_cosechar`).
     - Si ocurre un error (HTTP, API, datos), captura y registra el error en el valor.
 
     Retorna:
-    - dict[str, list|dict]: para cada estado, una lista de universidades o un
-      objeto {"error": str} si falló.
+    - dict[str, list|dict]: para cada estado (en el orden recibido), una lista de universidades o
+      un objeto {"error": str} si falló.
     """
-    salida = {}
-    for estado in estados:
-        try:
-            salida[estado] = top_5_por_tipo(estado)
-        except Exception as e:
-            salida[estado] = {"error": str(e)}
-    return salida
+    async def _recolectar():
+        return {estado: datos async for estado, datos in universidades_cosechar(estados, **opciones)}
+
+    resultados = asyncio.run(_recolectar())
+    return {estado: resultados[estado] for estado in estados}
 
 if __name__ == "__main__":
     # Ejemplo de uso: 10 universidades para algunos estados
     # Python
-    estados = [
-        "Aguascalientes",
-        "Baja California",
-        "Baja California Sur",
-        "Campeche",
-        "Coahuila",
-        "Colima",
-        "Chiapas",
-        "Chihuahua",
-        "Ciudad de México",
-        "Durango",
-        "Guanajuato",
-        "Guerrero",
-        "Hidalgo",
-        "Jalisco",
-        "Estado de México",
-        "Michoacán",
-        "Morelos",
-        "Nayarit",
-        "Nuevo León",
-        "Oaxaca",
-        "Puebla",
-        "Querétaro",
-        "Quintana Roo",
-        "San Luis Potosí",
-        "Sinaloa",
-        "Sonora",
-        "Tabasco",
-        "Tamaulipas",
-        "Tlaxcala",
-        "Veracruz",
-        "Yucatán",
-        "Zacatecas",
-    ]
+    estados = list(ESTADOS_MEXICO)
     #data = universidades_por_estados(estados)
     #import json
     #print(json.dumps(data, ensure_ascii=False, indent=2))
@@ -1,21 +1,34 @@
 """Rutas públicas de la API (Django REST Framework).
 
 Resumen de endpoints principales:
+- Salud (GET):
+  - /api/healthz: liveness del proceso (no consulta MongoDB).
+  - /api/readyz: readiness; ping a MongoDB en caché y estado del pool de conexiones (503 si no está lista).
+  - /api/metrics: métricas Prometheus (latencia por ruta, comandos MongoDB, carga masiva).
+  - /api/perfiles, /api/perfiles/<id>: perfiles cProfile guardados por PerfiladoMiddleware
+    (requieren la cabecera X-Perfilar con PERFILADO_TOKEN).
 - Auth OAuth2 (GET):
   - /api/auth/oauth2/start: inicia flujo OAuth2 (PKCE), devuelve URL de autorización.
   - /api/auth/oauth2/callback: callback para intercambio de código por tokens.
 - Registro (POST):
   - /api/usuarios/registro: registro de usuario (tradicional u OAuth2 asistido).
 - Consultas (GET):
+  - /usuarios/<id>/recomendaciones?k=...: carreras recomendadas según los intereses del usuario.
   - /voluntariados?carrera=...: voluntariados por carrera.
   - /carreras?area=...: nombres de carreras por área (o todas si no se envía área).
   - /carreras/mapa-curricular?carrera=...: nombres de materias del mapa curricular.
   - /carreras/mapa-curricular/descripcion?materia=...: descripción de una materia.
+  - /carreras/<nombre>/similares?k=...: carreras parecidas (índice MinHash/LSH).
   - /escuelas?carrera=...: escuelas que ofrecen la carrera.
+  - /escuelas/por-estado?estado=...&type=...&top=...: conteos y top de escuelas por estado y tipo.
   - /subareas?carrera=...: subáreas por carrera.
   - /subarea?nombre=...: detalle de una subárea.
   - /formulario?subarea=...: formulario por subárea.
   - /dashboard/formularios/promedio-por-carrera: promedio de resultados por carrera.
+  - /dashboard/formularios/distribucion: percentiles e histogramas de resultados por carrera y main_area.
+  - /cambios?desde=<token>: cambios del catálogo desde la última sincronización (feed incremental).
+- Formularios (POST):
+  - /api/formularios/recalificar: recalifica resultados en el servidor a partir de respuestas y preguntas.
 - Carga masiva (POST):
   - /api/bulk/carreras, /api/bulk/subareas, /api/bulk/escuelas,
     /api/bulk/voluntariados, /api/bulk/formularios, /api/bulk/mapas
@@ -26,6 +39,8 @@ Parámetros de consulta esperados (solo documentación):
 - GET /api/auth/oauth2/callback
   - code (str, requerido): código de autorización del proveedor.
   - state (str, requerido): valor antifraude recibido en el callback.
+- GET /api/usuarios/<id>/recomendaciones
+  - k (int, opcional): número máximo de carreras (1..50, por defecto 10).
 - GET /api/voluntariados
   - carrera (str, requerido): nombre de la carrera para filtrar.
 - GET /api/carreras
@@ -34,8 +49,14 @@ Parámetros de consulta esperados (solo documentación):
   - carrera (str, requerido): nombre de la carrera.
 - GET /api/carreras/mapa-curricular/descripcion
   - materia (str, requerido): nombre de la materia.
+- GET /api/carreras/<nombre>/similares
+  - k (int, opcional): número máximo de resultados (1..50, por defecto 10).
 - GET /api/escuelas
   - carrera (str, requerido): nombre de la carrera.
+- GET /api/escuelas/por-estado
+  - estado (str, opcional): nombre o alias del estado ("cdmx", "yucatan"); sin él, todos.
+  - type (str, opcional): publica | privada.
+  - top (int, opcional): escuelas por lista (1..ESCUELAS_POR_ESTADO_TOP, por defecto el máximo).
 - GET /api/subareas
   - carrera (str, requerido): nombre de la carrera.
 - GET /api/subarea
@@ -44,9 +65,18 @@ Parámetros de consulta esperados (solo documentación):
   - subarea (str, requerido): nombre de la subárea.
 - GET /api/dashboard/formularios/promedio-por-carrera
   - (sin parámetros de consulta)
+- GET /api/dashboard/formularios/distribucion
+  - agrupar (str, opcional): "carrera", "main_area" o ambos separados por coma.
+  - percentiles (str, opcional): lista separada por comas, ej. "50,90,99".
+  - bins (int, opcional): intervalos del histograma (1..100, por defecto 10).
+- GET /api/cambios
+  - desde (str, opcional): token "siguiente" de la respuesta anterior; sin él, todo el catálogo.
+  - limite (int, opcional): cambios por página (1..CAMBIOS_LIMITE_MAXIMO, por defecto 500).
+  - colecciones (str, opcional): carreras, subareas, escuelas, voluntariados y/o mapas separados por coma.
 
 Cuerpos esperados (POST, solo documentación):
 - POST /api/usuarios/registro: JSON con campos del usuario (ver vista register.RegistroUsuarioView).
+- POST /api/formularios/recalificar: objeto {"subarea": str (requerido), "dry_run": bool}.
 - POST /api/bulk/carreras: arreglo JSON de objetos Carrera.
 - POST /api/bulk/subareas: arreglo JSON de objetos Subarea.
 - POST /api/bulk/escuelas: arreglo JSON de objetos Escuela (incluye ubicacion [{lat,lng}]).
@@ -61,24 +91,35 @@ Notas:
 """
 from django.urls import path
 
-from api.views.escuelas import BulkCreateEscuelasAPIView
-from api.views.formularios import BulkCreateFormulariosAPIView
+from api.views.cambios import CambiosAPIView
+from api.views.escuelas import BulkCreateEscuelasAPIView, EscuelasPorEstadoAPIView
+from api.views.formularios import BulkCreateFormulariosAPIView, RecalificarFormulariosAPIView
 from api.views.login import OAuth2StartAPIView, OAuth2CallbackAPIView
 from api.views.mapa_curricular import BulkCreateMapaCurricularAPIView
 from api.views.register import RegistroUsuarioView
+from api.views.recomendaciones import RecomendacionesUsuarioAPIView
 from api.views.voluntariado import VoluntariadosPorCarreraAPIView, BulkCreateVoluntariadosAPIView
 from api.views.carreras import SubareasPorCarreraAPIView, CarrerasPorAreaAPIView, EscuelasPorCarreraAPIView, \
-    BulkCreateCarrerasAPIView
+    BulkCreateCarrerasAPIView, CarrerasSimilaresAPIView
 from api.views.subareas import (
     MapaCurricularNombresPorCarreraAPIView,
     DescripcionMateriaMapaCurricularAPIView,
     SubareaDetallePorNombreAPIView,
     FormularioPorSubareaAPIView, BulkCreateSubareasAPIView,
 )
-from api.views.stats import DashboardPromedioResultadosPorCarreraAPIView
+from api.views.stats import DashboardPromedioResultadosPorCarreraAPIView, DashboardDistribucionResultadosAPIView
+from api.views.salud import HealthzAPIView, ReadyzAPIView
+from api.views.metricas import MetricasAPIView
+from api.views.perfiles import PerfilesAPIView, PerfilDescargaAPIView
 
 
 urlpatterns = [
+    # Salud
+    path('healthz', HealthzAPIView.as_view(), name='healthz'),
+    path('readyz', ReadyzAPIView.as_view(), name='readyz'),
+    path('metrics', MetricasAPIView.as_view(), name='metrics'),
+    path('perfiles', PerfilesAPIView.as_view(), name='perfiles'),
+    path('perfiles/<str:perfil_id>', PerfilDescargaAPIView.as_view(), name='perfil-descarga'),
     # Auth (OAuth2)
     path('auth/oauth2/start', OAuth2StartAPIView.as_view(), name='oauth2-start'),
     path('auth/oauth2/callback', OAuth2CallbackAPIView.as_view(), name='oauth2-callback'),
@@ -86,14 +127,18 @@ urlpatterns = [
     path('usuarios/registro', RegistroUsuarioView.as_view(), name='registro-usuario'),
 
     # GET METHODS
+    # Usuarios
+    path('usuarios/<str:user_id>/recomendaciones', RecomendacionesUsuarioAPIView.as_view(), name='usuario-recomendaciones'),
     # Voluntariados
     path('voluntariados', VoluntariadosPorCarreraAPIView.as_view(), name='voluntariados-por-carrera'),
     # Carreras
     path('carreras', CarrerasPorAreaAPIView.as_view(), name='carreras-por-area'),
     path('carreras/mapa-curricular', MapaCurricularNombresPorCarreraAPIView.as_view(), name='mapa-curricular-nombres'),
     path('carreras/mapa-curricular/descripcion', DescripcionMateriaMapaCurricularAPIView.as_view(), name='mapa-curricular-descripcion'),
+    path('carreras/<str:nombre>/similares', CarrerasSimilaresAPIView.as_view(), name='carreras-similares'),
     # Escuelas
     path('escuelas', EscuelasPorCarreraAPIView.as_view(), name='escuelas-por-carrera'),
+    path('escuelas/por-estado', EscuelasPorEstadoAPIView.as_view(), name='escuelas-por-estado'),
     # Subáreas
     path('subareas', SubareasPorCarreraAPIView.as_view(), name='subareas-por-carrera'),
     path('subarea', SubareaDetallePorNombreAPIView.as_view(), name='subarea-detalle-por-nombre'),
@@ -101,8 +146,14 @@ urlpatterns = [
     path('formulario', FormularioPorSubareaAPIView.as_view(), name='formulario-por-subarea'),
     # Dashboard
     path('dashboard/formularios/promedio-por-carrera', DashboardPromedioResultadosPorCarreraAPIView.as_view(), name='dashboard-promedio-por-carrera'),
+    path('dashboard/formularios/distribucion', DashboardDistribucionResultadosAPIView.as_view(), name='dashboard-distribucion'),
+    # Sincronización incremental
+    path('cambios', CambiosAPIView.as_view(), name='cambios'),
 
 
+    # POST METHODS
+    path('formularios/recalificar', RecalificarFormulariosAPIView.as_view(), name='formularios-recalificar'),
+
     # POST BULK METHODS
     path('bulk/carreras', BulkCreateCarrerasAPIView.as_view(), name='bulk-carreras'),
     path('bulk/subareas', BulkCreateSubareasAPIView.as_view(), name='bulk-subareas'),
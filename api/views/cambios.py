@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from api.cambios import COLECCIONES, TokenInvalido, cambios_desde
+
+
+class CambiosAPIView(APIView):
+    """
+    GET /api/cambios?desde=<token>&limite=<n>&colecciones=<tipos>
+    Cambios del catálogo (carreras, subareas, escuelas, voluntariados, mapas) posteriores al token
+    de la última sincronización, en orden de escritura (ver api/cambios.py).
+    - desde (str, opcional): token "siguiente" de la respuesta anterior; sin él, todo el catálogo.
+    - limite (int, opcional): cambios por página (1..CAMBIOS_LIMITE_MAXIMO, por defecto 500).
+    - colecciones (str, opcional): subconjunto separado por comas.
+
+    Respuesta: {"cambios": [{"coleccion", "op": "upsert"|"delete", "id", "doc"}], "siguiente": token,
+    "hay_mas": bool, "reiniciar": bool}. Con hay_mas se pide de nuevo con "siguiente"; con
+    reiniciar (hubo una recarga completa) el cliente descarta su copia y sincroniza desde cero
+    con el token devuelto.
+    """
+    def get(self, request):
+        maximo = getattr(settings, "CAMBIOS_LIMITE_MAXIMO", 5000)
+        try:
+            limite = int(request.query_params.get("limite", min(500, maximo)))
+        except ValueError:
+            return Response({"detail": "'limite' debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limite <= maximo:
+            return Response({"detail": f"'limite' debe estar entre 1 y {maximo}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tipos = None
+        if request.query_params.get("colecciones"):
+            tipos = [t.strip() for t in request.query_params["colecciones"].split(",") if t.strip()]
+            desconocidas = [t for t in tipos if t not in COLECCIONES]
+            if desconocidas:
+                return Response({"detail": f"Colecciones inválidas: {', '.join(desconocidas)}. Use: {', '.join(COLECCIONES)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            datos = cambios_desde(request.query_params.get("desde"), limite, tipos)
+        except TokenInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(datos, status=status.HTTP_200_OK)
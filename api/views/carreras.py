@@ -1,11 +1,17 @@
+import time
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from api.catalogo import recarga_en_curso
 from api.models.carrera import Carrera
 from api.models.escuela import Escuela
 from api.models.subarea import Subarea
 from api.models.constants import MAIN_AREAS
+from api.recomendaciones import indice_carreras
+from api.similares import indice_similares
+from api.metricas import registrar_ingesta
 
 class BulkCreateCarrerasAPIView(APIView):
     """
@@ -16,16 +22,26 @@ class BulkCreateCarrerasAPIView(APIView):
         items = request.data
         if not isinstance(items, list):
             return Response({"detail": "Se esperaba un arreglo JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if recarga_en_curso():
+            # Lo escrito ahora se perdería al intercambiar la colección (api/catalogo.py)
+            return Response({"detail": "Recarga del catálogo en curso; reintenta al terminar."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "60"})
 
-        created_ids, errors = [], []
+        inicio = time.perf_counter()
+        created_ids, errors, nombres = [], [], []
         for i, data in enumerate(items):
             try:
                 obj = Carrera(**data)
                 obj.save()
                 created_ids.append(str(obj.id))
+                nombres.append(obj.nombre)
             except Exception as e:
                 errors.append({"index": i, "error": str(e)})
 
+        # Actualización incremental del índice de recomendaciones
+        indice_carreras.marcar_carreras(nombres)
+
+        registrar_ingesta("carreras", len(created_ids), len(errors), inicio)
         if created_ids and not errors:
             return Response({"created": len(created_ids), "ids": created_ids}, status=status.HTTP_201_CREATED)
         if created_ids and errors:
@@ -104,4 +120,32 @@ class SubareasPorCarreraAPIView(APIView):
         carrera_norm = carrera.strip()
         subareas = Subarea.objects(carrera__iexact=carrera_norm).only("nombre")
         nombres = [s.nombre for s in subareas]
-        return Response(nombres, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(nombres, status=status.HTTP_200_OK)
+
+class CarrerasSimilaresAPIView(APIView):
+    """
+    GET /api/carreras/<nombre>/similares?k=<n>
+    Carreras parecidas según sus subáreas y materias del mapa curricular, usando el índice
+    MinHash/LSH persistido (ver api/similares.py).
+    - k (int, opcional): número máximo de resultados (1..50, por defecto 10).
+
+    Respuesta: [{"carrera": <nombre>, "similitud": <jaccard estimado 0.5..1>}] (solo pares con
+    similitud >= SIMILITUD_MINIMA, el corte para el que está ajustado el LSH).
+    503 si el índice aún no se ha construido (`python manage.py construir_indice_similares`).
+    """
+    def get(self, request, nombre):
+        try:
+            k = int(request.query_params.get("k", 10))
+        except ValueError:
+            return Response({"detail": "'k' debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= k <= 50:
+            return Response({"detail": "'k' debe estar entre 1 y 50."}, status=status.HTTP_400_BAD_REQUEST)
+
+        indice = indice_similares.obtener()
+        if indice is None:
+            return Response({"detail": "Índice de similares no disponible."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        resultado = indice.similares(nombre, k=k)
+        if resultado is None:
+            return Response({"detail": "Carrera no encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(resultado, status=status.HTTP_200_OK)
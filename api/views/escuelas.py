@@ -1,9 +1,16 @@
+import time
+
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from api.models.escuela import Escuela
+from api.catalogo import recarga_en_curso
+from api.models.escuela import Escuela, EscuelasPorEstado
 from api.models.escuela import Coordenadas  # EmbeddedDocument esperado para ubicacion
+from api.escuelas_por_estado import TIPOS, refrescar
+from api.estados import estado_de_escuela, normalizar_estado
+from api.metricas import registrar_ingesta
 
 
 class BulkCreateEscuelasAPIView(APIView):
@@ -16,14 +23,20 @@ class BulkCreateEscuelasAPIView(APIView):
       "ubicacion": [ {"lat": 19.43, "lng": -99.13}, {"lat": 19.44, "lng": -99.14} ],  # lista de coordenadas
       "type": "publica" | "privada",
       "carreras": ["Ingeniería", "Biología"],
-      "costo": 12000.0
+      "costo": 12000.0,
+      "estado": "Puebla"  # opcional; si falta se deriva de la ubicación (api/estados.py)
     }
+    Al terminar se refresca el agregado de /escuelas/por-estado de los estados afectados.
     """
 
     def post(self, request):
         items = request.data
         if not isinstance(items, list):
             return Response({"detail": "Se esperaba un arreglo JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if recarga_en_curso():
+            # Lo escrito ahora se perdería al intercambiar la colección (api/catalogo.py)
+            return Response({"detail": "Recarga del catálogo en curso; reintenta al terminar."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "60"})
 
         def parse_ubicacion(value, idx):
             if not isinstance(value, list) or not value:
@@ -44,7 +57,8 @@ class BulkCreateEscuelasAPIView(APIView):
 
         allowed_types = {"publica", "privada"}
 
-        created_ids, errors = [], []
+        inicio = time.perf_counter()
+        created_ids, errors, estados = [], [], set()
         for i, data in enumerate(items):
             try:
                 if not isinstance(data, dict):
@@ -77,18 +91,30 @@ class BulkCreateEscuelasAPIView(APIView):
                 except Exception:
                     raise ValueError(f"[index {i}] 'costo' debe ser numérico.")
 
+                # Estado declarado o derivado del primer punto de ubicacion
+                if data.get("estado") in (None, ""):
+                    estado = estado_de_escuela(None, ubicacion)
+                else:
+                    estado = normalizar_estado(str(data["estado"]))
+                    if not estado:
+                        raise ValueError(f"[index {i}] 'estado' desconocido: {data['estado']}")
+
                 obj = Escuela(
                     nombre=nombre,
                     ubicacion=ubicacion,
                     type=tipo,
                     carreras=carreras,
                     costo=costo,
+                    estado=estado,
                 )
                 obj.save()
                 created_ids.append(str(obj.id))
+                estados.add(estado)
             except Exception as e:
                 errors.append({"index": i, "error": str(e)})
 
+        refrescar(estados)
+        registrar_ingesta("escuelas", len(created_ids), len(errors), inicio)
         if created_ids and not errors:
             return Response({"created": len(created_ids), "ids": created_ids}, status=status.HTTP_201_CREATED)
         if created_ids and errors:
@@ -97,3 +123,54 @@ class BulkCreateEscuelasAPIView(APIView):
                 status=status.HTTP_207_MULTI_STATUS,
             )
         return Response({"failed": len(errors), "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EscuelasPorEstadoAPIView(APIView):
+    """
+    GET /api/escuelas/por-estado?estado=<estado>&type=<tipo>&top=<n>
+    Conteos y escuelas con más carreras por estado y tipo, leídos del agregado precalculado
+    (api/escuelas_por_estado.py); no recorre la colección de escuelas.
+    - estado (str, opcional): nombre o alias ("cdmx", "yucatan"); 404 si no tiene escuelas.
+    - type (str, opcional): publica | privada.
+    - top (int, opcional): recorta las listas top (1..ESCUELAS_POR_ESTADO_TOP).
+
+    Respuesta: {"total": int, "estados": [{"estado", "total", "por_tipo": {tipo: {"total", "top":
+    [{"nombre", "carreras", "costo"}]}}, "actualizado"}]}
+    """
+    def get(self, request):
+        filtro = {}
+        estado = request.query_params.get("estado")
+        if estado:
+            filtro["_id"] = normalizar_estado(estado)
+            if not filtro["_id"]:
+                return Response({"detail": "Estado inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tipos = TIPOS
+        tipo = request.query_params.get("type")
+        if tipo:
+            tipo = tipo.strip().lower()
+            if tipo not in TIPOS:
+                return Response({"detail": f"'type' inválido. Use: {', '.join(TIPOS)}"}, status=status.HTTP_400_BAD_REQUEST)
+            tipos = (tipo,)
+
+        maximo = getattr(settings, "ESCUELAS_POR_ESTADO_TOP", 10)
+        try:
+            top = int(request.query_params.get("top", maximo))
+        except ValueError:
+            return Response({"detail": "'top' debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= top <= maximo:
+            return Response({"detail": f"'top' debe estar entre 1 y {maximo}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        estados = []
+        for doc in EscuelasPorEstado._get_collection().find(filtro).sort("_id", 1):
+            por_tipo = {t: {"total": doc["por_tipo"].get(t, {}).get("total", 0),
+                            "top": doc["por_tipo"].get(t, {}).get("top", [])[:top]} for t in tipos}
+            estados.append({
+                "estado": doc["_id"],
+                "total": sum(v["total"] for v in por_tipo.values()),
+                "por_tipo": por_tipo,
+                "actualizado": doc.get("actualizado"),
+            })
+        if estado and not estados:
+            return Response({"detail": "No hay escuelas registradas en ese estado."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"total": sum(e["total"] for e in estados), "estados": estados}, status=status.HTTP_200_OK)
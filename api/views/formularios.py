@@ -1,7 +1,13 @@
+import time
+
+from django.conf import settings
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 from api.models.formulario import Formulario
+from api.calificacion import recalificar_formularios
+from api.distribucion import snapshot_resultados
+from api.metricas import registrar_ingesta
 
 
 class BulkCreateFormulariosAPIView(APIView):
@@ -14,6 +20,7 @@ class BulkCreateFormulariosAPIView(APIView):
         if not isinstance(items, list):
             return Response({"detail": "Se esperaba un arreglo JSON."}, status=status.HTTP_400_BAD_REQUEST)
 
+        inicio = time.perf_counter()
         created_ids, errors = [], []
         for i, data in enumerate(items):
             try:
@@ -23,8 +30,55 @@ class BulkCreateFormulariosAPIView(APIView):
             except Exception as e:
                 errors.append({"index": i, "error": str(e)})
 
+        registrar_ingesta("formularios", len(created_ids), len(errors), inicio)
         if created_ids and not errors:
             return Response({"created": len(created_ids), "ids": created_ids}, status=status.HTTP_201_CREATED)
         if created_ids and errors:
             return Response({"created": len(created_ids), "ids": created_ids, "failed": len(errors), "errors": errors}, status=status.HTTP_207_MULTI_STATUS)
         return Response({"failed": len(errors), "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Valores aceptados para banderas booleanas (JSON o formulario)
+_BOOLEANOS = {True: True, False: False, "true": True, "false": False, "1": True, "0": False}
+
+
+class RecalificarFormulariosAPIView(APIView):
+    """
+    POST /api/formularios/recalificar
+    Body: {"subarea": "<nombre>", "dry_run": false}
+    Recalifica en el servidor los formularios de una subárea con el motor de api/calificacion.py
+    y escribe los resultados que cambian. Se atiende dentro de la petición, así que exige
+    'subarea' y rechaza subáreas con más de RECALIFICAR_MAXIMO_API formularios; la
+    recalificación completa o de volúmenes grandes se hace con
+    `python manage.py recalificar_formularios`.
+
+    Respuesta: {"procesados", "actualizados", "sin_cambios", "sin_clave"}
+    """
+    def post(self, request):
+        data = request.data or {}
+        if not isinstance(data, dict):
+            return Response({"detail": "Se esperaba un objeto JSON."}, status=status.HTTP_400_BAD_REQUEST)
+
+        subarea = data.get("subarea")
+        if not isinstance(subarea, str) or not subarea.strip():
+            return Response({"detail": "'subarea' es obligatorio y debe ser texto; para recalificar todo use "
+                                       "`manage.py recalificar_formularios`."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = data.get("dry_run", False)
+        if isinstance(dry_run, str):
+            dry_run = dry_run.strip().lower()
+        if not isinstance(dry_run, (bool, str)) or dry_run not in _BOOLEANOS:
+            return Response({"detail": "'dry_run' debe ser booleano (true/false)."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = _BOOLEANOS[dry_run]
+
+        filtro = {"subarea": subarea.strip()}
+        maximo = getattr(settings, "RECALIFICAR_MAXIMO_API", 5000)
+        total = Formulario.objects(**filtro).count()
+        if total > maximo:
+            return Response({"detail": f"La subárea tiene {total} formularios (máximo {maximo} por petición); "
+                                       "use `manage.py recalificar_formularios --subarea`."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        resumen = recalificar_formularios(filtro, dry_run=dry_run)
+        if resumen["actualizados"] and not dry_run:
+            snapshot_resultados.invalidar()
+        return Response(resumen, status=status.HTTP_200_OK)
@@ -9,7 +9,11 @@ import base64
 import os
 import hashlib
 
-from api.models.user import User
+from mongoengine.errors import NotUniqueError
+
+from api.models.user import User, normalizar_email
+from api.oauth2_cliente import ErrorOAuth2, intercambiar_codigo, verificar_id_token
+from api.oauth2_estado import guardar_estado, consumir_estado, descartar_estado, error_configuracion
 
 # ... existing code ...
 
@@ -33,6 +37,9 @@ class OAuth2StartAPIView(APIView):
 
         if not all([client_id, auth_endpoint, redirect_uri]):
             return Response({"detail": "Config OAuth2 incompleta en settings."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        error_estado = error_configuracion()
+        if error_estado:
+            return Response({"detail": error_estado}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # PKCE (code_verifier y code_challenge)
         code_verifier = base64.urlsafe_b64encode(os.urandom(40)).rstrip(b"=").decode("utf-8")
@@ -40,11 +47,7 @@ class OAuth2StartAPIView(APIView):
             hashlib.sha256(code_verifier.encode("utf-8")).digest()
         ).rstrip(b"=").decode("utf-8")
 
-        # Guardar state y code_verifier en sesión/almacén seguro para validarlos en el callback
         state = get_random_string(24)
-        request.session["oauth2_state"] = state
-        request.session["oauth2_code_verifier"] = code_verifier
-        request.session["oauth2_provider"] = provider
 
         params = {
             "client_id": client_id,
@@ -57,7 +60,10 @@ class OAuth2StartAPIView(APIView):
             # Algunos proveedores aceptan 'prompt' o 'access_type'
         }
         auth_url = f"{auth_endpoint}?{urlencode(params)}"
-        return Response({"auth_url": auth_url}, status=status.HTTP_200_OK)
+        response = Response({"auth_url": auth_url}, status=status.HTTP_200_OK)
+        # Guardar state y code_verifier (cookie firmada, caché o sesión; ver api/oauth2_estado.py)
+        guardar_estado(request, response, state, code_verifier, provider)
+        return response
 
 # ... existing code ...
 
@@ -67,80 +73,81 @@ class OAuth2CallbackAPIView(APIView):
     Intercambia el 'code' por tokens, valida el id_token y registra/inicia sesión al usuario.
     """
     def get(self, request):
+        response = self._callback(request)
+        # El estado es de un solo uso: se descarta con cualquier resultado
+        descartar_estado(response)
+        return response
+
+    def _callback(self, request):
         code = request.query_params.get("code")
         state = request.query_params.get("state")
-        sess_state = request.session.get("oauth2_state")
-        code_verifier = request.session.get("oauth2_code_verifier")
-        provider = request.session.get("oauth2_provider")
 
         if not code or not state:
             return Response({"detail": "Faltan parámetros 'code' o 'state'."}, status=status.HTTP_400_BAD_REQUEST)
-        if not sess_state or state != sess_state:
+        # Recuperar y retirar state/PKCE (evita replay)
+        estado = consumir_estado(request, state)
+        if not estado:
             return Response({"detail": "State inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        code_verifier = estado.get("code_verifier")
+        provider = estado.get("provider")
         if not code_verifier:
             return Response({"detail": "Falta code_verifier en sesión."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Limpiar state/PKCE de sesión para evitar replay
-        for k in ["oauth2_state", "oauth2_code_verifier", "oauth2_provider"]:
-            request.session.pop(k, None)
-
         # Cargar configuración
         client_id = getattr(settings, "OAUTH_CLIENT_ID", None)
         token_endpoint = getattr(settings, "OAUTH_TOKEN_ENDPOINT", None)
         redirect_uri = getattr(settings, "OAUTH_REDIRECT_URI", None)
-        if not all([client_id, token_endpoint, redirect_uri]):
+        jwks_uri = getattr(settings, "OAUTH_JWKS_URI", None)
+        issuer = getattr(settings, "OAUTH_ISSUER", None)
+        if not all([client_id, token_endpoint, redirect_uri, jwks_uri, issuer]):
             return Response({"detail": "Config OAuth2 incompleta en settings."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Intercambio de código por tokens (sin cliente secreto al usar PKCE en front-only o público)
-        # Aquí deberías llamar al token_endpoint con:
-        # {
-        #   grant_type: "authorization_code",
-        #   code,
-        #   redirect_uri,
-        #   client_id,
-        #   code_verifier
-        # }
-        # TODO: Realizar petición HTTP al token_endpoint y manejar errores.
-        # Ejemplo (placeholder):
-        tokens = {
-            # "access_token": "...",
-            # "id_token": "...",
-            # "refresh_token": "...",
-            # "expires_in": 3600,
-            # "token_type": "Bearer",
-        }
-        # TODO: Verificar cryptográficamente el id_token (firma, iss, aud, exp) y extraer claims.
-        # claims = decode_and_verify_id_token(tokens["id_token"])
-
-        # Suponiendo claims extraídos:
-        claims = {
-            # "email": "usuario@ejemplo.com",
-            # "given_name": "Nombre",
-            # "family_name": "Apellido",
-            # "sub": "proveedor_user_id"
-        }
+        # Intercambio de código por tokens (PKCE; el secreto solo se envía si está configurado) y
+        # verificación local del id_token (firma con JWKS en caché, iss, aud, exp). Ver api/oauth2_cliente.py.
+        try:
+            tokens = intercambiar_codigo(
+                token_endpoint, code, code_verifier, redirect_uri, client_id,
+                client_secret=getattr(settings, "OAUTH_CLIENT_SECRET", None),
+            )
+            claims = verificar_id_token(
+                tokens["id_token"], jwks_uri, audience=client_id, issuer=issuer,
+            )
+        except ErrorOAuth2 as e:
+            return Response({"detail": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        # Solo un email verificado por el proveedor puede vincularse a una cuenta existente
+        if claims.get("email_verified") is not True:
+            return Response({"detail": "El proveedor no ha verificado el email."}, status=status.HTTP_400_BAD_REQUEST)
 
         email = claims.get("email")
         if not email:
             return Response({"detail": "No se pudo obtener el email del proveedor."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Buscar o crear usuario base
-        usuario = User.objects(email__iexact=email).first()
-        if not usuario:
-            # Si tu registro requiere más campos, aquí podrías rellenarlos con claims o pedirlos luego al front.
-            usuario = User(
-                first_name=claims.get("given_name") or "NA",
-                last_name=claims.get("family_name") or "NA",
-                email=email,
-                ubicacion="NA",
-                discapacidad="NA",
-                carrera="NA",
-                main_area="NA",
+        # Buscar o crear usuario base en un solo upsert atómico sobre el email normalizado.
+        # Si tu registro requiere más campos, aquí podrías rellenarlos con claims o pedirlos luego al front.
+        # main_area se deja sin definir (valores fuera de MAIN_AREAS no son válidos).
+        email_normalizado = normalizar_email(email)
+        en_alta = {
+            "first_name": claims.get("given_name") or "NA",
+            "last_name": claims.get("family_name") or "NA",
+            "email": email,
+            "ubicacion": "NA",
+            "discapacidad": "NA",
+            "carrera": "NA",
+        }
+        try:
+            usuario = User.objects(email_normalizado=email_normalizado).modify(
+                upsert=True,
+                new=True,
+                **{f"set_on_insert__{campo}": valor for campo, valor in en_alta.items()},
             )
-            try:
-                usuario.save()
-            except Exception:
-                return Response({"detail": "No se pudo crear el usuario."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except NotUniqueError:
+            # Dos callbacks simultáneos: el otro upsert insertó primero, basta con leerlo
+            usuario = User.objects(email_normalizado=email_normalizado).first()
+        except Exception:
+            usuario = None
+        if not usuario:
+            return Response({"detail": "No se pudo crear el usuario."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Estrategia de sesión:
         # A) Cookie de sesión segura (recomendado para web): autentica al usuario en Django y setea cookie.
@@ -1,8 +1,12 @@
+import time
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 # ... existing code ...
+from api.catalogo import recarga_en_curso
 from api.models.mapa_curricular import MapaCurricular
+from api.metricas import registrar_ingesta
 
 class CreateMapaCurricularAPIView(APIView):
     """
@@ -45,7 +49,12 @@ class BulkCreateMapaCurricularAPIView(APIView):
         items = request.data
         if not isinstance(items, list):
             return Response({"detail": "Se esperaba un arreglo JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if recarga_en_curso():
+            # Lo escrito ahora se perdería al intercambiar la colección (api/catalogo.py)
+            return Response({"detail": "Recarga del catálogo en curso; reintenta al terminar."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "60"})
 
+        inicio = time.perf_counter()
         created_ids, errors = [], []
         for i, data in enumerate(items):
             try:
@@ -62,6 +71,7 @@ class BulkCreateMapaCurricularAPIView(APIView):
             except Exception as e:
                 errors.append({"index": i, "error": str(e)})
 
+        registrar_ingesta("mapa_curricular", len(created_ids), len(errors), inicio)
         if created_ids and not errors:
             return Response({"created": len(created_ids), "ids": created_ids}, status=status.HTTP_201_CREATED)
         if created_ids and errors:
@@ -0,0 +1,32 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+
+class MetricasAPIView(APIView):
+    """
+    GET /api/metrics
+    Métricas en formato de exposición de Prometheus (ver api/metricas.py). Con
+    PROMETHEUS_MULTIPROC_DIR definido agrega las métricas de todos los workers de gunicorn.
+    Si METRICAS_TOKEN está configurado exige 'Authorization: Bearer <token>'.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        token = getattr(settings, "METRICAS_TOKEN", None)
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registro = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registro)
+        else:
+            registro = REGISTRY
+        return HttpResponse(generate_latest(registro), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,43 @@
+from django.http import FileResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from api import perfilado
+
+
+def _autorizado(request) -> bool:
+    return perfilado.token_valido(request.headers.get(perfilado.CABECERA))
+
+
+class PerfilesAPIView(APIView):
+    """
+    GET /api/perfiles
+    Ids de los perfiles cProfile guardados por PerfiladoMiddleware, del más reciente al más
+    antiguo. Requiere la cabecera 'X-Perfilar: <PERFILADO_TOKEN>'.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        if not _autorizado(request):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response({"perfiles": perfilado.listar()}, status=status.HTTP_200_OK)
+
+
+class PerfilDescargaAPIView(APIView):
+    """
+    GET /api/perfiles/<id>
+    Descarga el archivo .prof (formato pstats) de un perfil. Requiere 'X-Perfilar: <PERFILADO_TOKEN>'.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, perfil_id):
+        if not _autorizado(request):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_401_UNAUTHORIZED)
+        ruta = perfilado.ruta_perfil(perfil_id)
+        if ruta is None:
+            return Response({"detail": "Perfil no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(ruta, "rb"), as_attachment=True, filename=ruta.name,
+                            content_type="application/octet-stream")
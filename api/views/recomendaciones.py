@@ -0,0 +1,44 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from api.models.user import User
+from api.recomendaciones import indice_carreras
+
+
+class RecomendacionesUsuarioAPIView(APIView):
+    """
+    GET /api/usuarios/<id>/recomendaciones?k=<n>
+    Recomienda carreras comparando los intereses del usuario contra los vectores TF-IDF de
+    cada carrera (descripción, subáreas y texto de subáreas), ver api/recomendaciones.py.
+    Si el usuario no registró intereses se usan su carrera y main_area como consulta.
+
+    Parámetros de consulta:
+    - k (int, opcional): número máximo de carreras (1..50, por defecto 10).
+
+    Respuesta: {"usuario": <id>, "recomendaciones": [{carrera, main_area, puntaje}]}
+    """
+    def get(self, request, user_id):
+        try:
+            k = int(request.query_params.get("k", 10))
+        except ValueError:
+            return Response({"detail": "'k' debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= k <= 50:
+            return Response({"detail": "'k' debe estar entre 1 y 50."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            usuario = User.objects(id=user_id).only("intereses", "carrera", "main_area").first()
+        except Exception:
+            usuario = None
+        if not usuario:
+            return Response({"detail": "Usuario no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+        intereses = [i for i in (usuario.intereses or []) if isinstance(i, str)]
+        if not intereses:
+            intereses = [usuario.carrera or "", usuario.main_area or ""]
+
+        data = {
+            "usuario": str(usuario.id),
+            "recomendaciones": indice_carreras.recomendar(intereses, main_area=usuario.main_area, k=k),
+        }
+        return Response(data, status=status.HTTP_200_OK)
@@ -5,7 +5,9 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 import json
 
-from api.models.user import User
+from mongoengine.errors import NotUniqueError
+
+from api.models.user import User, normalizar_email
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -42,6 +44,9 @@ class RegistroUsuarioView(View):
     - En una integración real, valida oauth_token con el proveedor (p.ej., verificación de ID Token JWT).
     - Tras validar, crea/recupera el usuario por email (o sub del proveedor) y enlaza la cuenta.
     - Puedes añadir campos al modelo (p.ej., provider, provider_id) en una iteración posterior.
+
+    Unicidad: el alta es un único insert; el índice único sobre 'email_normalizado' rechaza
+    duplicados de forma atómica (también bajo concurrencia) y se responde 409.
     """
 
     def post(self, request):
@@ -59,17 +64,13 @@ class RegistroUsuarioView(View):
         # if missing:
         #     return JsonResponse({"detail": f"Faltan campos: {', '.join(missing)}"}, status=400)
 
-        email = payload["email"].strip().lower()
+        email = normalizar_email(payload["email"])
 
         if oauth_provider:
             if not oauth_token:
                 return JsonResponse({"detail": "Falta 'oauth_token' para el registro OAuth2."}, status=400)
             # TODO: Verificar el token con el proveedor y extraer claims.
 
-        existente = User.objects(email__iexact=email).first()
-        if existente:
-            return JsonResponse({"detail": "El email ya está registrado."}, status=409)
-
         try:
             # Si no te envían 'zona', pon un valor por defecto para cumplir con el required=True del modelo
             zona_val = bool(payload.get("zona", False))
@@ -84,7 +85,9 @@ class RegistroUsuarioView(View):
                 main_area=payload["main_area"].strip(),
                 zona=zona_val,
             )
-            usuario.save()
+            usuario.save(force_insert=True)
+        except NotUniqueError:
+            return JsonResponse({"detail": "El email ya está registrado."}, status=409)
         except Exception as e:
             # IMPORTANTE: convertir la excepción a string para que sea serializable en JSON
             return JsonResponse({"detail": str(e)}, status=500)
@@ -101,4 +104,3 @@ class RegistroUsuarioView(View):
             "zona": usuario.zona,
         }
         return JsonResponse(data, status=201)
-# ... existing code ...
@@ -0,0 +1,46 @@
+from django.conf import settings
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from project.mongo import estado_pool, ping_mongo
+
+
+class HealthzAPIView(APIView):
+    """
+    GET /api/healthz
+    Liveness: el proceso responde. No toca MongoDB, para que una caída de la base no haga que
+    el orquestador reinicie workers sanos.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response({"status": "ok"}, status=status.HTTP_200_OK)
+
+
+class ReadyzAPIView(APIView):
+    """
+    GET /api/readyz
+    Readiness: MongoDB alcanzable (ping con resultado en caché READYZ_CACHE_SEGUNDOS) y estado del
+    pool de conexiones del proceso. 503 si Mongo no está configurado o no responde, para que el
+    balanceador solo envíe tráfico a workers con conexión lista.
+
+    Respuesta: {"status": "ok"|"no_listo", "mongo": {ok, latencia_ms, detalle}, "pool": {...}}
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        if not getattr(settings, "MONGO_URI", None):
+            return Response(
+                {"status": "no_listo", "mongo": {"ok": False, "detalle": "MONGO_URI no configurada."}},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        ping = ping_mongo(vigencia=getattr(settings, "READYZ_CACHE_SEGUNDOS", 5))
+        data = {
+            "status": "ok" if ping["ok"] else "no_listo",
+            "mongo": {"ok": bool(ping["ok"]), "latencia_ms": ping["latencia_ms"], "detalle": ping["detalle"]},
+            "pool": estado_pool.resumen(),
+        }
+        return Response(data, status=status.HTTP_200_OK if ping["ok"] else status.HTTP_503_SERVICE_UNAVAILABLE)
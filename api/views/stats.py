@@ -5,6 +5,7 @@ from rest_framework import status
 
 from api.models.carrera import Carrera
 from api.models.formulario import Formulario
+from api.distribucion import snapshot_resultados, PERCENTILES_POR_DEFECTO, PERCENTILES_MAXIMO, BINS_POR_DEFECTO
 
 class DashboardPromedioResultadosPorCarreraAPIView(APIView):
     """
@@ -38,4 +39,49 @@ class DashboardPromedioResultadosPorCarreraAPIView(APIView):
             resultados.append({"carrera": carrera.nombre, "promedio": promedio})
 
         return Response(resultados, status=status.HTTP_200_OK)
-# ... existing code ...
\ No newline at end of file
+
+class DashboardDistribucionResultadosAPIView(APIView):
+    """
+    GET /api/dashboard/formularios/distribucion
+    Distribución de 'resultados' de formularios por carrera y por main_area, calculada con
+    NumPy sobre un snapshot en memoria que se refresca de forma incremental (ver api/distribucion.py).
+
+    Parámetros de consulta:
+    - agrupar (str, opcional): "carrera", "main_area" o ambos separados por coma (por defecto ambos).
+    - percentiles (str, opcional): hasta 20 valores separados por comas en [0, 100] (por defecto 10,25,50,75,90).
+    - bins (int, opcional): número de intervalos del histograma, 1..100 (por defecto 10).
+
+    Respuesta:
+    {
+      "total": int, "actualizado": iso8601, "bins": [bordes compartidos],
+      "por_carrera": [{carrera, n, media, min, max, percentiles: {p50: ...}, histograma: [...]}],
+      "por_main_area": [{main_area, n, media, min, max, percentiles, histograma}]
+    }
+    """
+    def get(self, request):
+        agrupar_param = request.query_params.get("agrupar")
+        agrupar = [a.strip().lower() for a in agrupar_param.split(",")] if agrupar_param else ["carrera", "main_area"]
+        if not agrupar or any(a not in ("carrera", "main_area") for a in agrupar):
+            return Response({"detail": "'agrupar' debe ser 'carrera', 'main_area' o ambos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        percentiles_param = request.query_params.get("percentiles")
+        try:
+            percentiles = (
+                [float(p) for p in percentiles_param.split(",")] if percentiles_param else list(PERCENTILES_POR_DEFECTO)
+            )
+        except ValueError:
+            return Response({"detail": "'percentiles' debe ser una lista de números."}, status=status.HTTP_400_BAD_REQUEST)
+        if not percentiles or any(not 0 <= p <= 100 for p in percentiles):
+            return Response({"detail": "Cada percentil debe estar entre 0 y 100."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(percentiles) > PERCENTILES_MAXIMO:
+            return Response({"detail": f"Como máximo {PERCENTILES_MAXIMO} percentiles."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bins = int(request.query_params.get("bins", BINS_POR_DEFECTO))
+        except ValueError:
+            return Response({"detail": "'bins' debe ser entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= bins <= 100:
+            return Response({"detail": "'bins' debe estar entre 1 y 100."}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot_resultados.asegurar_vigente()
+        return Response(snapshot_resultados.resumen(agrupar, percentiles, bins), status=status.HTTP_200_OK)
@@ -1,10 +1,15 @@
+import time
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from api.catalogo import recarga_en_curso
 from api.models.mapa_curricular import MapaCurricular
 from api.models.subarea import Subarea, Leccion
 from api.models.formulario import Formulario
+from api.recomendaciones import indice_carreras
+from api.metricas import registrar_ingesta
 
 class BulkCreateSubareasAPIView(APIView):
     """
@@ -15,8 +20,13 @@ class BulkCreateSubareasAPIView(APIView):
         items = request.data
         if not isinstance(items, list):
             return Response({"detail": "Se esperaba un arreglo JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if recarga_en_curso():
+            # Lo escrito ahora se perdería al intercambiar la colección (api/catalogo.py)
+            return Response({"detail": "Recarga del catálogo en curso; reintenta al terminar."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "60"})
 
-        created_ids, errors = [], []
+        inicio = time.perf_counter()
+        created_ids, errors, nombres, carreras = [], [], [], []
         for i, data in enumerate(items):
             try:
                 payload = dict(data)
@@ -41,9 +51,15 @@ class BulkCreateSubareasAPIView(APIView):
                 obj.validate()  # validación explícita para mejores mensajes
                 obj.save()
                 created_ids.append(str(obj.id))
+                nombres.append(obj.nombre)
+                carreras.append(obj.carrera)
             except Exception as e:
                 errors.append({"index": i, "error": str(e)})
 
+        # Actualización incremental del índice de recomendaciones
+        indice_carreras.marcar_subareas(nombres, carreras)
+
+        registrar_ingesta("subareas", len(created_ids), len(errors), inicio)
         if created_ids and not errors:
             return Response({"created": len(created_ids), "ids": created_ids}, status=status.HTTP_201_CREATED)
         if created_ids and errors:
@@ -0,0 +1,31 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo).
+
+Prepara el modo multiproceso de prometheus_client: cada worker escribe sus métricas en
+PROMETHEUS_MULTIPROC_DIR y /metrics las agrega (api/views/metricas.py). Los archivos *.db de una
+ejecución anterior se borran al arrancar el master (no en cada recarga con HUP: los workers vivos
+siguen escribiendo en los suyos) y se marcan como muertos los workers que terminan, para que los
+gauges en vivo no conserven valores de procesos que ya no existen. Si el directorio contiene algo
+que no sea *.db no se toca y el arranque falla: probablemente apunta a un directorio equivocado.
+"""
+import os
+from pathlib import Path
+
+_directorio = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    directorio = Path(_directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ajenos = [p.name for p in directorio.iterdir() if not (p.is_file() and p.suffix == ".db")]
+    if ajenos:
+        raise RuntimeError(f"PROMETHEUS_MULTIPROC_DIR={directorio} contiene archivos que no son de métricas "
+                           f"({', '.join(sorted(ajenos)[:5])}); usa un directorio dedicado.")
+    for archivo in directorio.glob("*.db"):
+        archivo.unlink()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,191 @@
+"""
+Gestión de conexiones a MongoDB (mongoengine) segura frente a fork.
+
+- Las conexiones se registran de forma perezosa (`mongoengine.register_connection` y
+  `connect=False`): el MongoClient se crea con la primera consulta de cada proceso, no al
+  importar settings. Con `gunicorn --preload` el proceso maestro no abre sockets ni hilos de
+  monitorización que luego heredarían los workers.
+- Si el proceso llega a crear un cliente antes de un fork, el hijo lo descarta
+  (`os.register_at_fork`) y vuelve a registrar las conexiones para crear las suyas.
+- Alias:
+  - "default": lecturas y escrituras de los modelos, con MONGO_READ_PREFERENCE (primary).
+  - "lectura": lecturas pesadas que toleran cierto retraso (analítica, índices en memoria),
+    con MONGO_READ_PREFERENCE_LECTURA (secondaryPreferred). Ver `coleccion_lectura`.
+
+Los parámetros del pool (MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS),
+compresión (MONGO_COMPRESSORS) y timeouts se leen de settings (ver project/settings.py).
+
+Salud: `estado_pool` cuenta conexiones del proceso (ConnectionPoolListener) y `ping_mongo`
+hace un ping con resultado en caché, para `/readyz` (api/views/salud.py).
+"""
+import logging
+import os
+import threading
+import time
+
+import mongoengine
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, get_db
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+
+logger = logging.getLogger(__name__)
+
+ALIAS_LECTURA = "lectura"
+
+_registradas = False
+_fork_registrado = False
+
+
+class EstadoPool(monitoring.ConnectionPoolListener):
+    """Contadores del pool de conexiones del proceso (todos los alias)."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.abiertas = 0
+        self.en_uso = 0
+        self.esperas_fallidas = 0
+        self.pools_limpiados = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pools_limpiados += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.abiertas += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.abiertas -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.esperas_fallidas += 1
+
+    def connection_checked_out(self, event):
+        self.en_uso += 1
+
+    def connection_checked_in(self, event):
+        self.en_uso -= 1
+
+    def resumen(self) -> dict:
+        return {
+            "abiertas": self.abiertas,
+            "en_uso": self.en_uso,
+            "esperas_fallidas": self.esperas_fallidas,
+            "pools_limpiados": self.pools_limpiados,
+        }
+
+
+estado_pool = EstadoPool()
+
+
+def _read_preference(nombre):
+    """'secondaryPreferred' -> instancia de ReadPreference de pymongo."""
+    return make_read_preference(read_pref_mode_from_name(nombre), None)
+
+
+def _opciones_cliente(settings):
+    opciones = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "uuidRepresentation": "standard",
+        "connect": False,
+        "event_listeners": [estado_pool],
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS:
+        opciones["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_SOCKET_TIMEOUT_MS:
+        opciones["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        opciones["compressors"] = settings.MONGO_COMPRESSORS
+    return opciones
+
+
+def registrar_conexiones():
+    """Registra los alias 'default' y 'lectura' sin conectar. Idempotente."""
+    global _registradas, _fork_registrado
+    from django.conf import settings
+
+    if _registradas:
+        return
+    if not settings.MONGO_URI:
+        logger.warning("MONGO_URI no está configurada en variables de entorno.")
+        return
+    opciones = _opciones_cliente(settings)
+    mongoengine.register_connection(
+        DEFAULT_CONNECTION_NAME, host=settings.MONGO_URI,
+        read_preference=_read_preference(settings.MONGO_READ_PREFERENCE), **opciones,
+    )
+    mongoengine.register_connection(
+        ALIAS_LECTURA, host=settings.MONGO_URI,
+        read_preference=_read_preference(settings.MONGO_READ_PREFERENCE_LECTURA), **opciones,
+    )
+    _registradas = True
+    if not _fork_registrado and hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+        _fork_registrado = True
+
+
+def _reiniciar_tras_fork():
+    """En el hijo: descarta clientes heredados del padre y registra conexiones nuevas."""
+    global _registradas
+    if not _registradas:
+        return
+    for alias in (DEFAULT_CONNECTION_NAME, ALIAS_LECTURA):
+        try:
+            mongoengine.disconnect(alias)
+        except Exception as e:  # un cliente heredado puede fallar al cerrarse; se ignora
+            logger.debug("Error al descartar la conexión '%s' tras fork: %s", alias, e)
+    _registradas = False
+    estado_pool.reiniciar()
+    _ultimo_ping.update(ok=None, instante=0.0, detalle=None)
+    registrar_conexiones()
+
+
+def coleccion_lectura(documento):
+    """Colección pymongo de un Document en el alias 'lectura' (o 'default' si no está registrado)."""
+    nombre = documento._get_collection_name()
+    try:
+        return get_db(ALIAS_LECTURA)[nombre]
+    except mongoengine.connection.ConnectionFailure:
+        return documento._get_collection()
+
+
+_ultimo_ping = {"ok": None, "instante": 0.0, "detalle": None, "latencia_ms": None}
+_ping_lock = threading.Lock()
+
+
+def ping_mongo(vigencia: float = 5.0) -> dict:
+    """
+    Ping al servidor con el resultado en caché 'vigencia' segundos. Si otra hebra ya está
+    haciendo el ping se devuelve el último resultado conocido en lugar de esperar.
+    """
+    if time.monotonic() - _ultimo_ping["instante"] < vigencia or not _ping_lock.acquire(blocking=False):
+        return dict(_ultimo_ping)
+    try:
+        inicio = time.perf_counter()
+        try:
+            get_db().client.admin.command("ping")
+            _ultimo_ping.update(ok=True, detalle=None)
+        except Exception as e:
+            _ultimo_ping.update(ok=False, detalle=str(e)[:200])
+        _ultimo_ping.update(instante=time.monotonic(), latencia_ms=round((time.perf_counter() - inicio) * 1000, 2))
+    finally:
+        _ping_lock.release()
+    return dict(_ultimo_ping)
@@ -11,7 +11,10 @@ Variables de entorno relevantes (recomendado configurarlas en .env o en el entor
 - ALLOWED_HOSTS: lista separada por comas con los hosts permitidos (p.ej. "miapp.com,www.miapp.com").
 - CSRF_TRUSTED_ORIGINS: lista separada por comas de orígenes confiables para CSRF (p.ej. "https://miapp.com,https://*.miapp.com").
 - MONGO_URI: cadena de conexión a MongoDB (si no se define, se omite la conexión y se registra un warning).
+- MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_COMPRESSORS, MONGO_READ_PREFERENCE,
+  MONGO_READ_PREFERENCE_LECTURA y timeouts: pool y opciones del cliente (project/mongo.py).
 - OAUTH_CLIENT_ID, OAUTH_AUTH_ENDPOINT, OAUTH_REDIRECT_URI, OAUTH_TOKEN_ENDPOINT, OAUTH_SCOPE: ajustes usados por las vistas OAuth2 (api/views/login.py).
+- OAUTH_JWKS_URI, OAUTH_ISSUER, OAUTH_CLIENT_SECRET (opcional): verificación del id_token y canje del código.
 
 Notas de seguridad:
 - SECRET_KEY no debe exponerse en repositorios públicos; define un valor seguro en producción vía variables de entorno.
@@ -19,8 +22,8 @@ Notas de seguridad:
 
 Base de datos:
 - SQLite (django.db.backends.sqlite3) como base por defecto para el stack de Django.
-- MongoDB (opcional) para modelos con mongoengine. La conexión intenta establecerse al inicio con un timeout bajo
-  (serverSelectionTimeoutMS=5000) y registra un warning si falla para no bloquear el arranque.
+- MongoDB (opcional) para modelos con mongoengine. La conexión se registra sin conectar (project/mongo.py) y cada
+  proceso crea su cliente con la primera consulta, después del fork de gunicorn.
 
 Más información:
 - Documentación de settings: https://docs.djangoproject.com/en/4.2/ref/settings/
@@ -29,9 +32,7 @@ Más información:
 
 from pathlib import Path
 from dotenv import load_dotenv
-import mongoengine
 import os
-import logging
 
 load_dotenv()
 
@@ -69,6 +70,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricasMiddleware',  # primero: mide la petición completa (api/metricas.py)
+    'api.middleware.PresupuestoConsultasMiddleware',  # presupuesto de comandos MongoDB y N+1 (api/consultas.py)
+    'api.middleware.PerfiladoMiddleware',  # perfilado bajo demanda; se descarta si no está configurado (api/perfilado.py)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -155,11 +159,97 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MONGO_URI = os.getenv("MONGO_URI")
 
-if MONGO_URI:
-    try:
-        # Timeout bajo para no colgar el arranque, y loguear si falla
-        mongoengine.connect(host=MONGO_URI, serverSelectionTimeoutMS=5000, uuidRepresentation="standard")
-    except Exception as e:
-        logging.warning("No se pudo conectar a MongoDB Atlas al iniciar: %s", e)
+# Conexión perezosa por proceso (project/mongo.py, registrada en ApiConfig.ready): no se conecta al importar
+# settings, así que es segura con `gunicorn --preload`. Ajustes del pool, compresión y preferencia de lectura:
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0"))  # 0 = sin límite
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))  # 0 = sin límite
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # p.ej. "zstd,zlib" (zstd requiere el paquete zstandard)
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# Alias "lectura" para analítica e índices en memoria (api/distribucion.py, recomendaciones.py, similares.py)
+MONGO_READ_PREFERENCE_LECTURA = os.getenv("MONGO_READ_PREFERENCE_LECTURA", "secondaryPreferred")
+# Índices: False = no se crean en la primera consulta de cada proceso, sino con `manage.py ensure_indexes` al desplegar
+MONGO_AUTO_CREATE_INDEX = os.getenv("MONGO_AUTO_CREATE_INDEX", "false").lower() in ("1", "true", "yes")
+# /readyz: segundos que se reutiliza el resultado del ping a MongoDB
+READYZ_CACHE_SEGUNDOS = float(os.getenv("READYZ_CACHE_SEGUNDOS", "5"))
+
+# Métricas Prometheus (/metrics): token Bearer opcional para protegerlas
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN")
+
+# Presupuesto de comandos MongoDB por petición y log de consultas lentas / N+1 (api/consultas.py)
+CONSULTAS_MAX_POR_PETICION = int(os.getenv("CONSULTAS_MAX_POR_PETICION", "30"))
+CONSULTAS_MAX_MS_POR_PETICION = float(os.getenv("CONSULTAS_MAX_MS_POR_PETICION", "300"))
+CONSULTAS_LENTA_MS = float(os.getenv("CONSULTAS_LENTA_MS", "100"))
+CONSULTAS_N_MAS_1_UMBRAL = int(os.getenv("CONSULTAS_N_MAS_1_UMBRAL", "5"))
+
+# Perfilado bajo demanda (api/perfilado.py): peticiones con 'X-Perfilar: <PERFILADO_TOKEN>' o una
+# fracción aleatoria PERFILADO_MUESTREO (0..1). Sin token el middleware no se instala (tampoco muestrea).
+PERFILADO_TOKEN = os.getenv("PERFILADO_TOKEN")
+PERFILADO_MUESTREO = float(os.getenv("PERFILADO_MUESTREO", "0"))
+PERFILADO_DIR = Path(os.getenv("PERFILADO_DIR", "/tmp/perfiles"))
+PERFILADO_MAX_ARCHIVOS = int(os.getenv("PERFILADO_MAX_ARCHIVOS", "200"))
+
+
+# Analítica de distribución (api/distribucion.py): intervalos del snapshot en memoria
+DISTRIBUCION_REFRESCO_SEGUNDOS = int(os.getenv("DISTRIBUCION_REFRESCO_SEGUNDOS", "5"))
+DISTRIBUCION_RECONSTRUCCION_SEGUNDOS = int(os.getenv("DISTRIBUCION_RECONSTRUCCION_SEGUNDOS", "300"))
+
+# POST /formularios/recalificar: máximo de formularios de una subárea recalificados dentro de la petición
+RECALIFICAR_MAXIMO_API = int(os.getenv("RECALIFICAR_MAXIMO_API", "5000"))
+
+# Recomendaciones TF-IDF (api/recomendaciones.py)
+RECOMENDACIONES_MAX_TERMINOS = int(os.getenv("RECOMENDACIONES_MAX_TERMINOS", "4096"))
+RECOMENDACIONES_RECONSTRUCCION_SEGUNDOS = int(os.getenv("RECOMENDACIONES_RECONSTRUCCION_SEGUNDOS", "900"))
+RECOMENDACIONES_BONO_AREA = float(os.getenv("RECOMENDACIONES_BONO_AREA", "0.05"))
+
+# Índice MinHash/LSH de carreras similares (api/similares.py), construido con
+# `python manage.py construir_indice_similares`
+SIMILARES_INDICE_RUTA = Path(os.getenv("SIMILARES_INDICE_RUTA", BASE_DIR / "indices" / "similares_carreras.npz"))
+
+# OAuth2 / OIDC (api/views/login.py, api/oauth2_cliente.py)
+OAUTH_CLIENT_ID = os.getenv("OAUTH_CLIENT_ID")
+OAUTH_CLIENT_SECRET = os.getenv("OAUTH_CLIENT_SECRET")
+OAUTH_AUTH_ENDPOINT = os.getenv("OAUTH_AUTH_ENDPOINT")
+OAUTH_REDIRECT_URI = os.getenv("OAUTH_REDIRECT_URI")
+OAUTH_TOKEN_ENDPOINT = os.getenv("OAUTH_TOKEN_ENDPOINT")
+OAUTH_JWKS_URI = os.getenv("OAUTH_JWKS_URI")
+OAUTH_ISSUER = os.getenv("OAUTH_ISSUER")
+OAUTH_SCOPE = os.getenv("OAUTH_SCOPE", "openid email profile")
+OAUTH_JWKS_TTL = int(os.getenv("OAUTH_JWKS_TTL", "3600"))
+OAUTH_HTTP_TIMEOUT = float(os.getenv("OAUTH_HTTP_TIMEOUT", "10"))
+
+# Estado del flujo OAuth2 (api/oauth2_estado.py): "cookie" (firmada, sin escrituras en BD),
+# "cache" (backend de caché compartido con TTL) o "session" (sesiones de Django en SQLite).
+OAUTH2_ESTADO_MODO = os.getenv("OAUTH2_ESTADO_MODO", "cookie")
+OAUTH2_ESTADO_TTL = int(os.getenv("OAUTH2_ESTADO_TTL", "600"))
+# El modo "cache" exige caché compartida; True permite LocMem (un solo proceso, desarrollo)
+OAUTH2_ESTADO_CACHE_LOCAL = os.getenv("OAUTH2_ESTADO_CACHE_LOCAL", "false").lower() in ("1", "true", "yes")
+
+# Caché: Redis compartido si se define REDIS_URL (requiere el paquete redis), si no memoria local por proceso
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
 else:
-    logging.warning("MONGO_URI no está configurada en variables de entorno.")
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Escuelas por estado (api/escuelas_por_estado.py): longitud de las listas top precalculadas por estado y tipo
+ESCUELAS_POR_ESTADO_TOP = int(os.getenv("ESCUELAS_POR_ESTADO_TOP", "10"))
+
+# Versión del catálogo (api/catalogo.py): cada cuántos segundos relee cada proceso la versión para
+# invalidar sus cachés tras `manage.py recargar_catalogo`
+CATALOGO_VERSION_SEGUNDOS = float(os.getenv("CATALOGO_VERSION_SEGUNDOS", "5"))
+# Vigencia máxima del bloqueo de `recargar_catalogo` (congela /bulk/* del catálogo); pasado este
+# plazo se da por abandonado
+CATALOGO_RECARGA_MAX_SEGUNDOS = float(os.getenv("CATALOGO_RECARGA_MAX_SEGUNDOS", "3600"))
+
+# Feed de cambios (/cambios, api/cambios.py): segundos tras los que una reserva de seq sin confirmar
+# se da por abandonada (api/models/rastreo.py) y máximo de cambios por página
+CAMBIOS_RESERVA_MAX_SEGUNDOS = float(os.getenv("CAMBIOS_RESERVA_MAX_SEGUNDOS", "600"))
+CAMBIOS_LIMITE_MAXIMO = int(os.getenv("CAMBIOS_LIMITE_MAXIMO", "5000"))
+
+# Pruebas (api/tests/): mongod opcional para `manage.py test`; sin ella se usa mongomock. La base se
+# vacía en cada prueba: su nombre debe contener "test"
+MONGO_URI_PRUEBAS = os.getenv("MONGO_URI_PRUEBAS")
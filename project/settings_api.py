@@ -0,0 +1,51 @@
+"""
+Perfil de settings mínimo para servir la API (DJANGO_SETTINGS_MODULE=project.settings_api).
+
+Hereda todo de project/settings.py y recorta lo que la API no usa: admin, auth, contenttypes,
+messages, staticfiles, plantillas y los middleware de sesión/CSRF/auth/mensajes/clickjacking.
+La API sirve JSON desde MongoDB, así que no necesita base SQL: se elimina DATABASES.
+
+Se conserva lo que usa el flujo OAuth2 (api/oauth2_estado.py):
+- "cookie": django.core.signing con SECRET_KEY (no requiere apps).
+- "cache": CACHES (LocMem o Redis) tal como en settings.py.
+- "session": se instalan sessions y SessionMiddleware con el motor de cookies firmadas, sin SQLite.
+
+DRF queda sin autenticación (las vistas ya no la usan) y con el renderer JSON únicamente (el
+navegable requiere plantillas). Medición del ahorro: `python manage.py bench_arranque`.
+"""
+from project.settings import *  # noqa: F401,F403
+from project.settings import OAUTH2_ESTADO_MODO
+
+INSTALLED_APPS = [
+    'api',
+    'rest_framework',
+]
+
+MIDDLEWARE = [
+    'api.middleware.MetricasMiddleware',
+    'api.middleware.PresupuestoConsultasMiddleware',
+    'api.middleware.PerfiladoMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+if OAUTH2_ESTADO_MODO == "session":
+    INSTALLED_APPS.append('django.contrib.sessions')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'django.contrib.sessions.middleware.SessionMiddleware')
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+ROOT_URLCONF = 'project.urls_api'
+
+TEMPLATES = []
+
+DATABASES = {}
+
+AUTH_PASSWORD_VALIDATORS = []
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
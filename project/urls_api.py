@@ -0,0 +1,8 @@
+"""
+Rutas del perfil mínimo (project/settings_api.py): solo la API, sin el admin de Django.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('api.urls')),
+]